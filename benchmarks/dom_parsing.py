@@ -0,0 +1,156 @@
+"""
+Time / peak memory benchmark of the conversion of the `buildDomNode.js` payload into a notte `DomNode` tree.
+
+Compares the legacy three passes (`parse_node` + `generate_sequential_ids` + `to_notte_domnode`, frozen in
+`legacy_dom_parsing.py`) with the single pass `DomTreeBuilder`. On saved pages, also compares the payload size and the
+end-to-end parsing latency (`ParseDomTreePipe.forward`) of the nested and compact (`compact_payload`) wire formats.
+
+Usage:
+    # large synthetic payload (no browser needed)
+    uv run python benchmarks/dom_parsing.py --synthetic 20000
+    # saved pages, evaluated in a headless browser
+    uv run python benchmarks/dom_parsing.py tests/data/duckduckgo.html path/to/page.html
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from legacy_dom_parsing import legacy_conversion  # pyright: ignore[reportImplicitRelativeImport]
+from notte_browser.dom.builder import DomTreeBuilder
+from notte_browser.dom.parsing import DomParsingConfig, ParseDomTreePipe, dom_tree_js
+from notte_browser.dom.types import DomTreeDict
+from notte_core.browser.dom_tree import DomNode
+
+URL = "https://example.com"
+TAGS = ["div", "span", "li", "p", "a", "button", "input", "img"]
+INTERACTIVE_TAGS = {"a", "button", "input"}
+
+
+def synthetic_payload(nb_nodes: int, seed: int = 0) -> DomTreeDict:
+    rnd = random.Random(seed)
+    counter = {"nodes": 0, "highlight": 0}
+
+    def make(depth: int, xpath: str) -> Any:
+        counter["nodes"] += 1
+        tag = rnd.choice(TAGS)
+        xpath = f"{xpath}/{tag}[{counter['nodes']}]"
+        interactive = tag in INTERACTIVE_TAGS
+        nb_children = rnd.randint(1, 4) if depth < 15 and counter["nodes"] < nb_nodes else 0
+        children = [make(depth + 1, xpath) for _ in range(nb_children)]
+        if nb_children == 0:
+            children = [{"type": "TEXT_NODE", "text": f"node {counter['nodes']}", "isVisible": rnd.random() < 0.5}]
+        node: dict[str, Any] = {
+            "tagName": tag,
+            "xpath": xpath,
+            "attributes": {"class": rnd.choice(["row", "col", "item active", "card"])},
+            "isVisible": rnd.random() < 0.5,
+            "isInteractive": interactive,
+            "isTopElement": True,
+            "isEditable": tag == "input",
+            "children": children,
+        }
+        if interactive:
+            counter["highlight"] += 1
+            node["highlightIndex"] = counter["highlight"]
+        return node
+
+    roots: list[Any] = []
+    while counter["nodes"] < nb_nodes:
+        roots.append(make(0, "html/body"))
+    return {  # pyright: ignore[reportReturnType]
+        "tagName": "body",
+        "xpath": "html/body",
+        "attributes": {},
+        "isVisible": True,
+        "isInteractive": False,
+        "isTopElement": True,
+        "isEditable": False,
+        "children": roots,
+    }
+
+
+async def evaluate_saved_page(path: Path, repeat: int) -> tuple[DomTreeDict, dict[str, tuple[float, float]]]:
+    """Nested payload of the page, and payload size (MB) / end-to-end latency (ms) of each wire format"""
+    from patchright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(path.read_text())
+        # include every element, not only the ones in the viewport
+        node = await ParseDomTreePipe.evaluate_dom_tree(page, DomParsingConfig(viewport_expansion=-1))
+        wire_formats: dict[str, tuple[float, float]] = {}
+        for name, compact in [("nested", False), ("compact", True)]:
+            config = DomParsingConfig(viewport_expansion=-1, offload=False, compact_payload=compact)
+            size = await page.evaluate(f"(args) => JSON.stringify(({dom_tree_js()})(args)).length", config.model_dump())
+            timings: list[float] = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                _ = await ParseDomTreePipe.forward(page, config)
+                timings.append(time.perf_counter() - start)
+            wire_formats[name] = (size / 1e6, min(timings) * 1000)
+        await browser.close()
+        return node, wire_formats
+
+
+def legacy(payload: DomTreeDict) -> DomNode:
+    return legacy_conversion(payload, URL)
+
+
+def fused(payload: DomTreeDict) -> DomNode:
+    return DomTreeBuilder(URL).build(payload)
+
+
+def measure(convert: Callable[[DomTreeDict], DomNode], payload: DomTreeDict, repeat: int) -> tuple[float, float]:
+    timings: list[float] = []
+    for _ in range(repeat):
+        _ = gc.collect()
+        start = time.perf_counter()
+        _ = convert(payload)
+        timings.append(time.perf_counter() - start)
+    _ = gc.collect()
+    tracemalloc.start()
+    _ = convert(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings) * 1000, peak / 1e6
+
+
+def report(name: str, payload: DomTreeDict, repeat: int) -> None:
+    nb_nodes = len(fused(payload).flatten())
+    print(f"# {name}: {nb_nodes} nodes")
+    results = {"legacy": measure(legacy, payload, repeat), "fused": measure(fused, payload, repeat)}
+    for method, (ms, peak) in results.items():
+        print(f"  {method:<8} {ms:9.1f} ms   peak {peak:7.1f} MB")
+    (legacy_ms, legacy_peak), (fused_ms, fused_peak) = results["legacy"], results["fused"]
+    print(f"  speedup: x{legacy_ms / fused_ms:.2f}, peak memory: x{fused_peak / legacy_peak:.2f}")
+
+
+def main() -> None:
+    sys.setrecursionlimit(100_000)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("pages", nargs="*", type=Path, help="saved html pages")
+    _ = parser.add_argument("--synthetic", type=int, default=0, help="number of nodes of a synthetic payload")
+    _ = parser.add_argument("--repeat", type=int, default=5, help="number of timed runs (the best one is reported)")
+    args = parser.parse_args()
+
+    if args.synthetic > 0:
+        report(f"synthetic({args.synthetic})", synthetic_payload(args.synthetic), args.repeat)
+
+    for path in args.pages:
+        payload, wire_formats = asyncio.run(evaluate_saved_page(path, args.repeat))
+        report(str(path), payload, args.repeat)
+        for wire_format, (size, ms) in wire_formats.items():
+            print(f"  {wire_format:<8} payload {size:6.2f} MB   end-to-end {ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
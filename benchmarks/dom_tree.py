@@ -0,0 +1,159 @@
+"""
+Memory / throughput benchmark of the `DomNode` tree representation.
+
+Usage:
+    # large synthetic tree (no browser needed)
+    uv run python benchmarks/dom_tree.py --synthetic 20000
+    # saved pages, parsed in a headless browser with `ParseDomTreePipe`
+    uv run python benchmarks/dom_tree.py tests/data/duckduckgo.html path/to/page.html
+"""
+
+import argparse
+import asyncio
+import copy
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from notte_core.browser.dom_tree import ComputedDomAttributes, DomAttributes, DomNode, NodeSelectors
+from notte_core.browser.node_type import NodeRole, NodeType
+
+TAGS = ["div", "span", "li", "p", "a", "button", "input", "img"]
+INTERACTIVE_TAGS = {"a": NodeRole.LINK, "button": NodeRole.BUTTON, "input": NodeRole.TEXTBOX}
+
+
+def synthetic_tree(nb_nodes: int, seed: int = 0) -> DomNode:
+    rnd = random.Random(seed)
+    counter = {"nodes": 0, "ids": 0}
+
+    def make(depth: int) -> DomNode:
+        counter["nodes"] += 1
+        tag = rnd.choice(TAGS)
+        role = INTERACTIVE_TAGS.get(tag)
+        node_id = None
+        if role is not None:
+            counter["ids"] += 1
+            node_id = f"{role.short_id(force_id=True)}{counter['ids']}"
+        nb_children = rnd.randint(1, 4) if depth < 15 and counter["nodes"] < nb_nodes else 0
+        children = [make(depth + 1) for _ in range(nb_children)]
+        node = DomNode(
+            id=node_id,
+            type=NodeType.INTERACTION if role is not None else NodeType.OTHER,
+            role=role or NodeRole.GROUP,
+            text=f"node {counter['nodes']}",
+            children=children,
+            attributes=DomAttributes.safe_init(
+                tag_name=tag,
+                href=f"/page/{counter['nodes']}" if tag == "a" else None,
+                **{"class": rnd.choice(["row", "col", "item active", "card"]), "aria-label": None},
+            ),
+            computed_attributes=ComputedDomAttributes(
+                in_viewport=rnd.random() < 0.5,
+                is_interactive=role is not None,
+                selectors=NodeSelectors(
+                    css_selector=f"html > body > {tag}",
+                    xpath_selector=f"html/body/{tag}",
+                    notte_selector=f"https://example.com:{counter['nodes']}",
+                    in_iframe=False,
+                    in_shadow_root=False,
+                    iframe_parent_css_selectors=[],
+                ),
+            ),
+        )
+        for child in children:
+            child.set_parent(node)
+        return node
+
+    roots: list[DomNode] = []
+    while counter["nodes"] < nb_nodes:
+        roots.append(make(0))
+    root = DomNode(
+        id=None,
+        type=NodeType.OTHER,
+        role=NodeRole.WEBAREA,
+        text="",
+        children=roots,
+        attributes=DomAttributes.safe_init(tag_name="body"),
+        computed_attributes=ComputedDomAttributes(),
+    )
+    for child in roots:
+        child.set_parent(root)
+    return root
+
+
+async def parse_saved_page(path: Path) -> DomNode:
+    from notte_browser.dom.parsing import DomParsingConfig, ParseDomTreePipe
+    from patchright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(path.read_text())
+        # include every element, not only the ones in the viewport
+        node = await ParseDomTreePipe.forward(page, DomParsingConfig(viewport_expansion=-1))
+        await browser.close()
+        return node
+
+
+def measure_memory(build: Callable[[], DomNode]) -> tuple[DomNode, float, float]:
+    _ = gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    node = build()
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return node, memory / 1e6, elapsed
+
+
+def measure_traversal(node: DomNode, repeat: int) -> dict[str, float]:
+    operations: dict[str, Callable[[], object]] = {
+        "flatten": lambda: node.flatten(),
+        "find": lambda: node.find("unknown-id"),
+        "interaction_nodes": lambda: node.interaction_nodes(),
+        "subtree_filter": lambda: node.subtree_filter(lambda n: n.role != NodeRole.IMAGE),
+    }
+    timings: dict[str, float] = {}
+    for name, operation in operations.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            _ = operation()
+        timings[name] = (time.perf_counter() - start) / repeat * 1000
+    return timings
+
+
+def report(name: str, node: DomNode, memory: float | None, build_time: float | None, repeat: int) -> None:
+    nb_nodes = len(node.flatten())
+    print(f"# {name}: {nb_nodes} nodes")
+    if memory is not None and build_time is not None:
+        print(f"  memory: {memory:.1f} MB ({memory * 1e6 / nb_nodes:.0f} B/node), build (traced): {build_time:.2f}s")
+    for operation, ms in measure_traversal(node, repeat).items():
+        print(f"  {operation:<18} {ms:8.2f} ms ({nb_nodes / ms / 1000:.2f} Mnodes/s)")
+
+
+def main() -> None:
+    # deep copies of deep trees
+    sys.setrecursionlimit(100_000)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("pages", nargs="*", type=Path, help="saved html pages")
+    _ = parser.add_argument("--synthetic", type=int, default=0, help="number of nodes of a synthetic tree")
+    _ = parser.add_argument("--repeat", type=int, default=5, help="number of runs per traversal")
+    args = parser.parse_args()
+
+    if args.synthetic > 0:
+        node, memory, elapsed = measure_memory(lambda: synthetic_tree(args.synthetic))
+        report(f"synthetic({args.synthetic})", node, memory, elapsed, args.repeat)
+
+    for path in args.pages:
+        parsed = asyncio.run(parse_saved_page(path))
+        # memory of the python tree only (excluding the browser round-trip): measured on a deep copy
+        node, memory, elapsed = measure_memory(lambda: copy.deepcopy(parsed))
+        report(str(path), node, memory, elapsed, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+Frozen copy of the legacy conversion of the `buildDomNode.js` payload into a notte `DomNode` tree, replaced by
+`DomTreeBuilder`: the payload is parsed into an intermediate `DOMElementNode` tree, ids are assigned in a second pass
+and the notte tree is built in a third one.
+
+Only kept as the baseline of `dom_parsing.py` and to generate the legacy output fixture of `test_dom_builder.py`.
+Do not use it in the library.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from loguru import logger
+from notte_browser.dom.csspaths import build_csspath
+from notte_browser.dom.id_generation import new_id_counter
+from notte_browser.dom.types import (
+    DomTreeDict,
+    cleanup_aria_attributes,
+    element_name,
+    element_role,
+    placeholder_text,
+)
+from notte_core.browser.dom_tree import ComputedDomAttributes, DomAttributes, NodeSelectors
+from notte_core.browser.dom_tree import DomNode as NotteDomNode
+from notte_core.browser.node_type import NodeRole, NodeType
+from typing_extensions import override
+
+
+@dataclass(frozen=False)
+class DOMBaseNode:
+    parent: "DOMElementNode | None"
+    is_visible: bool
+    highlight_index: int | None
+    notte_id: str | None = field(init=False, default=None)
+    children: list["DOMBaseNode"] = field(init=False, default_factory=list)
+    # Use None as default and set parent later to avoid circular reference issues
+
+    def __post_init__(self) -> None:
+        self.children = [] if getattr(self, "children", None) is None else self.children
+        self.notte_id = None if getattr(self, "notte_id", None) is None else self.notte_id
+
+    def to_dict(self) -> dict[str, str]:
+        raise NotImplementedError("to_dict method not implemented for DOMBaseNode")
+
+    def to_notte_domnode(self) -> NotteDomNode:
+        raise NotImplementedError("to_notte_domnode method not implemented for DOMBaseNode")
+
+    @property
+    def name(self) -> str:
+        raise NotImplementedError("name property not implemented for DOMBaseNode")
+
+    @property
+    def role(self) -> str:
+        raise NotImplementedError("role property not implemented for DOMBaseNode")
+
+
+@dataclass(frozen=False)
+class DOMTextNode(DOMBaseNode):
+    text: str = ""
+    type: str = "TEXT_NODE"
+    highlight_index: int | None = None
+
+    def has_parent_with_highlight_index(self) -> bool:
+        current = self.parent
+        while current is not None:
+            if current.highlight_index is not None:
+                return True
+            current = current.parent
+        return False
+
+    @override
+    def to_dict(self) -> dict[str, str]:
+        return {
+            "role": "text",
+            "text": self.text,
+        }
+
+    @property
+    @override
+    def role(self) -> str:
+        return "text"
+
+    @property
+    @override
+    def name(self) -> str:
+        return self.text
+
+    @override
+    def to_notte_domnode(self) -> NotteDomNode:
+        return NotteDomNode(
+            id=self.notte_id,
+            role=NodeRole.from_value(self.role),
+            type=NodeType.TEXT,
+            text=self.name,
+            children=[],
+            computed_attributes=ComputedDomAttributes(
+                in_viewport=self.is_visible,
+            ),
+            attributes=None,
+        )
+
+
+@dataclass(frozen=False)
+class DOMElementNode(DOMBaseNode):
+    """
+    xpath: the xpath of the element from the last root node
+    (shadow root or iframe OR document if no shadow root or iframe).
+    To properly reference the element we need to recursively switch the root node
+    until we find the element (work you way up the tree with `.parent`)
+    """
+
+    tag_name: str
+    xpath: str
+    # iframe resolution
+    in_iframe: bool
+    in_shadow_root: bool
+    css_path: str
+    iframe_parent_css_selectors: list[str]
+    notte_selector: str
+    # html attributes
+    attributes: dict[str, str]
+    # computed attributes
+    is_interactive: bool = False
+    is_top_element: bool = False
+    shadow_root: bool = False
+    is_editable: bool = False
+
+    @override
+    def __post_init__(self) -> None:
+        if self.tag_name is not None and self.tag_name.startswith("wiz_"):  # type: ignore[arg-type]
+            self.tag_name = self.tag_name[len("wiz_") :].replace("_", "-")
+        # replace also in the attributes
+        self.attributes = cleanup_aria_attributes(self.attributes)
+
+    @override
+    def __repr__(self) -> str:
+        tag_str = f"<{self.tag_name}"
+
+        # Add attributes
+        for key, value in self.attributes.items():
+            tag_str += f' {key}="{value}"'
+        tag_str += ">"
+
+        # Add extra info
+        extras: list[str] = []
+        if self.is_interactive:
+            extras.append("interactive")
+        if self.is_top_element:
+            extras.append("top")
+        if self.shadow_root:
+            extras.append("shadow-root")
+        if self.highlight_index is not None:
+            extras.append(f"highlight:{self.highlight_index}")
+
+        if extras:
+            tag_str += f" [{', '.join(extras)}]"
+
+        return tag_str
+
+    @property
+    @override
+    def role(self) -> str:
+        if self.tag_name is None or len(self.tag_name) == 0:  # type: ignore[arg-type]
+            if self.attributes.get("role"):
+                return self.attributes["role"]
+            if len(self.attributes) == 0 and len(self.children) == 0:
+                return "none"
+            raise ValueError(f"No tag_name found for element: {self} with attributes: {self.attributes}")
+        return element_role(self.tag_name, self.attributes)
+
+    @property
+    @override
+    def name(self) -> str:
+        return element_name(self.tag_name, self.attributes, self._get_text_content)
+
+    def _get_text_content(self) -> str:
+        """Recursively get text content from child text nodes."""
+
+        def extract_text(node: DOMBaseNode) -> str:
+            if isinstance(node, DOMTextNode):
+                return node.text if node.is_visible else ""
+            else:
+                children_text = "".join(extract_text(child) for child in node.children)
+                return children_text
+
+        result = extract_text(self)
+        return result
+
+    @override
+    def to_dict(self) -> dict[str, Any]:
+        role, name = self.role, self.name
+        if (name == "" or role == "") and len(self.children) == 0:
+            return {}
+        base: dict[str, Any] = {"role": role, "name": name}
+        if self.children:
+            base["children"] = [child.to_dict() for child in self.children]
+        return base
+
+    @override
+    def to_notte_domnode(self) -> NotteDomNode:
+        node = NotteDomNode(
+            id=self.notte_id,
+            type=NodeType.INTERACTION if self.is_interactive else NodeType.OTHER,
+            role=NodeRole.from_value(self.role),
+            text=self.name,
+            children=[child.to_notte_domnode() for child in self.children],
+            attributes=DomAttributes.safe_init(
+                tag_name=self.tag_name,
+                **self.attributes,
+            ),
+            computed_attributes=ComputedDomAttributes(
+                in_viewport=self.is_visible,
+                is_interactive=self.is_interactive,
+                is_top_element=self.is_top_element,
+                is_editable=self.is_editable,
+                shadow_root=self.shadow_root,
+                highlight_index=self.highlight_index,
+                selectors=NodeSelectors(
+                    css_selector=self.css_path,
+                    xpath_selector=self.xpath,
+                    notte_selector=self.notte_selector,
+                    in_iframe=self.in_iframe,
+                    iframe_parent_css_selectors=self.iframe_parent_css_selectors,
+                    in_shadow_root=self.in_shadow_root,
+                ),
+            ),
+        )
+        # second path to set the parent
+        for child in node.children:
+            child.set_parent(node)
+        return node
+
+
+def generate_sequential_ids(root: DOMBaseNode) -> DOMBaseNode:
+    """
+    Generates sequential IDs for interactive elements in the accessibility tree
+    using depth-first search.
+    """
+    stack = [root]
+    id_counter = new_id_counter()
+    while stack:
+        node = stack.pop()
+        children = node.children
+
+        role = NodeRole.from_value(node.role)
+        if isinstance(role, str):
+            logger.debug(
+                f"Unsupported role to convert to ID: {node}. Please add this role to the NodeRole e logic ASAP."
+            )
+        elif node.highlight_index is not None:
+            id = role.short_id(force_id=True)
+            if id is not None:
+                node.notte_id = f"{id}{id_counter[id]}"
+                id_counter[id] += 1
+            else:
+                raise ValueError(
+                    (
+                        f"Role {role} was incorrectly converted from raw Dom Node."
+                        " It is an interaction node. It should have a short ID but is currently None"
+                    )
+                )
+        stack.extend(reversed(children))
+
+    return root
+
+
+def parse_node(
+    node: DomTreeDict,
+    parent: "DOMElementNode | None",
+    in_iframe: bool,
+    in_shadow_root: bool,
+    iframe_parent_css_paths: list[str],
+    notte_selector: str,
+) -> DOMBaseNode | None:
+    if node.get("type") == "TEXT_NODE":
+        text_node = DOMTextNode(
+            text=node["text"],
+            is_visible=node["isVisible"],
+            parent=parent,
+        )
+
+        return text_node
+
+    if node.get("type") == "PLACEHOLDER_NODE":
+        return DOMTextNode(
+            text=placeholder_text(node.get("elements", 0), node.get("interactive", 0), node.get("position", "below")),
+            is_visible=False,
+            parent=parent,
+        )
+
+    tag_name = node["tagName"]
+    attrs = node.get("attributes", {})
+    xpath = node["xpath"]
+
+    if tag_name is None:
+        if xpath is None and len(attrs) == 0 and len(node.get("children", [])) == 0:
+            return None
+        raise ValueError(f"Tag name is None for node: {node}")
+
+    highlight_index = node.get("highlightIndex")
+    shadow_root = node.get("shadowRoot", False)
+    if xpath is None:
+        raise ValueError(f"XPath is None for node: {node}")
+    css_path = build_csspath(
+        tag_name=tag_name,
+        xpath=xpath,
+        attributes=attrs,
+        highlight_index=highlight_index,
+    )
+    _iframe_parent_css_paths = iframe_parent_css_paths
+    notte_selector = ":".join([notte_selector, str(hash(xpath)), str(hash(css_path))])
+
+    if shadow_root:
+        in_shadow_root = True
+
+    if tag_name.lower() == "iframe":
+        in_iframe = True
+        _iframe_parent_css_paths = _iframe_parent_css_paths + [css_path]
+
+    element_node = DOMElementNode(
+        tag_name=tag_name,
+        in_iframe=in_iframe,
+        xpath=xpath,
+        css_path=css_path,
+        notte_selector=notte_selector,
+        iframe_parent_css_selectors=iframe_parent_css_paths,
+        attributes=attrs,
+        is_visible=node.get("isVisible", False),
+        is_interactive=node.get("isInteractive", False),
+        is_top_element=node.get("isTopElement", False),
+        is_editable=node.get("isEditable", False),
+        highlight_index=node.get("highlightIndex"),
+        shadow_root=shadow_root,
+        in_shadow_root=in_shadow_root,
+        parent=parent,
+    )
+
+    children: list[DOMBaseNode] = []
+    for child in node.get("children", []):
+        if child is not None:
+            child_node = parse_node(
+                node=child,
+                parent=element_node,
+                in_iframe=in_iframe,
+                iframe_parent_css_paths=_iframe_parent_css_paths,
+                notte_selector=notte_selector,
+                in_shadow_root=in_shadow_root,
+            )
+            if child_node is not None:
+                children.append(child_node)
+
+    element_node.children = children
+
+    return element_node
+
+
+def legacy_conversion(payload: DomTreeDict, url: str) -> NotteDomNode:
+    root = parse_node(
+        payload, parent=None, in_iframe=False, in_shadow_root=False, iframe_parent_css_paths=[], notte_selector=url
+    )
+    if root is None:
+        raise ValueError(f"Failed to parse DOM tree. Dom Tree is empty. {payload}")
+    return generate_sequential_ids(root).to_notte_domnode()
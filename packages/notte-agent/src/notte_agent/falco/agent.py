@@ -7,6 +7,7 @@ from enum import StrEnum
 import notte_core
 from litellm import AllMessageValues, override
 from loguru import logger
+from notte_browser.controller import BrowserController
 from notte_browser.dom.locate import locate_element
 from notte_browser.resolution import NodeResolutionPipe
 from notte_browser.session import NotteSession, NotteSessionConfig
@@ -21,6 +22,7 @@ from notte_core.controller.actions import (
     InteractionAction,
 )
 from notte_core.credentials.base import BaseVault, LocatorAttributes
+from notte_core.errors.base import NotteBaseError
 from notte_core.llms.engine import LLMEngine
 from notte_core.utils.webp_replay import ScreenshotReplay, WebpReplay
 from patchright.async_api import Locator
@@ -62,6 +64,8 @@ class HistoryType(StrEnum):
 
 class FalcoAgentConfig(AgentConfig):
     max_actions_per_step: int = 1
+    # execute steps made only of form actions (fill, check, select) as a single batch with one final observation
+    batch_form_actions: bool = True
     history_type: HistoryType = HistoryType.SHORT_OBSERVATIONS_WITH_SHORT_DATA
 
     @classmethod
@@ -121,6 +125,9 @@ class FalcoAgent(BaseAgent):
             self.llm.structured_completion = self.vault.patch_structured_completion(0, self.vault.get_replacement_map)(
                 self.llm.structured_completion
             )
+            self.llm.astructured_completion = self.vault.patch_astructured_completion(  # pyright: ignore [reportAttributeAccessIssue]
+                0, self.vault.get_replacement_map
+            )(self.llm.astructured_completion)
 
         self.perception: FalcoPerception = FalcoPerception()
         self.validator: CompletionValidator = CompletionValidator(
@@ -244,7 +251,7 @@ class FalcoAgent(BaseAgent):
     async def step(self, task: str) -> CompletionAction | None:
         """Execute a single step of the agent"""
         messages = await self.get_messages(task)
-        response: StepAgentOutput = self.llm.structured_completion(messages, response_format=StepAgentOutput)
+        response: StepAgentOutput = await self.llm.astructured_completion(messages, response_format=StepAgentOutput)
         if self.step_callback is not None:
             self.step_callback(task, response)
 
@@ -259,32 +266,75 @@ class FalcoAgent(BaseAgent):
         if response.output is not None:
             return response.output
         # Execute the actions
-        for action in response.get_actions(self.config.max_actions_per_step):
+        actions = response.get_actions(self.config.max_actions_per_step)
+        if self.can_batch(actions):
+            await self.batch_step(response, actions)
+            return None
+        for action in actions:
             result = await self.step_executor.execute(action)
 
             self.trajectory.add_step(result)
             step_msg = self.trajectory.perceive_step_result(result, include_ids=True)
             logger.info(f"{step_msg}\n\n")
             if not result.success:
-                # observe again
-                obs = await self.session.observe()
-
-                # cast is necessary because we cant have covariance
-                # in ExecutionStatus
-                ex_status = ExecutionStatus(
-                    input=typing.cast(BaseAction, FallbackObserveAction()),
-                    output=obs,
-                    success=True,
-                    message="Observed",
-                )
-                self.trajectory.add_output(response)
-                self.trajectory.add_step(ex_status)
-
+                await self.observe_after_failure(response)
                 # stop the loop
                 break
             # Successfully executed the action
         return None
 
+    async def observe_after_failure(self, response: StepAgentOutput) -> None:
+        # observe again
+        obs = await self.session.observe()
+
+        # cast is necessary because we cant have covariance
+        # in ExecutionStatus
+        ex_status = ExecutionStatus(
+            input=typing.cast(BaseAction, FallbackObserveAction()),
+            output=obs,
+            success=True,
+            message="Observed",
+        )
+        self.trajectory.add_output(response)
+        self.trajectory.add_step(ex_status)
+
+    def can_batch(self, actions: list[BaseAction]) -> bool:
+        if not self.config.batch_form_actions or len(actions) <= 1:
+            return False
+        if self.vault is not None and any(self.vault.contains_credentials(action) for action in actions):
+            # credentials are replaced one action at a time, based on the located element
+            return False
+        return all(BrowserController.is_batchable(action) for action in actions)
+
+    async def batch_step(self, response: StepAgentOutput, actions: list[BaseAction]) -> None:
+        """
+        Execute form actions back-to-back and observe the page once at the end.
+
+        Like the action-by-action loop of `step`, the results stop at the first failed action and the page is
+        observed again before the next step.
+        """
+        try:
+            results, obs = await self.session.act_multiple(actions)
+        except Exception as e:
+            message = e.agent_message if isinstance(e, NotteBaseError) else str(e)
+            self.trajectory.add_step(self.step_executor.on_failure(actions[0], message, e))
+            await self.observe_after_failure(response)
+            return
+        for result in results:
+            if result.success:
+                self.step_executor.reset()
+                status: ExecutionStatus[BaseAction, Observation] = ExecutionStatus(
+                    input=result.action, output=obs, success=True, message=result.message
+                )
+            else:
+                status = self.step_executor.on_failure(result.action, result.message, result.error or Exception())
+            self.trajectory.add_step(status)
+            logger.info(f"{self.trajectory.perceive_step_result(status, include_ids=True)}\n\n")
+            if not result.success:
+                await self.observe_after_failure(response)
+                # the following actions were skipped
+                break
+
     @override
     async def run(self, task: str, url: str | None = None) -> AgentResponse:
         logger.info(f"Running task: {task}")
@@ -299,7 +349,7 @@ class FalcoAgent(BaseAgent):
 
     async def _human_in_the_loop(self) -> None:
         # Check for captcha if human-in-the-loop is enabled
-        captcha_result = self.captcha_detector.detect(self.session.trajectory[-1])
+        captcha_result = await self.captcha_detector.detect(self.session.trajectory[-1])
         if captcha_result.has_captcha:
             logger.warning(f"⚠️ Captcha detected: {captcha_result.description}")
             logger.info("🔄 Waiting for human intervention...")
@@ -342,7 +392,7 @@ class FalcoAgent(BaseAgent):
             # Sucessful execution and LLM output is not None
             # Need to validate the output
             logger.info(f"🔥 Validating agent output:\n{output.model_dump_json()}")
-            val = self.validator.validate(task, output, self.trajectory)  # pyright: ignore [reportArgumentType]
+            val = await self.validator.validate(task, output, self.trajectory)  # pyright: ignore [reportArgumentType]
             if val.is_valid:
                 # Successfully validated the output
                 logger.info("✅ Task completed successfully")
@@ -88,6 +88,9 @@ class GufoAgent(BaseAgent):
             self.llm.structured_completion = self.vault.patch_structured_completion(0, self.vault.get_replacement_map)(
                 self.llm.structured_completion
             )
+            self.llm.astructured_completion = self.vault.patch_astructured_completion(  # pyright: ignore [reportAttributeAccessIssue]
+                0, self.vault.get_replacement_map
+            )(self.llm.astructured_completion)
 
     async def reset(self):
         await self.session.reset()
@@ -105,7 +108,7 @@ class GufoAgent(BaseAgent):
     async def step(self, task: str) -> CompletionAction | None:
         # Processes the conversation history through the LLM to decide the next action.
         # logger.info(f"🤖 LLM prompt:\n{self.conv.messages()}")
-        response: str = self.llm.single_completion(self.conv.messages())
+        response: str = await self.llm.asingle_completion(self.conv.messages())
         self.conv.add_assistant_message(content=response)
         logger.info(f"🤖 LLM response:\n{response}")
         # Ask Notte to perform the selected action
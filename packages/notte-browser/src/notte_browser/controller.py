@@ -1,3 +1,6 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
+
 from loguru import logger
 from notte_core.browser.snapshot import BrowserSnapshot
 from notte_core.controller.actions import (
@@ -24,6 +27,7 @@ from notte_core.controller.actions import (
 )
 from notte_core.credentials.types import get_str_value
 from notte_core.errors.actions import ActionExecutionError
+from notte_core.errors.base import NotteBaseError
 from notte_core.utils.code import text_contains_tabs
 from notte_core.utils.platform import platform_control_key
 from patchright.async_api import Locator
@@ -33,6 +37,40 @@ from notte_browser.dom.locate import locate_element
 from notte_browser.errors import capture_playwright_errors
 from notte_browser.window import BrowserWindow
 
+# actions that only modify the state of a form field: they can be executed back-to-back without
+# waiting for the page to stabilize or taking a snapshot in between
+BATCHABLE_ACTIONS = (FillAction, CheckAction, SelectDropdownOptionAction)
+
+
+@dataclass
+class ActionExecutionResult:
+    action: BaseAction
+    success: bool
+    # `None` for successful actions and for actions skipped after a failure
+    error: Exception | None = None
+    skipped: bool = False
+
+    @property
+    def message(self) -> str:
+        if self.skipped:
+            return "Action skipped because a previous action of the batch failed"
+        if self.error is None:
+            return f"Successfully executed action {self.action.id}"
+        if isinstance(self.error, NotteBaseError):
+            return self.error.agent_message or self.error.dev_message
+        return str(self.error)
+
+
+@dataclass
+class BatchExecutionResult:
+    results: list[ActionExecutionResult]
+    # snapshot taken once, after the last action of the batch
+    snapshot: BrowserSnapshot
+
+    @property
+    def success(self) -> bool:
+        return all(result.success for result in self.results)
+
 
 @final
 class BrowserController:
@@ -40,6 +78,11 @@ class BrowserController:
         self.verbose: bool = verbose
 
         self.execute = capture_playwright_errors(verbose=verbose)(self.execute)  # type: ignore[reportAttributeAccessIssue]
+        self.execute_batched = capture_playwright_errors(verbose=verbose)(self.execute_batched)  # type: ignore[reportAttributeAccessIssue]
+
+    @staticmethod
+    def is_batchable(action: BaseAction) -> bool:
+        return isinstance(action, BATCHABLE_ACTIONS) and not action.press_enter
 
     async def switch_tab(self, window: BrowserWindow, tab_index: int) -> None:
         context = window.page.context
@@ -94,7 +137,7 @@ class BrowserController:
         return None
 
     async def execute_interaction_action(
-        self, window: BrowserWindow, action: InteractionAction
+        self, window: BrowserWindow, action: InteractionAction, wait: bool = True
     ) -> BrowserSnapshot | None:
         if action.selector is None:
             raise ValueError(f"Selector is required for {action.name()}")
@@ -145,7 +188,8 @@ class BrowserController:
                     await window.short_wait()
                 else:
                     await locator.fill(get_str_value(value), timeout=action_timeout, force=action.clear_before_fill)
-                    await window.short_wait()
+                    if wait:
+                        await window.short_wait()
             case MultiFactorFillAction(value=value):
                 # click the locator, then fill in one number at a time
                 await locator.click()
@@ -189,6 +233,7 @@ class BrowserController:
         return None
 
     async def execute(self, window: BrowserWindow, action: BaseAction) -> BrowserSnapshot:
+        window.invalidate_snapshots()
         context = window.page.context
         num_pages = len(context.pages)
         match action:
@@ -204,8 +249,8 @@ class BrowserController:
                 return snapshot
             case _:
                 retval = await self.execute_browser_action(window, action)
-        # add short wait before we check for new tabs to make sure that
-        # the page has time to be created
+        # wait for the page to settle (at most `short_wait` ms) before we check for new tabs
+        # to make sure that the page has time to be created
         await window.short_wait()
         if len(context.pages) != num_pages:
             if self.verbose:
@@ -218,8 +263,54 @@ class BrowserController:
 
         return await window.snapshot()
 
-    async def execute_multiple(self, window: BrowserWindow, actions: list[BaseAction]) -> list[BrowserSnapshot]:
-        snapshots: list[BrowserSnapshot] = []
+    async def execute_batched(self, window: BrowserWindow, action: InteractionAction) -> None:
+        """Execute a batchable action without waiting for the page to stabilize nor taking a snapshot"""
+        window.invalidate_snapshots()
+        _ = await self.execute_interaction_action(window, action, wait=False)
+
+    async def execute_multiple(
+        self,
+        window: BrowserWindow,
+        actions: Sequence[BaseAction],
+        stop_on_failure: bool = True,
+    ) -> BatchExecutionResult:
+        """
+        Execute a batch of actions and take a single snapshot at the end.
+
+        Consecutive batchable actions (e.g. filling a form) run back-to-back, the page stabilization is only
+        awaited once after them. Other actions go through `execute` as usual.
+        """
+        context = window.page.context
+        results: list[ActionExecutionResult] = []
+        snapshot: BrowserSnapshot | None = None
+        # state before the pending batchable actions
+        num_pages, original_url = len(context.pages), window.page.url
         for action in actions:
-            snapshots.append(await self.execute(window, action))
-        return snapshots
+            if stop_on_failure and any(not result.success for result in results):
+                results.append(ActionExecutionResult(action=action, success=False, skipped=True))
+                continue
+            # any attempted action invalidates the last snapshot
+            snapshot = None
+            try:
+                if isinstance(action, InteractionAction) and self.is_batchable(action):
+                    await self.execute_batched(window, action)
+                else:
+                    snapshot = await self.execute(window, action)
+                    num_pages, original_url = len(context.pages), window.page.url
+                results.append(ActionExecutionResult(action=action, success=True))
+            except Exception as e:
+                if self.verbose:
+                    logger.error(f"🪦 Action {action.id} failed in batch execution: {e}")
+                results.append(ActionExecutionResult(action=action, success=False, error=e))
+
+        if snapshot is None:
+            # wait for the page to stabilize once for all the batched actions
+            await window.short_wait()
+            if len(context.pages) != num_pages:
+                if self.verbose:
+                    logger.info("🪦 Batch execution resulted in a new tab, switched to it...")
+                await self.switch_tab(window, -1)
+            elif original_url != window.page.url:
+                await window.long_wait()
+            snapshot = await window.snapshot()
+        return BatchExecutionResult(results=results, snapshot=snapshot)
@@ -1,9 +1,11 @@
 // file taken from: https://github.com/browser-use/browser-use/blob/main/browser_use/dom/buildDomTree.js
 (
-	{highlight_elements, focus_element, viewport_expansion }
+	{highlight_elements, focus_element, viewport_expansion, incremental, max_patches, reset, browser_selectors, compact_payload, partial_extraction, partial_margin }
 ) => {
 
 	let highlightIndex = 0; // Reset highlight index
+	// incremental mode state (persisted on the window between calls), null in one-shot mode
+	let state = null;
 
 	function highlightElement(element, index, parentIframe = null) {
 		// Create or get highlight container
@@ -138,6 +140,41 @@
 		return segments.join('/');
 	}
 
+	// Same selectors as `build_csspath` in `notte_browser/dom/csspaths.py`, computed in the page (browser_selectors mode)
+	const VALID_CLASS_NAME = /^[a-zA-Z_][a-zA-Z0-9_-]*$/;
+	const SAFE_CSS_ATTRIBUTES = new Set([
+		'id', 'name', 'type', 'placeholder', 'aria-label', 'aria-labelledby', 'aria-describedby', 'role', 'for',
+		'autocomplete', 'required', 'readonly', 'alt', 'title', 'src', 'href', 'target',
+		'data-id', 'data-qa', 'data-cy', 'data-testid',
+	]);
+
+	function getCssPath(xpath, attributes) {
+		// xpath segments are `tag` or `tag[n]`
+		let selector = xpath.split('/').filter(part => part).map(part => {
+			const bracket = part.indexOf('[');
+			return bracket < 0 ? part : `${part.slice(0, bracket)}:nth-of-type(${part.slice(bracket + 1, -1)})`;
+		}).join(' > ');
+		for (const className of (attributes['class'] || '').split(/\s+/)) {
+			if (VALID_CLASS_NAME.test(className)) {
+				selector += `.${className}`;
+			}
+		}
+		for (const [name, value] of Object.entries(attributes)) {
+			if (name === 'class' || !SAFE_CSS_ATTRIBUTES.has(name)) {
+				continue;
+			}
+			if (value === '') {
+				selector += `[${name}]`;
+			} else if (/["'<>`\n\r\t]/.test(value)) {
+				const safeValue = value.replace(/\s+/g, ' ').trim().replaceAll('"', '\\"');
+				selector += `[${name}*="${safeValue}"]`;
+			} else {
+				selector += `[${name}="${value}"]`;
+			}
+		}
+		return selector;
+	}
+
 	// Helper function to check if element is accepted
 	function isElementAccepted(element) {
 		const leafElementDenyList = new Set(['svg', 'script', 'style', 'link', 'meta']);
@@ -386,6 +423,74 @@
 		}
 	}
 
+	// Partial extraction: only the elements intersecting the captured regions (the current viewport plus a margin, and
+	// the regions captured by the previous snapshots of the document) are walked. The others are summarized by
+	// placeholders, so that long pages (e.g. infinite scroll feeds) do not produce huge trees.
+	const PLACEHOLDER_INTERACTIVE_SELECTOR = 'a[href], button, input, select, textarea, [role="button"], [role="link"], [onclick]';
+	const capturedRanges = partial_extraction && !incremental ? captureRanges() : null;
+
+	function captureRanges() {
+		const current = {
+			top: window.scrollY - partial_margin,
+			bottom: window.scrollY + window.innerHeight + partial_margin,
+		};
+		// vertical ranges in document coordinates, sorted and merged
+		const ranges = [...(window.__notteCapturedRanges || []), current].sort((a, b) => a.top - b.top);
+		const merged = [];
+		for (const range of ranges) {
+			const last = merged[merged.length - 1];
+			if (last && range.top <= last.bottom) {
+				last.bottom = Math.max(last.bottom, range.bottom);
+			} else {
+				merged.push({ ...range });
+			}
+		}
+		window.__notteCapturedRanges = merged;
+		return merged;
+	}
+
+	function isOutsideCapturedRanges(element) {
+		// iframes have their own coordinates: their content is always walked
+		if (element === document.body || element.ownerDocument !== document) {
+			return false;
+		}
+		const rect = element.getBoundingClientRect();
+		// zero-sized elements can still have visible (positioned) descendants
+		if (rect.width === 0 && rect.height === 0) {
+			return false;
+		}
+		const top = rect.top + window.scrollY;
+		const bottom = rect.bottom + window.scrollY;
+		return !capturedRanges.some(range => bottom >= range.top && top <= range.bottom);
+	}
+
+	function placeholder(element) {
+		const rect = element.getBoundingClientRect();
+		return {
+			type: "PLACEHOLDER_NODE",
+			elements: 1 + element.getElementsByTagName('*').length,
+			interactive: (element.matches(PLACEHOLDER_INTERACTIVE_SELECTOR) ? 1 : 0) +
+				element.querySelectorAll(PLACEHOLDER_INTERACTIVE_SELECTOR).length,
+			position: rect.bottom <= 0 ? 'above' : 'below',
+		};
+	}
+
+	// consecutive placeholders of the same side are merged into one
+	function mergePlaceholders(children) {
+		const merged = [];
+		for (const child of children) {
+			if (child === null) continue;
+			const last = merged[merged.length - 1];
+			if (child.type === "PLACEHOLDER_NODE" && last?.type === "PLACEHOLDER_NODE" && last.position === child.position) {
+				last.elements += child.elements;
+				last.interactive += child.interactive;
+			} else {
+				merged.push(child);
+			}
+		}
+		return merged;
+	}
+
 	// Helper function to check if text node is visible
 	function isTextNodeVisible(textNode) {
 		const range = document.createRange();
@@ -404,7 +509,25 @@
 
 
 	// Function to traverse the DOM and create nested JSON
-	function buildDomTree(node, parentIframe = null) {
+	// iframe / shadow root context of the selectors, only tracked in browser_selectors mode
+	const ROOT_SELECTOR_CONTEXT = { inIframe: false, inShadowRoot: false, iframeParentCss: [] };
+
+	// Selectors of an element and the context of its descendants (unchanged, except under iframes and shadow hosts)
+	function selectorsOf(node, xpath, attributes, context) {
+		const isIframe = node.tagName === 'IFRAME';
+		const css = getCssPath(xpath, attributes);
+		const inShadowRoot = context.inShadowRoot || !!node.shadowRoot;
+		const inIframe = context.inIframe || isIframe;
+		const selectors = { css, inIframe, inShadowRoot, iframeParentCss: context.iframeParentCss };
+		const childContext = {
+			inIframe,
+			inShadowRoot,
+			iframeParentCss: isIframe ? [...context.iframeParentCss, css] : context.iframeParentCss,
+		};
+		return [selectors, childContext];
+	}
+
+	function buildDomTree(node, parentIframe = null, context = ROOT_SELECTOR_CONTEXT) {
 		if (!node) return null;
 
 		// Special case for text nodes
@@ -425,6 +548,10 @@
 			return null;
 		}
 
+		if (capturedRanges && node.nodeType === Node.ELEMENT_NODE && isOutsideCapturedRanges(node)) {
+			return placeholder(node);
+		}
+
 		const nodeData = {
 			tagName: node.tagName ? node.tagName.toLowerCase() : null,
 			attributes: {},
@@ -432,6 +559,11 @@
 			children: [],
 		};
 
+		if (state && node.nodeType === Node.ELEMENT_NODE) {
+			nodeData.key = keyOf(node);
+			state.built.add(node);
+		}
+
 		// Copy all attributes if the node is an element
 		if (node.nodeType === Node.ELEMENT_NODE && node.attributes) {
 			// Use getAttributeNames() instead of directly iterating attributes
@@ -477,10 +609,20 @@
 			nodeData.shadowRoot = true;
 		}
 
+		// Selectors are only computed for the nodes that need them: highlighted nodes, and the iframes / shadow
+		// hosts that define the context of their descendants
+		let childContext = context;
+		if (browser_selectors && node.nodeType === Node.ELEMENT_NODE) {
+			if (nodeData.highlightIndex !== undefined || node.tagName === 'IFRAME' || node.shadowRoot) {
+				[nodeData.selectors, childContext] = selectorsOf(node, nodeData.xpath, nodeData.attributes, context);
+			}
+		}
+
 		// Handle shadow DOM
 		if (node.shadowRoot) {
+			observe(node.shadowRoot);
 			const shadowChildren = Array.from(node.shadowRoot.childNodes).map(child =>
-				buildDomTree(child, parentIframe)
+				buildDomTree(child, parentIframe, childContext)
 			);
 			nodeData.children.push(...shadowChildren);
 		}
@@ -490,8 +632,9 @@
 			try {
 				const iframeDoc = node.contentDocument || node.contentWindow.document;
 				if (iframeDoc) {
+					observe(iframeDoc.body);
 					const iframeChildren = Array.from(iframeDoc.body.childNodes).map(child =>
-						buildDomTree(child, node)
+						buildDomTree(child, node, childContext)
 					);
 					nodeData.children.push(...iframeChildren);
 				}
@@ -500,14 +643,248 @@
 			}
 		} else {
 			const children = Array.from(node.childNodes).map(child =>
-				buildDomTree(child, parentIframe)
+				buildDomTree(child, parentIframe, childContext)
 			);
 			nodeData.children.push(...children);
 		}
 
+		if (capturedRanges) {
+			nodeData.children = mergePlaceholders(nodeData.children);
+		}
 		return nodeData;
 	}
 
 
-	return buildDomTree(document.body);
+	// Compact wire format (decoded by `DomTreeBuilder.build_compact`): instead of nested objects repeating the same keys,
+	// the tree is flattened in pre-order into an array of integers and every string is replaced by its index in a
+	// string table.
+	//   text node: 0, text, flags
+	//   placeholder (partial extraction): 2, nb elements, nb interactive elements, 0 if above the viewport else 1
+	//   element:   1, tagName, xpath, flags, highlightIndex + 1 (0 if none), nb attributes, (name, value)*,
+	//              [css, nb iframe parents, iframe parent css* (if flags & SELECTORS)], nb children, children*
+	const COMPACT_FLAGS = { isVisible: 1, isInteractive: 2, isTopElement: 4, isEditable: 8, shadowRoot: 16 };
+	const COMPACT_SELECTORS = 32, COMPACT_IN_IFRAME = 64, COMPACT_IN_SHADOW_ROOT = 128;
+
+	function encodeCompact(tree) {
+		const strings = [];
+		const indices = new Map();
+		const nodes = [];
+
+		function intern(value) {
+			let index = indices.get(value);
+			if (index === undefined) {
+				index = strings.length;
+				strings.push(value);
+				indices.set(value, index);
+			}
+			return index;
+		}
+
+		function encode(node) {
+			if (node.type === 'TEXT_NODE') {
+				nodes.push(0, intern(node.text), node.isVisible ? COMPACT_FLAGS.isVisible : 0);
+				return;
+			}
+			if (node.type === 'PLACEHOLDER_NODE') {
+				nodes.push(2, node.elements, node.interactive, node.position === 'above' ? 0 : 1);
+				return;
+			}
+			let flags = 0;
+			for (const [key, flag] of Object.entries(COMPACT_FLAGS)) {
+				if (node[key]) flags |= flag;
+			}
+			const selectors = node.selectors;
+			if (selectors) {
+				flags |= COMPACT_SELECTORS;
+				if (selectors.inIframe) flags |= COMPACT_IN_IFRAME;
+				if (selectors.inShadowRoot) flags |= COMPACT_IN_SHADOW_ROOT;
+			}
+			const attributes = Object.entries(node.attributes);
+			nodes.push(1, intern(node.tagName), intern(node.xpath), flags, (node.highlightIndex ?? -1) + 1, attributes.length);
+			for (const [name, value] of attributes) {
+				nodes.push(intern(name), intern(value));
+			}
+			if (selectors) {
+				nodes.push(intern(selectors.css), selectors.iframeParentCss.length, ...selectors.iframeParentCss.map(intern));
+			}
+			// non element nodes (comments, ...) are dropped by the python parser anyway
+			const children = node.children.filter(child => child !== null && child.tagName !== null);
+			nodes.push(children.length);
+			children.forEach(encode);
+		}
+
+		encode(tree);
+		return { strings, nodes };
+	}
+
+
+	// Incremental mode: a MutationObserver records the nodes that changed between two calls
+	// so that only the dirty subtrees are rebuilt and sent back as patches.
+	const OBSERVER_OPTIONS = { childList: true, subtree: true, attributes: true, characterData: true };
+	const HIGHLIGHT_CONTAINER_ID = 'playwright-highlight-container';
+
+	function getState() {
+		let current = window.__notteDomState;
+		if (!current) {
+			current = {
+				keys: new WeakMap(),
+				built: new WeakSet(),
+				nextKey: 1,
+				pending: [],
+				stale: true,
+				root: null,
+				highlightIndex: 0,
+			};
+			current.observer = new MutationObserver(records => current.pending.push(...recordTargets(records)));
+			// layout dependent attributes (visibility, top element) change on scroll/resize without any mutation
+			const markStale = () => { current.stale = true; };
+			document.addEventListener('scroll', markStale, { capture: true, passive: true });
+			window.addEventListener('resize', markStale, { passive: true });
+			window.__notteDomState = current;
+		}
+		return current;
+	}
+
+	function keyOf(element) {
+		let key = state.keys.get(element);
+		if (key === undefined) {
+			key = state.nextKey++;
+			state.keys.set(element, key);
+		}
+		return key;
+	}
+
+	function observe(root) {
+		if (state && root) {
+			state.observer.observe(root, OBSERVER_OPTIONS);
+		}
+	}
+
+	function isHighlightNode(node) {
+		return node.id === HIGHLIGHT_CONTAINER_ID || node.parentElement?.id === HIGHLIGHT_CONTAINER_ID;
+	}
+
+	// Filter out the mutations made by this script (highlight overlays)
+	function recordTargets(records) {
+		const targets = [];
+		for (const record of records) {
+			if (isHighlightNode(record.target) || record.attributeName === 'browser-user-highlight-id') {
+				continue;
+			}
+			if (record.type === 'childList' &&
+				[...record.addedNodes, ...record.removedNodes].every(isHighlightNode)) {
+				continue;
+			}
+			targets.push(record.target);
+		}
+		return targets;
+	}
+
+	// Closest element of the tree (crossing shadow roots and iframes) that contains `node`
+	function parentElementOf(node) {
+		const parent = node.parentNode;
+		if (!parent) return null;
+		if (parent instanceof ShadowRoot) return parent.host;
+		if (parent.nodeType !== Node.ELEMENT_NODE) return null;
+		// iframe content is attached directly under the iframe element
+		if (parent === parent.ownerDocument.body && parent.ownerDocument !== document) {
+			return parent.ownerDocument.defaultView?.frameElement ?? null;
+		}
+		return parent;
+	}
+
+	function dirtyElement(node) {
+		if (node instanceof ShadowRoot) return node.host;
+		if (node.nodeType === Node.ELEMENT_NODE && node.ownerDocument !== document &&
+			node === node.ownerDocument.body) {
+			return node.ownerDocument.defaultView?.frameElement ?? null;
+		}
+		return node.nodeType === Node.ELEMENT_NODE ? node : parentElementOf(node);
+	}
+
+	// Selector context of a patched subtree, rebuilt from the iframes and shadow hosts above it
+	function selectorContextOf(element) {
+		const ancestors = [];
+		for (let parent = parentElementOf(element); parent; parent = parentElementOf(parent)) {
+			ancestors.push(parent);
+		}
+		let context = ROOT_SELECTOR_CONTEXT;
+		for (const ancestor of ancestors.reverse()) {
+			if (ancestor.tagName === 'IFRAME' || ancestor.shadowRoot) {
+				const attributes = {};
+				for (const name of ancestor.getAttributeNames()) {
+					attributes[name] = ancestor.getAttribute(name);
+				}
+				context = selectorsOf(ancestor, getXPathTree(ancestor, true), attributes, context)[1];
+			}
+		}
+		return context;
+	}
+
+	// Minimal set of built elements covering every pending mutation
+	function dirtyRoots() {
+		const candidates = new Set();
+		for (const node of state.pending) {
+			let element = dirtyElement(node);
+			if (!element || !element.isConnected) {
+				// detached nodes are covered by the childList mutation of their former parent
+				continue;
+			}
+			// denied elements (e.g. svg content) are not part of the tree: patch their closest built ancestor
+			while (element && !state.built.has(element)) {
+				element = parentElementOf(element);
+			}
+			if (element) {
+				candidates.add(element);
+			}
+		}
+		const roots = [];
+		for (const element of candidates) {
+			let parent = parentElementOf(element);
+			while (parent && !candidates.has(parent)) {
+				parent = parentElementOf(parent);
+			}
+			if (!parent) {
+				roots.push(element);
+			}
+		}
+		return roots;
+	}
+
+	function buildIncremental() {
+		state = getState();
+		state.pending.push(...recordTargets(state.observer.takeRecords()));
+		const canPatch = !reset && !state.stale && state.root === document.body;
+		const roots = canPatch ? dirtyRoots() : null;
+		state.pending = [];
+
+		if (roots !== null && roots.length <= max_patches && !roots.includes(document.body)) {
+			highlightIndex = state.highlightIndex;
+			const patches = roots.map(element => ({
+				key: keyOf(element),
+				node: buildDomTree(
+					element,
+					element.ownerDocument.defaultView?.frameElement ?? null,
+					browser_selectors ? selectorContextOf(element) : ROOT_SELECTOR_CONTEXT,
+				),
+			}));
+			state.highlightIndex = highlightIndex;
+			return { mode: 'patch', patches };
+		}
+
+		state.built = new WeakSet();
+		state.stale = false;
+		state.root = document.body;
+		observe(document.body);
+		const tree = buildDomTree(document.body);
+		state.highlightIndex = highlightIndex;
+		return { mode: 'full', tree };
+	}
+
+
+	if (incremental) {
+		return buildIncremental();
+	}
+	const tree = buildDomTree(document.body);
+	return compact_payload && tree ? encodeCompact(tree) : tree;
 }
@@ -0,0 +1,343 @@
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from loguru import logger
+from notte_core.browser.dom_tree import ComputedDomAttributes, DomAttributes, NodeSelectors
+from notte_core.browser.dom_tree import DomNode as NotteDomNode
+from notte_core.browser.node_type import NodeRole, NodeType
+from notte_core.errors.processing import SnapshotProcessingError
+
+from notte_browser.dom.csspaths import build_csspath
+from notte_browser.dom.id_generation import new_id_counter
+from notte_browser.dom.types import (
+    CompactDomTreeDict,
+    DomSelectorsDict,
+    DomTreeDict,
+    cleanup_aria_attributes,
+    element_name,
+    element_role,
+    placeholder_text,
+)
+
+# compact wire format (see `encodeCompact` in `buildDomNode.js`): record kinds and element flags
+COMPACT_TEXT_NODE = 0
+COMPACT_ELEMENT_NODE = 1
+COMPACT_PLACEHOLDER_NODE = 2
+COMPACT_VISIBLE = 1
+COMPACT_INTERACTIVE = 2
+COMPACT_TOP_ELEMENT = 4
+COMPACT_EDITABLE = 8
+COMPACT_SHADOW_ROOT = 16
+COMPACT_SELECTORS = 32
+COMPACT_IN_IFRAME = 64
+COMPACT_IN_SHADOW_ROOT = 128
+
+
+def _visible_text(node: NotteDomNode) -> str:
+    if node.type == NodeType.TEXT:
+        return node.text if node.computed_attributes.in_viewport else ""
+    return "".join(_visible_text(child) for child in node.children)
+
+
+@dataclass(frozen=True)
+class SelectorContext:
+    """Iframe / shadow root context inherited by the descendants of a node"""
+
+    notte_selector: str
+    in_iframe: bool = False
+    in_shadow_root: bool = False
+    iframe_parent_css_paths: list[str] = field(default_factory=list)
+
+
+class DomTreeBuilder:
+    """
+    Single-pass conversion of the `buildDomNode.js` payload into a notte `DomNode` tree.
+
+    Ids are assigned in pre-order, while roles, names, selectors and attributes are computed during the same walk.
+
+    With `browser_selectors`, the selectors computed by `buildDomNode.js` are used as is: only the highlighted nodes,
+    iframes and shadow hosts have selectors.
+
+    In incremental mode, `id_counter` and `previous_ids` (element key -> notte id) keep the ids of the elements known
+    from the previous snapshots stable. The ids of the keyed elements of the built tree are collected in `ids`.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        browser_selectors: bool = False,
+        id_counter: defaultdict[str, int] | None = None,
+        previous_ids: dict[int, str] | None = None,
+    ) -> None:
+        self.url: str = url
+        # use the selectors computed by `buildDomNode.js` (see `DomParsingConfig.browser_selectors`)
+        self.browser_selectors: bool = browser_selectors
+        self.id_counter: defaultdict[str, int] = id_counter if id_counter is not None else new_id_counter()
+        self.previous_ids: dict[int, str] = previous_ids if previous_ids is not None else {}
+        self.ids: dict[int, str] = {}
+        self._roles: dict[str, NodeRole | str] = {}
+
+    def build(self, node: DomTreeDict) -> NotteDomNode:
+        root = self._build(node, SelectorContext(notte_selector=self.url))
+        if root is None:
+            raise SnapshotProcessingError(self.url, f"Failed to parse DOM tree. Dom Tree is empty. {node}")
+        return root
+
+    def build_compact(self, payload: CompactDomTreeDict) -> NotteDomNode:
+        """
+        Same as `build`, decoding the compact wire format: a pre-order array of integers, where strings are indices
+        in the `strings` table.
+        """
+        values = iter(payload["nodes"])
+        root = self._build_compact(values.__next__, payload["strings"], SelectorContext(notte_selector=self.url))
+        if next(values, None) is not None:
+            raise SnapshotProcessingError(self.url, "Failed to decode the compact DOM tree: trailing values")
+        return root
+
+    def role(self, value: str) -> NodeRole | str:
+        role = self._roles.get(value)
+        if role is None:
+            role = self._roles[value] = NodeRole.from_value(value)
+        return role
+
+    def next_id(
+        self, role: NodeRole | str, highlight_index: int | None, tag_name: str, key: int | None = None
+    ) -> str | None:
+        if isinstance(role, str):
+            logger.debug(
+                f"Unsupported role to convert to ID: {tag_name}. Please add this role to the NodeRole e logic ASAP."
+            )
+            return None
+        if highlight_index is None:
+            return None
+        short_id = role.short_id(force_id=True)
+        if short_id is None:
+            raise ValueError(
+                (
+                    f"Role {role} was incorrectly converted from raw Dom Node."
+                    " It is an interaction node. It should have a short ID but is currently None"
+                )
+            )
+        previous_id = self.previous_ids.get(key) if key is not None else None
+        if previous_id is not None and previous_id.removeprefix(short_id).isdigit():
+            # same element, same role: keep its id
+            notte_id = previous_id
+        else:
+            notte_id = f"{short_id}{self.id_counter[short_id]}"
+            self.id_counter[short_id] += 1
+        if key is not None:
+            self.ids[key] = notte_id
+        return notte_id
+
+    def _text(self, text: str, is_visible: bool) -> NotteDomNode:
+        return NotteDomNode(
+            id=None,
+            role=self.role("text"),
+            type=NodeType.TEXT,
+            text=text,
+            children=[],
+            computed_attributes=ComputedDomAttributes(in_viewport=is_visible),
+            attributes=None,
+        )
+
+    def _build(self, node: DomTreeDict, context: SelectorContext) -> NotteDomNode | None:
+        if node.get("type") == "TEXT_NODE":
+            return self._text(node["text"], node["isVisible"])
+        if node.get("type") == "PLACEHOLDER_NODE":
+            # not visible: placeholders are rendered, but are not part of the names of their ancestors
+            return self._text(
+                placeholder_text(node.get("elements", 0), node.get("interactive", 0), node.get("position", "below")),
+                False,
+            )
+
+        tag_name: str | None = node["tagName"]
+        attrs: dict[str, str] = node.get("attributes", {})
+        xpath: str | None = node["xpath"]
+        children_dicts = node.get("children", [])
+        if tag_name is None:
+            if xpath is None and len(attrs) == 0 and len(children_dicts) == 0:
+                return None
+            raise ValueError(f"Tag name is None for node: {node}")
+        if xpath is None:
+            raise ValueError(f"XPath is None for node: {node}")
+
+        def build_children(children_context: SelectorContext) -> list[NotteDomNode]:
+            children: list[NotteDomNode] = []
+            for child in children_dicts:
+                if child is None:
+                    continue
+                child_node = self._build(child, children_context)
+                if child_node is not None:
+                    children.append(child_node)
+            return children
+
+        return self._element(
+            tag_name=tag_name,
+            xpath=xpath,
+            attrs=attrs,
+            highlight_index=node.get("highlightIndex"),
+            is_visible=node.get("isVisible", False),
+            is_interactive=node.get("isInteractive", False),
+            is_top_element=node.get("isTopElement", False),
+            is_editable=node.get("isEditable", False),
+            shadow_root=node.get("shadowRoot", False),
+            browser_selectors=node.get("selectors"),
+            key=node.get("key"),
+            has_children=any(child is not None for child in children_dicts),
+            context=context,
+            build_children=build_children,
+        )
+
+    def _build_compact(self, read: Callable[[], int], strings: list[str], context: SelectorContext) -> NotteDomNode:
+        kind = read()
+        if kind == COMPACT_TEXT_NODE:
+            text = strings[read()]
+            return self._text(text, bool(read() & COMPACT_VISIBLE))
+        if kind == COMPACT_PLACEHOLDER_NODE:
+            elements, interactive = read(), read()
+            return self._text(placeholder_text(elements, interactive, "above" if read() == 0 else "below"), False)
+
+        tag_name = strings[read()]
+        xpath = strings[read()]
+        flags = read()
+        highlight_index = read() - 1
+        # keys are read before values
+        attrs = {strings[read()]: strings[read()] for _ in range(read())}
+        browser_selectors: DomSelectorsDict | None = None
+        if flags & COMPACT_SELECTORS:
+            css = strings[read()]
+            browser_selectors = DomSelectorsDict(
+                css=css,
+                inIframe=bool(flags & COMPACT_IN_IFRAME),
+                inShadowRoot=bool(flags & COMPACT_IN_SHADOW_ROOT),
+                iframeParentCss=[strings[read()] for _ in range(read())],
+            )
+        nb_children = read()
+
+        def build_children(children_context: SelectorContext) -> list[NotteDomNode]:
+            return [self._build_compact(read, strings, children_context) for _ in range(nb_children)]
+
+        return self._element(
+            tag_name=tag_name,
+            xpath=xpath,
+            attrs=attrs,
+            highlight_index=highlight_index if highlight_index >= 0 else None,
+            is_visible=bool(flags & COMPACT_VISIBLE),
+            is_interactive=bool(flags & COMPACT_INTERACTIVE),
+            is_top_element=bool(flags & COMPACT_TOP_ELEMENT),
+            is_editable=bool(flags & COMPACT_EDITABLE),
+            shadow_root=bool(flags & COMPACT_SHADOW_ROOT),
+            browser_selectors=browser_selectors,
+            has_children=nb_children > 0,
+            context=context,
+            build_children=build_children,
+        )
+
+    def _selectors(
+        self,
+        tag_name: str,
+        xpath: str,
+        attrs: dict[str, str],
+        highlight_index: int | None,
+        shadow_root: bool,
+        browser_selectors: DomSelectorsDict | None,
+        context: SelectorContext,
+    ) -> tuple[NodeSelectors | None, SelectorContext]:
+        """Selectors of an element, and the context of its children"""
+        if self.browser_selectors:
+            if browser_selectors is None:
+                return None, context
+            selectors = NodeSelectors(
+                css_selector=browser_selectors["css"],
+                xpath_selector=xpath,
+                notte_selector=":".join([self.url, str(hash(xpath)), str(hash(browser_selectors["css"]))]),
+                in_iframe=browser_selectors["inIframe"],
+                iframe_parent_css_selectors=browser_selectors["iframeParentCss"],
+                in_shadow_root=browser_selectors["inShadowRoot"],
+            )
+            return selectors, context
+
+        # computed on the raw tag name and attributes, before they are cleaned up
+        css_path = build_csspath(tag_name=tag_name, xpath=xpath, attributes=attrs, highlight_index=highlight_index)
+        notte_selector = ":".join([context.notte_selector, str(hash(xpath)), str(hash(css_path))])
+        in_shadow_root = context.in_shadow_root or shadow_root
+        is_iframe = tag_name.lower() == "iframe"
+        in_iframe = context.in_iframe or is_iframe
+        selectors = NodeSelectors(
+            css_selector=css_path,
+            xpath_selector=xpath,
+            notte_selector=notte_selector,
+            in_iframe=in_iframe,
+            iframe_parent_css_selectors=context.iframe_parent_css_paths,
+            in_shadow_root=in_shadow_root,
+        )
+        children_context = SelectorContext(
+            notte_selector=notte_selector,
+            in_iframe=in_iframe,
+            in_shadow_root=in_shadow_root,
+            iframe_parent_css_paths=(
+                context.iframe_parent_css_paths + [css_path] if is_iframe else context.iframe_parent_css_paths
+            ),
+        )
+        return selectors, children_context
+
+    def _element(
+        self,
+        tag_name: str,
+        xpath: str,
+        attrs: dict[str, str],
+        highlight_index: int | None,
+        is_visible: bool,
+        is_interactive: bool,
+        is_top_element: bool,
+        is_editable: bool,
+        shadow_root: bool,
+        browser_selectors: DomSelectorsDict | None,
+        has_children: bool,
+        context: SelectorContext,
+        build_children: Callable[[SelectorContext], list[NotteDomNode]],
+        key: int | None = None,
+    ) -> NotteDomNode:
+        selectors, children_context = self._selectors(
+            tag_name, xpath, attrs, highlight_index, shadow_root, browser_selectors, context
+        )
+
+        if tag_name.startswith("wiz_"):
+            tag_name = tag_name[len("wiz_") :].replace("_", "-")
+        # copied: incremental parsing builds the same payload again after each patch
+        attrs = cleanup_aria_attributes(dict(attrs))
+
+        if len(tag_name) > 0:
+            role_value = element_role(tag_name, attrs)
+        elif attrs.get("role"):
+            role_value = attrs["role"]
+        elif len(attrs) == 0 and not has_children:
+            role_value = "none"
+        else:
+            raise ValueError(f"No tag_name found for element: {tag_name} with attributes: {attrs}")
+        role = self.role(role_value)
+        # pre-order: the id is assigned before the ids of the children
+        notte_id = self.next_id(role, highlight_index, tag_name, key)
+
+        children = build_children(children_context)
+        element = NotteDomNode(
+            id=notte_id,
+            type=NodeType.INTERACTION if is_interactive else NodeType.OTHER,
+            role=role,
+            text=element_name(tag_name, attrs, lambda: "".join(_visible_text(child) for child in children)),
+            children=children,
+            attributes=DomAttributes.safe_init(tag_name=tag_name, **attrs),
+            computed_attributes=ComputedDomAttributes(
+                in_viewport=is_visible,
+                is_interactive=is_interactive,
+                is_top_element=is_top_element,
+                is_editable=is_editable,
+                shadow_root=shadow_root,
+                highlight_index=highlight_index,
+                selectors=selectors,
+            ),
+        )
+        for child in children:
+            child.set_parent(element)
+        return element
@@ -44,7 +44,9 @@ def selectors_through_shadow_dom(node: DomNode) -> NodeSelectors:
     while node.parent is not None:
         selectors = node.computed_attributes.selectors
         if selectors is None:
-            raise ValueError("Is this a valid dom tree?")
+            # with `DomParsingConfig.browser_selectors`, only highlighted nodes, iframes and shadow hosts have selectors
+            if node.computed_attributes.shadow_root:
+                raise ValueError("Is this a valid dom tree?")
         elif node.computed_attributes.shadow_root:
             if len(selectors.xpath_selector) == 0:
                 if node.attributes is None:
@@ -1,4 +1,13 @@
+import asyncio
+import functools
+import json
+import os
+import weakref
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, cast
 
 from loguru import logger
 from notte_core.browser.dom_tree import DomErrorBuffer
@@ -6,28 +15,67 @@ from notte_core.browser.dom_tree import DomNode as NotteDomNode
 from notte_core.common.config import FrozenConfig
 from notte_core.errors.processing import SnapshotProcessingError
 from patchright.async_api import Page
-from typing_extensions import TypedDict
 
-from notte_browser.dom.csspaths import build_csspath
-from notte_browser.dom.id_generation import generate_sequential_ids
-from notte_browser.dom.types import DOMBaseNode, DOMElementNode, DOMTextNode
+from notte_browser.dom.builder import DomTreeBuilder
+from notte_browser.dom.id_generation import new_id_counter
+from notte_browser.dom.types import (
+    CompactDomTreeDict,
+    DomTreeDict,
+    DomTreePatchDict,
+    IncrementalDomTreeDict,
+)
 
 DOM_TREE_JS_PATH = Path(__file__).parent / "buildDomNode.js"
+# DOM post-processing (css paths, ids, conversion to notte nodes) is pure python CPU work. It runs in a small
+# thread pool so that the event loop keeps serving the other sessions. Threads are used instead of processes
+# because `notte_selector` relies on `hash()`, which is salted per process.
+DOM_PROCESSING_WORKERS = min(4, os.cpu_count() or 1)
 
 
-class DomTreeDict(TypedDict):
-    type: str
-    text: str
-    tagName: str | None
-    xpath: str | None
-    attributes: dict[str, str]
-    isVisible: bool
-    isInteractive: bool
-    isTopElement: bool
-    isEditable: bool
-    highlightIndex: int | None
-    shadowRoot: bool
-    children: list["DomTreeDict"]
+@functools.cache
+def dom_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=DOM_PROCESSING_WORKERS, thread_name_prefix="notte-dom")
+
+
+# `buildDomNode.js` is defined once per document, by its first snapshot: the next snapshots only call it by name
+# instead of sending (and compiling) the whole source every time. A context init script would define it before the
+# first snapshot, but patchright implements init scripts with a catch-all route that pauses every request of the context.
+DOM_TREE_FUNCTION = "__notteBuildDomTree"
+
+
+@functools.cache
+def dom_tree_js() -> str:
+    return DOM_TREE_JS_PATH.read_text()
+
+
+def _dom_tree_call(serialized: bool) -> str:
+    call = f"window.{DOM_TREE_FUNCTION}(args)"
+    if not serialized:
+        return call
+    # a single JSON string is much cheaper for the event loop to deserialize than letting playwright rebuild a deeply
+    # nested object. `undefined` values are kept as `null`, like playwright does.
+    return f"JSON.stringify({call}, (key, value) => value === undefined ? null : value)"
+
+
+@functools.cache
+def dom_tree_call_js(serialized: bool = False) -> str:
+    # the result is wrapped in an array: `null` means that the function is not defined in the document
+    return f"(args) => typeof window.{DOM_TREE_FUNCTION} === 'function' ? [{_dom_tree_call(serialized)}] : null"
+
+
+@functools.cache
+def dom_tree_install_js(serialized: bool = False) -> str:
+    return f"(args) => {{ window.{DOM_TREE_FUNCTION} = {dom_tree_js()}; return [{_dom_tree_call(serialized)}]; }}"
+
+
+async def evaluate_dom_tree_js(page: Page, args: dict[str, Any], serialized: bool = False) -> Any:
+    result: list[Any] | None = await page.evaluate(dom_tree_call_js(serialized), args)
+    if result is None:
+        # first snapshot of the document
+        result = await page.evaluate(dom_tree_install_js(serialized), args)
+        if result is None:
+            return None
+    return result[0]
 
 
 class DomParsingConfig(FrozenConfig):
@@ -42,117 +90,199 @@ class DomParsingConfig(FrozenConfig):
     highlight_elements: bool = False
     focus_element: int = -1
     viewport_expansion: int = 0
+    # Incremental mode: a MutationObserver injected in the page tracks the subtrees modified since the
+    # previous snapshot, only those are rebuilt in the page and sent as patches (unchanged nodes keep their ids).
+    # This saves the page-side traversal and shrinks the CDP payload, but python still builds a new notte tree from
+    # the whole patched payload for every snapshot: the python CPU cost is the same as a full snapshot.
+    # Scrolling/resizing forces a full rebuild, but occlusion changes of untouched elements are not detected.
+    incremental: bool = False
+    # above this number of dirty subtrees, a full rebuild is performed instead
+    max_patches: int = 50
+    # run the post-processing of the DOM tree off the event loop, in `dom_executor`
+    offload: bool = True
+    # compute the css selectors (and iframe / shadow root context) in the page, only for the highlighted nodes,
+    # instead of computing them in python for every node
+    browser_selectors: bool = False
+    # transfer the (non incremental) DOM tree in a compact, string-interned array format instead of nested objects,
+    # which are much larger to serialize over CDP and to deserialize in python
+    compact_payload: bool = False
+    # partial extraction (ignored in incremental mode): only the elements intersecting the viewport extended by
+    # `partial_margin` pixels are extracted, the other regions of the page are replaced by placeholder text nodes
+    # counting their elements. Regions captured by the previous snapshots of the same document are kept, so scrolling
+    # extends the captured tree.
+    partial_extraction: bool = False
+    partial_margin: int = 1000
+
+
+@dataclass
+class IncrementalDomState:
+    """
+    Python side of an incremental parsing session for a given page: the payload of the previous snapshot, in which
+    the rebuilt subtrees are patched.
+
+    A new notte tree is built from the patched payload for each snapshot: the trees of the previous snapshots are
+    never modified.
+    """
+
+    root: DomTreeDict
+    # element key -> element currently in the payload, and its parent element
+    nodes: dict[int, DomTreeDict] = field(default_factory=dict)
+    parents: dict[int, DomTreeDict | None] = field(default_factory=dict)
+    # element key -> notte id, used to keep ids stable across patches
+    ids: dict[int, str] = field(default_factory=dict)
+    id_counter: defaultdict[str, int] = field(default_factory=new_id_counter)
+
+    @staticmethod
+    def from_root(root: DomTreeDict) -> "IncrementalDomState":
+        state = IncrementalDomState(root=root)
+        state.index(root, parent=None)
+        return state
+
+    def index(self, root: DomTreeDict, parent: DomTreeDict | None) -> None:
+        stack: list[tuple[DomTreeDict, DomTreeDict | None]] = [(root, parent)]
+        while stack:
+            node, parent = stack.pop()
+            key = node.get("key")
+            if key is not None:
+                self.nodes[key] = node
+                self.parents[key] = parent
+            stack.extend((child, node) for child in node.get("children", []) if child is not None)
+
+    def unindex(self, root: DomTreeDict) -> None:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            key = node.get("key")
+            if key is not None:
+                _ = self.nodes.pop(key, None)
+                _ = self.parents.pop(key, None)
+            stack.extend(child for child in node.get("children", []) if child is not None)
+
+    def build(self, url: str, browser_selectors: bool = False) -> NotteDomNode:
+        builder = DomTreeBuilder(
+            url, browser_selectors=browser_selectors, id_counter=self.id_counter, previous_ids=self.ids
+        )
+        root = builder.build(self.root)
+        # ids of the removed elements are dropped
+        self.ids = builder.ids
+        return root
+
+
+# incremental parsing state of each page (dropped with the page)
+_incremental_states: "weakref.WeakKeyDictionary[Page, IncrementalDomState]" = weakref.WeakKeyDictionary()
 
 
 class ParseDomTreePipe:
     @staticmethod
     async def forward(page: Page, config: DomParsingConfig | None = None) -> NotteDomNode:
         config = config or DomParsingConfig()
-        dom_tree = await ParseDomTreePipe.parse_dom_tree(page, config)
-        dom_tree = generate_sequential_ids(dom_tree)
-        notte_dom_tree = dom_tree.to_notte_domnode()
+        if config.incremental:
+            return await ParseDomTreePipe.forward_incremental(page, config)
+        if config.offload:
+            return await ParseDomTreePipe.forward_offloaded(page, config)
+        if config.verbose:
+            logger.info(f"Parsing DOM tree for {page.url} with config: {config.model_dump()}")
+        payload: DomTreeDict | CompactDomTreeDict | None = await evaluate_dom_tree_js(page, config.model_dump())
+        notte_dom_tree = ParseDomTreePipe.build(payload, page.url, config)
         DomErrorBuffer.flush()
         return notte_dom_tree
 
     @staticmethod
-    async def parse_dom_tree(page: Page, config: DomParsingConfig) -> DOMBaseNode:
-        js_code = DOM_TREE_JS_PATH.read_text()
+    def build(payload: DomTreeDict | CompactDomTreeDict | None, url: str, config: DomParsingConfig) -> NotteDomNode:
+        if payload is None:
+            raise SnapshotProcessingError(url, "Failed to parse HTML to dictionary")
+        builder = DomTreeBuilder(url, browser_selectors=config.browser_selectors)
+        if config.compact_payload:
+            return builder.build_compact(cast(CompactDomTreeDict, payload))
+        return builder.build(cast(DomTreeDict, payload))
+
+    @staticmethod
+    async def forward_offloaded(page: Page, config: DomParsingConfig) -> NotteDomNode:
         if config.verbose:
             logger.info(f"Parsing DOM tree for {page.url} with config: {config.model_dump()}")
-        node: DomTreeDict | None = await page.evaluate(js_code, config.model_dump())
-        if node is None:
+        serialized: str | None = await evaluate_dom_tree_js(page, config.model_dump(), serialized=True)
+        if serialized is None:
             raise SnapshotProcessingError(page.url, "Failed to parse HTML to dictionary")
-        parsed = ParseDomTreePipe._parse_node(
-            node,
-            parent=None,
-            in_iframe=False,
-            in_shadow_root=False,
-            iframe_parent_css_paths=[],
-            notte_selector=page.url,
+        loop = asyncio.get_running_loop()
+        notte_dom_tree = await loop.run_in_executor(
+            dom_executor(), ParseDomTreePipe.process_serialized, serialized, page.url, config
         )
-        if parsed is None:
-            raise SnapshotProcessingError(page.url, f"Failed to parse DOM tree. Dom Tree is empty. {node}")
-        return parsed
+        DomErrorBuffer.flush()
+        return notte_dom_tree
 
     @staticmethod
-    def _parse_node(
-        node: DomTreeDict,
-        parent: "DOMElementNode | None",
-        in_iframe: bool,
-        in_shadow_root: bool,
-        iframe_parent_css_paths: list[str],
-        notte_selector: str,
-    ) -> DOMBaseNode | None:
-        if node.get("type") == "TEXT_NODE":
-            text_node = DOMTextNode(
-                text=node["text"],
-                is_visible=node["isVisible"],
-                parent=parent,
-            )
-
-            return text_node
-
-        tag_name = node["tagName"]
-        attrs = node.get("attributes", {})
-        xpath = node["xpath"]
-
-        if tag_name is None:
-            if xpath is None and len(attrs) == 0 and len(node.get("children", [])) == 0:
-                return None
-            raise ValueError(f"Tag name is None for node: {node}")
-
-        highlight_index = node.get("highlightIndex")
-        shadow_root = node.get("shadowRoot", False)
-        if xpath is None:
-            raise ValueError(f"XPath is None for node: {node}")
-        css_path = build_csspath(
-            tag_name=tag_name,
-            xpath=xpath,
-            attributes=attrs,
-            highlight_index=highlight_index,
-        )
-        _iframe_parent_css_paths = iframe_parent_css_paths
-        notte_selector = ":".join([notte_selector, str(hash(xpath)), str(hash(css_path))])
-
-        if shadow_root:
-            in_shadow_root = True
-
-        if tag_name.lower() == "iframe":
-            in_iframe = True
-            _iframe_parent_css_paths = _iframe_parent_css_paths + [css_path]
-
-        element_node = DOMElementNode(
-            tag_name=tag_name,
-            in_iframe=in_iframe,
-            xpath=xpath,
-            css_path=css_path,
-            notte_selector=notte_selector,
-            iframe_parent_css_selectors=iframe_parent_css_paths,
-            attributes=attrs,
-            is_visible=node.get("isVisible", False),
-            is_interactive=node.get("isInteractive", False),
-            is_top_element=node.get("isTopElement", False),
-            is_editable=node.get("isEditable", False),
-            highlight_index=node.get("highlightIndex"),
-            shadow_root=shadow_root,
-            in_shadow_root=in_shadow_root,
-            parent=parent,
-        )
+    def process_serialized(serialized: str, url: str, config: DomParsingConfig) -> NotteDomNode:
+        """Same processing as the inline path of `forward`, starting from the JSON serialized DOM tree"""
+        return ParseDomTreePipe.build(json.loads(serialized), url, config)
 
-        children: list[DOMBaseNode] = []
-        for child in node.get("children", []):
-            if child is not None:
-                child_node = ParseDomTreePipe._parse_node(
-                    node=child,
-                    parent=element_node,
-                    in_iframe=in_iframe,
-                    iframe_parent_css_paths=_iframe_parent_css_paths,
-                    notte_selector=notte_selector,
-                    in_shadow_root=in_shadow_root,
+    @staticmethod
+    async def forward_incremental(page: Page, config: DomParsingConfig, retry: bool = True) -> NotteDomNode:
+        state = _incremental_states.get(page)
+        args = {**config.model_dump(), "reset": state is None}
+        try:
+            if config.offload:
+                serialized: str | None = await evaluate_dom_tree_js(page, args, serialized=True)
+                loop = asyncio.get_running_loop()
+                state, notte_dom_tree = await loop.run_in_executor(
+                    dom_executor(), ParseDomTreePipe.process_incremental, serialized, state, page.url, config
                 )
-                if child_node is not None:
-                    children.append(child_node)
+            else:
+                result: IncrementalDomTreeDict | None = await evaluate_dom_tree_js(page, args)
+                state, notte_dom_tree = ParseDomTreePipe.process_incremental(result, state, page.url, config)
+        except SnapshotProcessingError:
+            if _incremental_states.pop(page, None) is None or not retry:
+                raise
+            # python and page states are out of sync: start over with a full rebuild
+            return await ParseDomTreePipe.forward_incremental(page, config, retry=False)
+        _incremental_states[page] = state
+        DomErrorBuffer.flush()
+        return notte_dom_tree
+
+    @staticmethod
+    def process_incremental(
+        result: IncrementalDomTreeDict | str | None,
+        state: IncrementalDomState | None,
+        url: str,
+        config: DomParsingConfig,
+    ) -> tuple[IncrementalDomState, NotteDomNode]:
+        """Apply the incremental payload (possibly JSON serialized) to `state` and build the new tree"""
+        if isinstance(result, str):
+            result = cast(IncrementalDomTreeDict | None, json.loads(result))
+        if result is None:
+            raise SnapshotProcessingError(url, "Failed to parse HTML to dictionary")
+
+        if result["mode"] == "full" or state is None:
+            tree = result.get("tree")
+            if tree is None:
+                raise SnapshotProcessingError(url, "Failed to parse HTML to dictionary")
+            state = IncrementalDomState.from_root(tree)
+        else:
+            patches = result.get("patches", [])
+            if config.verbose:
+                logger.info(f"Applying {len(patches)} incremental DOM patch(es) for {url}")
+            for patch in patches:
+                ParseDomTreePipe.apply_patch(state, patch, url)
+        return state, state.build(url, browser_selectors=config.browser_selectors)
 
-        element_node.children = children
+    @staticmethod
+    def apply_patch(state: IncrementalDomState, patch: DomTreePatchDict, url: str) -> None:
+        old = state.nodes.get(patch["key"])
+        if old is None:
+            raise SnapshotProcessingError(url, f"Unknown element key {patch['key']} in incremental DOM patch")
+        parent = state.parents[patch["key"]]
+        new = patch["node"]
+        state.unindex(old)
+        state.index(new, parent=parent)
+        if parent is None:
+            state.root = new
+            return
+        parent["children"] = [new if child is old else child for child in parent["children"]]
 
-        return element_node
+    @staticmethod
+    async def evaluate_dom_tree(page: Page, config: DomParsingConfig) -> DomTreeDict:
+        if config.verbose:
+            logger.info(f"Parsing DOM tree for {page.url} with config: {config.model_dump()}")
+        node: DomTreeDict | None = await evaluate_dom_tree_js(page, config.model_dump())
+        if node is None:
+            raise SnapshotProcessingError(page.url, "Failed to parse HTML to dictionary")
+        return node
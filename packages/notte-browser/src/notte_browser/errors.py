@@ -105,6 +105,20 @@ class EmptyPageContentError(BrowserError):
         )
 
 
+class StaleSnapshotError(BrowserError):
+    def __init__(self, field: str, url: str) -> None:
+        super().__init__(
+            dev_message=(
+                f"Cannot load the deferred snapshot field '{field}' for {url}: the page has changed since the snapshot"
+                " was taken (a new snapshot was taken or an action was executed). Load the field before interacting"
+                " with the page, or use a snapshot profile that captures it."
+            ),
+            user_message="The page has changed since it was observed. Observe the page again to continue.",
+            agent_message="The page has changed since it was observed. Hint: observe the page again.",
+            should_retry_later=False,
+        )
+
+
 class UnexpectedBrowserError(BrowserError):
     def __init__(self, url: str) -> None:
         super().__init__(
@@ -0,0 +1,410 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import ClassVar, Self
+
+from loguru import logger
+from notte_core.common.config import FrozenConfig
+from patchright.async_api import BrowserContext, Route
+from pydantic import BaseModel, model_validator
+
+# statuses that can be cached without explicit freshness information (RFC 9111, section 4.2.2)
+CACHEABLE_STATUSES = frozenset({200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501})
+# request headers identifying the user: responses to these requests are only shared if they are explicitly `public`
+CREDENTIAL_HEADERS = frozenset({"authorization", "cookie"})
+# headers that describe the transfer of the original response, not the (decoded) body we store
+HOP_BY_HOP_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"})
+
+
+class HttpCacheConfig(FrozenConfig):
+    enabled: bool = False
+    # sqlite database file shared by every context, session and process using the same path
+    path: str | None = None
+    # total size of the cached bodies, least recently used responses are evicted first
+    max_size_bytes: int = 512 * 1024 * 1024
+    # larger responses are never cached
+    max_entry_size_bytes: int = 16 * 1024 * 1024
+    # resource types served from the cache. `None` means every GET request
+    resource_types: list[str] | None = ["script", "stylesheet", "font", "image"]
+    # store every GET response (including documents and `no-store` responses) to replay the site later
+    record: bool = False
+    # offline mode: stored responses are served regardless of their freshness and misses are aborted
+    replay: bool = False
+
+    @model_validator(mode="after")
+    def check_path(self) -> Self:
+        if self.enabled and self.path is None:
+            raise ValueError("'path' is required to enable the HTTP cache")
+        return self
+
+    def enable(self: Self, path: str) -> Self:
+        return self._copy_and_validate(enabled=True, path=path)
+
+    def disable(self: Self) -> Self:
+        return self._copy_and_validate(enabled=False)
+
+    def set_max_size_bytes(self: Self, value: int) -> Self:
+        return self._copy_and_validate(max_size_bytes=value)
+
+    def set_resource_types(self: Self, value: list[str] | None) -> Self:
+        return self._copy_and_validate(resource_types=value)
+
+    def set_record(self: Self, value: bool = True) -> Self:
+        # recorded sites are replayed entirely
+        return self._copy_and_validate(record=value, resource_types=None if value else self.resource_types)
+
+    def set_replay(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(replay=value, resource_types=None if value else self.resource_types)
+
+
+class HttpCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    # stale responses confirmed by the server (304 Not Modified)
+    revalidated: int = 0
+    stored: int = 0
+    evictions: int = 0
+    bytes_served: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    url: str
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    created_at: float
+    # the response must be revalidated with the server after this date
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers used to revalidate a stale response"""
+        validators: dict[str, str] = {}
+        if "etag" in self.headers:
+            validators["if-none-match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            validators["if-modified-since"] = self.headers["last-modified"]
+        return validators
+
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for directive in (value or "").split(","):
+        name, _, arg = directive.strip().partition("=")
+        if len(name) > 0:
+            directives[name.lower()] = arg.strip('"') if len(arg) > 0 else None
+    return directives
+
+
+def _parse_date(value: str | None) -> float | None:
+    if value is None:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: dict[str, str]) -> float | None:
+    """
+    Number of seconds the response can be served without revalidation. `None` if it must not be stored.
+
+    Follows RFC 9111 for a shared cache (responses are shared between contexts and sessions): `private`
+    responses are not stored, then `s-maxage`, `max-age`, `Expires` and the heuristic 10% of the time since
+    `Last-Modified` are used. Responses with `no-cache` or without freshness information are stored with a lifetime
+    of 0 if they carry a validator (ETag / Last-Modified) so that they can be revalidated cheaply.
+    """
+    directives = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in directives or "private" in directives or headers.get("vary", "").strip() == "*":
+        return None
+    has_validator = "etag" in headers or "last-modified" in headers
+    if "no-cache" in directives:
+        return 0.0 if has_validator else None
+    age_header = headers.get("age", "")
+    age = float(age_header) if age_header.isdigit() else 0.0
+    max_age = directives.get("s-maxage") or directives.get("max-age")
+    if max_age is not None and max_age.isdigit():
+        return max(0.0, int(max_age) - age)
+    date = _parse_date(headers.get("date")) or time.time()
+    expires = _parse_date(headers.get("expires"))
+    if "expires" in headers:
+        # invalid `Expires` values mean "already expired"
+        return max(0.0, expires - date) if expires is not None else (0.0 if has_validator else None)
+    last_modified = _parse_date(headers.get("last-modified"))
+    if last_modified is not None:
+        return max(0.0, (date - last_modified) / 10)
+    return 0.0 if has_validator else None
+
+
+class HttpCache:
+    """
+    Disk-backed cache of HTTP responses, shared by the browser contexts created with the same config.
+
+    Responses are stored in a sqlite database (bodies included) and evicted in least recently used order once
+    `config.max_size_bytes` is reached.
+    """
+
+    _shared: ClassVar[dict[str, "HttpCache"]] = {}
+
+    @staticmethod
+    def shared(config: HttpCacheConfig) -> "HttpCache":
+        """Cache instance shared by all the contexts created with the same config."""
+        key = config.model_dump_json()
+        if key not in HttpCache._shared:
+            HttpCache._shared[key] = HttpCache(config)
+        return HttpCache._shared[key]
+
+    def __init__(self, config: HttpCacheConfig) -> None:
+        if config.path is None:
+            raise ValueError("'path' is required to create an HTTP cache")
+        self.config: HttpCacheConfig = config
+        self.stats: HttpCacheStats = HttpCacheStats()
+        self._lock: threading.Lock = threading.Lock()
+        Path(config.path).parent.mkdir(parents=True, exist_ok=True)
+        self._db: sqlite3.Connection = sqlite3.connect(config.path, check_same_thread=False)
+        _ = self._db.execute(
+            (
+                "CREATE TABLE IF NOT EXISTS http_cache (key TEXT PRIMARY KEY, url TEXT NOT NULL, status INTEGER NOT NULL, "
+                "headers TEXT NOT NULL, body BLOB NOT NULL, size INTEGER NOT NULL, created_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+        )
+        _ = self._db.execute("CREATE INDEX IF NOT EXISTS http_cache_last_access ON http_cache (last_access)")
+        self._db.commit()
+
+    @staticmethod
+    def key(method: str, url: str) -> str:
+        return hashlib.sha256(f"{method.upper()} {url}".encode()).hexdigest()
+
+    def get(self, method: str, url: str) -> CachedResponse | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, status, headers, body, created_at, expires_at FROM http_cache WHERE key = ?",
+                (self.key(method, url),),
+            ).fetchone()
+            if row is None:
+                return None
+            _ = self._db.execute(
+                "UPDATE http_cache SET last_access = ? WHERE key = ?", (time.time(), self.key(method, url))
+            )
+            self._db.commit()
+        url, status, headers, body, created_at, expires_at = row
+        return CachedResponse(
+            url=url,
+            status=status,
+            headers=json.loads(headers),
+            body=body,
+            created_at=created_at,
+            expires_at=expires_at,
+        )
+
+    def is_storable(self, status: int, headers: dict[str, str], body: bytes, credentialed: bool = False) -> bool:
+        if len(body) > self.config.max_entry_size_bytes or status == 206:
+            return False
+        if self.config.record:
+            return True
+        if status not in CACHEABLE_STATUSES:
+            return False
+        # responses to requests with cookies / credentials are personalized unless the server says otherwise
+        if credentialed and "public" not in parse_cache_control(headers.get("cache-control")):
+            return False
+        vary = {name.strip().lower() for name in headers.get("vary", "").split(",") if len(name.strip()) > 0}
+        # responses varying on request headers other than the encoding (which is decoded before storage)
+        # would need one entry per variant
+        if len(vary - {"accept-encoding"}) > 0:
+            return False
+        return freshness_lifetime(headers) is not None
+
+    def set(
+        self,
+        method: str,
+        url: str,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        credentialed: bool = False,
+    ) -> CachedResponse | None:
+        headers = {name.lower(): value for name, value in headers.items()}
+        if not self.is_storable(status, headers, body, credentialed):
+            return None
+        now = time.time()
+        # cookies belong to the context that received the response
+        stored_headers = {
+            name: value for name, value in headers.items() if name not in HOP_BY_HOP_HEADERS and name != "set-cookie"
+        }
+        response = CachedResponse(
+            url=url,
+            status=status,
+            headers=stored_headers,
+            body=body,
+            created_at=now,
+            expires_at=now + (freshness_lifetime(headers) or 0.0),
+        )
+        with self._lock:
+            _ = self._db.execute(
+                (
+                    "INSERT OR REPLACE INTO http_cache "
+                    "(key, url, status, headers, body, size, created_at, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                ),
+                (
+                    self.key(method, url),
+                    url,
+                    status,
+                    json.dumps(stored_headers),
+                    body,
+                    len(body),
+                    now,
+                    response.expires_at,
+                    now,
+                ),
+            )
+            self.stats.stored += 1
+            self._evict()
+            self._db.commit()
+        return response
+
+    def refresh(self, method: str, cached: CachedResponse, headers: dict[str, str]) -> CachedResponse:
+        """Update the freshness of a response revalidated by the server"""
+        merged = {**cached.headers, **{name.lower(): value for name, value in headers.items()}}
+        merged = {name: value for name, value in merged.items() if name not in HOP_BY_HOP_HEADERS}
+        lifetime = freshness_lifetime(merged)
+        refreshed = CachedResponse(
+            url=cached.url,
+            status=cached.status,
+            headers=merged,
+            body=cached.body,
+            created_at=cached.created_at,
+            expires_at=time.time() + (lifetime or 0.0),
+        )
+        with self._lock:
+            _ = self._db.execute(
+                "UPDATE http_cache SET headers = ?, expires_at = ?, last_access = ? WHERE key = ?",
+                (json.dumps(merged), refreshed.expires_at, time.time(), self.key(method, cached.url)),
+            )
+            self._db.commit()
+        return refreshed
+
+    def _evict(self) -> None:
+        total: int = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.config.max_size_bytes:
+            return
+        rows = self._db.execute("SELECT key, size FROM http_cache ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if total <= self.config.max_size_bytes:
+                break
+            _ = self._db.execute("DELETE FROM http_cache WHERE key = ?", (key,))
+            total -= size
+            self.stats.evictions += 1
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            _ = self._db.execute("DELETE FROM http_cache")
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class HttpCacheRoute:
+    """
+    Route handler serving the GET requests of a browser context from an `HttpCache`.
+
+    Fresh responses are served without hitting the network, stale ones are revalidated with a conditional
+    request and cacheable misses are fetched, stored and forwarded to the page.
+    """
+
+    def __init__(self, cache: HttpCache, verbose: bool = False) -> None:
+        self.cache: HttpCache = cache
+        self.verbose: bool = verbose
+
+    @staticmethod
+    async def install(context: BrowserContext, config: HttpCacheConfig, verbose: bool = False) -> HttpCache | None:
+        if not config.enabled:
+            return None
+        cache = HttpCache.shared(config)
+        await context.route("**/*", HttpCacheRoute(cache, verbose=verbose).handle)
+        return cache
+
+    def is_cacheable(self, method: str, url: str, resource_type: str) -> bool:
+        resource_types = self.cache.config.resource_types
+        return (
+            method == "GET"
+            and url.startswith(("http://", "https://"))
+            and (resource_types is None or resource_type in resource_types)
+        )
+
+    async def serve(self, route: Route, response: CachedResponse) -> None:
+        self.cache.stats.hits += 1
+        self.cache.stats.bytes_served += len(response.body)
+        await route.fulfill(status=response.status, headers=response.headers, body=response.body)
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        if not self.is_cacheable(request.method, request.url, request.resource_type):
+            await route.fallback()
+            return
+        # sqlite calls are blocking: keep them off the event loop
+        cached = await asyncio.to_thread(self.cache.get, request.method, request.url)
+        if cached is not None and (cached.fresh or self.cache.config.replay):
+            await self.serve(route, cached)
+            return
+        if self.cache.config.replay:
+            self.cache.stats.misses += 1
+            if self.verbose:
+                logger.warning(f"🗄️ HTTP cache miss in replay mode for {request.url}")
+            await route.abort("internetdisconnected")
+            return
+        headers = request.headers
+        if cached is not None and len(cached.validators) > 0:
+            headers = {**headers, **cached.validators}
+        try:
+            # redirects are forwarded to the page (and cached) instead of being followed here
+            response = await route.fetch(headers=headers, max_redirects=0)
+            body = await response.body()
+        except Exception as e:
+            # the route must always be resolved: an unhandled error would leave the request of the page pending
+            if cached is not None:
+                if self.verbose:
+                    logger.warning(f"🗄️ Serving stale HTTP cache entry for {request.url} after a network error: {e}")
+                await self.serve(route, cached)
+                return
+            if self.verbose:
+                logger.warning(f"🗄️ Network error for {request.url}, falling back to the browser: {e}")
+            # the browser sends the request again and reports the network failure to the page
+            await route.fallback()
+            return
+        if cached is not None and response.status == 304:
+            self.cache.stats.revalidated += 1
+            await self.serve(
+                route, await asyncio.to_thread(self.cache.refresh, request.method, cached, response.headers)
+            )
+            return
+        self.cache.stats.misses += 1
+        # `request.headers` does not include the cookies added by the browser
+        credentialed = len(CREDENTIAL_HEADERS & set(await request.all_headers())) > 0
+        _ = await asyncio.to_thread(
+            self.cache.set, request.method, request.url, response.status, response.headers, body, credentialed
+        )
+        await route.fulfill(response=response, body=body)
@@ -0,0 +1,209 @@
+import fnmatch
+from enum import StrEnum
+from typing import ClassVar, Self
+from urllib.parse import urlparse
+
+from loguru import logger
+from notte_core.common.config import FrozenConfig
+from notte_core.utils.url import get_root_domain
+from patchright.async_api import BrowserContext, Request, Route
+from pydantic import BaseModel, Field
+
+
+class InterceptionProfile(StrEnum):
+    # every request goes through
+    NONE = "none"
+    # images, videos, audio and fonts are blocked
+    NO_MEDIA = "no_media"
+    # analytics, ads and tracking pixels served from third-party domains are blocked
+    NO_THIRD_PARTY_TRACKERS = "no_third_party_trackers"
+    # no_media + no_third_party_trackers + subtitles and manifests.
+    # Stylesheets are kept: they are needed to compute the visibility of the DOM nodes
+    TEXT_ONLY = "text_only"
+
+
+MEDIA_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+PROFILE_RESOURCE_TYPES: dict[InterceptionProfile, frozenset[str]] = {
+    InterceptionProfile.NONE: frozenset(),
+    InterceptionProfile.NO_MEDIA: MEDIA_RESOURCE_TYPES,
+    InterceptionProfile.NO_THIRD_PARTY_TRACKERS: frozenset(),
+    InterceptionProfile.TEXT_ONLY: MEDIA_RESOURCE_TYPES | {"texttrack", "manifest"},
+}
+
+TRACKER_DOMAINS = frozenset(
+    {
+        "2mdn.net",
+        "adnxs.com",
+        "adsrvr.org",
+        "amplitude.com",
+        "chartbeat.com",
+        "clarity.ms",
+        "criteo.com",
+        "criteo.net",
+        "doubleclick.net",
+        "facebook.net",
+        "fullstory.com",
+        "google-analytics.com",
+        "googleadservices.com",
+        "googlesyndication.com",
+        "googletagmanager.com",
+        "googletagservices.com",
+        "hotjar.com",
+        "mixpanel.com",
+        "nr-data.net",
+        "outbrain.com",
+        "quantserve.com",
+        "rubiconproject.com",
+        "scorecardresearch.com",
+        "segment.com",
+        "segment.io",
+        "taboola.com",
+    }
+)
+
+
+class InterceptionConfig(FrozenConfig):
+    profile: InterceptionProfile = InterceptionProfile.NONE
+    # domains (e.g. `cdn.example.com`, subdomains included) or url glob patterns (e.g. `*://*/api/*`)
+    # that are never blocked. The allow list takes precedence over every other rule
+    allow: list[str] = Field(default_factory=list)
+    # domains or url glob patterns that are always blocked
+    deny: list[str] = Field(default_factory=list)
+    # profile applied instead of `profile` on the pages of a given domain (subdomains included)
+    domain_overrides: dict[str, InterceptionProfile] = Field(default_factory=dict)
+
+    @property
+    def active(self) -> bool:
+        return (
+            self.profile != InterceptionProfile.NONE
+            or len(self.deny) > 0
+            or any(profile != InterceptionProfile.NONE for profile in self.domain_overrides.values())
+        )
+
+    def set_profile(self: Self, value: InterceptionProfile) -> Self:
+        return self._copy_and_validate(profile=value)
+
+    def set_allow(self: Self, value: list[str]) -> Self:
+        return self._copy_and_validate(allow=value)
+
+    def set_deny(self: Self, value: list[str]) -> Self:
+        return self._copy_and_validate(deny=value)
+
+    def set_domain_override(self: Self, domain: str, profile: InterceptionProfile) -> Self:
+        return self._copy_and_validate(domain_overrides={**self.domain_overrides, domain: profile})
+
+
+class InterceptionStats(BaseModel):
+    # rough median transfer sizes (in bytes) used to estimate the bandwidth saved by blocked requests
+    ESTIMATED_SIZES: ClassVar[dict[str, int]] = {
+        "image": 30_000,
+        "media": 500_000,
+        "font": 25_000,
+        "script": 20_000,
+        "stylesheet": 10_000,
+    }
+    DEFAULT_ESTIMATED_SIZE: ClassVar[int] = 2_000
+
+    requests: int = 0
+    blocked_requests: int = 0
+    estimated_blocked_bytes: int = 0
+    blocked_by_type: dict[str, int] = Field(default_factory=dict)
+    blocked_by_rule: dict[str, int] = Field(default_factory=dict)
+
+    def record(self, resource_type: str, rule: str | None) -> None:
+        self.requests += 1
+        if rule is None:
+            return
+        self.blocked_requests += 1
+        self.estimated_blocked_bytes += self.ESTIMATED_SIZES.get(resource_type, self.DEFAULT_ESTIMATED_SIZE)
+        self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+        self.blocked_by_rule[rule] = self.blocked_by_rule.get(rule, 0) + 1
+
+
+def _host(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+def _matches_domain(host: str, domain: str) -> bool:
+    domain = domain.lower()
+    return host == domain or host.endswith(f".{domain}")
+
+
+def _matches(url: str, host: str, pattern: str) -> bool:
+    if "/" in pattern or "*" in pattern:
+        return fnmatch.fnmatchcase(url, pattern)
+    return _matches_domain(host, pattern)
+
+
+class RequestInterceptor:
+    """
+    Blocks requests of a browser context according to an `InterceptionConfig` (installed with `context.route`).
+
+    Requests that are not blocked fall back to the other route handlers of the context (or to the network).
+    Counters are kept in `stats` and reset each time the context is handed out to a new session.
+    """
+
+    def __init__(self, config: InterceptionConfig, verbose: bool = False) -> None:
+        self.config: InterceptionConfig = config
+        self.verbose: bool = verbose
+        self.stats: InterceptionStats = InterceptionStats()
+
+    @staticmethod
+    async def install(
+        context: BrowserContext, config: InterceptionConfig, verbose: bool = False
+    ) -> "RequestInterceptor | None":
+        if not config.active:
+            return None
+        interceptor = RequestInterceptor(config, verbose=verbose)
+        await context.route("**/*", interceptor.handle)
+        return interceptor
+
+    def reset(self) -> None:
+        self.stats = InterceptionStats()
+
+    def page_profile(self, page_host: str) -> InterceptionProfile:
+        for domain, profile in self.config.domain_overrides.items():
+            if _matches_domain(page_host, domain):
+                return profile
+        return self.config.profile
+
+    def block_rule(self, url: str, resource_type: str, page_url: str | None = None) -> str | None:
+        """Name of the rule blocking the request, `None` if the request is allowed"""
+        if not url.startswith(("http://", "https://")):
+            # data urls, blobs, extensions, ...
+            return None
+        host = _host(url)
+        if any(_matches(url, host, pattern) for pattern in self.config.allow):
+            return None
+        if any(_matches(url, host, pattern) for pattern in self.config.deny):
+            return "deny"
+        page_host = _host(page_url) if page_url is not None else ""
+        profile = self.page_profile(page_host)
+        if resource_type in PROFILE_RESOURCE_TYPES[profile]:
+            return profile.value
+        if profile in (InterceptionProfile.NO_THIRD_PARTY_TRACKERS, InterceptionProfile.TEXT_ONLY):
+            root_domain = get_root_domain(url)
+            # first-party analytics endpoints are kept: blocking them can break the page
+            if root_domain in TRACKER_DOMAINS and root_domain != get_root_domain(page_url or ""):
+                return "tracker"
+        return None
+
+    @staticmethod
+    def page_url(request: Request) -> str | None:
+        try:
+            return request.frame.page.url
+        except Exception:
+            # service worker requests are not attached to a frame
+            return None
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        rule = self.block_rule(request.url, request.resource_type, self.page_url(request))
+        self.stats.record(request.resource_type, rule)
+        if rule is None:
+            await route.fallback()
+            return
+        if self.verbose:
+            logger.debug(f"🚫 Blocked {request.resource_type} request to {request.url} ({rule})")
+        await route.abort("blockedbyclient")
@@ -1,8 +1,13 @@
 import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import ClassVar
+from collections import deque
+from dataclasses import dataclass, field
+from typing import ClassVar, Self
+from urllib.parse import urlparse
 
 from loguru import logger
+from notte_core.common.config import FrozenConfig
 from notte_core.common.resource import AsyncResource
 from notte_sdk.types import BrowserType
 from openai import BaseModel
@@ -11,6 +16,8 @@ from patchright.async_api import (
 )
 from patchright.async_api import (
     BrowserContext,
+    Frame,
+    Page,
     Playwright,
     async_playwright,
 )
@@ -18,6 +25,8 @@ from pydantic import PrivateAttr
 from typing_extensions import override
 
 from notte_browser.errors import BrowserNotStartedError
+from notte_browser.http_cache import HttpCache, HttpCacheRoute
+from notte_browser.interception import RequestInterceptor
 from notte_browser.window import BrowserResource, BrowserWindow, BrowserWindowConfig, BrowserWindowOptions
 
 
@@ -146,31 +155,41 @@ class WindowManager(PlaywrightManager):
         self.browser = None
         return False
 
+    async def create_context(self, options: BrowserWindowOptions) -> BrowserContext:
+        if self.browser is None:
+            raise BrowserNotStartedError()
+        viewport = None
+        if options.viewport_width is not None or options.viewport_height is not None:
+            viewport = {
+                "width": options.viewport_width,
+                "height": options.viewport_height,
+            }
+        else:
+            logger.warning("No viewport set, using default viewport in playwright")
+
+        context = await self.browser.new_context(
+            # no viewport should be False for headless browsers
+            no_viewport=not options.headless,
+            viewport=viewport,  # pyright: ignore[reportArgumentType]
+            permissions=[
+                "clipboard-read",
+                "clipboard-write",
+            ],  # Needed for clipboard copy/paste to respect tabs / new lines
+            proxy=options.proxy.to_playwright() if options.proxy is not None else None,
+            user_agent=options.user_agent,
+        )
+        return context
+
     @override
     async def get_browser_resource(self, options: BrowserWindowOptions) -> BrowserResource:
         if self.browser is None:
             self.browser = await self.create_playwright_browser(options)
         async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
-            viewport = None
-            if options.viewport_width is not None or options.viewport_height is not None:
-                viewport = {
-                    "width": options.viewport_width,
-                    "height": options.viewport_height,
-                }
-            else:
-                logger.warning("No viewport set, using default viewport in playwright")
-
-            context: BrowserContext = await self.browser.new_context(
-                # no viewport should be False for headless browsers
-                no_viewport=not options.headless,
-                viewport=viewport,  # pyright: ignore[reportArgumentType]
-                permissions=[
-                    "clipboard-read",
-                    "clipboard-write",
-                ],  # Needed for clipboard copy/paste to respect tabs / new lines
-                proxy=options.proxy.to_playwright() if options.proxy is not None else None,
-                user_agent=options.user_agent,
-            )
+            context = await self.create_context(options)
+
+            # routes run in reverse registration order: blocked requests never reach the cache
+            http_cache = await HttpCacheRoute.install(context, options.http_cache, verbose=self.verbose)
+            interceptor = await RequestInterceptor.install(context, options.interception, verbose=self.verbose)
 
             if len(context.pages) == 0:
                 page = await context.new_page()
@@ -179,27 +198,313 @@ class WindowManager(PlaywrightManager):
             return BrowserResource(
                 page=page,
                 options=options,
+                interceptor=interceptor,
+                http_cache=http_cache,
             )
 
+    def log_interception_stats(self, resource: BrowserResource) -> None:
+        if not self.verbose or resource.interceptor is None:
+            return
+        stats = resource.interceptor.stats
+        logger.info(
+            (
+                f"🚫 Blocked {stats.blocked_requests}/{stats.requests} requests "
+                f"(~{stats.estimated_blocked_bytes / 1e6:.1f} MB saved): {stats.blocked_by_type}"
+            )
+        )
+
     @override
     async def release_browser_resource(self, resource: BrowserResource) -> None:
+        self.log_interception_stats(resource)
         context: BrowserContext = resource.page.context
         await context.close()
 
 
+class ContextPoolConfig(FrozenConfig):
+    # number of idle contexts kept warm for each set of context options
+    min_size: int = 2
+    # maximum number of contexts (idle + in use) kept for each set of context options
+    max_size: int = 8
+    # idle contexts older than this are closed instead of being handed out
+    idle_ttl_seconds: float = 300.0
+    # contexts are discarded (instead of recycled) after this many sessions
+    max_reuse: int = 20
+
+    def set_min_size(self: Self, value: int) -> Self:
+        return self._copy_and_validate(min_size=value)
+
+    def set_max_size(self: Self, value: int) -> Self:
+        return self._copy_and_validate(max_size=value)
+
+    def set_idle_ttl_seconds(self: Self, value: float) -> Self:
+        return self._copy_and_validate(idle_ttl_seconds=value)
+
+    def set_max_reuse(self: Self, value: int) -> Self:
+        return self._copy_and_validate(max_reuse=value)
+
+
+@dataclass
+class PooledContext:
+    key: str
+    context: BrowserContext
+    page: Page
+    created_at: float = field(default_factory=time.time)
+    idle_since: float = field(default_factory=time.time)
+    nb_uses: int = 0
+    # origins visited while the context was checked out, cleared on release
+    origins: set[str] = field(default_factory=set)
+    interceptor: RequestInterceptor | None = None
+    http_cache: HttpCache | None = None
+
+    def is_expired(self, ttl: float) -> bool:
+        return time.time() - self.idle_since > ttl
+
+    def track_origin(self, frame: Frame) -> None:
+        parsed = urlparse(frame.url)
+        if parsed.scheme in ("http", "https"):
+            self.origins.add(f"{parsed.scheme}://{parsed.netloc}")
+
+    def track_page(self, page: Page) -> None:
+        page.on("framenavigated", self.track_origin)
+
+    def start_tracking(self) -> None:
+        # sessions can open new tabs and popups: the origins of every page of the context are tracked
+        self.context.on("page", self.track_page)
+        for page in self.context.pages:
+            self.track_page(page)
+
+    def stop_tracking(self) -> None:
+        self.context.remove_listener("page", self.track_page)
+        for page in self.context.pages:
+            page.remove_listener("framenavigated", self.track_origin)
+
+
+class PooledWindowManager(WindowManager):
+    """
+    Window manager that keeps a single long-lived browser and a pool of pre-created contexts.
+
+    Contexts are keyed by the context-level options (proxy, user agent, viewport, headless). They are handed out
+    in O(1), recycled on `release_browser_resource` (cookies and storage are cleared) and refilled in the background.
+    Browser-level options (browser type, chrome args, ...) are taken from the first window created by the manager.
+    """
+
+    pool: ContextPoolConfig = ContextPoolConfig()
+
+    _idle: dict[str, deque[PooledContext]] = PrivateAttr(default_factory=dict)
+    _in_use: dict[int, PooledContext] = PrivateAttr(default_factory=dict)
+    _sizes: dict[str, int] = PrivateAttr(default_factory=dict)
+    _refill_tasks: dict[str, asyncio.Task[None]] = PrivateAttr(default_factory=dict)
+    _lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+
+    @staticmethod
+    def pool_key(options: BrowserWindowOptions) -> str:
+        return options.model_dump_json(
+            include={
+                "headless",
+                "user_agent",
+                "proxy",
+                "viewport_width",
+                "viewport_height",
+                "browser_type",
+                # routes are installed on the context
+                "interception",
+                "http_cache",
+            }
+        )
+
+    @staticmethod
+    def is_poolable(options: BrowserWindowOptions) -> bool:
+        # storage cleanup relies on CDP, which is only available on chromium based browsers
+        return options.cdp_url is None and options.browser_type in (BrowserType.CHROMIUM, BrowserType.CHROME)
+
+    def nb_idle(self, options: BrowserWindowOptions) -> int:
+        return len(self._idle.get(self.pool_key(options), []))
+
+    async def _new_pooled_context(self, key: str, options: BrowserWindowOptions) -> PooledContext:
+        async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+            context = await self.create_context(options)
+            http_cache = await HttpCacheRoute.install(context, options.http_cache, verbose=self.verbose)
+            interceptor = await RequestInterceptor.install(context, options.interception, verbose=self.verbose)
+            page = context.pages[-1] if len(context.pages) > 0 else await context.new_page()
+        self._sizes[key] = self._sizes.get(key, 0) + 1
+        return PooledContext(key=key, context=context, page=page, interceptor=interceptor, http_cache=http_cache)
+
+    async def _discard(self, entry: PooledContext) -> None:
+        self._sizes[entry.key] = max(0, self._sizes.get(entry.key, 0) - 1)
+        try:
+            async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                await entry.context.close()
+        except Exception as e:
+            logger.error(f"Failed to close pooled browser context: {e}")
+
+    async def _evict_expired(self, key: str) -> None:
+        idle = self._idle.get(key)
+        if idle is None:
+            return
+        # oldest idle contexts are on the left of the queue
+        while len(idle) > 0 and idle[0].is_expired(self.pool.idle_ttl_seconds):
+            await self._discard(idle.popleft())
+
+    async def _refill(self, key: str, options: BrowserWindowOptions) -> None:
+        try:
+            await self._evict_expired(key)
+            idle = self._idle.setdefault(key, deque())
+            while len(idle) < self.pool.min_size and self._sizes.get(key, 0) < self.pool.max_size:
+                idle.append(await self._new_pooled_context(key, options))
+        except Exception as e:
+            logger.error(f"Failed to refill browser context pool: {e}")
+        finally:
+            _ = self._refill_tasks.pop(key, None)
+
+    def schedule_refill(self, options: BrowserWindowOptions) -> None:
+        key = self.pool_key(options)
+        if key in self._refill_tasks:
+            return
+        self._refill_tasks[key] = asyncio.create_task(self._refill(key, options))
+
+    async def warmup(self, options: BrowserWindowOptions | None = None) -> None:
+        """Launch the browser and fill the pool for `options` before the first window is requested"""
+        options = options or BrowserWindowOptions()
+        async with self._lock:
+            if self.browser is None:
+                self.browser = await self.create_playwright_browser(options)  # pyright: ignore[reportUnannotatedClassAttribute]
+        await self._refill(self.pool_key(options), options)
+
+    @override
+    async def get_browser_resource(self, options: BrowserWindowOptions) -> BrowserResource:
+        if not self.is_poolable(options):
+            return await super().get_browser_resource(options)
+        async with self._lock:
+            if self.browser is None:
+                self.browser = await self.create_playwright_browser(options)
+        key = self.pool_key(options)
+        await self._evict_expired(key)
+        idle = self._idle.setdefault(key, deque())
+        # most recently released contexts are on the right of the queue
+        entry = idle.pop() if len(idle) > 0 else await self._new_pooled_context(key, options)
+        entry.nb_uses += 1
+        if entry.interceptor is not None:
+            # counters are kept per session
+            entry.interceptor.reset()
+        entry.start_tracking()
+        # keyed by context: the session can switch its page to another tab
+        self._in_use[id(entry.context)] = entry
+        self.schedule_refill(options)
+        if self.verbose:
+            logger.info(f"[Context Pool] Checked out context ({len(idle)} idle, {self._sizes[key]} total)")
+        return BrowserResource(
+            page=entry.page, options=options, interceptor=entry.interceptor, http_cache=entry.http_cache
+        )
+
+    async def _recycle(self, entry: PooledContext) -> bool:
+        """Clear cookies and storage of a released context. Returns False if the context cannot be reused"""
+        try:
+            async with asyncio.timeout(self.BROWSER_OPERATION_TIMEOUT_SECONDS):
+                pages = entry.context.pages
+                fresh_page = await entry.context.new_page()
+                cdp = await entry.context.new_cdp_session(fresh_page)
+                for origin in entry.origins:
+                    _ = await cdp.send(  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+                        "Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"}
+                    )
+                await cdp.detach()
+                await entry.context.clear_cookies()
+                await entry.context.clear_permissions()
+                await entry.context.grant_permissions(["clipboard-read", "clipboard-write"])
+                for page in pages:
+                    await page.close()
+        except Exception as e:
+            logger.error(f"Failed to recycle pooled browser context: {e}")
+            return False
+        entry.page = fresh_page
+        entry.origins = set()
+        entry.idle_since = time.time()
+        return True
+
+    @override
+    async def release_browser_resource(self, resource: BrowserResource) -> None:
+        entry = self._in_use.pop(id(resource.page.context), None)
+        if entry is None:
+            await super().release_browser_resource(resource)
+            return
+        self.log_interception_stats(resource)
+        entry.stop_tracking()
+        idle = self._idle.setdefault(entry.key, deque())
+        if (
+            resource.tainted
+            or entry.page.is_closed()
+            or entry.nb_uses >= self.pool.max_reuse
+            or self._sizes.get(entry.key, 0) > self.pool.max_size
+            or not await self._recycle(entry)
+        ):
+            await self._discard(entry)
+            self.schedule_refill(resource.options)
+            return
+        idle.append(entry)
+
+    def taint(self, resource: BrowserResource) -> None:
+        """Mark the context backing `resource` so that it is discarded instead of recycled on release"""
+        resource.tainted = True
+
+    @override
+    async def stop(self) -> None:
+        for task in self._refill_tasks.values():
+            _ = task.cancel()
+        self._refill_tasks = {}
+        for idle in self._idle.values():
+            while len(idle) > 0:
+                await self._discard(idle.popleft())
+        for entry in self._in_use.values():
+            await self._discard(entry)
+        self._in_use = {}
+        if self.browser is not None:
+            _ = await self.close_playwright_browser()
+            self.browser = None
+        await super().stop()
+
+
 class GlobalWindowManager:
     manager: WindowManager = WindowManager()
     started: bool = False
 
     @staticmethod
-    async def new_window(options: BrowserWindowOptions) -> BrowserWindow:
+    def is_pooled() -> bool:
+        return isinstance(GlobalWindowManager.manager, PooledWindowManager)
+
+    @staticmethod
+    async def enable_pooling(config: ContextPoolConfig | None = None, verbose: bool = False) -> None:
+        """
+        Switch the global manager to a `PooledWindowManager`: the browser is kept alive between sessions and
+        windows are served from a pool of pre-warmed contexts.
+        """
+        await GlobalWindowManager.disable_pooling()
+        GlobalWindowManager.manager = PooledWindowManager(pool=config or ContextPoolConfig(), verbose=verbose)
+
+    @staticmethod
+    async def disable_pooling() -> None:
+        if GlobalWindowManager.started:
+            await GlobalWindowManager.manager.stop()
+        GlobalWindowManager.manager = WindowManager()
+        GlobalWindowManager.started = False
+
+    @staticmethod
+    async def new_window(options: BrowserWindowOptions, config: BrowserWindowConfig | None = None) -> BrowserWindow:
+        if GlobalWindowManager.is_pooled():
+            if not GlobalWindowManager.manager.is_started():
+                await GlobalWindowManager.manager.start()
+            GlobalWindowManager.started = True
+            return await GlobalWindowManager.manager.new_window(options, config)
         await GlobalWindowManager.manager.stop()
         await GlobalWindowManager.manager.start()
         GlobalWindowManager.started = True
-        return await GlobalWindowManager.manager.new_window(options)
+        return await GlobalWindowManager.manager.new_window(options, config)
 
     @staticmethod
     async def close_window(window: BrowserWindow) -> None:
+        if GlobalWindowManager.is_pooled():
+            # keep the browser alive: the context goes back to the pool
+            await GlobalWindowManager.manager.release_browser_resource(window.resource)
+            return
         if GlobalWindowManager.started:
             try:
                 await GlobalWindowManager.manager.release_browser_resource(window.resource)
@@ -25,10 +25,9 @@ class SimpleActionResolutionPipe:
             # no need to resolve
             return action
 
-        selector_map: dict[str, InteractionDomNode] = {inode.id: inode for inode in snapshot.interaction_nodes()}
-        if action.id not in selector_map:
+        node = snapshot.dom_node.index.find_interaction(action.id)
+        if node is None:
             raise InvalidActionError(action_id=action.id, reason=f"action '{action.id}' not found in page context.")
-        node = selector_map[action.id]
         action.selector = SimpleActionResolutionPipe.resolve_selectors(node, verbose)
         action.text_label = node.text
         return action
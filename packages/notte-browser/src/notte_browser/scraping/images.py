@@ -1,3 +1,5 @@
+from typing import TypedDict
+
 from loguru import logger
 from notte_core.browser.dom_tree import DomNode, InteractionDomNode
 from notte_core.browser.node_type import NodeType
@@ -11,6 +13,54 @@ from notte_browser.resolution import SimpleActionResolutionPipe
 from notte_browser.window import BrowserWindow
 
 
+def svg_category(
+    width: float | None, height: float | None, role: str | None, aria_label: str | None, classes: str
+) -> ImageCategory:
+    if width is None or height is None:
+        return ImageCategory.SVG_CONTENT
+    is_likely_icon = (
+        width <= 64
+        and height <= 64  # Small size
+        or "icon" in classes
+        or "icon" in (aria_label or "").lower()
+        or role == "img"
+        and width <= 64  # Small SVG with img role
+    )
+
+    if is_likely_icon:
+        return ImageCategory.SVG_ICON
+    else:
+        return ImageCategory.SVG_CONTENT
+
+
+def raster_image_category(
+    width: float | None,
+    height: float | None,
+    role: str | None,
+    aria_hidden: str | None,
+    aria_label: str | None,
+    alt: str | None,
+    classes: str,
+) -> ImageCategory:
+    if width is None or height is None:
+        return ImageCategory.SVG_CONTENT
+
+    # Check if it's an icon
+    if (
+        "icon" in classes
+        or "icon" in (aria_label or "").lower()
+        or "icon" in (alt or "").lower()
+        or (width <= 64 and height <= 64)  # Small size
+    ):
+        return ImageCategory.ICON
+
+    # Check if it's decorative
+    if role == "presentation" or aria_hidden == "true" or (alt == "" and not aria_label):
+        return ImageCategory.DECORATIVE
+
+    return ImageCategory.CONTENT_IMAGE
+
+
 async def classify_image_element(node: DomNode, locator: Locator | None = None) -> ImageCategory | None:
     """Classify an image or SVG element.
 
@@ -63,23 +113,7 @@ async def classify_svg(
     # Get SVG content for debugging/identification
     # svg_content = (await locator.evaluate("el => el.outerHTML")) if return_svg_content else None
 
-    # Classify SVG
-    width, height = dimensions["width"], dimensions["height"]
-    if width is None or height is None:
-        return ImageCategory.SVG_CONTENT
-    is_likely_icon = (
-        width <= 64
-        and height <= 64  # Small size
-        or "icon" in classes
-        or "icon" in (aria_label or "").lower()
-        or role == "img"
-        and width <= 64  # Small SVG with img role
-    )
-
-    if is_likely_icon:
-        return ImageCategory.SVG_ICON
-    else:
-        return ImageCategory.SVG_CONTENT
+    return svg_category(dimensions["width"], dimensions["height"], role, aria_label, classes)
 
 
 async def classify_raster_image(locator: Locator) -> ImageCategory:
@@ -90,7 +124,6 @@ async def classify_raster_image(locator: Locator) -> ImageCategory:
     aria_label = await locator.get_attribute("aria-label")
     alt = await locator.get_attribute("alt")
     classes = (await locator.get_attribute("class") or "").lower()
-    presentation = role == "presentation"
 
     # Try to get dimensions
     dimensions: dict[str, int | None] = await locator.evaluate(
@@ -101,34 +134,19 @@ async def classify_raster_image(locator: Locator) -> ImageCategory:
         }
     }"""
     )
-    width, height = dimensions["width"], dimensions["height"]
-    if width is None or height is None:
-        return ImageCategory.SVG_CONTENT
-
-    # Check if it's an icon
-    if (
-        "icon" in classes
-        or "icon" in (aria_label or "").lower()
-        or "icon" in (alt or "").lower()
-        or (width <= 64 and height <= 64)  # Small size
-    ):
-        return ImageCategory.ICON
-
-    # Check if it's decorative
-    if presentation or aria_hidden == "true" or (alt == "" and not aria_label):
-        return ImageCategory.DECORATIVE
-
-    return ImageCategory.CONTENT_IMAGE
+    return raster_image_category(dimensions["width"], dimensions["height"], role, aria_hidden, aria_label, alt, classes)
 
 
 async def resolve_image_conflict(page: Page, node: DomNode, image_node: InteractionDomNode) -> Locator | None:
-    selectors = SimpleActionResolutionPipe.resolve_selectors(image_node, verbose=False)
-    try:
-        locator = await locate_element(page, selectors)
-        if (await locator.count()) == 1:
-            return locator
-    except Exception as e:
-        logger.warning(f"Error locating element: {e}")
+    # image nodes built without selectors (e.g. by the `browser_selectors` DOM builder) are located by role / position
+    if image_node.computed_attributes.selectors is not None:
+        selectors = SimpleActionResolutionPipe.resolve_selectors(image_node, verbose=False)
+        try:
+            locator = await locate_element(page, selectors)
+            if (await locator.count()) == 1:
+                return locator
+        except Exception as e:
+            logger.warning(f"Error locating element: {e}")
 
     if len(image_node.text) > 0:
         locators = await page.get_by_role(image_node.get_role_str(), name=image_node.text).all()  # type: ignore[arg-type]
@@ -180,6 +198,120 @@ async def get_svg_content(locator: Locator | None = None) -> str | None:
     return await locator.evaluate("el => el.outerHTML")
 
 
+class ImageElementDict(TypedDict):
+    """Properties of an image / SVG element, read in the page by `IMAGE_ELEMENTS_JS`"""
+
+    tagName: str
+    role: str | None
+    ariaHidden: str | None
+    ariaLabel: str | None
+    alt: str | None
+    classes: str
+    width: float | None
+    height: float | None
+    # `src`, `data-src` and `srcset` attributes, then `currentSrc || src || data-src`
+    sources: list[str | None]
+    svgContent: str | None
+
+
+# same properties as `classify_svg` / `classify_raster_image` / `get_image_src` / `get_svg_content`, for all the
+# images at once. `null` if the xpath does not match exactly one element (or if the element cannot be read)
+IMAGE_ELEMENTS_JS = """(xpaths) => xpaths.map((xpath) => {
+    if (xpath === null) {
+        return null;
+    }
+    try {
+        const result = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        if (result.snapshotLength !== 1) {
+            return null;
+        }
+        const el = result.snapshotItem(0);
+        const tagName = el.tagName.toLowerCase();
+        let width = el.naturalWidth || el.width;
+        let height = el.naturalHeight || el.height;
+        if (tagName === "svg") {
+            const bbox = el.getBBox();
+            width = bbox.width;
+            height = bbox.height;
+        }
+        return {
+            tagName: tagName,
+            role: el.getAttribute("role"),
+            ariaHidden: el.getAttribute("aria-hidden"),
+            ariaLabel: el.getAttribute("aria-label"),
+            alt: el.getAttribute("alt"),
+            classes: (el.getAttribute("class") || "").toLowerCase(),
+            width: width ?? null,
+            height: height ?? null,
+            sources: [
+                el.getAttribute("src"),
+                el.getAttribute("data-src"),
+                el.getAttribute("srcset"),
+                el.currentSrc || el.src || el.getAttribute("data-src") || null,
+            ],
+            svgContent: tagName === "svg" ? el.outerHTML : null,
+        };
+    } catch (e) {
+        return null;
+    }
+})"""
+
+
+async def read_image_elements(page: Page, nodes: list[DomNode]) -> list[ImageElementDict | None]:
+    """
+    Properties of the image elements, read with a single `page.evaluate`.
+
+    Images in iframes / shadow roots (or without selectors) are not read: `None`, like the images whose xpath does
+    not match exactly one element.
+    """
+    xpaths: list[str | None] = []
+    for node in nodes:
+        selectors = node.computed_attributes.selectors
+        if selectors is None or selectors.in_iframe or selectors.in_shadow_root:
+            xpaths.append(None)
+        else:
+            xpaths.append(selectors.xpath_selector)
+    if all(xpath is None for xpath in xpaths):
+        return [None] * len(nodes)
+    try:
+        elements: list[ImageElementDict | None] = await page.evaluate(IMAGE_ELEMENTS_JS, xpaths)
+        return elements
+    except Exception as e:
+        logger.warning(f"Failed to read the image elements in the page: {e}")
+        return [None] * len(nodes)
+
+
+def image_element_category(node: DomNode, element: ImageElementDict) -> ImageCategory:
+    """Same as `classify_image_element`, from the properties read by `read_image_elements`"""
+    tag_name = node.attributes.tag_name if node.attributes is not None else element["tagName"]
+    if tag_name == "svg":
+        return svg_category(
+            element["width"], element["height"], element["role"], element["ariaLabel"], element["classes"]
+        )
+    return raster_image_category(
+        element["width"],
+        element["height"],
+        element["role"],
+        element["ariaHidden"],
+        element["ariaLabel"],
+        element["alt"],
+        element["classes"],
+    )
+
+
+def image_element_src(node: DomNode, element: ImageElementDict) -> str | None:
+    """Same as `get_image_src`, from the properties read by `read_image_elements`"""
+    if node.attributes is not None:
+        resource_url = node.attributes.get_resource_url()
+        if resource_url is not None:
+            return resource_url
+    *attributes, current_src = element["sources"]
+    for src in attributes:
+        if src:
+            return src
+    return current_src
+
+
 async def get_parent_inner_text(dom_node: DomNode, max_depth: int = 3) -> str | None:
     """Get the inner text of an element."""
     if max_depth <= 0:
@@ -199,8 +331,10 @@ class ImageScrapingPipe:
     Data scraping pipe that scrapes images from the page
     """
 
-    def __init__(self, verbose: bool = False) -> None:
+    def __init__(self, verbose: bool = False, batched: bool = True) -> None:
         self.verbose: bool = verbose
+        # read all the images with a single `page.evaluate`, and only locate the ones that could not be read
+        self.batched: bool = batched
 
     async def forward(self, window: BrowserWindow, snapshot: BrowserSnapshot) -> list[ImageData]:
         image_nodes = snapshot.dom_node.image_nodes()
@@ -212,27 +346,32 @@ class ImageScrapingPipe:
                 description=f"Favicon for {snapshot.clean_url}",
             )
         ]
+        elements: list[ImageElementDict | None] = [None] * len(image_nodes)
+        if self.batched:
+            elements = await read_image_elements(window.page, image_nodes)
         from tqdm import tqdm
 
-        for i, node in tqdm(enumerate(image_nodes)):
-            locator = await resolve_image_conflict(
-                page=window.page,
-                node=snapshot.dom_node,
-                image_node=InteractionDomNode(
-                    id=node.id or f"image_{i}",
-                    type=NodeType.INTERACTION,
-                    role=node.role,
-                    text=node.text,
-                    children=[],
-                    attributes=node.attributes,
-                    computed_attributes=node.computed_attributes,
-                ),
-            )
-            # if image_src is None:
-            #     logger.warning(f"No src attribute found for image node {node.id}")
-            #     continue
-            category = await classify_image_element(node, locator)
-            image_src = await get_image_src(node, locator)
+        for i, (node, element) in tqdm(enumerate(zip(image_nodes, elements))):
+            locator: Locator | None = None
+            if element is not None:
+                category = image_element_category(node, element)
+                image_src = image_element_src(node, element)
+            else:
+                locator = await resolve_image_conflict(
+                    page=window.page,
+                    node=snapshot.dom_node,
+                    image_node=InteractionDomNode(
+                        id=node.id or f"image_{i}",
+                        type=NodeType.INTERACTION,
+                        role=node.role,
+                        text=node.text,
+                        children=[],
+                        attributes=node.attributes,
+                        computed_attributes=node.computed_attributes,
+                    ),
+                )
+                category = await classify_image_element(node, locator)
+                image_src = await get_image_src(node, locator)
             if image_src is not None:
                 if len(image_src) > 0 and image_src != snapshot.metadata.url:
                     original_url = image_src
@@ -249,9 +388,9 @@ class ImageScrapingPipe:
                     # or the same as the page url (likely just a href)
                     image_src = None
             if image_src is None and category is ImageCategory.SVG_CONTENT:
-                image_src = await get_svg_content(locator)
+                image_src = element["svgContent"] if element is not None else await get_svg_content(locator)
 
-            if locator is None and (category is None or image_src is None):
+            if element is None and locator is None and (category is None or image_src is None):
                 if self.verbose:
                     logger.warning(f"No locator found for image node {node.id}")
                 continue
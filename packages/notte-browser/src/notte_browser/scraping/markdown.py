@@ -1,4 +1,11 @@
+import asyncio
+from collections.abc import Iterator
+
 import markdownify  # type: ignore[import]
+from bs4 import BeautifulSoup
+from bs4.element import Comment, Doctype, NavigableString, Tag
+from litellm import ModelResponse  # type: ignore[import]
+from loguru import logger
 from main_content_extractor import MainContentExtractor  # type: ignore[import]
 from notte_core.browser.snapshot import BrowserSnapshot
 from notte_core.errors.llm import LLMnoOutputCompletionError
@@ -6,7 +13,7 @@ from notte_core.llms.engine import StructuredContent
 from notte_core.llms.service import LLMService
 
 from notte_browser.rendering.pipe import DomNodeRenderingConfig, DomNodeRenderingPipe
-from notte_browser.scraping.pruning import MarkdownPruningPipe
+from notte_browser.scraping.pruning import MarkdownPruningPipe, MaskedDocument
 from notte_browser.window import BrowserWindow
 
 
@@ -28,6 +35,148 @@ class MainContentScrapingPipe:
         )
 
 
+class _MarkdownOutput:
+    """
+    Markdown emitted so far by `stream_markdown`.
+
+    Trailing newlines are held back: `markdownify` merges the newlines around block elements (`merge`).
+    """
+
+    def __init__(self) -> None:
+        self.chunks: list[str] = []
+        self.newlines: int = 0
+
+    def _emit(self, newlines: int, text: str) -> None:
+        content = text.rstrip("\n")
+        self.chunks.append("\n" * newlines + content)
+        self.newlines = len(text) - len(content)
+
+    def append(self, text: str) -> None:
+        if text.strip("\n") == "":
+            self.newlines += len(text)
+        else:
+            self._emit(self.newlines, text)
+
+    def merge(self, text: str) -> None:
+        content = text.lstrip("\n")
+        if content == "":
+            self.newlines = max(self.newlines, len(text))
+        else:
+            self._emit(max(self.newlines, len(text) - len(content)), content)
+
+    def drain(self) -> list[str]:
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+    def close(self) -> list[str]:
+        return self.drain() + ["\n" * self.newlines]
+
+
+class _MarkdownBlock:
+    """
+    Markdown of a tag without conversion (`div`, `section`, ...): its children are forwarded to the parent as soon as
+    the block has content, which is what `markdownify` produces once the block is merged into its parent.
+    """
+
+    def __init__(self, parent: "_MarkdownOutput | _MarkdownBlock") -> None:
+        self.parent: _MarkdownOutput | _MarkdownBlock = parent
+        # newlines of the block, while it has no content
+        self.newlines: int = 0
+        self.started: bool = False
+
+    def _start(self, text: str) -> None:
+        if text.strip("\n") == "":
+            self.newlines = len(text)
+        else:
+            self.started = True
+            self.parent.merge(text)
+
+    def append(self, text: str) -> None:
+        if self.started:
+            self.parent.append(text)
+        else:
+            self._start("\n" * self.newlines + text)
+
+    def merge(self, text: str) -> None:
+        if self.started:
+            self.parent.merge(text)
+        else:
+            content = text.lstrip("\n")
+            self._start("\n" * max(self.newlines, len(text) - len(content)) + content)
+
+    def close(self) -> None:
+        if not self.started:
+            self.parent.merge("\n" * self.newlines)
+
+
+def _is_block(converter: markdownify.MarkdownConverter, tag: Tag) -> bool:
+    # headings and cells convert their children as inline
+    if markdownify.html_heading_re.match(tag.name) is not None or tag.name in ["td", "th"]:
+        return False
+    convert_fn = getattr(converter, f"convert_{tag.name}", None)
+    return convert_fn is None or not converter.should_convert_tag(tag.name)  # type: ignore[attr-defined]
+
+
+def _stream_children(
+    converter: markdownify.MarkdownConverter,
+    node: Tag,
+    parent: _MarkdownOutput | _MarkdownBlock,
+    output: _MarkdownOutput,
+) -> Iterator[str]:
+    # same whitespace cleanup as `MarkdownConverter.process_tag`
+    should_remove_inside = markdownify.should_remove_whitespace_inside(node)  # type: ignore[attr-defined]
+    for el in list(node.children):
+        can_extract = bool(
+            should_remove_inside
+            and (not el.previous_sibling or not el.next_sibling)
+            or markdownify.should_remove_whitespace_outside(el.previous_sibling)  # type: ignore[attr-defined]
+            or markdownify.should_remove_whitespace_outside(el.next_sibling)  # type: ignore[attr-defined]
+        )
+        if isinstance(el, NavigableString) and str(el).strip() == "" and can_extract:
+            _ = el.extract()
+
+    for el in node.children:
+        if isinstance(el, (Comment, Doctype)):
+            continue
+        if isinstance(el, NavigableString):
+            parent.append(converter.process_text(el))  # type: ignore[attr-defined]
+        elif isinstance(el, Tag) and _is_block(converter, el):
+            block = _MarkdownBlock(parent)
+            yield from _stream_children(converter, el, block, output)
+            block.close()
+        else:
+            parent.merge(converter.process_tag(el, convert_as_inline=False))  # type: ignore[attr-defined]
+        yield from output.drain()
+
+
+def stream_markdown(html: str, strip: list[str] | None = None) -> Iterator[str]:
+    """
+    Same markdown as `markdownify.markdownify(html, strip=strip)`, yielded block by block.
+
+    Only the tags converted by `markdownify` (paragraphs, lists, tables, ...) are converted as a whole: the markdown
+    of a huge page is never built as a single string, and the conversion can be stopped at any point.
+    """
+    converter = markdownify.MarkdownConverter(strip=strip)
+    soup = BeautifulSoup(html, "html.parser")
+    output = _MarkdownOutput()
+    yield from _stream_children(converter, soup, output, output)
+    yield from output.close()
+
+
+def markdownify_html(html: str, strip: list[str] | None = None, max_length: int | None = None) -> str:
+    """Markdown of `html`, truncated to `max_length` characters (the conversion stops as soon as it is reached)"""
+    chunks: list[str] = []
+    length = 0
+    for chunk in stream_markdown(html, strip=strip):
+        if max_length is not None and length + len(chunk) > max_length:
+            chunks.append(chunk[: max_length - length])
+            logger.warning(f"Markdown content is larger than {max_length} characters: truncating it")
+            break
+        chunks.append(chunk)
+        length += len(chunk)
+    return "".join(chunks)
+
+
 class MarkdownifyScrapingPipe:
     """
     Data scraping pipe that scrapes data from the page
@@ -41,6 +190,7 @@ class MarkdownifyScrapingPipe:
         scrape_links: bool,
         scrape_images: bool,
         include_iframes: bool = True,
+        max_length: int | None = None,
     ) -> str:
         strip: list[str] = []
         if not scrape_links:
@@ -48,21 +198,40 @@ class MarkdownifyScrapingPipe:
         if not scrape_images:
             strip.append("img")
 
-        if only_main_content:
-            html = MainContentScrapingPipe.forward(snapshot, scrape_links=scrape_links, output_format="html")
-        else:
-            html = snapshot.html_content
+        # iframe contents are fetched while the page is converted
+        iframes = [
+            iframe
+            for iframe in (window.page.frames if include_iframes else [])
+            if iframe.url != window.page.url and not iframe.url.startswith("data:")
+        ]
+        iframe_contents = asyncio.gather(*[iframe.content() for iframe in iframes])
 
-        content: str = markdownify.markdownify(html, strip=strip)  # type: ignore[attr-defined]
+        def convert() -> str:
+            if only_main_content:
+                html = MainContentScrapingPipe.forward(snapshot, scrape_links=scrape_links, output_format="html")
+            else:
+                html = snapshot.html_content
+            return markdownify_html(html, strip=strip, max_length=max_length)
 
-        # manually append iframe text into the content so it's readable by the LLM (includes cross-origin iframes)
-        if include_iframes:
-            for iframe in window.page.frames:
-                if iframe.url != window.page.url and not iframe.url.startswith("data:"):
-                    content += f"\n\nIFRAME {iframe.url}:\n"  # type: ignore[attr-defined]
-                    content += markdownify.markdownify(await iframe.content())  # type: ignore[attr-defined]
+        # conversion of huge pages would block the event loop
+        try:
+            content = await asyncio.to_thread(convert)
+        except BaseException:
+            _ = iframe_contents.cancel()
+            raise
 
-        return content  # type: ignore[return-value]
+        # manually append iframe text into the content so it's readable by the LLM (includes cross-origin iframes)
+        contents: list[str] = [content]
+        length = len(content)
+        for iframe, iframe_html in zip(iframes, await iframe_contents):
+            header = f"\n\nIFRAME {iframe.url}:\n"
+            if max_length is not None and length + len(header) >= max_length:
+                break
+            remaining = None if max_length is None else max_length - length - len(header)
+            iframe_content = await asyncio.to_thread(markdownify_html, iframe_html, max_length=remaining)
+            contents.extend([header, iframe_content])
+            length += len(header) + len(iframe_content)
+        return "".join(contents)
 
 
 class Llm2MarkdownScrapingPipe:
@@ -83,19 +252,16 @@ class Llm2MarkdownScrapingPipe:
         document = self.llmserve.clip_tokens(document)
         return document
 
-    def forward(
-        self,
-        snapshot: BrowserSnapshot,
-        only_main_content: bool,
-        use_link_placeholders: bool = True,
-    ) -> str:
+    def _prepare_document(self, snapshot: BrowserSnapshot, use_link_placeholders: bool) -> tuple[str, MaskedDocument]:
         document = self._render_node(snapshot)
         masked_document = MarkdownPruningPipe.mask(document)
         if use_link_placeholders:
             document = masked_document.content
-        # make LLM call
-        prompt = "only_main_content" if only_main_content else "all_data"
-        response = self.llmserve.completion(prompt_id=f"data-extraction/{prompt}", variables={"document": document})
+        return document, masked_document
+
+    def _parse_response(
+        self, response: ModelResponse, masked_document: MaskedDocument, use_link_placeholders: bool
+    ) -> str:
         if response.choices[0].message.content is None:  # type: ignore[arg-type]
             raise LLMnoOutputCompletionError()
         response_text = str(response.choices[0].message.content)  # type: ignore[arg-type]
@@ -108,3 +274,29 @@ class Llm2MarkdownScrapingPipe:
             fail_if_inner_tag=False,
         )
         return sc.extract(response_text)
+
+    def forward(
+        self,
+        snapshot: BrowserSnapshot,
+        only_main_content: bool,
+        use_link_placeholders: bool = True,
+    ) -> str:
+        document, masked_document = self._prepare_document(snapshot, use_link_placeholders)
+        # make LLM call
+        prompt = "only_main_content" if only_main_content else "all_data"
+        response = self.llmserve.completion(prompt_id=f"data-extraction/{prompt}", variables={"document": document})
+        return self._parse_response(response, masked_document, use_link_placeholders)
+
+    async def forward_async(
+        self,
+        snapshot: BrowserSnapshot,
+        only_main_content: bool,
+        use_link_placeholders: bool = True,
+    ) -> str:
+        document, masked_document = self._prepare_document(snapshot, use_link_placeholders)
+        # make LLM call
+        prompt = "only_main_content" if only_main_content else "all_data"
+        response = await self.llmserve.acompletion(
+            prompt_id=f"data-extraction/{prompt}", variables={"document": document}
+        )
+        return self._parse_response(response, masked_document, use_link_placeholders)
@@ -1,12 +1,16 @@
+import asyncio
+import time
+from collections.abc import Coroutine
 from enum import StrEnum
-from typing import ClassVar, final
+from typing import Any, ClassVar, TypeVar, final
 
 from html2text import config
 from loguru import logger
 from notte_core.browser.snapshot import BrowserSnapshot
-from notte_core.data.space import DataSpace
+from notte_core.data.space import DataSpace, ImageData, StructuredData
 from notte_core.llms.service import LLMService
 from notte_sdk.types import ScrapeParams
+from pydantic import BaseModel
 
 from notte_browser.rendering.pipe import DomNodeRenderingConfig, DomNodeRenderingType
 from notte_browser.scraping.images import ImageScrapingPipe
@@ -18,6 +22,8 @@ from notte_browser.scraping.markdown import (
 from notte_browser.scraping.schema import SchemaScrapingPipe
 from notte_browser.window import BrowserWindow
 
+T = TypeVar("T")
+
 
 class ScrapingType(StrEnum):
     MARKDOWNIFY = "markdownify"
@@ -41,11 +47,14 @@ class DataScrapingPipe:
         self,
         llmserve: LLMService,
         type: ScrapingType,
+        markdown_max_length: int | None = None,
     ) -> None:
         self.llm_pipe = Llm2MarkdownScrapingPipe(llmserve=llmserve, config=self.rendering_config)
         self.schema_pipe = SchemaScrapingPipe(llmserve=llmserve)
         self.image_pipe = ImageScrapingPipe(verbose=self.rendering_config.verbose)
         self.scraping_type = type
+        # markdownify output is truncated to this number of characters
+        self.markdown_max_length = markdown_max_length
 
     def get_markdown_scraping_type(self, params: ScrapeParams) -> ScrapingType:
         # use_llm has priority over config.type
@@ -59,7 +68,11 @@ class DataScrapingPipe:
         return self.scraping_type
 
     async def scrape_markdown(self, window: BrowserWindow, snapshot: BrowserSnapshot, params: ScrapeParams) -> str:
-        match self.get_markdown_scraping_type(params):
+        scraping_type = self.get_markdown_scraping_type(params)
+        if scraping_type != ScrapingType.LLM_EXTRACT:
+            # html is not part of every snapshot profile
+            _ = await snapshot.load("html_content")
+        match scraping_type:
             case ScrapingType.MARKDOWNIFY:
                 if self.rendering_config.verbose:
                     logger.info("📀 Scraping page with simple scraping pipe")
@@ -70,6 +83,7 @@ class DataScrapingPipe:
                     scrape_links=params.scrape_links,
                     scrape_images=params.scrape_images,
                     only_main_content=params.only_main_content,
+                    max_length=self.markdown_max_length,
                 )
 
             case ScrapingType.MAIN_CONTENT:
@@ -87,7 +101,7 @@ class DataScrapingPipe:
             case ScrapingType.LLM_EXTRACT:
                 if self.rendering_config.verbose:
                     logger.info("📀 Scraping page with complex/LLM-based scraping pipe")
-                return self.llm_pipe.forward(
+                return await self.llm_pipe.forward_async(
                     snapshot,
                     only_main_content=params.only_main_content,
                     use_link_placeholders=params.use_link_placeholders,
@@ -99,31 +113,59 @@ class DataScrapingPipe:
         snapshot: BrowserSnapshot,
         params: ScrapeParams,
     ) -> DataSpace:
-        markdown = await self.scrape_markdown(window, snapshot, params)
+        timings: dict[str, float] = {}
+
+        async def timed(stage: str, stage_coro: Coroutine[Any, Any, T]) -> T:
+            start = time.perf_counter()
+            try:
+                return await stage_coro
+            finally:
+                timings[stage] = (time.perf_counter() - start) * 1000
+
+        images_task: asyncio.Task[list[ImageData]] | None = None
+        structured_task: asyncio.Task[StructuredData[BaseModel]] | None = None
+        # images only depend on the snapshot, and the structured data only on the markdown: if a stage fails,
+        # the other ones are cancelled
+        try:
+            async with asyncio.TaskGroup() as group:
+                # scrape images if required
+                if params.scrape_images:
+                    if self.rendering_config.verbose:
+                        logger.info("🏞️ Scraping images with image pipe")
+                    images_task = group.create_task(timed("images", self.image_pipe.forward(window, snapshot)))
+
+                markdown = await timed("markdown", self.scrape_markdown(window, snapshot, params))
+                if self.rendering_config.verbose:
+                    logger.info(f"📀 Extracted page as markdown\n: {markdown}\n")
+
+                # scrape structured data if required
+                if params.requires_schema():
+                    if self.rendering_config.verbose:
+                        logger.info("🎞️ Structuring data with schema pipe")
+                    structured_task = group.create_task(
+                        timed(
+                            "structured",
+                            self.schema_pipe.forward_async(
+                                url=snapshot.metadata.url,
+                                document=markdown,
+                                response_format=params.response_format,
+                                instructions=params.instructions,
+                                verbose=self.rendering_config.verbose,
+                                use_link_placeholders=params.use_link_placeholders,
+                            ),
+                        )
+                    )
+        except BaseExceptionGroup as e:
+            # surface the error of the failed stage, like `asyncio.gather`
+            raise e.exceptions[0] from e
         if self.rendering_config.verbose:
-            logger.info(f"📀 Extracted page as markdown\n: {markdown}\n")
-        images = None
-        structured = None
-
-        # scrape images if required
-        if params.scrape_images:
-            if self.rendering_config.verbose:
-                logger.info("🏞️ Scraping images with image pipe")
-            images = await self.image_pipe.forward(window, snapshot)
-
-        # scrape structured data if required
-        if params.requires_schema():
-            if self.rendering_config.verbose:
-                logger.info("🎞️ Structuring data with schema pipe")
-            structured = self.schema_pipe.forward(
-                url=snapshot.metadata.url,
-                document=markdown,
-                response_format=params.response_format,
-                instructions=params.instructions,
-                verbose=self.rendering_config.verbose,
-                use_link_placeholders=params.use_link_placeholders,
-            )
-        return DataSpace(markdown=markdown, images=images, structured=structured)
+            logger.info(f"⏱️ Scraping stages: {', '.join(f'{stage}={ms:.0f}ms' for stage, ms in timings.items())}")
+        return DataSpace(
+            markdown=markdown,
+            images=images_task.result() if images_task is not None else None,
+            structured=structured_task.result() if structured_task is not None else None,
+            timings=timings,
+        )
 
     async def forward_async(
         self,
@@ -1,4 +1,9 @@
+import asyncio
 import datetime as dt
+import math
+import re
+from collections.abc import Callable
+from typing import Any
 
 from litellm import json
 from loguru import logger
@@ -7,7 +12,7 @@ from notte_core.llms.engine import TResponseFormat
 from notte_core.llms.service import LLMService
 from pydantic import BaseModel
 
-from notte_browser.scraping.pruning import MarkdownPruningPipe
+from notte_browser.scraping.pruning import MarkdownPruningPipe, MaskedDocument
 
 
 class _Hotel(BaseModel):
@@ -23,13 +28,135 @@ class _Hotels(BaseModel):
     hotels: list[_Hotel]
 
 
+# lines that start a new block of a markdown document: headings, list items and table rows
+MARKDOWN_BLOCK_START = re.compile(r"^(#{1,6}\s|\s*([-*+]|\d+[.)])\s|\s*\|)")
+MARKDOWN_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}")
+
+
+def _markdown_blocks(document: str) -> list[str]:
+    blocks: list[str] = []
+    for line in document.splitlines(keepends=True):
+        if len(blocks) == 0 or MARKDOWN_BLOCK_START.match(line) is not None or blocks[-1].endswith("\n\n"):
+            blocks.append(line)
+        else:
+            blocks[-1] += line
+    return blocks
+
+
+def _split_block(block: str, max_tokens: int, count_tokens: Callable[[str], int]) -> list[str]:
+    nb_parts = math.ceil(count_tokens(block) / max_tokens)
+    if nb_parts <= 1:
+        return [block]
+    lines = block.splitlines(keepends=True)
+    if len(lines) > 1:
+        middle = len(lines) // 2
+        return [
+            *_split_block("".join(lines[:middle]), max_tokens, count_tokens),
+            *_split_block("".join(lines[middle:]), max_tokens, count_tokens),
+        ]
+    size = math.ceil(len(block) / nb_parts)
+    return [block[i : i + size] for i in range(0, len(block), size)]
+
+
+def split_markdown(document: str, max_tokens: int, count_tokens: Callable[[str], int]) -> list[str]:
+    """
+    Split a markdown document into chunks of at most `max_tokens` tokens, on headings, list items, table rows and
+    paragraphs. Chunks starting in the middle of a table repeat the table header.
+    """
+    chunks: list[str] = []
+    chunk: list[str] = []
+    chunk_tokens = 0
+    table_header: str | None = None
+    blocks = _markdown_blocks(document)
+    for i, block in enumerate(blocks):
+        is_table_row = block.lstrip().startswith("|")
+        if not is_table_row:
+            table_header = None
+        elif (
+            table_header is None
+            and i + 1 < len(blocks)
+            and MARKDOWN_TABLE_SEPARATOR.match(blocks[i + 1].lstrip("| ")) is not None
+        ):
+            table_header = block + blocks[i + 1]
+        for part in _split_block(block, max_tokens, count_tokens):
+            tokens = count_tokens(part)
+            if len(chunk) > 0 and chunk_tokens + tokens > max_tokens:
+                chunks.append("".join(chunk))
+                chunk, chunk_tokens = [], 0
+                if table_header is not None and is_table_row and part not in table_header:
+                    header_tokens = count_tokens(table_header)
+                    if header_tokens + tokens <= max_tokens:
+                        chunk, chunk_tokens = [table_header], header_tokens
+            chunk.append(part)
+            chunk_tokens += tokens
+    if len(chunk) > 0:
+        chunks.append("".join(chunk))
+    return chunks
+
+
+def _merge_values(values: list[Any]) -> Any:
+    values = [value for value in values if value is not None]
+    if len(values) == 0:
+        return None
+    if all(isinstance(value, list) for value in values):
+        # concatenate and de-duplicate the items extracted from each chunk
+        merged: list[Any] = []
+        seen: set[str] = set()
+        for items in values:
+            for item in items:
+                key = json.dumps(item, sort_keys=True, default=str)
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(item)
+        return merged
+    if all(isinstance(value, dict) for value in values):
+        keys = list(dict.fromkeys(key for value in values for key in value))
+        return {key: _merge_values([value.get(key) for value in values]) for key in keys}
+    # scalars: the first chunk with a value wins
+    return values[0]
+
+
+def merge_structured_data(responses: list[StructuredData[DictBaseModel]]) -> StructuredData[DictBaseModel]:
+    """Merge the data extracted from each chunk of a document: lists are concatenated and de-duplicated"""
+    successes = [response for response in responses if response.success and response.data is not None]
+    if len(successes) == 0:
+        return responses[0]
+    if len(successes) == 1:
+        return successes[0]
+    roots = [response.data.root for response in successes if response.data is not None]
+    if not all(isinstance(root, list) for root in roots) and not all(isinstance(root, dict) for root in roots):
+        # some chunks are lists, other ones are objects: wrap the objects in lists
+        roots = [root if isinstance(root, list) else [root] for root in roots]
+    return StructuredData(success=True, data=DictBaseModel(_merge_values(roots)))
+
+
+def failed_chunks_to_structured_data(
+    responses: list[StructuredData[DictBaseModel] | BaseException],
+) -> list[StructuredData[DictBaseModel]]:
+    """Turn the chunks whose extraction raised into failed responses, so that the other chunks are still merged"""
+    errors = [response for response in responses if isinstance(response, BaseException)]
+    if len(errors) == len(responses):
+        # nothing was extracted: same as extracting the document in one go
+        raise errors[0]
+    for error in errors:
+        logger.warning(f"Failed to extract structured data from a document chunk: {error}")
+    return [
+        StructuredData(success=False, error=str(response)) if isinstance(response, BaseException) else response
+        for response in responses
+    ]
+
+
 class SchemaScrapingPipe:
     """
     Data scraping pipe that scrapes data from the page into a structured JSON output format
     """
 
-    def __init__(self, llmserve: LLMService) -> None:
+    def __init__(self, llmserve: LLMService, chunk_tokens: int | None = None, max_concurrent_chunks: int = 8) -> None:
         self.llmserve: LLMService = llmserve
+        # documents larger than `chunk_tokens` (by default: the context length of the model) are split into chunks,
+        # extracted separately, and merged (see `merge_structured_data`)
+        self.chunk_tokens: int | None = chunk_tokens
+        self.max_concurrent_chunks: int = max_concurrent_chunks
 
     @staticmethod
     def success_example() -> StructuredData[_Hotels]:
@@ -65,90 +192,150 @@ class SchemaScrapingPipe:
             success=False, error="The user requested information about a cat but the document is about a dog", data=None
         )
 
-    def forward(
+    def _prepare_chunks(self, document: str, use_link_placeholders: bool) -> tuple[list[str], MaskedDocument]:
+        # TODO: add masking but needs more testing
+        masked_document = MarkdownPruningPipe.mask(document)
+        document = masked_document.content if use_link_placeholders else document
+        max_tokens = self.chunk_tokens or (self.llmserve.context_length() - 2000)
+        if self.llmserve.estimate_tokens(text=document) <= max_tokens:
+            return [document], masked_document
+        chunks = split_markdown(document, max_tokens, lambda text: self.llmserve.estimate_tokens(text=text))
+        logger.info(f"Document exceeds {max_tokens} tokens: extracting structured data from {len(chunks)} chunks")
+        return chunks, masked_document
+
+    def _prompt(
         self,
         url: str,
         document: str,
         response_format: type[TResponseFormat] | None,
         instructions: str | None,
-        verbose: bool = False,
-        use_link_placeholders: bool = True,
-    ) -> StructuredData[BaseModel]:
-        # make LLM call
-        # TODO: add masking but needs more testing
-        masked_document = MarkdownPruningPipe.mask(document)
-        document = self.llmserve.clip_tokens(masked_document.content if use_link_placeholders else document)
+    ) -> tuple[str, dict[str, Any]]:
         match (response_format, instructions):
             case (None, None):
                 raise ValueError("response_format and instructions cannot be both None")
             case (None, _):
-                structured = self.llmserve.structured_completion(
-                    prompt_id="extract-without-json-schema",
-                    variables={
-                        "document": document,
-                        "instructions": instructions,
-                        "success_example": self.success_example().model_dump_json(),
-                        "failure_example": self.failure_example().model_dump_json(),
-                        "timestamp": dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    },
-                    response_format=StructuredData[DictBaseModel],
-                )
-                if verbose:
-                    logger.info(f"LLM Structured Response with no schema:\n{structured}")
-                return structured
+                return "extract-without-json-schema", {
+                    "document": document,
+                    "instructions": instructions,
+                    "success_example": self.success_example().model_dump_json(),
+                    "failure_example": self.failure_example().model_dump_json(),
+                    "timestamp": dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                }
             case (_response_format, _):
                 assert _response_format is not None
+                return "extract-json-schema/multi-entity", {
+                    "url": url,
+                    "failure_example": StructuredData(
+                        success=False,
+                        error="<REASONING ABOUT WHY YOU CANNOT ANSWER THE USER REQUEST>",
+                        data=None,
+                    ).model_dump_json(),
+                    "success_example": self.success_example().model_dump_json(),
+                    "schema": json.dumps(_response_format.model_json_schema(), indent=2),
+                    "content": document,
+                    "timestamp": dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "instructions": instructions or "no additional instructions",
+                }
 
-                response: StructuredData[DictBaseModel] = self.llmserve.structured_completion(
-                    prompt_id="extract-json-schema/multi-entity",
-                    response_format=StructuredData[DictBaseModel],
-                    variables={
-                        "url": url,
-                        "failure_example": StructuredData(
-                            success=False,
-                            error="<REASONING ABOUT WHY YOU CANNOT ANSWER THE USER REQUEST>",
-                            data=None,
-                        ).model_dump_json(),
-                        "success_example": self.success_example().model_dump_json(),
-                        "schema": json.dumps(_response_format.model_json_schema(), indent=2),
-                        "content": document,
-                        "timestamp": dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "instructions": instructions or "no additional instructions",
-                    },
+    def _validate_response(
+        self,
+        response: StructuredData[DictBaseModel],
+        response_format: type[TResponseFormat] | None,
+        masked_document: MaskedDocument,
+        verbose: bool,
+        use_link_placeholders: bool,
+    ) -> StructuredData[BaseModel]:
+        if response_format is None:
+            if verbose:
+                logger.info(f"LLM Structured Response with no schema:\n{response}")
+            return response
+
+        if verbose:
+            logger.info(f"LLM Structured Response with user provided schema:\n{response}")
+        # try model_validate
+        if not response.success or response.data is None:
+            return response
+        try:
+            if isinstance(response.data.root, list):
+                return StructuredData(
+                    success=False,
+                    error="The response is a list, but the schema is not a list",
+                    data=response.data,
                 )
-                if verbose:
-                    logger.info(f"LLM Structured Response with user provided schema:\n{response}")
-                # try model_validate
-                if not response.success or response.data is None:
-                    return response
-                try:
-                    if isinstance(response.data.root, list):
-                        return StructuredData(
-                            success=False,
-                            error="The response is a list, but the schema is not a list",
-                            data=response.data,
-                        )
-                    data: BaseModel = _response_format.model_validate(response.data.root)
-                    if use_link_placeholders:
-                        data = MarkdownPruningPipe.unmask_pydantic(document=masked_document, data=data)
-                    return StructuredData[BaseModel](
-                        success=response.success,
-                        error=response.error,
-                        data=data,
+            data: BaseModel = response_format.model_validate(response.data.root)
+            if use_link_placeholders:
+                data = MarkdownPruningPipe.unmask_pydantic(document=masked_document, data=data)
+            return StructuredData[BaseModel](
+                success=response.success,
+                error=response.error,
+                data=data,
+            )
+        except Exception as e:
+            if verbose:
+                logger.info(
+                    (
+                        "LLM Response cannot be validated into the provided"
+                        f" schema:\n{response_format.model_json_schema()}"
                     )
-                except Exception as e:
-                    if verbose:
-                        logger.info(
-                            (
-                                "LLM Response cannot be validated into the provided"
-                                f" schema:\n{_response_format.model_json_schema()}"
-                            )
-                        )
-                    data = response.data
-                    if use_link_placeholders:
-                        data = MarkdownPruningPipe.unmask_pydantic(document=masked_document, data=data)
-                    return StructuredData(
-                        success=False,
-                        error=f"Cannot validate response into the provided schema. Error: {e}",
-                        data=data,
+                )
+            data = response.data
+            if use_link_placeholders:
+                data = MarkdownPruningPipe.unmask_pydantic(document=masked_document, data=data)
+            return StructuredData(
+                success=False,
+                error=f"Cannot validate response into the provided schema. Error: {e}",
+                data=data,
+            )
+
+    def forward(
+        self,
+        url: str,
+        document: str,
+        response_format: type[TResponseFormat] | None,
+        instructions: str | None,
+        verbose: bool = False,
+        use_link_placeholders: bool = True,
+    ) -> StructuredData[BaseModel]:
+        chunks, masked_document = self._prepare_chunks(document, use_link_placeholders)
+        responses: list[StructuredData[DictBaseModel] | BaseException] = []
+        for chunk in chunks:
+            prompt_id, variables = self._prompt(url, chunk, response_format, instructions)
+            # make LLM call
+            try:
+                responses.append(
+                    self.llmserve.structured_completion(
+                        prompt_id=prompt_id,
+                        response_format=StructuredData[DictBaseModel],
+                        variables=variables,
                     )
+                )
+            except Exception as e:
+                responses.append(e)
+        response = merge_structured_data(failed_chunks_to_structured_data(responses))
+        return self._validate_response(response, response_format, masked_document, verbose, use_link_placeholders)
+
+    async def forward_async(
+        self,
+        url: str,
+        document: str,
+        response_format: type[TResponseFormat] | None,
+        instructions: str | None,
+        verbose: bool = False,
+        use_link_placeholders: bool = True,
+    ) -> StructuredData[BaseModel]:
+        chunks, masked_document = self._prepare_chunks(document, use_link_placeholders)
+        semaphore = asyncio.Semaphore(self.max_concurrent_chunks)
+
+        async def extract(chunk: str) -> StructuredData[DictBaseModel]:
+            prompt_id, variables = self._prompt(url, chunk, response_format, instructions)
+            # make LLM call
+            async with semaphore:
+                return await self.llmserve.astructured_completion(
+                    prompt_id=prompt_id,
+                    response_format=StructuredData[DictBaseModel],
+                    variables=variables,
+                )
+
+        responses = await asyncio.gather(*[extract(chunk) for chunk in chunks], return_exceptions=True)
+        response = merge_structured_data(failed_chunks_to_structured_data(list(responses)))
+        return self._validate_response(response, response_format, masked_document, verbose, use_link_placeholders)
@@ -38,8 +38,9 @@ from notte_sdk.types import (
 from pydantic import BaseModel, Field
 from typing_extensions import override
 
-from notte_browser.controller import BrowserController
+from notte_browser.controller import ActionExecutionResult, BrowserController
 from notte_browser.errors import BrowserNotStartedError, MaxStepsReachedError, NoSnapshotObservedError
+from notte_browser.interception import InterceptionConfig, InterceptionProfile
 from notte_browser.playwright import GlobalWindowManager
 from notte_browser.resolution import NodeResolutionPipe
 from notte_browser.scraping.pipe import DataScrapingPipe, ScrapingType
@@ -47,7 +48,7 @@ from notte_browser.tagging.action.pipe import (
     MainActionSpaceConfig,
     MainActionSpacePipe,
 )
-from notte_browser.window import BrowserWindow, BrowserWindowConfig, BrowserWindowOptions
+from notte_browser.window import BrowserWindow, BrowserWindowConfig, BrowserWindowOptions, SnapshotProfile
 
 
 class ScrapeAndObserveParamsDict(ScrapeParamsDict, PaginationParamsDict):
@@ -60,11 +61,15 @@ class NotteSessionConfig(FrozenConfig):
     action: MainActionSpaceConfig = MainActionSpaceConfig()
     observe_max_retry_after_snapshot_update: int = 2
     scraping_type: ScrapingType = ScrapingType.LLM_EXTRACT
+    # bounds the markdown of huge pages (`ScrapingType.MARKDOWNIFY`), in characters
+    markdown_max_length: int | None = None
     nb_seconds_between_snapshots_check: int = 10
     auto_scrape: bool = True
     perception_model: str = Field(default_factory=LlmModel.default)
     verbose: bool = False
     structured_output_retries: int = 3
+    # which snapshot components are captured after each action (the others are fetched lazily)
+    snapshot_profile: SnapshotProfile = SnapshotProfile.FULL
 
     def dev_mode(self: Self) -> Self:
         format = "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
@@ -128,6 +133,9 @@ class NotteSessionConfig(FrozenConfig):
     def set_llm_scraping(self: Self) -> Self:
         return self._copy_and_validate(scraping_type=ScrapingType.LLM_EXTRACT)
 
+    def set_markdown_max_length(self: Self, value: int | None) -> Self:
+        return self._copy_and_validate(markdown_max_length=value)
+
     def web_security(self: Self, value: bool = True) -> Self:
         """
         Enable or disable web security.
@@ -137,6 +145,9 @@ class NotteSessionConfig(FrozenConfig):
     def set_chrome_args(self: Self, value: list[str] | None) -> Self:
         return self._copy_and_validate(window=self.window.set_chrome_args(value))
 
+    def set_interception(self: Self, value: InterceptionConfig | InterceptionProfile) -> Self:
+        return self._copy_and_validate(window=self.window.set_interception(value))
+
     def disable_web_security(self: Self) -> Self:
         return self.web_security(False)
 
@@ -188,10 +199,17 @@ class NotteSessionConfig(FrozenConfig):
     def set_viewport(self: Self, width: int | None = None, height: int | None = None) -> Self:
         return self._copy_and_validate(window=self.window.set_viewport(width, height))
 
+    def set_snapshot_profile(self: Self, value: SnapshotProfile) -> Self:
+        return self._copy_and_validate(snapshot_profile=value)
+
 
 class TrajectoryStep(BaseModel):
     obs: Observation
     action: BaseAction
+    # time spent waiting for the page to settle after the action (in ms)
+    settle_time_ms: float | None = None
+    # actions executed by an `act_multiple` batch (`action` is the last one), `None` for single actions
+    batch: list[BaseAction] | None = None
 
 
 class NotteSession(AsyncResource):
@@ -214,7 +232,9 @@ class NotteSession(AsyncResource):
         self.trajectory: list[TrajectoryStep] = []
         self._snapshot: BrowserSnapshot | None = None
         self._action_space_pipe: MainActionSpacePipe = MainActionSpacePipe(llmserve=llmserve, config=self.config.action)
-        self._data_scraping_pipe: DataScrapingPipe = DataScrapingPipe(llmserve=llmserve, type=self.config.scraping_type)
+        self._data_scraping_pipe: DataScrapingPipe = DataScrapingPipe(
+            llmserve=llmserve, type=self.config.scraping_type, markdown_max_length=self.config.markdown_max_length
+        )
         self.act_callback: Callable[[BaseAction, Observation], None] | None = act_callback
 
         # Track initialization
@@ -239,13 +259,28 @@ class NotteSession(AsyncResource):
     async def start(self) -> None:
         if self._window is not None:
             return
-        self._window = await GlobalWindowManager.new_window(self.config.window)
+        self._window = await GlobalWindowManager.new_window(
+            self.config.window,
+            config=BrowserWindowConfig().set_snapshot_profile(self.config.snapshot_profile),
+        )
 
     @override
     async def stop(self) -> None:
         await GlobalWindowManager.close_window(self.window)
         self._window = None
 
+    @override
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException],
+        exc_val: BaseException,
+        exc_tb: type[BaseException] | None,
+    ) -> None:
+        if exc_val is not None and isinstance(self._window, BrowserWindow):  # pyright: ignore[reportUnnecessaryComparison]
+            # the session failed: its browser context may be broken, do not hand it out to the next session
+            self._window.resource.tainted = True
+        await super().__aexit__(exc_type, exc_val, exc_tb)
+
     @property
     def window(self) -> BrowserWindow:
         if self._window is None:
@@ -293,12 +328,15 @@ class NotteSession(AsyncResource):
 
     # ---------------------------- observe, step functions ----------------------------
 
-    def _preobserve(self, snapshot: BrowserSnapshot, action: BaseAction) -> Observation:
+    async def _preobserve(
+        self, snapshot: BrowserSnapshot, action: BaseAction, batch: list[BaseAction] | None = None
+    ) -> Observation:
         if len(self.trajectory) >= self.config.max_steps:
             raise MaxStepsReachedError(max_steps=self.config.max_steps)
         self._snapshot = snapshot
         preobs = Observation.from_snapshot(snapshot, space=EmptyActionSpace(), progress=self.progress())
-        self.trajectory.append(TrajectoryStep(obs=preobs, action=action))
+        settle_time_ms = self._window.pop_settle_time() if self._window is not None else None
+        self.trajectory.append(TrajectoryStep(obs=preobs, action=action, settle_time_ms=settle_time_ms, batch=batch))
         if self.act_callback is not None:
             self.act_callback(action, preobs)
         return preobs
@@ -310,7 +348,7 @@ class NotteSession(AsyncResource):
     ) -> Observation:
         if self.config.verbose:
             logger.info(f"🧿 observing page {self.snapshot.metadata.url}")
-        self.obs.space = self._action_space_pipe.forward(
+        self.obs.space = await self._action_space_pipe.forward_async(
             self.snapshot,
             self.previous_actions,
             pagination=pagination,
@@ -319,7 +357,7 @@ class NotteSession(AsyncResource):
         # Check if the snapshot has changed since the beginning of the trajectory
         # if it has, it means that the page was not fully loaded and that we should restart the oblisting
         time_diff = dt.datetime.now() - self.snapshot.metadata.timestamp
-        if time_diff.total_seconds() > self.config.nb_seconds_between_snapshots_check:
+        if retry > 0 and time_diff.total_seconds() > self.config.nb_seconds_between_snapshots_check:
             if self.config.verbose:
                 logger.warning(
                     (
@@ -327,14 +365,20 @@ class NotteSession(AsyncResource):
                         "Check if page content has changed..."
                     )
                 )
-            check_snapshot = await self.window.snapshot(screenshot=False)
-            if not self.snapshot.compare_with(check_snapshot) and retry > 0:
+            # the a11y trees are deferred by some snapshot profiles: load them before the page state changes
+            _ = await self.snapshot.load("a11y_tree")
+            check_snapshot = await (await self.window.snapshot()).load("a11y_tree")
+            if not self.snapshot.compare_with(check_snapshot):
                 if self.config.verbose:
                     logger.warning(
                         "Snapshot changed since the beginning of the action listing, retrying to observe again"
                     )
-                _ = self._preobserve(check_snapshot, action=WaitAction(time_ms=int(time_diff.total_seconds() * 1000)))
+                _ = await self._preobserve(
+                    check_snapshot, action=WaitAction(time_ms=int(time_diff.total_seconds() * 1000))
+                )
                 return await self._observe(retry=retry - 1, pagination=pagination)
+            # same page: the deferred fields of the previous snapshot expired with the check snapshot
+            self._snapshot = check_snapshot
 
         if (
             self.config.auto_scrape
@@ -351,7 +395,7 @@ class NotteSession(AsyncResource):
     @track_usage("page.goto")
     async def goto(self, url: str | None) -> Observation:
         snapshot = await self.window.goto(url)
-        return self._preobserve(snapshot, action=GotoAction(url=snapshot.metadata.url))
+        return await self._preobserve(snapshot, action=GotoAction(url=snapshot.metadata.url))
 
     @timeit("observe")
     @track_usage("page.observe")
@@ -385,7 +429,7 @@ class NotteSession(AsyncResource):
         exec_action = ExecutableAction.parse(action_id, params, enter=enter)
         action = await NodeResolutionPipe.forward(exec_action, self._snapshot, verbose=self.config.verbose)
         snapshot = await self.controller.execute(self.window, action)
-        obs = self._preobserve(snapshot, action=action)
+        obs = await self._preobserve(snapshot, action=action)
         return obs
 
     @timeit("act")
@@ -404,12 +448,54 @@ class NotteSession(AsyncResource):
         snapshot = await self.controller.execute(self.window, action)
         if self.config.verbose:
             logger.info(f"🌌 action {action.id} executed in browser. Observing page...")
-        _ = self._preobserve(snapshot, action=action)
+        _ = await self._preobserve(snapshot, action=action)
         return await self._observe(
             pagination=PaginationParams(),
             retry=self.config.observe_max_retry_after_snapshot_update,
         )
 
+    @timeit("act_multiple")
+    @track_usage("page.act_multiple")
+    async def act_multiple(
+        self,
+        actions: Sequence[BaseAction],
+    ) -> tuple[list[ActionExecutionResult], Observation]:
+        """
+        Execute a batch of actions resolved against the current snapshot and observe the page once at the end.
+
+        Batchable actions (e.g. form fills) run back-to-back without intermediate snapshots. Execution stops at
+        the first failure: the remaining actions are reported as skipped. The batch is recorded as a single
+        trajectory step.
+        """
+        if self.config.verbose:
+            logger.info(f"🌌 starting batch execution of actions {[action.id for action in actions]}...")
+        resolved: list[BaseAction] = []
+        failure: ActionExecutionResult | None = None
+        for action in actions:
+            try:
+                resolved.append(await NodeResolutionPipe.forward(action, self._snapshot, verbose=self.config.verbose))
+            except Exception as e:
+                failure = ActionExecutionResult(action=action, success=False, error=e)
+                break
+        batch = await self.controller.execute_multiple(self.window, resolved)
+        results = batch.results
+        if failure is not None:
+            # the resolution failure is only relevant if the executed actions succeeded
+            results.append(
+                failure if batch.success else ActionExecutionResult(action=failure.action, success=False, skipped=True)
+            )
+            results.extend(
+                ActionExecutionResult(action=action, success=False, skipped=True) for action in actions[len(results) :]
+            )
+        executed = [result.action for result in results if not result.skipped]
+        if len(executed) > 0:
+            _ = await self._preobserve(batch.snapshot, action=executed[-1], batch=executed)
+        obs = await self._observe(
+            pagination=PaginationParams(),
+            retry=self.config.observe_max_retry_after_snapshot_update,
+        )
+        return results, obs
+
     @timeit("step")
     @track_usage("page.step")
     async def step(
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+from patchright.async_api import Frame, Page, Request
+
+# long-lived connections never complete: they should not prevent the page from being considered settled
+IGNORED_RESOURCE_TYPES = frozenset({"eventsource", "websocket", "media"})
+
+# installs a mutation observer on the current document (once) and returns the number of ms since the last
+# DOM mutation, or -1 while the document is still loading
+DOM_QUIET_JS = """() => {
+    if (window.__notteStability === undefined) {
+        const state = { lastMutation: performance.now() };
+        new MutationObserver(() => {
+            state.lastMutation = performance.now();
+        }).observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+        window.__notteStability = state;
+    }
+    if (document.readyState !== "complete") {
+        return -1;
+    }
+    return performance.now() - window.__notteStability.lastMutation;
+}"""
+
+
+@dataclass(frozen=True)
+class StabilizationResult:
+    # `False` if the hard ceiling was reached before the page settled
+    settled: bool
+    elapsed_ms: float
+    inflight_requests: int
+
+
+class PageStabilizer:
+    """
+    Detects when a page is settled, i.e. when there are no more requests in flight, the DOM stopped
+    mutating and no navigation is ongoing.
+
+    Network activity and navigations are tracked from the page events as soon as the stabilizer is attached,
+    so that requests fired by an action are accounted for even if they start before `wait` is called.
+    """
+
+    def __init__(self, page: Page) -> None:
+        self.page: Page = page
+        self.inflight: set[Request] = set()
+        self.last_activity: float = time.perf_counter()
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_request_done)
+        self.page.on("requestfailed", self._on_request_done)
+        self.page.on("framenavigated", self._on_navigated)
+        self.page.on("popup", self._on_activity)
+
+    def detach(self) -> None:
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("requestfinished", self._on_request_done)
+        self.page.remove_listener("requestfailed", self._on_request_done)
+        self.page.remove_listener("framenavigated", self._on_navigated)
+        self.page.remove_listener("popup", self._on_activity)
+
+    def _on_activity(self, *_: object) -> None:
+        self.last_activity = time.perf_counter()
+
+    def _on_request(self, request: Request) -> None:
+        if request.resource_type in IGNORED_RESOURCE_TYPES:
+            return
+        self.inflight.add(request)
+        self._on_activity()
+
+    def _on_request_done(self, request: Request) -> None:
+        if request in self.inflight:
+            self.inflight.discard(request)
+            self._on_activity()
+
+    def _on_navigated(self, frame: Frame) -> None:
+        if frame == self.page.main_frame:
+            # requests of the previous document are not reported as finished
+            self.inflight.clear()
+        self._on_activity()
+
+    async def dom_quiet_ms(self, timeout_ms: float) -> float | None:
+        """Time since the last DOM mutation. `None` if the page is loading or navigating."""
+        try:
+            quiet = await asyncio.wait_for(self.page.evaluate(DOM_QUIET_JS), timeout=max(timeout_ms, 1) / 1000)
+        except Exception:
+            # execution context destroyed by a navigation, or page too busy to answer
+            return None
+        if not isinstance(quiet, int | float) or quiet < 0:
+            return None
+        return float(quiet)
+
+    async def wait(
+        self,
+        timeout_ms: int,
+        dom_quiet_ms: int,
+        network_quiet_ms: int,
+        max_inflight_requests: int = 0,
+        poll_interval_ms: int = 50,
+    ) -> StabilizationResult:
+        """Wait until the page is settled, or at most `timeout_ms`."""
+        start = time.perf_counter()
+        deadline = start + timeout_ms / 1000
+        while True:
+            remaining_ms = (deadline - time.perf_counter()) * 1000
+            dom_quiet = await self.dom_quiet_ms(remaining_ms)
+            now = time.perf_counter()
+            network_quiet = (now - self.last_activity) * 1000 if len(self.inflight) <= max_inflight_requests else 0.0
+            settled = dom_quiet is not None and dom_quiet >= dom_quiet_ms and network_quiet >= network_quiet_ms
+            if settled or now >= deadline:
+                return StabilizationResult(
+                    settled=settled,
+                    elapsed_ms=(now - start) * 1000,
+                    inflight_requests=len(self.inflight),
+                )
+            await asyncio.sleep(min(poll_interval_ms / 1000, deadline - now))
@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ClassVar, Self
+
+from loguru import logger
+from notte_core.actions.base import Action
+from notte_core.actions.space import PossibleActionSpace
+from notte_core.browser.snapshot import BrowserSnapshot
+from notte_core.common.config import FrozenConfig
+from notte_core.utils.url import get_root_domain
+from pydantic import BaseModel
+from typing_extensions import override
+
+from notte_browser.tagging.action.llm_taging.base import BaseActionListingPipe
+from notte_browser.tagging.action.llm_taging.rules import RuleBasedActionListingPipe
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+DIGITS_PATTERN = re.compile(r"\d+")
+
+
+class ActionListingCacheConfig(FrozenConfig):
+    enabled: bool = False
+    # number of entries kept in the in-memory LRU
+    max_entries: int = 256
+    # maximum number of entries per domain (oldest entries are evicted first)
+    max_entries_per_domain: int = 64
+    # entries older than this are ignored and evicted. `None` means entries never expire
+    ttl_seconds: float | None = 7 * 24 * 3600
+    # optional sqlite database shared across sessions / processes
+    path: str | None = None
+    # mask digits in texts so that pages only differing by counters, prices or page numbers share entries
+    mask_digits: bool = True
+
+    def enable(self: Self, path: str | None = None) -> Self:
+        return self._copy_and_validate(enabled=True, path=path)
+
+    def disable(self: Self) -> Self:
+        return self._copy_and_validate(enabled=False)
+
+    def set_max_entries(self: Self, value: int) -> Self:
+        return self._copy_and_validate(max_entries=value)
+
+    def set_max_entries_per_domain(self: Self, value: int) -> Self:
+        return self._copy_and_validate(max_entries_per_domain=value)
+
+    def set_ttl_seconds(self: Self, value: float | None) -> Self:
+        return self._copy_and_validate(ttl_seconds=value)
+
+
+class ActionListingCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    domain: str
+    created_at: float
+    space: PossibleActionSpace
+
+
+class ActionListingCache:
+    """
+    Cache of action listings keyed by a structural fingerprint of the page.
+
+    Entries live in an in-memory LRU and, if `config.path` is set, in a sqlite database that
+    survives across sessions. The sqlite store is the source of truth for the per-domain cap.
+    """
+
+    _shared: ClassVar[dict[str, "ActionListingCache"]] = {}
+
+    @staticmethod
+    def shared(config: ActionListingCacheConfig) -> "ActionListingCache":
+        """Cache instance shared by all the pipes (and thus sessions) created with the same config."""
+        key = config.model_dump_json()
+        if key not in ActionListingCache._shared:
+            ActionListingCache._shared[key] = ActionListingCache(config)
+        return ActionListingCache._shared[key]
+
+    def __init__(self, config: ActionListingCacheConfig) -> None:
+        self.config: ActionListingCacheConfig = config
+        self.stats: ActionListingCacheStats = ActionListingCacheStats()
+        self._memory: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if config.path is not None:
+            Path(config.path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(config.path, check_same_thread=False)
+            _ = self._db.execute(
+                (
+                    "CREATE TABLE IF NOT EXISTS action_listing "
+                    "(key TEXT PRIMARY KEY, domain TEXT NOT NULL, created_at REAL NOT NULL, value TEXT NOT NULL)"
+                )
+            )
+            _ = self._db.execute("CREATE INDEX IF NOT EXISTS action_listing_domain ON action_listing (domain)")
+            self._db.commit()
+
+    def normalize_text(self, text: str) -> str:
+        text = WHITESPACE_PATTERN.sub(" ", text).strip().lower()
+        if self.config.mask_digits:
+            text = DIGITS_PATTERN.sub("0", text)
+        return text
+
+    def fingerprint(self, snapshot: BrowserSnapshot, namespace: str = "") -> str:
+        """Hash of the domain and of the roles, ids and normalized texts of the rendered DOM tree."""
+        digest = hashlib.sha256(f"{namespace}|{get_root_domain(snapshot.metadata.url)}\n".encode())
+        for node in snapshot.dom_node.flatten():
+            if node.id is None:
+                # structural nodes: only their role matters
+                digest.update(f"{node.get_role_str()}\n".encode())
+            else:
+                digest.update(f"{node.get_role_str()}|{node.id}|{self.normalize_text(node.text)}\n".encode())
+        return digest.hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.config.ttl_seconds is not None and time.time() - created_at > self.config.ttl_seconds
+
+    def get(self, key: str) -> PossibleActionSpace | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._expired(entry.created_at):
+                    self._remove(key)
+                    self.stats.expired += 1
+                else:
+                    self._memory.move_to_end(key)
+                    self.stats.hits += 1
+                    self.stats.memory_hits += 1
+                    return entry.space
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT domain, created_at, value FROM action_listing WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    domain, created_at, value = row
+                    if self._expired(created_at):
+                        self._remove(key)
+                        self.stats.expired += 1
+                    else:
+                        entry = CacheEntry(
+                            domain=domain,
+                            created_at=created_at,
+                            space=PossibleActionSpace.model_validate_json(value),
+                        )
+                        self._set_memory(key, entry)
+                        self.stats.hits += 1
+                        self.stats.disk_hits += 1
+                        return entry.space
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: str, url: str, space: PossibleActionSpace) -> None:
+        entry = CacheEntry(domain=get_root_domain(url), created_at=time.time(), space=space)
+        with self._lock:
+            self._set_memory(key, entry)
+            if self._db is not None:
+                _ = self._db.execute(
+                    "INSERT OR REPLACE INTO action_listing (key, domain, created_at, value) VALUES (?, ?, ?, ?)",
+                    (key, entry.domain, entry.created_at, space.model_dump_json()),
+                )
+                self._db.commit()
+            self._enforce_domain_cap(entry.domain)
+
+    def _set_memory(self, key: str, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.config.max_entries:
+            _ = self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _ = self._memory.pop(key, None)
+        if self._db is not None:
+            _ = self._db.execute("DELETE FROM action_listing WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _enforce_domain_cap(self, domain: str) -> None:
+        cap = self.config.max_entries_per_domain
+        if self._db is not None:
+            rows = self._db.execute(
+                "SELECT key FROM action_listing WHERE domain = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+                (domain, cap),
+            ).fetchall()
+            for (key,) in rows:
+                self._remove(key)
+                self.stats.evictions += 1
+            return
+        # memory entries are ordered from least to most recently used
+        keys = [key for key, entry in self._memory.items() if entry.domain == domain]
+        for key in keys[: max(0, len(keys) - cap)]:
+            self._remove(key)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                _ = self._db.execute("DELETE FROM action_listing")
+                self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class CachedActionListingPipe(BaseActionListingPipe):
+    """
+    Serves full action listings from an `ActionListingCache` and only calls the wrapped pipe on misses.
+
+    Incremental listings depend on the previous action list and are never cached, except when the previous action
+    list only holds the rule-based actions of the snapshot (`LlmActionSpaceConfig.rule_based_listing`): these only
+    depend on the snapshot, so the listing of the remaining nodes is cached apart from the full listings.
+    """
+
+    def __init__(
+        self,
+        pipe: BaseActionListingPipe,
+        cache: ActionListingCache,
+        namespace: str = "",
+        verbose: bool = False,
+    ) -> None:
+        super().__init__(pipe.llmserve)
+        self.pipe: BaseActionListingPipe = pipe
+        self.cache: ActionListingCache = cache
+        # prompt used by the wrapped pipe: listings generated by different prompts are kept apart
+        self.namespace: str = namespace
+        self.verbose: bool = verbose
+
+    def cache_namespace(self, snapshot: BrowserSnapshot, previous_action_list: list[Action] | None) -> str | None:
+        """Namespace of the listing in the cache, `None` if the listing depends on the previous steps"""
+        if previous_action_list is None or len(previous_action_list) == 0:
+            return self.namespace
+        if previous_action_list == RuleBasedActionListingPipe.forward(snapshot):
+            return f"{self.namespace}:rule_based"
+        return None
+
+    def _lookup(self, snapshot: BrowserSnapshot, namespace: str) -> tuple[str, PossibleActionSpace | None]:
+        key = self.cache.fingerprint(snapshot, namespace=namespace)
+        space = self.cache.get(key)
+        if self.verbose:
+            status = "hit" if space is not None else "miss"
+            logger.info(
+                f"🗃️ Action listing cache {status} for {snapshot.metadata.url} (hit rate: {self.cache.stats.hit_rate:.0%})"
+            )
+        return key, space
+
+    @override
+    def forward(
+        self, snapshot: BrowserSnapshot, previous_action_list: list[Action] | None = None
+    ) -> PossibleActionSpace:
+        namespace = self.cache_namespace(snapshot, previous_action_list)
+        if namespace is None:
+            return self.pipe.forward(snapshot, previous_action_list)
+        key, space = self._lookup(snapshot, namespace)
+        if space is None:
+            space = self.pipe.forward(snapshot, previous_action_list)
+            self.cache.set(key, snapshot.metadata.url, space)
+        return space
+
+    @override
+    async def forward_async(
+        self, snapshot: BrowserSnapshot, previous_action_list: list[Action] | None = None
+    ) -> PossibleActionSpace:
+        namespace = self.cache_namespace(snapshot, previous_action_list)
+        if namespace is None:
+            return await self.pipe.forward_async(snapshot, previous_action_list)
+        # sqlite lookups and commits are blocking: keep them off the event loop
+        key, space = await asyncio.to_thread(self._lookup, snapshot, namespace)
+        if space is None:
+            space = await self.pipe.forward_async(snapshot, previous_action_list)
+            await asyncio.to_thread(self.cache.set, key, snapshot.metadata.url, space)
+        return space
+
+    @override
+    def forward_incremental(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: list[Action],
+    ) -> PossibleActionSpace:
+        return self.pipe.forward_incremental(snapshot, previous_action_list)
+
+    @override
+    async def forward_incremental_async(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: list[Action],
+    ) -> PossibleActionSpace:
+        return await self.pipe.forward_incremental_async(snapshot, previous_action_list)
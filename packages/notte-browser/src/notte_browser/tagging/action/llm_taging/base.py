@@ -1,5 +1,6 @@
 import re
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from typing import Any, ClassVar
 
 from loguru import logger
@@ -26,12 +27,23 @@ class BaseActionListingPipe(ABC):
     ) -> PossibleActionSpace:
         pass
 
+    async def forward_async(
+        self, snapshot: BrowserSnapshot, previous_action_list: list[Action] | None = None
+    ) -> PossibleActionSpace:
+        return self.forward(snapshot, previous_action_list)
+
     def llm_completion(self, prompt_id: str, variables: dict[str, Any]) -> str:
         response = self.llmserve.completion(prompt_id, variables)
         if response.choices[0].message.content is None:  # type: ignore
             raise LLMnoOutputCompletionError()
         return response.choices[0].message.content  # type: ignore
 
+    async def llm_completion_async(self, prompt_id: str, variables: dict[str, Any]) -> str:
+        response = await self.llmserve.acompletion(prompt_id, variables)
+        if response.choices[0].message.content is None:  # type: ignore
+            raise LLMnoOutputCompletionError()
+        return response.choices[0].message.content  # type: ignore
+
     @abstractmethod
     def forward_incremental(
         self,
@@ -45,6 +57,29 @@ class BaseActionListingPipe(ABC):
         """
         raise NotImplementedError("forward_incremental")
 
+    async def forward_incremental_async(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: list[Action],
+    ) -> PossibleActionSpace:
+        return self.forward_incremental(snapshot, previous_action_list)
+
+    @staticmethod
+    def previous_action_space(previous_action_list: Sequence[Action]) -> PossibleActionSpace:
+        return PossibleActionSpace(
+            # TODO: get description from previous action list
+            description="",
+            actions=[
+                PossibleAction(
+                    id=act.id,
+                    description=act.description,
+                    category=act.category,
+                    params=act.params,
+                )
+                for act in previous_action_list
+            ],
+        )
+
 
 class RetryPipeWrapper(BaseActionListingPipe):
     tracer: ClassVar[LlmParsingErrorFileTracer] = LlmParsingErrorFileTracer()
@@ -55,6 +90,42 @@ class RetryPipeWrapper(BaseActionListingPipe):
         self.max_tries: int = max_tries
         self.verbose: bool = verbose
 
+    def _on_error(self, e: Exception, errors: list[str]) -> None:
+        if "Please reduce the length of the messages or completions" in str(e):
+            # this is a known error that happens when the context is too long
+            # we should not retry in this case (nothing is going to change)
+            pattern = r"Current length is (\d+) while limit is (\d+)"
+            size: int | None = None
+            max_size: int | None = None
+            match = re.search(pattern, str(e))
+            if match:
+                size = int(match.group(1))
+                max_size = int(match.group(2))
+            else:
+                if self.verbose:
+                    logger.error(f"Failed to parse context size from error message: {str(e)}. Please fix this ASAP.")
+                raise ContextSizeTooLargeError(size=size, max_size=max_size) from e
+        if self.verbose:
+            logger.warning(f"failed to parse action list but retrying. Start of error msg: {str(e)[:200]}...")
+        errors.append(str(e))
+
+    def _on_success(self, errors: list[str]) -> None:
+        self.tracer.trace(
+            status="success",
+            pipe_name=self.pipe.__class__.__name__,
+            nb_retries=len(errors),
+            error_msgs=errors,
+        )
+
+    def _on_failure(self, errors: list[str]) -> LLMParsingError:
+        self.tracer.trace(
+            status="failure",
+            pipe_name=self.pipe.__class__.__name__,
+            nb_retries=len(errors),
+            error_msgs=errors,
+        )
+        return LLMParsingError(context=f"Action listing failed after {self.max_tries} tries with errors: {errors}")
+
     @override
     def forward(
         self, snapshot: BrowserSnapshot, previous_action_list: list[Action] | None = None
@@ -64,43 +135,28 @@ class RetryPipeWrapper(BaseActionListingPipe):
         for _ in range(self.max_tries):
             try:
                 out = self.pipe.forward(snapshot, previous_action_list)
-                self.tracer.trace(
-                    status="success",
-                    pipe_name=self.pipe.__class__.__name__,
-                    nb_retries=len(errors),
-                    error_msgs=errors,
-                )
+                self._on_success(errors)
                 return out
             except Exception as e:
                 last_error = e
-                if "Please reduce the length of the messages or completions" in str(e):
-                    # this is a known error that happens when the context is too long
-                    # we should not retry in this case (nothing is going to change)
-                    pattern = r"Current length is (\d+) while limit is (\d+)"
-                    size: int | None = None
-                    max_size: int | None = None
-                    match = re.search(pattern, str(e))
-                    if match:
-                        size = int(match.group(1))
-                        max_size = int(match.group(2))
-                    else:
-                        if self.verbose:
-                            logger.error(
-                                f"Failed to parse context size from error message: {str(e)}. Please fix this ASAP."
-                            )
-                        raise ContextSizeTooLargeError(size=size, max_size=max_size) from e
-                if self.verbose:
-                    logger.warning(f"failed to parse action list but retrying. Start of error msg: {str(e)[:200]}...")
-                errors.append(str(e))
-        self.tracer.trace(
-            status="failure",
-            pipe_name=self.pipe.__class__.__name__,
-            nb_retries=len(errors),
-            error_msgs=errors,
-        )
-        raise LLMParsingError(
-            context=f"Action listing failed after {self.max_tries} tries with errors: {errors}"
-        ) from last_error
+                self._on_error(e, errors)
+        raise self._on_failure(errors) from last_error
+
+    @override
+    async def forward_async(
+        self, snapshot: BrowserSnapshot, previous_action_list: list[Action] | None = None
+    ) -> PossibleActionSpace:
+        errors: list[str] = []
+        last_error: Exception | None = None
+        for _ in range(self.max_tries):
+            try:
+                out = await self.pipe.forward_async(snapshot, previous_action_list)
+                self._on_success(errors)
+                return out
+            except Exception as e:
+                last_error = e
+                self._on_error(e, errors)
+        raise self._on_failure(errors) from last_error
 
     @override
     def forward_incremental(
@@ -115,16 +171,19 @@ class RetryPipeWrapper(BaseActionListingPipe):
                 pass
         if self.verbose:
             logger.error("Failed to get action list after max tries => returning previous action list")
-        return PossibleActionSpace(
-            # TODO: get description from previous action list
-            description="",
-            actions=[
-                PossibleAction(
-                    id=act.id,
-                    description=act.description,
-                    category=act.category,
-                    params=act.params,
-                )
-                for act in previous_action_list
-            ],
-        )
+        return self.previous_action_space(previous_action_list)
+
+    @override
+    async def forward_incremental_async(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: list[Action],
+    ) -> PossibleActionSpace:
+        for _ in range(self.max_tries):
+            try:
+                return await self.pipe.forward_incremental_async(snapshot, previous_action_list)
+            except Exception:
+                pass
+        if self.verbose:
+            logger.error("Failed to get action list after max tries => returning previous action list")
+        return self.previous_action_space(previous_action_list)
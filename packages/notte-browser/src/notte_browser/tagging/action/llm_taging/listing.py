@@ -1,4 +1,5 @@
 from collections.abc import Sequence
+from typing import Self
 
 from loguru import logger
 from notte_core.actions.base import Action, PossibleAction
@@ -10,6 +11,7 @@ from notte_core.llms.service import LLMService
 from typing_extensions import override
 
 from notte_browser.rendering.pipe import DomNodeRenderingConfig, DomNodeRenderingPipe
+from notte_browser.tagging.action.cache import ActionListingCache, ActionListingCacheConfig, CachedActionListingPipe
 from notte_browser.tagging.action.llm_taging.base import BaseActionListingPipe, RetryPipeWrapper
 from notte_browser.tagging.action.llm_taging.parser import (
     ActionListingParserConfig,
@@ -23,6 +25,10 @@ class ActionListingConfig(FrozenConfig):
     parser: ActionListingParserConfig = ActionListingParserConfig()
     rendering: DomNodeRenderingConfig = DomNodeRenderingConfig()
     max_retries: int | None = 3
+    cache: ActionListingCacheConfig = ActionListingCacheConfig()
+
+    def set_cache(self: Self, value: ActionListingCacheConfig) -> Self:
+        return self._copy_and_validate(cache=value)
 
 
 class ActionListingPipe(BaseActionListingPipe):
@@ -69,6 +75,22 @@ class ActionListingPipe(BaseActionListingPipe):
         text = sc.extract(response)
         return text
 
+    def parse_response(self, response: str) -> PossibleActionSpace:
+        return PossibleActionSpace(
+            description=self.parse_webpage_description(response),
+            actions=self.parse_action_listing(response),
+        )
+
+    def empty_action_space(self, snapshot: BrowserSnapshot) -> PossibleActionSpace | None:
+        if len(snapshot.interaction_nodes()) == 0:
+            if self.config.verbose:
+                logger.error("No interaction nodes found in context. Returning empty action list.")
+            return PossibleActionSpace(
+                description="Description not available because no interaction actions found",
+                actions=[],
+            )
+        return None
+
     @override
     def forward(
         self,
@@ -77,26 +99,33 @@ class ActionListingPipe(BaseActionListingPipe):
     ) -> PossibleActionSpace:
         if previous_action_list is not None and len(previous_action_list) > 0:
             return self.forward_incremental(snapshot, previous_action_list)
-        if len(snapshot.interaction_nodes()) == 0:
-            if self.config.verbose:
-                logger.error("No interaction nodes found in context. Returning empty action list.")
-            return PossibleActionSpace(
-                description="Description not available because no interaction actions found",
-                actions=[],
-            )
+        empty_space = self.empty_action_space(snapshot)
+        if empty_space is not None:
+            return empty_space
         variables = self.get_prompt_variables(snapshot, previous_action_list)
         response = self.llm_completion(self.config.prompt_id, variables)
-        return PossibleActionSpace(
-            description=self.parse_webpage_description(response),
-            actions=self.parse_action_listing(response),
-        )
+        return self.parse_response(response)
 
     @override
-    def forward_incremental(
+    async def forward_async(
         self,
         snapshot: BrowserSnapshot,
-        previous_action_list: Sequence[Action],
+        previous_action_list: Sequence[Action] | None = None,
     ) -> PossibleActionSpace:
+        if previous_action_list is not None and len(previous_action_list) > 0:
+            return await self.forward_incremental_async(snapshot, previous_action_list)
+        empty_space = self.empty_action_space(snapshot)
+        if empty_space is not None:
+            return empty_space
+        variables = self.get_prompt_variables(snapshot, previous_action_list)
+        response = await self.llm_completion_async(self.config.prompt_id, variables)
+        return self.parse_response(response)
+
+    def incremental_snapshot(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: Sequence[Action],
+    ) -> BrowserSnapshot | None:
         incremental_snapshot = snapshot.subgraph_without(previous_action_list)
         if incremental_snapshot is None:
             if self.config.verbose:
@@ -107,40 +136,59 @@ class ActionListingPipe(BaseActionListingPipe):
                         "Returning previous action list..."
                     )
                 )
-            return PossibleActionSpace(
-                description="",
-                actions=[
-                    PossibleAction(
-                        id=act.id,
-                        description=act.description,
-                        category=act.category,
-                        params=act.params,
-                    )
-                    for act in previous_action_list
-                ],
-            )
-        document = DomNodeRenderingPipe.forward(snapshot.dom_node, config=self.config.rendering)
-        incr_document = DomNodeRenderingPipe.forward(incremental_snapshot.dom_node, config=self.config.rendering)
-        total_length, incremental_length = len(document), len(incr_document)
-        reduction_perc = (total_length - incremental_length) / total_length * 100
+            return None
         if self.config.verbose:
+            document = DomNodeRenderingPipe.forward(snapshot.dom_node, config=self.config.rendering)
+            incr_document = DomNodeRenderingPipe.forward(incremental_snapshot.dom_node, config=self.config.rendering)
+            total_length, incremental_length = len(document), len(incr_document)
+            reduction_perc = (total_length - incremental_length) / total_length * 100
             logger.info(f"🚀 Forward incremental reduces context length by {reduction_perc:.2f}%")
+        return incremental_snapshot
+
+    @override
+    def forward_incremental(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: Sequence[Action],
+    ) -> PossibleActionSpace:
+        incremental_snapshot = self.incremental_snapshot(snapshot, previous_action_list)
+        if incremental_snapshot is None:
+            return self.previous_action_space(previous_action_list)
         variables = self.get_prompt_variables(incremental_snapshot, previous_action_list)
         response = self.llm_completion(self.config.incremental_prompt_id, variables)
-        return PossibleActionSpace(
-            description=self.parse_webpage_description(response),
-            actions=self.parse_action_listing(response),
-        )
+        return self.parse_response(response)
+
+    @override
+    async def forward_incremental_async(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: Sequence[Action],
+    ) -> PossibleActionSpace:
+        incremental_snapshot = self.incremental_snapshot(snapshot, previous_action_list)
+        if incremental_snapshot is None:
+            return self.previous_action_space(previous_action_list)
+        variables = self.get_prompt_variables(incremental_snapshot, previous_action_list)
+        response = await self.llm_completion_async(self.config.incremental_prompt_id, variables)
+        return self.parse_response(response)
 
 
 def MainActionListingPipe(
     llmserve: LLMService,
     config: ActionListingConfig,
 ) -> BaseActionListingPipe:
+    pipe: BaseActionListingPipe = ActionListingPipe(llmserve=llmserve, config=config)
     if config.max_retries is not None:
-        return RetryPipeWrapper(
-            pipe=ActionListingPipe(llmserve=llmserve, config=config),
+        pipe = RetryPipeWrapper(
+            pipe=pipe,
             max_tries=config.max_retries,
             verbose=config.verbose,
         )
-    return ActionListingPipe(llmserve=llmserve, config=config)
+    if config.cache.enabled:
+        # only successful (i.e. retried) listings are cached
+        pipe = CachedActionListingPipe(
+            pipe=pipe,
+            cache=ActionListingCache.shared(config.cache),
+            namespace=config.prompt_id,
+            verbose=config.verbose,
+        )
+    return pipe
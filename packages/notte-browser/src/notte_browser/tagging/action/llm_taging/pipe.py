@@ -1,8 +1,10 @@
+import asyncio
+import math
 from collections.abc import Sequence
 
 from loguru import logger
 from notte_core.actions.base import Action, PossibleAction
-from notte_core.actions.space import ActionSpace
+from notte_core.actions.space import ActionSpace, PossibleActionSpace
 from notte_core.browser.node_type import NodeCategory
 from notte_core.browser.snapshot import BrowserSnapshot
 from notte_core.common.config import FrozenConfig
@@ -21,6 +23,7 @@ from notte_browser.tagging.action.llm_taging.listing import (
     ActionListingConfig,
     MainActionListingPipe,
 )
+from notte_browser.tagging.action.llm_taging.rules import RuleBasedActionListingPipe
 from notte_browser.tagging.action.llm_taging.validation import ActionListValidationPipe
 from notte_browser.tagging.page import PageCategoryPipe
 
@@ -32,6 +35,13 @@ class LlmActionSpaceConfig(FrozenConfig):
     required_action_coverage: float = 0.95
     max_listing_trials: int = 3
     include_images: bool = False
+    # pages with more interaction nodes to list are split into chunks of at most `max_nodes_per_chunk` nodes
+    # (in DOM order), listed concurrently. `None`: the page is listed in a single LLM call.
+    max_nodes_per_chunk: int | None = None
+    # interaction nodes with a descriptive name are listed without the LLM (see `RuleBasedActionListingPipe`):
+    # only the other ones are sent to the LLM. With the action listing cache, these partial listings are cached
+    # apart from the full ones, and only when no action was listed by a previous step (see `CachedActionListingPipe`)
+    rule_based_listing: bool = False
 
     def __post_init__(self):
         if self.required_action_coverage > 1.0 or self.required_action_coverage < 0.0:
@@ -44,6 +54,11 @@ class LlmActionSpaceConfig(FrozenConfig):
                 "'max_listing_trials' must be positive",
                 advice="Check the `max_listing_trials` parameter in the `LlmActionSpaceConfig` class.",
             )
+        if self.max_nodes_per_chunk is not None and self.max_nodes_per_chunk <= 0:
+            raise UnexpectedBehaviorError(
+                "'max_nodes_per_chunk' must be positive",
+                advice="Check the `max_nodes_per_chunk` parameter in the `LlmActionSpaceConfig` class.",
+            )
 
 
 class LlmActionSpacePipe(BaseActionSpacePipe):
@@ -114,21 +129,24 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
             )
         return False
 
-    def forward_unfiltered(
+    def _listing_inputs(
         self,
         snapshot: BrowserSnapshot,
         previous_action_list: Sequence[Action] | None,
-        pagination: PaginationParams,
-        n_trials: int,
-    ) -> ActionSpace:
+    ) -> tuple[list[str], list[Action]]:
         # this function assumes tld(previous_actions_list) == tld(context)!
         inodes_ids = [inode.id for inode in snapshot.interaction_nodes()]
         previous_action_list = previous_action_list or []
         # we keep only intersection of current context inodes and previous actions!
-        previous_action_list = [action for action in previous_action_list if action.id in inodes_ids]
-        # TODO: question, can we already perform a `check_enough_actions` here ?
-        possible_space = self.action_listing_pipe.forward(snapshot, previous_action_list)
-        merged_actions = self.merge_action_lists(inodes_ids, possible_space.actions, previous_action_list)
+        return inodes_ids, [action for action in previous_action_list if action.id in inodes_ids]
+
+    def _requires_retry(
+        self,
+        inodes_ids: list[str],
+        merged_actions: Sequence[Action],
+        pagination: PaginationParams,
+        n_trials: int,
+    ) -> bool:
         # check if we have enough actions to proceed.
         completed = self.check_enough_actions(inodes_ids, merged_actions, pagination)
         if not completed and n_trials == 0:
@@ -137,10 +155,62 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
                 n_actions=len(inodes_ids),
                 threshold=self.config.required_action_coverage,
             )
-
         if not completed and n_trials > 0:
             if self.config.verbose:
                 logger.info(f"[ActionListing] Retry listing actions with {n_trials} trials left.")
+            return True
+        return False
+
+    def listing_chunks(
+        self,
+        snapshot: BrowserSnapshot,
+        inodes_ids: list[str],
+        previous_action_list: Sequence[Action],
+    ) -> list[BrowserSnapshot] | None:
+        """
+        Disjoint subgraphs of the interaction nodes that are not listed yet, or `None` if they fit in a single chunk
+        """
+        max_nodes_per_chunk = self.config.max_nodes_per_chunk
+        listed_ids = set([action.id for action in previous_action_list])
+        missing_ids = [id for id in inodes_ids if id not in listed_ids]
+        if max_nodes_per_chunk is None or len(missing_ids) <= max_nodes_per_chunk:
+            return None
+        # same number of nodes in every chunk
+        nb_chunks = math.ceil(len(missing_ids) / max_nodes_per_chunk)
+        chunk_size = math.ceil(len(missing_ids) / nb_chunks)
+        chunks: list[BrowserSnapshot] = []
+        for start in range(0, len(missing_ids), chunk_size):
+            chunk = snapshot.subgraph(set(missing_ids[start : start + chunk_size]))
+            if chunk is not None:
+                chunks.append(chunk)
+        if self.config.verbose:
+            logger.info(f"[ActionListing] Listing {len(missing_ids)} actions in {len(chunks)} chunks")
+        return chunks if len(chunks) > 0 else None
+
+    @staticmethod
+    def merge_chunk_spaces(spaces: list[PossibleActionSpace]) -> PossibleActionSpace:
+        return PossibleActionSpace(
+            # the first chunk is the top of the page
+            description=spaces[0].description,
+            actions=[action for space in spaces for action in space.actions],
+        )
+
+    def forward_unfiltered(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: Sequence[Action] | None,
+        pagination: PaginationParams,
+        n_trials: int,
+    ) -> ActionSpace:
+        inodes_ids, previous_action_list = self._listing_inputs(snapshot, previous_action_list)
+        # TODO: question, can we already perform a `check_enough_actions` here ?
+        chunks = self.listing_chunks(snapshot, inodes_ids, previous_action_list)
+        if chunks is not None:
+            possible_space = self.merge_chunk_spaces([self.action_listing_pipe.forward(chunk) for chunk in chunks])
+        else:
+            possible_space = self.action_listing_pipe.forward(snapshot, previous_action_list)
+        merged_actions = self.merge_action_lists(inodes_ids, possible_space.actions, previous_action_list)
+        if self._requires_retry(inodes_ids, merged_actions, pagination, n_trials):
             return self.forward_unfiltered(
                 snapshot,
                 merged_actions,
@@ -157,6 +227,59 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
             space.category = self.doc_categoriser_pipe.forward(snapshot, space)
         return space
 
+    async def forward_unfiltered_async(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: Sequence[Action] | None,
+        pagination: PaginationParams,
+        n_trials: int,
+    ) -> ActionSpace:
+        inodes_ids, previous_action_list = self._listing_inputs(snapshot, previous_action_list)
+        chunks = self.listing_chunks(snapshot, inodes_ids, previous_action_list)
+        if chunks is not None:
+            # the listing takes as long as the slowest chunk
+            spaces = await asyncio.gather(*[self.action_listing_pipe.forward_async(chunk) for chunk in chunks])
+            possible_space = self.merge_chunk_spaces(list(spaces))
+        else:
+            possible_space = await self.action_listing_pipe.forward_async(snapshot, previous_action_list)
+        merged_actions = self.merge_action_lists(inodes_ids, possible_space.actions, previous_action_list)
+        if self._requires_retry(inodes_ids, merged_actions, pagination, n_trials):
+            return await self.forward_unfiltered_async(
+                snapshot,
+                merged_actions,
+                n_trials=n_trials - 1,
+                pagination=pagination,
+            )
+
+        space = ActionSpace(
+            description=possible_space.description,
+            raw_actions=merged_actions,
+        )
+        # categorisation should only be done after enough actions have been listed to avoid unecessary LLM calls.
+        if self.doc_categoriser_pipe:
+            space.category = await self.doc_categoriser_pipe.forward_async(snapshot, space)
+        return space
+
+    def with_rule_based_actions(
+        self, snapshot: BrowserSnapshot, previous_action_list: Sequence[Action] | None
+    ) -> Sequence[Action] | None:
+        if not self.config.rule_based_listing:
+            return previous_action_list
+        previous_action_list = list(previous_action_list or [])
+        # actions listed by the LLM in a previous step are kept
+        listed_ids = set([action.id for action in previous_action_list])
+        rule_based_actions = [
+            action for action in RuleBasedActionListingPipe.forward(snapshot) if action.id not in listed_ids
+        ]
+        if self.config.verbose:
+            logger.info(
+                (
+                    f"[ActionListing] {len(rule_based_actions)} actions listed without LLM "
+                    f"out of {len(snapshot.interaction_nodes())} interaction nodes"
+                )
+            )
+        return previous_action_list + rule_based_actions
+
     def tagging_context(self, snapshot: BrowserSnapshot) -> BrowserSnapshot:
         if self.config.include_images:
             return snapshot
@@ -180,6 +303,7 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
         # TODO: handle the typing of this properly later on
         cast_previous_action_list: Sequence[Action] | None = previous_action_list  # type: ignore
         _snapshot = self.tagging_context(snapshot)
+        cast_previous_action_list = self.with_rule_based_actions(_snapshot, cast_previous_action_list)
 
         space = self.forward_unfiltered(
             _snapshot,
@@ -190,7 +314,32 @@ class LlmActionSpacePipe(BaseActionSpacePipe):
                 max_nb_actions=pagination.max_nb_actions,
             ),
         )
-        filtered_actions = ActionFilteringPipe.forward(_snapshot, space.raw_actions)
+        return self.filter_space(_snapshot, space)
+
+    @override
+    async def forward_async(
+        self,
+        snapshot: BrowserSnapshot,
+        previous_action_list: Sequence[BaseAction] | None,
+        pagination: PaginationParams,
+    ) -> ActionSpace:
+        cast_previous_action_list: Sequence[Action] | None = previous_action_list  # type: ignore
+        _snapshot = self.tagging_context(snapshot)
+        cast_previous_action_list = self.with_rule_based_actions(_snapshot, cast_previous_action_list)
+
+        space = await self.forward_unfiltered_async(
+            _snapshot,
+            cast_previous_action_list,
+            pagination=pagination,
+            n_trials=self.get_n_trials(
+                nb_nodes=len(snapshot.interaction_nodes()),
+                max_nb_actions=pagination.max_nb_actions,
+            ),
+        )
+        return self.filter_space(_snapshot, space)
+
+    def filter_space(self, snapshot: BrowserSnapshot, space: ActionSpace) -> ActionSpace:
+        filtered_actions = ActionFilteringPipe.forward(snapshot, space.raw_actions)
         return ActionSpace(
             description=space.description,
             raw_actions=filtered_actions,
@@ -0,0 +1,117 @@
+import re
+
+from notte_core.actions.base import Action, ActionParameter
+from notte_core.browser.dom_tree import DomNode
+from notte_core.browser.node_type import NodeRole
+from notte_core.browser.snapshot import BrowserSnapshot
+
+# names that do not say what the action does: the LLM has to look at the surrounding context
+GENERIC_NAMES: set[str] = {
+    "here",
+    "click here",
+    "more",
+    "read more",
+    "learn more",
+    "see more",
+    "show more",
+    "details",
+    "link",
+    "button",
+    "menu",
+    "toggle",
+    "open",
+    "close",
+    "go",
+}
+URL_LIKE = re.compile(r"^(https?:|www\.|/|#|\.|javascript:|mailto:|tel:)|://")
+# form field names, css classes, ...: `search_query`, `btn-primary`
+IDENTIFIER_LIKE = re.compile(r"^[A-Za-z0-9]+([_\-.][A-Za-z0-9]+)+$")
+
+BUTTON_DESCRIPTIONS: dict[str, str] = {
+    NodeRole.BUTTON.value: "Click the '{name}' button",
+    NodeRole.TAB.value: "Select the '{name}' tab",
+    NodeRole.MENUITEM.value: "Select the '{name}' menu item",
+    NodeRole.SWITCH.value: "Toggle the '{name}' switch",
+    NodeRole.CHECKBOX.value: "Toggle the '{name}' checkbox",
+    NodeRole.MENUITEMCHECKBOX.value: "Toggle the '{name}' menu item",
+    NodeRole.RADIO.value: "Select the '{name}' option",
+    NodeRole.MENUITEMRADIO.value: "Select the '{name}' menu item",
+}
+INPUT_DESCRIPTIONS: dict[str, str] = {
+    NodeRole.TEXTBOX.value: "Fill the '{name}' field",
+    NodeRole.SEARCHBOX.value: "Search using the '{name}' search field",
+}
+
+
+def is_descriptive(name: str | None) -> bool:
+    """Whether an accessible name describes the action on its own"""
+    if name is None:
+        return False
+    name = name.strip()
+    if len(name) < 2 or len(name) > 80 or "\n" in name:
+        return False
+    if sum(c.isalpha() for c in name) < 2:
+        return False
+    if name.lower() in GENERIC_NAMES:
+        return False
+    return URL_LIKE.search(name) is None and IDENTIFIER_LIKE.match(name) is None
+
+
+def parameter_name(label: str) -> str:
+    return "_".join(re.findall(r"[a-z0-9]+", label.lower())[:4])
+
+
+class RuleBasedActionListingPipe:
+    """
+    Deterministic descriptions for the interaction nodes whose accessible name already describes the action
+    (e.g. a `Sign in` button, or a text input with an `Email address` placeholder).
+
+    Icon-only buttons, unlabeled inputs, comboboxes (their values are not known), ... are not listed: they are left to
+    the LLM.
+    """
+
+    @staticmethod
+    def input_label(node: DomNode) -> str | None:
+        # the `name` attribute of inputs is a form field name, not a label
+        if node.attributes is None:
+            return None
+        for label in [node.attributes.aria_label, node.attributes.placeholder, node.attributes.title]:
+            if label is not None and len(label.strip()) > 0:
+                return label.strip()
+        return None
+
+    @staticmethod
+    def action(node: DomNode) -> Action | None:
+        if node.id is None or isinstance(node.role, str):
+            return None
+        role = node.role.value
+        if role == NodeRole.LINK.value:
+            name = node.text.strip()
+            if not is_descriptive(name) or (node.attributes is not None and name == node.attributes.href):
+                return None
+            return Action(id=node.id, description=f"Open '{name}'", category="Navigation")
+        if role in BUTTON_DESCRIPTIONS:
+            name = node.text.strip()
+            if not is_descriptive(name):
+                return None
+            return Action(id=node.id, description=BUTTON_DESCRIPTIONS[role].format(name=name), category="Actions")
+        if role in INPUT_DESCRIPTIONS:
+            label = RuleBasedActionListingPipe.input_label(node)
+            if label is None or not is_descriptive(label) or len(parameter_name(label)) == 0:
+                return None
+            return Action(
+                id=node.id,
+                description=INPUT_DESCRIPTIONS[role].format(name=label),
+                category="Form",
+                params=[ActionParameter(name=parameter_name(label), type="str")],
+            )
+        return None
+
+    @staticmethod
+    def forward(snapshot: BrowserSnapshot) -> list[Action]:
+        actions: list[Action] = []
+        for node in snapshot.interaction_nodes():
+            action = RuleBasedActionListingPipe.action(node)
+            if action is not None:
+                actions.append(action)
+        return actions
@@ -1,5 +1,6 @@
 import time
 
+from litellm import ModelResponse  # type: ignore[import]
 from loguru import logger
 from notte_core.actions.space import ActionSpace
 from notte_core.browser.snapshot import BrowserSnapshot
@@ -13,18 +14,15 @@ class PageCategoryPipe:
         self.llmserve: LLMService = llmserve
         self.verbose: bool = verbose
 
-    def forward(self, snapshot: BrowserSnapshot, space: ActionSpace) -> SpaceCategory:
-        description = f"""
+    @staticmethod
+    def page_description(snapshot: BrowserSnapshot, space: ActionSpace) -> str:
+        return f"""
 - URL: {snapshot.metadata.url}
 - Title: {snapshot.metadata.title}
 - Description: {space.description or "No description available"}
 """.strip()
 
-        start_time = time.time()
-        response = self.llmserve.completion(
-            prompt_id="document-category/optim",
-            variables={"document": description},
-        )
+    def parse_category(self, response: ModelResponse, start_time: float) -> SpaceCategory:
         end_time = time.time()
 
         sc = StructuredContent(outer_tag="document-category")
@@ -33,3 +31,19 @@ class PageCategoryPipe:
         if self.verbose:
             logger.info(f"🏷️ Page categorisation: {category} (took {end_time - start_time:.2f} seconds)")
         return SpaceCategory(category)
+
+    def forward(self, snapshot: BrowserSnapshot, space: ActionSpace) -> SpaceCategory:
+        start_time = time.time()
+        response = self.llmserve.completion(
+            prompt_id="document-category/optim",
+            variables={"document": self.page_description(snapshot, space)},
+        )
+        return self.parse_category(response, start_time)
+
+    async def forward_async(self, snapshot: BrowserSnapshot, space: ActionSpace) -> SpaceCategory:
+        start_time = time.time()
+        response = await self.llmserve.acompletion(
+            prompt_id="document-category/optim",
+            variables={"document": self.page_description(snapshot, space)},
+        )
+        return self.parse_category(response, start_time)
@@ -1,13 +1,16 @@
+import asyncio
 import time
 from collections.abc import Awaitable
+from enum import StrEnum
 from pathlib import Path
-from typing import Any, Callable, ClassVar, Self
+from typing import Any, Callable, ClassVar, Self, TypeVar
 
 import httpx
 from loguru import logger
 from notte_core.browser.dom_tree import A11yNode, A11yTree, DomNode
 from notte_core.browser.snapshot import (
     BrowserSnapshot,
+    LazySnapshotField,
     SnapshotMetadata,
     TabsData,
     ViewportData,
@@ -18,18 +21,33 @@ from notte_core.utils.url import is_valid_url
 from notte_sdk.types import BrowserType, Cookie, ProxySettings
 from patchright.async_api import CDPSession, Locator, Page
 from patchright.async_api import TimeoutError as PlaywrightTimeoutError
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing_extensions import override
 
-from notte_browser.dom.parsing import ParseDomTreePipe
+from notte_browser.dom.parsing import DomParsingConfig, ParseDomTreePipe
 from notte_browser.errors import (
     BrowserExpiredError,
     EmptyPageContentError,
     InvalidURLError,
     PageLoadingError,
     RemoteDebuggingNotAvailableError,
+    StaleSnapshotError,
     UnexpectedBrowserError,
 )
+from notte_browser.http_cache import HttpCache, HttpCacheConfig, HttpCacheStats
+from notte_browser.interception import InterceptionConfig, InterceptionProfile, InterceptionStats, RequestInterceptor
+from notte_browser.stabilization import PageStabilizer, StabilizationResult
+
+T = TypeVar("T")
+
+VIEWPORT_JS = """() => ({
+    scroll_x: window.scrollX,
+    scroll_y: window.scrollY,
+    viewport_width: window.innerWidth,
+    viewport_height: window.innerHeight,
+    total_width: document.documentElement.scrollWidth,
+    total_height: document.documentElement.scrollHeight,
+})"""
 
 
 class BrowserWindowOptions(FrozenConfig):
@@ -41,6 +59,10 @@ class BrowserWindowOptions(FrozenConfig):
     browser_type: BrowserType = BrowserType.CHROMIUM
     chrome_args: list[str] | None = None
     web_security: bool = False
+    # requests blocked by the browser context (media, trackers, allow / deny lists)
+    interception: InterceptionConfig = InterceptionConfig()
+    # disk-backed HTTP cache shared by the contexts created with the same config
+    http_cache: HttpCacheConfig = HttpCacheConfig()
 
     # Debugging args
     cdp_url: str | None = None
@@ -131,6 +153,14 @@ class BrowserWindowOptions(FrozenConfig):
     def set_viewport(self: Self, width: int | None = None, height: int | None = None) -> Self:
         return self._copy_and_validate(viewport_width=width, viewport_height=height)
 
+    def set_interception(self: Self, value: InterceptionConfig | InterceptionProfile) -> Self:
+        if isinstance(value, InterceptionProfile):
+            value = self.interception.set_profile(value)
+        return self._copy_and_validate(interception=value)
+
+    def set_http_cache(self: Self, value: HttpCacheConfig) -> Self:
+        return self._copy_and_validate(http_cache=value)
+
 
 class BrowserResource(BaseModel):
     model_config = {  # pyright: ignore[reportUnannotatedClassAttribute]
@@ -141,6 +171,10 @@ class BrowserResource(BaseModel):
     options: BrowserWindowOptions
     browser_id: str | None = None
     context_id: str | None = None
+    interceptor: RequestInterceptor | None = Field(default=None, exclude=True)
+    http_cache: HttpCache | None = Field(default=None, exclude=True)
+    # set when the browser failed while the resource was in use: pooled contexts are discarded instead of recycled
+    tainted: bool = Field(default=False, exclude=True)
 
 
 class BrowserWaitConfig(FrozenConfig):
@@ -159,6 +193,15 @@ class BrowserWaitConfig(FrozenConfig):
     step: int = STEP
     short_wait: int = SHORT_WAIT
     action_timeout: int = ACTION_TIMEOUT
+    # event-driven waits: return as soon as the page is settled (no request in flight, no DOM mutation,
+    # no ongoing navigation). `short_wait` and `goto` are then only used as hard ceilings
+    stabilize: bool = True
+    # minimum time (in ms) without DOM mutation / network activity for the page to be considered settled
+    dom_quiet: int = 100
+    network_quiet: int = 100
+    # number of requests still in flight tolerated when settled (e.g. long polling, analytics beacons)
+    max_inflight_requests: int = 0
+    poll_interval: int = 50
 
     @classmethod
     def short(cls):
@@ -175,15 +218,119 @@ class BrowserWaitConfig(FrozenConfig):
     def long(cls):
         return cls(goto=10_000, goto_retry=1_000, retry=3_000, step=10_000, short_wait=500, action_timeout=5000)
 
+    def set_stabilize(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(stabilize=value)
+
+    def set_quiet_windows(self: Self, dom: int | None = None, network: int | None = None) -> Self:
+        return self._copy_and_validate(
+            dom_quiet=dom if dom is not None else self.dom_quiet,
+            network_quiet=network if network is not None else self.network_quiet,
+        )
+
+    def set_max_inflight_requests(self: Self, value: int) -> Self:
+        return self._copy_and_validate(max_inflight_requests=value)
+
+
+class SnapshotProfile(StrEnum):
+    # dom tree and metadata only
+    MINIMAL = "minimal"
+    # minimal + a11y tree and screenshot
+    AGENT = "agent"
+    # minimal + html content
+    SCRAPE = "scrape"
+    # every snapshot component
+    FULL = "full"
+
+
+class BrowserSnapshotConfig(FrozenConfig):
+    # acquire all snapshot components (html, a11y, dom, screenshot, metadata) concurrently
+    concurrent: bool = True
+    # components that are not used by every consumer can be skipped: they are then fetched lazily
+    # from the live page on `BrowserSnapshot.load`
+    html_content: bool = True
+    a11y_tree: bool = True
+    raw_a11y_tree: bool = True
+    # only rebuild the DOM subtrees modified since the previous snapshot (see `DomParsingConfig.incremental`)
+    incremental_dom: bool = False
+    # compute the node selectors in the page (see `DomParsingConfig.browser_selectors`)
+    browser_selectors: bool = False
+    # transfer the DOM tree in the compact wire format (see `DomParsingConfig.compact_payload`)
+    compact_dom_payload: bool = False
+    # only extract the DOM around the viewport (see `DomParsingConfig.partial_extraction`)
+    partial_dom: bool = False
+    # per-component timeouts (in ms)
+    html_timeout: int = 5_000
+    a11y_timeout: int = 5_000
+    dom_timeout: int = 10_000
+    screenshot_timeout: int = 5_000
+    metadata_timeout: int = 5_000
+
+    def set_concurrent(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(concurrent=value)
+
+    def set_html_content(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(html_content=value)
+
+    def set_incremental_dom(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(incremental_dom=value)
+
+    def set_browser_selectors(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(browser_selectors=value)
+
+    def set_compact_dom_payload(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(compact_dom_payload=value)
+
+    def set_partial_dom(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(partial_dom=value)
+
+    def set_a11y_tree(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(a11y_tree=value)
+
+    def set_raw_a11y_tree(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(raw_a11y_tree=value)
+
+    def set_profile(self: Self, profile: SnapshotProfile) -> Self:
+        return self._copy_and_validate(
+            html_content=profile in (SnapshotProfile.SCRAPE, SnapshotProfile.FULL),
+            a11y_tree=profile in (SnapshotProfile.AGENT, SnapshotProfile.FULL),
+            raw_a11y_tree=profile == SnapshotProfile.FULL,
+        )
+
+    def set_timeouts(
+        self: Self,
+        html: int | None = None,
+        a11y: int | None = None,
+        dom: int | None = None,
+        screenshot: int | None = None,
+        metadata: int | None = None,
+    ) -> Self:
+        return self._copy_and_validate(
+            html_timeout=html if html is not None else self.html_timeout,
+            a11y_timeout=a11y if a11y is not None else self.a11y_timeout,
+            dom_timeout=dom if dom is not None else self.dom_timeout,
+            screenshot_timeout=screenshot if screenshot is not None else self.screenshot_timeout,
+            metadata_timeout=metadata if metadata is not None else self.metadata_timeout,
+        )
+
 
 class BrowserWindowConfig(FrozenConfig):
     wait: BrowserWaitConfig = BrowserWaitConfig.long()
+    snapshot: BrowserSnapshotConfig = BrowserSnapshotConfig()
     screenshot: bool | None = True
     empty_page_max_retry: int = 5
 
     def set_wait(self: Self, value: BrowserWaitConfig) -> Self:
         return self._copy_and_validate(wait=value)
 
+    def set_snapshot(self: Self, value: BrowserSnapshotConfig) -> Self:
+        return self._copy_and_validate(snapshot=value)
+
+    def set_snapshot_profile(self: Self, profile: SnapshotProfile) -> Self:
+        return self._copy_and_validate(
+            snapshot=self.snapshot.set_profile(profile),
+            screenshot=profile in (SnapshotProfile.AGENT, SnapshotProfile.FULL),
+        )
+
 
 class ScreenshotMask(BaseModel):
     async def mask(self, page: Page) -> list[Locator]:  # pyright: ignore[reportUnusedParameter]
@@ -195,10 +342,18 @@ class BrowserWindow(BaseModel):
     resource: BrowserResource
     screenshot_mask: ScreenshotMask | None = None
     on_close: Callable[[], Awaitable[None]] | None = None
+    _stabilizer: PageStabilizer | None = PrivateAttr(default=None)
+    # time spent waiting for the page to settle since the last call to `pop_settle_time`
+    _settle_time_ms: float = PrivateAttr(default=0.0)
+    # incremented before each snapshot and action: deferred snapshot fields can only be loaded from the page state
+    # they were deferred from
+    _page_version: int = PrivateAttr(default=0)
 
     @override
     def model_post_init(self, __context: Any) -> None:
         self.resource.page.set_default_timeout(self.config.wait.step)
+        if self.config.wait.stabilize:
+            self._stabilizer = PageStabilizer(self.resource.page)
 
     @property
     def page(self) -> Page:
@@ -209,6 +364,20 @@ class BrowserWindow(BaseModel):
             await self.on_close()
         await self.resource.page.close()
 
+    def invalidate_snapshots(self) -> None:
+        """Expire the deferred fields of the snapshots taken so far: the page is about to change"""
+        self._page_version += 1
+
+    def _deferred(self, field: LazySnapshotField, loader: Callable[[], Awaitable[T]]) -> Callable[[], Awaitable[T]]:
+        version = self._page_version
+
+        async def load() -> T:
+            if version != self._page_version:
+                raise StaleSnapshotError(field=field, url=self.page.url)
+            return await loader()
+
+        return load
+
     @property
     def port(self) -> int:
         if self.resource.options.debug_port is None:
@@ -237,12 +406,62 @@ class BrowserWindow(BaseModel):
     @page.setter
     def page(self, page: Page) -> None:
         self.resource.page = page
+        if self._stabilizer is not None:
+            self._stabilizer.detach()
+            self._stabilizer = PageStabilizer(page)
+
+    @property
+    def interception_stats(self) -> InterceptionStats | None:
+        """Requests blocked since the window was created. `None` if no interception profile is set"""
+        if self.resource.interceptor is None:
+            return None
+        return self.resource.interceptor.stats
+
+    @property
+    def http_cache_stats(self) -> HttpCacheStats | None:
+        """Stats of the HTTP cache shared with the other contexts. `None` if the cache is disabled"""
+        if self.resource.http_cache is None:
+            return None
+        return self.resource.http_cache.stats
 
     @property
     def tabs(self) -> list[Page]:
         return self.page.context.pages
 
+    async def wait_until_stable(self, timeout: int) -> StabilizationResult:
+        """Wait until the page is settled, or at most `timeout` ms. The settle time is recorded as a step metric."""
+        if self._stabilizer is None or self._stabilizer.page is not self.page:
+            self._stabilizer = PageStabilizer(self.page)
+        wait = self.config.wait
+        result = await self._stabilizer.wait(
+            timeout_ms=timeout,
+            dom_quiet_ms=wait.dom_quiet,
+            network_quiet_ms=wait.network_quiet,
+            max_inflight_requests=wait.max_inflight_requests,
+            poll_interval_ms=wait.poll_interval,
+        )
+        self._settle_time_ms += result.elapsed_ms
+        if self.config.verbose:
+            if result.settled:
+                logger.info(f"⏱️ Page '{self.page.url}' settled in {result.elapsed_ms:.0f}ms")
+            else:
+                logger.warning(
+                    (
+                        f"⏱️ Page '{self.page.url}' did not settle within {timeout}ms "
+                        f"({result.inflight_requests} requests in flight)"
+                    )
+                )
+        return result
+
+    def pop_settle_time(self) -> float:
+        """Total settle time (in ms) since the previous call"""
+        settle_time, self._settle_time_ms = self._settle_time_ms, 0.0
+        return settle_time
+
     async def long_wait(self) -> None:
+        if self.config.wait.stabilize:
+            _ = await self.wait_until_stable(timeout=self.config.wait.goto)
+            return
         start_time = time.time()
         try:
             await self.page.wait_for_load_state("networkidle", timeout=self.config.wait.goto)
@@ -255,6 +474,9 @@ class BrowserWindow(BaseModel):
             logger.info(f"Waited for networkidle state for '{self.page.url}' in {time.time() - start_time:.2f}s")
 
     async def short_wait(self) -> None:
+        if self.config.wait.stabilize:
+            _ = await self.wait_until_stable(timeout=self.config.wait.short_wait)
+            return
         await self.page.wait_for_timeout(self.config.wait.short_wait)
 
     async def tab_metadata(self, tab_idx: int | None = None) -> TabsData:
@@ -266,18 +488,111 @@ class BrowserWindow(BaseModel):
         )
 
     async def snapshot_metadata(self) -> SnapshotMetadata:
+        title, viewport, tabs = await asyncio.gather(
+            self.page.title(),
+            self.page.evaluate(VIEWPORT_JS),
+            asyncio.gather(*[self.tab_metadata(i) for i, _ in enumerate(self.tabs)]),
+        )
         return SnapshotMetadata(
-            title=await self.page.title(),
+            title=title,
             url=self.page.url,
-            viewport=ViewportData(
-                scroll_x=int(await self.page.evaluate("window.scrollX")),
-                scroll_y=int(await self.page.evaluate("window.scrollY")),
-                viewport_width=int(await self.page.evaluate("window.innerWidth")),
-                viewport_height=int(await self.page.evaluate("window.innerHeight")),
-                total_width=int(await self.page.evaluate("document.documentElement.scrollWidth")),
-                total_height=int(await self.page.evaluate("document.documentElement.scrollHeight")),
+            viewport=ViewportData(**{key: int(value) for key, value in viewport.items()}),
+            tabs=list(tabs),
+        )
+
+    async def _acquire(self, name: str, component: Callable[[], Awaitable[T]], timeout_ms: int) -> T | None:
+        try:
+            return await asyncio.wait_for(component(), timeout=timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            if self.config.verbose:
+                logger.warning(f"Timeout ({timeout_ms}ms) while acquiring snapshot {name} for {self.page.url}")
+            return None
+
+    async def _a11y_snapshot(self, interesting_only: bool = True) -> A11yNode | None:
+        return await self.page.accessibility.snapshot(interesting_only=interesting_only)  # type: ignore[attr-defined]
+
+    async def _raw_a11y_snapshot(self) -> A11yNode | None:
+        return await self._a11y_snapshot(interesting_only=False)
+
+    def _build_a11y_tree(self, simple: A11yNode | None, raw: A11yNode | None) -> A11yTree | None:
+        if simple is None or len(simple.get("children", [])) == 0:
+            logger.warning("A11y tree is empty, this might cause unforeseen issues")
+            return None
+        if self.config.snapshot.raw_a11y_tree and raw is None:
+            logger.warning("Raw a11y tree is missing, this might cause unforeseen issues")
+            return None
+        return A11yTree(simple=simple, raw=raw)
+
+    async def _a11y_tree(self) -> A11yTree | None:
+        simple, raw = await asyncio.gather(
+            self._a11y_snapshot(),
+            self._raw_a11y_snapshot() if self.config.snapshot.raw_a11y_tree else _skip(),
+        )
+        return self._build_a11y_tree(simple, raw)
+
+    async def _dom_node(self) -> DomNode:
+        return await ParseDomTreePipe.forward(
+            self.page,
+            DomParsingConfig(
+                incremental=self.config.snapshot.incremental_dom,
+                browser_selectors=self.config.snapshot.browser_selectors,
+                compact_payload=self.config.snapshot.compact_dom_payload,
+                partial_extraction=self.config.snapshot.partial_dom,
             ),
-            tabs=[await self.tab_metadata(i) for i, _ in enumerate(self.tabs)],
+        )
+
+    async def _screenshot(self) -> bytes:
+        mask = await self.screenshot_mask.mask(self.page) if self.screenshot_mask is not None else None
+        return await self.page.screenshot(mask=mask)
+
+    async def _snapshot_components(
+        self, take_screenshot: bool
+    ) -> tuple[str | None, A11yNode | None, A11yNode | None, DomNode | None, bytes | None, SnapshotMetadata | None]:
+        config = self.config.snapshot
+        html_content = (
+            self._acquire("html content", self.page.content, config.html_timeout) if config.html_content else _skip()
+        )
+        a11y_simple = (
+            self._acquire("a11y tree", self._a11y_snapshot, config.a11y_timeout) if config.a11y_tree else _skip()
+        )
+        a11y_raw = (
+            self._acquire("raw a11y tree", self._raw_a11y_snapshot, config.a11y_timeout)
+            if config.a11y_tree and config.raw_a11y_tree
+            else _skip()
+        )
+        dom_node = self._acquire("dom tree", self._dom_node, config.dom_timeout)
+        screenshot = (
+            self._acquire("screenshot", self._screenshot, config.screenshot_timeout) if take_screenshot else _skip()
+        )
+        metadata = self._acquire("metadata", self.snapshot_metadata, config.metadata_timeout)
+        components = (html_content, a11y_simple, a11y_raw, dom_node, screenshot, metadata)
+
+        if not config.concurrent:
+            try:
+                return (
+                    await html_content,
+                    await a11y_simple,
+                    await a11y_raw,
+                    await dom_node,
+                    await screenshot,
+                    await metadata,
+                )
+            finally:
+                # components left behind by an early failure are never started
+                for component in components:
+                    component.close()
+
+        results = await asyncio.gather(
+            html_content, a11y_simple, a11y_raw, dom_node, screenshot, metadata, return_exceptions=True
+        )
+        # re-raise the first failure (in component order) once all CDP round-trips are settled
+        return (
+            _unwrap(results[0]),
+            _unwrap(results[1]),
+            _unwrap(results[2]),
+            _unwrap(results[3]),
+            _unwrap(results[4]),
+            _unwrap(results[5]),
         )
 
     async def snapshot(self, screenshot: bool | None = None, retries: int | None = None) -> BrowserSnapshot:
@@ -285,60 +600,65 @@ class BrowserWindow(BaseModel):
             retries = self.config.empty_page_max_retry
         if retries <= 0:
             raise EmptyPageContentError(url=self.page.url, nb_retries=self.config.empty_page_max_retry)
-        html_content: str = ""
-        a11y_simple: A11yNode | None = None
-        a11y_raw: A11yNode | None = None
-        dom_node: DomNode | None = None
+        take_screenshot = screenshot if screenshot is not None else self.config.screenshot
+        self.invalidate_snapshots()
         try:
-            html_content = await self.page.content()
-            a11y_simple = await self.page.accessibility.snapshot()  # type: ignore[attr-defined]
-            a11y_raw = await self.page.accessibility.snapshot(interesting_only=False)  # type: ignore[attr-defined]
-            dom_node = await ParseDomTreePipe.forward(self.page)
+            (
+                html_content,
+                a11y_simple,
+                a11y_raw,
+                dom_node,
+                snapshot_screenshot,
+                metadata,
+            ) = await self._snapshot_components(take_screenshot=bool(take_screenshot))
 
         except SnapshotProcessingError:
             await self.long_wait()
             return await self.snapshot(screenshot=screenshot, retries=retries - 1)
 
+        except PlaywrightTimeoutError:
+            if self.config.verbose:
+                logger.warning(f"Timeout while taking snapshot for {self.page.url}. Retrying...")
+            return await self.snapshot(screenshot=screenshot, retries=retries - 1)
+
         except Exception as e:
-            if "has been closed" in str(e):
-                raise BrowserExpiredError() from e
             if "Unable to retrieve content because the page is navigating and changing the content" in str(e):
                 # Should retry after the page is loaded
                 await self.short_wait()
-            else:
-                raise UnexpectedBrowserError(url=self.page.url) from e
-
-        a11y_tree = None
-        if a11y_simple is None or a11y_raw is None or len(a11y_simple.get("children", [])) == 0:
-            logger.warning("A11y tree is empty, this might cause unforeseen issues")
+                return await self.snapshot(screenshot=screenshot, retries=retries - 1)
+            self.resource.tainted = True
+            if "has been closed" in str(e):
+                raise BrowserExpiredError() from e
+            raise UnexpectedBrowserError(url=self.page.url) from e
 
-        else:
-            a11y_tree = A11yTree(
-                simple=a11y_simple,
-                raw=a11y_raw,
-            )
+        config = self.config.snapshot
+        a11y_tree = self._build_a11y_tree(a11y_simple, a11y_raw) if config.a11y_tree else None
 
         if dom_node is None:
             if self.config.verbose:
                 logger.warning(f"Empty page content for {self.page.url}. Retry in {self.config.wait.short_wait}ms")
             await self.page.wait_for_timeout(self.config.wait.short_wait)
             return await self.snapshot(screenshot=screenshot, retries=retries - 1)
-        take_screenshot = screenshot if screenshot is not None else self.config.screenshot
-        try:
-            mask = await self.screenshot_mask.mask(self.page) if self.screenshot_mask is not None else None
-            snapshot_screenshot = await self.page.screenshot(mask=mask) if take_screenshot else None
-        except PlaywrightTimeoutError:
-            if self.config.verbose:
-                logger.warning(f"Timeout while taking screenshot for {self.page.url}. Retrying...")
+
+        if metadata is None or (take_screenshot and snapshot_screenshot is None):
             return await self.snapshot(screenshot=screenshot, retries=retries - 1)
 
-        return BrowserSnapshot(
-            metadata=await self.snapshot_metadata(),
-            html_content=html_content,
+        snapshot = BrowserSnapshot(
+            metadata=metadata,
+            html_content=html_content or "",
             a11y_tree=a11y_tree,
             dom_node=dom_node,
             screenshot=snapshot_screenshot,
         )
+        # components skipped by the snapshot profile are fetched on first access
+        # (until the next snapshot or action: they are read from the live page)
+        if not config.html_content:
+            snapshot.defer("html_content", self._deferred("html_content", self.page.content))
+        if not config.a11y_tree:
+            snapshot.defer("a11y_tree", self._deferred("a11y_tree", self._a11y_tree))
+        if not take_screenshot:
+            snapshot.defer("screenshot", self._deferred("screenshot", self._screenshot))
+        return snapshot
 
     async def goto(
         self,
@@ -348,6 +668,7 @@ class BrowserWindow(BaseModel):
             return await self.snapshot()
         if not is_valid_url(url, check_reachability=False):
             raise InvalidURLError(url=url)
+        self.invalidate_snapshots()
         try:
             _ = await self.page.goto(url, timeout=self.config.wait.goto)
         except PlaywrightTimeoutError:
@@ -371,3 +692,13 @@ class BrowserWindow(BaseModel):
 
     async def get_cookies(self) -> list[Cookie]:
         return [Cookie.model_validate(cookie) for cookie in await self.page.context.cookies()]
+
+
+async def _skip() -> None:
+    return None
+
+
+def _unwrap(result: T | BaseException) -> T:
+    if isinstance(result, BaseException):
+        raise result
+    return result
@@ -1,3 +1,4 @@
+import sys
 import time
 from collections.abc import Sequence
 from dataclasses import asdict, dataclass, field
@@ -45,11 +46,12 @@ class A11yNode(TypedDict, total=False):
 
 @dataclass
 class A11yTree:
-    raw: A11yNode
+    # `None` when the raw tree acquisition is disabled in the snapshot config
+    raw: A11yNode | None
     simple: A11yNode
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NodeSelectors:
     css_selector: str
     xpath_selector: str
@@ -114,96 +116,149 @@ These attributes should be added to the DomAttributes class. Fix this ASAP.
         DomErrorBuffer._buffer.clear()
 
 
+IGNORED_ATTRIBUTE_PREFIXES: tuple[str, ...] = ("data-", "js", "__", "g-")
+# known attributes that are not stored in `DomAttributes`
+EXCLUDED_ATTRIBUTE_KEYS: frozenset[str] = frozenset(
+    [
+        "browser_user_highlight_id",
+        "class",
+        "style",
+        "id",
+        "data_jsl10n",
+        "keyshortcuts",
+        "for",
+        "rel",
+        "ng_non_bindable",
+        "c_wiz",
+        "ssk",
+        "soy_skip",
+        "key",
+        "method",
+        "eid",
+        "view",
+        "pivot",
+    ]
+)
+# low cardinality attributes: their values are interned to be shared across nodes
+INTERNED_ATTRIBUTES: frozenset[str] = frozenset(
+    [
+        "tag_name",
+        "class_name",
+        "type",
+        "role",
+        "target",
+        "autocomplete",
+        "autocorrect",
+        "autocapitalize",
+        "lang",
+        "dir",
+        "action",
+        "aria_haspopup",
+        "aria_current",
+        "aria_autocomplete",
+        "aria_live",
+    ]
+)
+
+
 @dataclass
 class DomAttributes:
-    # State attributes
-    modal: bool | None
-    required: bool | None
-    visible: bool | None
-    selected: bool | None
-    checked: bool | None
-    enabled: bool | None
-    focused: bool | None
-    disabled: bool | None
-    pressed: bool | None
-    type: str | None
+    """
+    HTML/aria attributes of a DOM element.
 
-    # Value attributes
-    value: str | None
-    valuemin: str | None
-    valuemax: str | None
-    description: str | None
-    autocomplete: str | None
-    haspopup: bool | None
-    accesskey: str | None
-    autofocus: bool | None
-    tabindex: int | None
-    multiselectable: bool | None
+    Instances created with `safe_init` are sparse: only the attributes that are set are stored on the
+    instance, the others resolve to the `None` class defaults. This keeps large DOM trees small in memory.
+    """
 
     # HTML element attributes
     tag_name: str
-    class_name: str | None
+
+    # State attributes
+    modal: bool | None = None
+    required: bool | None = None
+    visible: bool | None = None
+    selected: bool | None = None
+    checked: bool | None = None
+    enabled: bool | None = None
+    focused: bool | None = None
+    disabled: bool | None = None
+    pressed: bool | None = None
+    type: str | None = None
+
+    # Value attributes
+    value: str | None = None
+    valuemin: str | None = None
+    valuemax: str | None = None
+    description: str | None = None
+    autocomplete: str | None = None
+    haspopup: bool | None = None
+    accesskey: str | None = None
+    autofocus: bool | None = None
+    tabindex: int | None = None
+    multiselectable: bool | None = None
+
+    class_name: str | None = None
 
     # Resource attributes
-    href: str | None
-    src: str | None
-    srcset: str | None
-    target: str | None
-    ping: str | None
-    data_src: str | None
-    data_srcset: str | None
+    href: str | None = None
+    src: str | None = None
+    srcset: str | None = None
+    target: str | None = None
+    ping: str | None = None
+    data_src: str | None = None
+    data_srcset: str | None = None
 
     # Text attributes
-    placeholder: str | None
-    title: str | None
-    alt: str | None
-    name: str | None
-    autocorrect: str | None
-    autocapitalize: str | None
-    spellcheck: bool | None
-    maxlength: int | None
+    placeholder: str | None = None
+    title: str | None = None
+    alt: str | None = None
+    name: str | None = None
+    autocorrect: str | None = None
+    autocapitalize: str | None = None
+    spellcheck: bool | None = None
+    maxlength: int | None = None
 
     # Layout attributes
-    width: int | None
-    height: int | None
-    size: int | None
-    rows: int | None
+    width: int | None = None
+    height: int | None = None
+    size: int | None = None
+    rows: int | None = None
 
     # Internationalization attributes
-    lang: str | None
-    dir: str | None
+    lang: str | None = None
+    dir: str | None = None
 
     # aria attributes
-    action: str | None
-    role: str | None
-    aria_label: str | None
-    aria_labelledby: str | None
-    aria_describedby: str | None
-    aria_hidden: bool | None
-    aria_expanded: bool | None
-    aria_controls: str | None
-    aria_haspopup: bool | None
-    aria_current: str | None
-    aria_autocomplete: str | None
-    aria_selected: bool | None
-    aria_modal: bool | None
-    aria_disabled: bool | None
-    aria_valuenow: int | None
-    aria_live: str | None
-    aria_atomic: bool | None
-    aria_valuemax: int | None
-    aria_valuemin: int | None
-    aria_level: int | None
-    aria_owns: str | None
-    aria_multiselectable: bool | None
-    aria_colindex: int | None
-    aria_colspan: int | None
-    aria_rowindex: int | None
-    aria_rowspan: int | None
-    aria_description: str | None
-    aria_activedescendant: str | None
-    hidden: bool | None
-    expanded: bool | None
+    action: str | None = None
+    role: str | None = None
+    aria_label: str | None = None
+    aria_labelledby: str | None = None
+    aria_describedby: str | None = None
+    aria_hidden: bool | None = None
+    aria_expanded: bool | None = None
+    aria_controls: str | None = None
+    aria_haspopup: bool | None = None
+    aria_current: str | None = None
+    aria_autocomplete: str | None = None
+    aria_selected: bool | None = None
+    aria_modal: bool | None = None
+    aria_disabled: bool | None = None
+    aria_valuenow: int | None = None
+    aria_live: str | None = None
+    aria_atomic: bool | None = None
+    aria_valuemax: int | None = None
+    aria_valuemin: int | None = None
+    aria_level: int | None = None
+    aria_owns: str | None = None
+    aria_multiselectable: bool | None = None
+    aria_colindex: int | None = None
+    aria_colspan: int | None = None
+    aria_rowindex: int | None = None
+    aria_rowspan: int | None = None
+    aria_description: str | None = None
+    aria_activedescendant: str | None = None
+    hidden: bool | None = None
+    expanded: bool | None = None
 
     def get_resource_url(self) -> str | None:
         if self.src is not None and len(self.src) > 0:
@@ -222,51 +277,29 @@ class DomAttributes:
 
     @staticmethod
     def safe_init(**kwargs: AttributeValue) -> "DomAttributes":
-        # compute additional attributes
-        if "class" in kwargs:
-            kwargs["class_name"] = kwargs["class"]
-            del kwargs["class"]
-
-        # replace '-' with '_' in keys
-        kwargs = {
-            k.replace("-", "_"): v
-            for k, v in kwargs.items()
-            if (
-                not k.startswith("data-")
-                and not k.startswith("js")
-                and not k.startswith("__")
-                and not k.startswith("g-")
-            )
-        }
-
-        keys = set(DomAttributes.__dataclass_fields__.keys())
-        excluded_keys = set(
-            [
-                "browser_user_highlight_id",
-                "class",
-                "style",
-                "id",
-                "data_jsl10n",
-                "keyshortcuts",
-                "for",
-                "rel",
-                "ng_non_bindable",
-                "c_wiz",
-                "ssk",
-                "soy_skip",
-                "key",
-                "method",
-                "eid",
-                "view",
-                "pivot",
-            ]
-        )
-
-        extra_keys = set(kwargs.keys()).difference(keys).difference(excluded_keys)
-        if len(extra_keys) > 0:
-            DomErrorBuffer.add_error(extra_keys, kwargs)
+        # sparse instance: skip `__init__` to only store the attributes that are set
+        attributes = object.__new__(DomAttributes)
+        values = attributes.__dict__
+        values["tag_name"] = None
+        extra_values: dict[str, AttributeValue] = {}
+        for key, value in kwargs.items():
+            if key.startswith(IGNORED_ATTRIBUTE_PREFIXES):
+                continue
+            # compute additional attributes and replace '-' with '_' in keys
+            key = "class_name" if key == "class" else key.replace("-", "_")
+            if key not in DOM_ATTRIBUTE_KEYS:
+                if key not in EXCLUDED_ATTRIBUTE_KEYS:
+                    extra_values[key] = value
+                continue
+            if value is None:
+                continue
+            if isinstance(value, str) and key in INTERNED_ATTRIBUTES:
+                value = sys.intern(value)
+            values[key] = value
 
-        return DomAttributes(**{key: kwargs.get(key, None) for key in keys})  # type: ignore[arg-type]
+        if len(extra_values) > 0:
+            DomErrorBuffer.add_error(set(extra_values.keys()), extra_values)
+        return attributes
 
     def relevant_attrs(
         self,
@@ -308,7 +341,10 @@ class DomAttributes:
         return f"{self.__class__.__name__}({attrs})"
 
 
-@dataclass(frozen=True)
+DOM_ATTRIBUTE_KEYS: frozenset[str] = frozenset(DomAttributes.__dataclass_fields__.keys())
+
+
+@dataclass(frozen=True, slots=True)
 class ComputedDomAttributes:
     in_viewport: bool = False
     is_interactive: bool = False
@@ -322,7 +358,7 @@ class ComputedDomAttributes:
         object.__setattr__(self, "selectors", selectors)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DomNode:
     id: str | None
     type: NodeType
@@ -331,10 +367,13 @@ class DomNode:
     children: list["DomNode"]
     attributes: DomAttributes | None
     computed_attributes: ComputedDomAttributes
-    subtree_ids: list[str] = field(init=False, default_factory=list)
     # parents cannot be set in the constructor because it is a recursive structure
     # we need to set it after the constructor
     parent: "DomNode | None" = None
+    # lazily computed by `subtree_ids`
+    _subtree_ids: list[str] | None = field(init=False, default=None, repr=False, compare=False)
+    # lazily computed by `index`
+    _index: "DomNodeIndex | None" = field(init=False, default=None, repr=False, compare=False)
 
     @override
     def __repr__(self) -> str:
@@ -344,15 +383,40 @@ class DomNode:
         return f"{self.__class__.__name__}(id={self.id}, role={self.get_role_str()}, text={self.text[:40]}...)\n{children_repr}"
 
     def __post_init__(self) -> None:
-        subtree_ids: list[str] = [] if self.id is None else [self.id]
-        for child in self.children:
-            subtree_ids.extend(child.subtree_ids)
-        object.__setattr__(self, "subtree_ids", subtree_ids)
         if isinstance(self.role, str):
             object.__setattr__(self, "role", NodeRole.from_value(self.role))
 
+    @property
+    def subtree_ids(self) -> list[str]:
+        subtree_ids = self._subtree_ids
+        if subtree_ids is None:
+            subtree_ids = [] if self.id is None else [self.id]
+            for child in self.children:
+                subtree_ids.extend(child.subtree_ids)
+            object.__setattr__(self, "_subtree_ids", subtree_ids)
+        return subtree_ids
+
+    @property
+    def index(self) -> "DomNodeIndex":
+        """Lookup tables over the subtree, built on first access and kept until `invalidate` is called."""
+        index = self._index
+        if index is None:
+            index = DomNodeIndex.build(self)
+            object.__setattr__(self, "_index", index)
+        return index
+
+    def invalidate(self) -> None:
+        """Drop the cached index and subtree ids of the node and its ancestors after a mutation of the subtree."""
+        node: DomNode | None = self
+        while node is not None:
+            object.__setattr__(node, "_index", None)
+            object.__setattr__(node, "_subtree_ids", None)
+            node = node.parent
+
     def set_parent(self, parent: "DomNode | None") -> None:
         object.__setattr__(self, "parent", parent)
+        if parent is not None:
+            parent.invalidate()
 
     def inner_text(self, depth: int = 3) -> str:
         if self.attributes is not None and self.attributes.tag_name.lower() == "input":
@@ -392,15 +456,7 @@ class DomNode:
         return attr.notte_selector.split(":")[0]
 
     def find(self, id: str) -> "InteractionDomNode | None":
-        if self.id == id:
-            if self.is_interaction():
-                return self.to_interaction_node()
-            return self  # pyright: ignore[reportReturnType]
-        for child in self.children:
-            found = child.find(id)
-            if found:
-                return found
-        return None
+        return self.index.find(id)
 
     def is_interaction(self) -> bool:
         if isinstance(self.role, str):
@@ -464,11 +520,10 @@ class DomNode:
         return dialogs
 
     def interaction_nodes(self) -> Sequence["InteractionDomNode"]:
-        inodes = self.flatten(keep_filter=lambda node: node.is_interaction())
-        return [inode.to_interaction_node() for inode in inodes]
+        return self.index.interaction_nodes()
 
     def image_nodes(self) -> list["DomNode"]:
-        return self.flatten(keep_filter=lambda node: node.is_image())
+        return list(self.index.images)
 
     def subtree_filter(self, ft: Callable[["DomNode"], bool], verbose: bool = False) -> "DomNode | None":
         def inner(node: DomNode) -> DomNode | None:
@@ -540,9 +595,11 @@ class DomNode:
 
 
 class InteractionDomNode(DomNode):
+    __slots__ = ()  # pyright: ignore[reportUnannotatedClassAttribute]
+
     id: str
-    type: NodeType = NodeType.INTERACTION
 
+    @override
     def __post_init__(self) -> None:
         if self.id is None:  # type: ignore[type-check]
             raise InvalidInternalCheckError(
@@ -565,6 +622,77 @@ class InteractionDomNode(DomNode):
         super().__post_init__()
 
 
+@dataclass(slots=True)
+class DomNodeIndex:
+    """
+    Lookup tables over a `DomNode` subtree, built in a single traversal.
+
+    Interaction nodes and subtree id sets are derived lazily from the tables and cached as well.
+    """
+
+    nodes: list[DomNode]
+    by_id: dict[str, DomNode]
+    by_role: dict[NodeRole | str, list[DomNode]]
+    interactions: list[DomNode]
+    images: list[DomNode]
+    # keyed by `id(node)`: both caches only hold nodes of the indexed subtree
+    _interaction_nodes: dict[int, InteractionDomNode] = field(default_factory=dict, repr=False)
+    _subtree_id_sets: dict[int, frozenset[str]] = field(default_factory=dict, repr=False)
+
+    @staticmethod
+    def build(root: DomNode) -> "DomNodeIndex":
+        index = DomNodeIndex(nodes=root.flatten(), by_id={}, by_role={}, interactions=[], images=[])
+        for node in index.nodes:
+            if node.id is not None and node.id not in index.by_id:
+                # same semantics as a depth-first search: the first node wins
+                index.by_id[node.id] = node
+            index.by_role.setdefault(node.role, []).append(node)
+            if node.is_interaction():
+                index.interactions.append(node)
+            if node.is_image():
+                index.images.append(node)
+        return index
+
+    def interaction_node(self, node: DomNode) -> InteractionDomNode:
+        inode = self._interaction_nodes.get(id(node))
+        if inode is None:
+            inode = node.to_interaction_node()
+            self._interaction_nodes[id(node)] = inode
+        return inode
+
+    def interaction_nodes(self) -> list[InteractionDomNode]:
+        return [self.interaction_node(node) for node in self.interactions]
+
+    def interaction_ids(self) -> set[str]:
+        return {node.id for node in self.interactions if node.id is not None}
+
+    def find(self, id: str) -> InteractionDomNode | None:
+        node = self.by_id.get(id)
+        if node is None:
+            return None
+        if node.is_interaction():
+            return self.interaction_node(node)
+        return node  # pyright: ignore[reportReturnType]
+
+    def find_interaction(self, id: str) -> InteractionDomNode | None:
+        node = self.by_id.get(id)
+        if node is None or not node.is_interaction():
+            return None
+        return self.interaction_node(node)
+
+    def role_nodes(self, role: NodeRole | str) -> list[DomNode]:
+        if isinstance(role, str):
+            role = NodeRole.from_value(role)
+        return self.by_role.get(role, [])
+
+    def subtree_id_set(self, node: DomNode) -> frozenset[str]:
+        ids = self._subtree_id_sets.get(id(node))
+        if ids is None:
+            ids = frozenset(node.subtree_ids)
+            self._subtree_id_sets[id(node)] = ids
+        return ids
+
+
 @dataclass(frozen=True)
 class ResolvedLocator:
     role: NodeRole | str
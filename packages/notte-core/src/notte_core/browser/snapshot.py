@@ -1,11 +1,12 @@
 import datetime as dt
 from base64 import b64encode
-from collections.abc import Sequence
+from collections.abc import Awaitable, Sequence
 from dataclasses import field
+from typing import Any, Callable, Literal, Self
 
 from loguru import logger
 from PIL import Image
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from notte_core.actions.base import Action
 from notte_core.browser.dom_tree import A11yTree, DomNode, InteractionDomNode
@@ -44,12 +45,17 @@ class SnapshotMetadata(BaseModel):
     timestamp: dt.datetime = field(default_factory=dt.datetime.now)
 
 
+LazySnapshotField = Literal["html_content", "a11y_tree", "screenshot"]
+
+
 class BrowserSnapshot(BaseModel):
     metadata: SnapshotMetadata
-    html_content: str
-    a11y_tree: A11yTree | None
+    html_content: str = ""
+    a11y_tree: A11yTree | None = None
     dom_node: DomNode
-    screenshot: bytes | None = Field(repr=False)
+    screenshot: bytes | None = Field(default=None, repr=False)
+    # loaders for the fields that were not captured with the snapshot (see `defer` and `load`)
+    _loaders: dict[str, Callable[[], Awaitable[Any]]] = PrivateAttr(default_factory=dict)
 
     model_config = {  # type: ignore[reportUnknownMemberType]
         "json_encoders": {
@@ -57,6 +63,21 @@ class BrowserSnapshot(BaseModel):
         }
     }
 
+    def defer(self, field: LazySnapshotField, loader: Callable[[], Awaitable[Any]]) -> None:
+        """Register a loader used to fetch `field` the first time it is requested through `load`."""
+        self._loaders[field] = loader
+
+    def is_loaded(self, field: LazySnapshotField) -> bool:
+        return field not in self._loaders
+
+    async def load(self, *fields: LazySnapshotField) -> Self:
+        """Fetch the deferred `fields` (if any). Fields that are already loaded are left untouched."""
+        for name in fields:
+            loader = self._loaders.pop(name, None)
+            if loader is not None:
+                setattr(self, name, await loader())
+        return self
+
     def display_screenshot(self) -> "Image.Image | None":
         from notte_core.utils.image import image_from_bytes
 
@@ -72,8 +93,8 @@ class BrowserSnapshot(BaseModel):
         if self.a11y_tree is None or other.a11y_tree is None:
             raise AccessibilityTreeMissingError()
 
-        inodes = {node.id for node in self.dom_node.interaction_nodes()}
-        new_inodes = {node.id for node in other.dom_node.interaction_nodes()}
+        inodes = self.dom_node.index.interaction_ids()
+        new_inodes = other.dom_node.index.interaction_ids()
         identical = inodes == new_inodes
         if not identical:
             logger.warning(f"Interactive nodes changed: {new_inodes.difference(inodes)}")
@@ -83,25 +104,32 @@ class BrowserSnapshot(BaseModel):
         return self.dom_node.interaction_nodes()
 
     def with_dom_node(self, dom_node: DomNode) -> "BrowserSnapshot":
-        return BrowserSnapshot(
+        snapshot = BrowserSnapshot(
             metadata=self.metadata,
             html_content=self.html_content,
             a11y_tree=self.a11y_tree,
             dom_node=dom_node,
             screenshot=self.screenshot,
         )
+        snapshot._loaders = dict(self._loaders)
+        return snapshot
 
     def subgraph_without(self, actions: Sequence[Action], roles: set[str] | None = None) -> "BrowserSnapshot | None":
         if len(actions) == 0 and roles is not None:
             subgraph = self.dom_node.subtree_without(roles)
             return self.with_dom_node(subgraph)
         id_existing_actions = set([action.id for action in actions])
-        failed_actions = {node.id for node in self.interaction_nodes() if node.id not in id_existing_actions}
+        failed_actions = self.dom_node.index.interaction_ids().difference(id_existing_actions)
+        return self.subgraph(failed_actions)
+
+    def subgraph(self, interaction_ids: set[str]) -> "BrowserSnapshot | None":
+        """Subgraph made of the nodes that contain at least one of the `interaction_ids` interaction nodes"""
+        index = self.dom_node.index
 
-        def only_failed_actions(node: DomNode) -> bool:
-            return len(set(node.subtree_ids).intersection(failed_actions)) > 0
+        def only_interactions(node: DomNode) -> bool:
+            return not index.subtree_id_set(node).isdisjoint(interaction_ids)
 
-        filtered_graph = self.dom_node.subtree_filter(only_failed_actions)
+        filtered_graph = self.dom_node.subtree_filter(only_interactions)
         if filtered_graph is None:
             return None
 
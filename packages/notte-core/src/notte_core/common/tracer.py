@@ -103,6 +103,7 @@ class LlmUsageFileTracer(LlmTracer):
                     "messages": messages,
                     "completion": completion,
                     "usage": usage,
+                    "metadata": metadata,
                 },
                 f,
             )
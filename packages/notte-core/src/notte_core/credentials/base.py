@@ -4,6 +4,7 @@ import json
 import os
 import re
 from abc import ABC, abstractmethod
+from collections.abc import Coroutine
 from typing import Any, Callable, ClassVar, NotRequired, Unpack
 
 from loguru import logger
@@ -426,6 +427,30 @@ class BaseVault(ABC):
 
         return _patch_structured
 
+    @staticmethod
+    def patch_astructured_completion(arg_index: int, replacement_map_fn: Callable[..., dict[str, str]]):
+        """Same as `patch_structured_completion` but for async completion functions"""
+
+        def _patch_structured(
+            func: Callable[..., Coroutine[Any, Any, TResponseFormat]],
+        ) -> Callable[..., Coroutine[Any, Any, TResponseFormat]]:
+            async def patcher(*args: tuple[Any], **kwargs: dict[str, Any]) -> TResponseFormat:
+                arglist = list(args)
+                replacement_map = replacement_map_fn()
+                try:
+                    original_string = json.dumps(arglist[arg_index], indent=2)
+                except Exception as e:
+                    raise ValueError(f"Invalid JSON object at index {arg_index}: {arglist[arg_index]}") from e
+                og_dict = json.loads(original_string)
+
+                arglist[arg_index] = BaseVault.recursive_replace_mapping(og_dict, replacement_map)  # type: ignore
+
+                return await func(*arglist, **kwargs)
+
+            return patcher
+
+        return _patch_structured
+
     @staticmethod
     def recursive_replace_mapping(data: recursive_data, replacement_map: dict[str, str]) -> recursive_data:
         """
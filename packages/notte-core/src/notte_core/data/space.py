@@ -103,3 +103,7 @@ class DataSpace(BaseModel):
     structured: Annotated[
         StructuredData[BaseModel] | None, Field(description="Structured data extracted from the page in JSON format")
     ] = None
+    timings: Annotated[
+        dict[str, float] | None,
+        Field(description="Duration (in milliseconds) of each scraping stage: markdown, images and structured"),
+    ] = None
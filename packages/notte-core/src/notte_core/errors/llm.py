@@ -53,3 +53,16 @@ class InvalidPromptTemplateError(NotteBaseError):
             # should not happen in production environment
             agent_message=None,
         )
+
+
+class LLMCacheMissError(NotteBaseError):
+    def __init__(self, model: str, key: str) -> None:
+        super().__init__(
+            dev_message=(
+                f"No cached LLM response for model '{model}' (key: {key}) while the LLM cache is in replay mode. "
+                "Record the responses first by running with the cache in read-write mode."
+            ),
+            user_message="Sorry, Notte failed to generate a valid response for your request this time.",
+            agent_message=None,
+            should_retry_later=False,
+        )
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, Self
+
+from litellm import AllMessageValues, ModelResponse  # type: ignore[import]
+from loguru import logger
+from pydantic import model_validator
+from typing_extensions import override
+
+from notte_core.common.config import FrozenConfig
+from notte_core.errors.llm import LLMCacheMissError
+
+
+class LlmCacheBackend(StrEnum):
+    MEMORY = "memory"
+    SQLITE = "sqlite"
+    DIRECTORY = "directory"
+
+
+class LlmCacheConfig(FrozenConfig):
+    backend: LlmCacheBackend = LlmCacheBackend.MEMORY
+    # sqlite database file or directory of json files (ignored by the memory backend)
+    path: str | None = None
+    # entries older than this are ignored and evicted. `None` means entries never expire
+    ttl_seconds: float | None = None
+    # maximum number of entries, the oldest ones are evicted first. `None` means unbounded
+    max_entries: int | None = 10_000
+    # read-only mode: cache misses raise `LLMCacheMissError` instead of calling the provider (offline tests)
+    replay: bool = False
+    # only cache deterministic (temperature 0) completions
+    deterministic_only: bool = True
+
+    @model_validator(mode="after")
+    def check_path(self) -> Self:
+        if self.backend != LlmCacheBackend.MEMORY and self.path is None:
+            raise ValueError(f"'path' is required for the '{self.backend}' LLM cache backend")
+        return self
+
+    def set_replay(self: Self, value: bool = True) -> Self:
+        return self._copy_and_validate(replay=value)
+
+    def set_ttl_seconds(self: Self, value: float | None) -> Self:
+        return self._copy_and_validate(ttl_seconds=value)
+
+    def set_max_entries(self: Self, value: int | None) -> Self:
+        return self._copy_and_validate(max_entries=value)
+
+
+class LlmCacheStore(ABC):
+    """Key-value store of serialized responses along with their creation time."""
+
+    @abstractmethod
+    def get(self, key: str) -> tuple[float, str] | None:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, created_at: float) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def evict(self, max_entries: int) -> int:
+        """Drop the oldest entries until at most `max_entries` remain. Returns the number of dropped entries."""
+        pass
+
+
+class MemoryLlmCacheStore(LlmCacheStore):
+    def __init__(self) -> None:
+        self.entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    @override
+    def get(self, key: str) -> tuple[float, str] | None:
+        return self.entries.get(key)
+
+    @override
+    def set(self, key: str, value: str, created_at: float) -> None:
+        self.entries[key] = (created_at, value)
+        self.entries.move_to_end(key)
+
+    @override
+    def delete(self, key: str) -> None:
+        _ = self.entries.pop(key, None)
+
+    @override
+    def evict(self, max_entries: int) -> int:
+        nb_evicted = 0
+        while len(self.entries) > max_entries:
+            _ = self.entries.popitem(last=False)
+            nb_evicted += 1
+        return nb_evicted
+
+
+class SqliteLlmCacheStore(LlmCacheStore):
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        _ = self.db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, created_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self.db.commit()
+
+    @override
+    def get(self, key: str) -> tuple[float, str] | None:
+        row = self.db.execute("SELECT created_at, value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    @override
+    def set(self, key: str, value: str, created_at: float) -> None:
+        _ = self.db.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, created_at, value) VALUES (?, ?, ?)", (key, created_at, value)
+        )
+        self.db.commit()
+
+    @override
+    def delete(self, key: str) -> None:
+        _ = self.db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        self.db.commit()
+
+    @override
+    def evict(self, max_entries: int) -> int:
+        cursor = self.db.execute(
+            (
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)"
+            ),
+            (max_entries,),
+        )
+        self.db.commit()
+        return cursor.rowcount
+
+
+class DirectoryLlmCacheStore(LlmCacheStore):
+    """One json file per entry: easy to inspect, diff and commit alongside tests."""
+
+    def __init__(self, path: str) -> None:
+        self.dir: Path = Path(path)
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, key: str) -> Path:
+        return self.dir / f"{key}.json"
+
+    @override
+    def get(self, key: str) -> tuple[float, str] | None:
+        file = self._file(key)
+        if not file.exists():
+            return None
+        entry = json.loads(file.read_text())
+        return entry["created_at"], entry["value"]
+
+    @override
+    def set(self, key: str, value: str, created_at: float) -> None:
+        _ = self._file(key).write_text(json.dumps({"created_at": created_at, "value": value}))
+
+    @override
+    def delete(self, key: str) -> None:
+        self._file(key).unlink(missing_ok=True)
+
+    @override
+    def evict(self, max_entries: int) -> int:
+        files = sorted(self.dir.glob("*.json"), key=lambda file: file.stat().st_mtime)
+        evicted = files[: max(0, len(files) - max_entries)]
+        for file in evicted:
+            file.unlink(missing_ok=True)
+        return len(evicted)
+
+
+class LlmResponseCache:
+    """
+    Opt-in cache of LLM completions.
+
+    Requests are keyed by a deterministic hash of the model, messages, temperature, response format and
+    number of choices. Cached responses are returned with `_hidden_params["cache_hit"] = True` so that
+    tracers can account for them separately.
+    """
+
+    def __init__(self, config: LlmCacheConfig | None = None) -> None:
+        self.config: LlmCacheConfig = config or LlmCacheConfig()
+        self.store: LlmCacheStore = self._create_store(self.config)
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def _create_store(config: LlmCacheConfig) -> LlmCacheStore:
+        match config.backend:
+            case LlmCacheBackend.MEMORY:
+                return MemoryLlmCacheStore()
+            case LlmCacheBackend.SQLITE:
+                return SqliteLlmCacheStore(config.path)  # pyright: ignore[reportArgumentType]
+            case LlmCacheBackend.DIRECTORY:
+                return DirectoryLlmCacheStore(config.path)  # pyright: ignore[reportArgumentType]
+
+    @staticmethod
+    def key(
+        model: str,
+        messages: list[AllMessageValues],
+        temperature: float,
+        response_format: dict[str, Any] | None = None,
+        n: int = 1,
+    ) -> str:
+        request = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": response_format,
+            "n": n,
+        }
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def is_cache_hit(response: ModelResponse) -> bool:
+        return response._hidden_params.get("cache_hit") is True  # pyright: ignore[reportPrivateUsage, reportUnknownMemberType]
+
+    def is_cacheable(self, temperature: float) -> bool:
+        return not self.config.deterministic_only or temperature == 0.0
+
+    def _expired(self, created_at: float) -> bool:
+        return self.config.ttl_seconds is not None and time.time() - created_at > self.config.ttl_seconds
+
+    def get(self, key: str, model: str) -> ModelResponse | None:
+        with self._lock:
+            entry = self.store.get(key)
+            # recorded responses never expire in replay mode
+            if entry is not None and not self.config.replay and self._expired(entry[0]):
+                self.store.delete(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                if self.config.replay:
+                    raise LLMCacheMissError(model=model, key=key)
+                return None
+            self.hits += 1
+        response = ModelResponse(**json.loads(entry[1]))
+        response._hidden_params["cache_hit"] = True  # pyright: ignore[reportPrivateUsage, reportUnknownMemberType]
+        return response
+
+    def set(self, key: str, response: ModelResponse) -> None:
+        if self.config.replay:
+            return
+        with self._lock:
+            self.store.set(key, response.model_dump_json(), created_at=time.time())
+            if self.config.max_entries is not None:
+                nb_evicted = self.store.evict(self.config.max_entries)
+                if nb_evicted > 0 and self.config.verbose:
+                    logger.info(f"🗑️ Evicted {nb_evicted} entries from the LLM response cache")
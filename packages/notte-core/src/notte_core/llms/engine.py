@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import re
 from dataclasses import dataclass
@@ -35,7 +36,8 @@ from notte_core.errors.provider import (
     ModelDoesNotSupportImageError,
 )
 from notte_core.errors.provider import RateLimitError as NotteRateLimitError
-from notte_core.llms.logging import trace_llm_usage
+from notte_core.llms.cache import LlmResponseCache
+from notte_core.llms.logging import trace_llm_usage, trace_llm_usage_async
 
 
 class LlmModel(StrEnum):
@@ -71,8 +73,10 @@ class LLMEngine:
         tracer: LlmTracer | None = None,
         structured_output_retries: int = 0,
         verbose: bool = False,
+        cache: LlmResponseCache | None = None,
     ):
         self.model: str = model or LlmModel.default()
+        self.cache: LlmResponseCache | None = cache
         self.sc: StructuredContent = StructuredContent(inner_tag="json", fail_if_inner_tag=False)
 
         if tracer is None:
@@ -80,12 +84,50 @@ class LLMEngine:
 
         self.tracer: LlmTracer = tracer
         self.completion = trace_llm_usage(tracer=self.tracer)(self.completion)
+        self.acompletion = trace_llm_usage_async(tracer=self.tracer)(self.acompletion)  # pyright: ignore [reportAttributeAccessIssue]
         self.structured_output_retries: int = structured_output_retries
         self.verbose: bool = verbose
 
     def context_length(self) -> int:
         return LlmModel.context_length(self.model)
 
+    def _parse_structured_response(
+        self,
+        content: str,
+        messages: list[AllMessageValues],
+        response_format: type[TResponseFormat],
+    ) -> TResponseFormat | None:
+        """Parse a raw LLM answer into `response_format`.
+
+        Returns None (and appends a retry message to `messages`) if the answer cannot be parsed.
+        """
+        content = self.sc.extract(content).strip()
+
+        if self.verbose:
+            logger.info(f"LLM response: \n{content}")
+
+        if "```json" in content:
+            # extract content from JSON code blocks
+            content = self.sc.extract(content).strip()
+        elif not content.startswith("{") or not content.endswith("}"):
+            messages.append(
+                ChatCompletionUserMessage(
+                    role="user",
+                    content=f"Invalid LLM response. JSON code blocks or JSON object expected, got: {content}. Retrying",
+                )
+            )
+            return None
+        try:
+            return response_format.model_validate_json(content)
+        except ValidationError as e:
+            messages.append(
+                ChatCompletionUserMessage(
+                    role="user",
+                    content=f"Error parsing LLM response: {e}, retrying",
+                )
+            )
+            return None
+
     def structured_completion(
         self,
         messages: list[AllMessageValues],
@@ -97,32 +139,26 @@ class LLMEngine:
         while tries > 0:
             tries -= 1
             content = self.single_completion(messages, model, response_format=dict(type="json_object")).strip()
-            content = self.sc.extract(content).strip()
+            parsed = self._parse_structured_response(content, messages, response_format)
+            if parsed is not None:
+                return parsed
 
-            if self.verbose:
-                logger.info(f"LLM response: \n{content}")
-
-            if "```json" in content:
-                # extract content from JSON code blocks
-                content = self.sc.extract(content).strip()
-            elif not content.startswith("{") or not content.endswith("}"):
-                messages.append(
-                    ChatCompletionUserMessage(
-                        role="user",
-                        content=f"Invalid LLM response. JSON code blocks or JSON object expected, got: {content}. Retrying",
-                    )
-                )
-                continue
-            try:
-                return response_format.model_validate_json(content)
-            except ValidationError as e:
-                messages.append(
-                    ChatCompletionUserMessage(
-                        role="user",
-                        content=f"Error parsing LLM response: {e}, retrying",
-                    )
-                )
-                continue
+        raise LLMParsingError(f"Error parsing LLM response: \n\n{content}\n\n")
+
+    async def astructured_completion(
+        self,
+        messages: list[AllMessageValues],
+        response_format: type[TResponseFormat],
+        model: str | None = None,
+    ) -> TResponseFormat:
+        tries = self.structured_output_retries + 1
+        content = None
+        while tries > 0:
+            tries -= 1
+            content = (await self.asingle_completion(messages, model, response_format=dict(type="json_object"))).strip()
+            parsed = self._parse_structured_response(content, messages, response_format)
+            if parsed is not None:
+                return parsed
 
         raise LLMParsingError(f"Error parsing LLM response: \n\n{content}\n\n")
 
@@ -143,6 +179,23 @@ class LLMEngine:
         )
         return response.choices[0].message.content  # type: ignore
 
+    async def asingle_completion(
+        self,
+        messages: list[AllMessageValues],
+        model: str | None = None,
+        temperature: float = 0.0,
+        response_format: dict[str, str] | None = None,
+    ) -> str:
+        model = model or self.model
+        response = await self.acompletion(
+            messages,
+            model=model,
+            temperature=temperature,
+            n=1,
+            response_format=response_format,
+        )
+        return response.choices[0].message.content  # type: ignore
+
     def completion(
         self,
         messages: list[AllMessageValues],
@@ -152,6 +205,11 @@ class LLMEngine:
         n: int = 1,
     ) -> ModelResponse:
         model = model or self.model
+        cache_key = self._cache_key(messages, model, temperature, response_format, n)
+        if self.cache is not None and cache_key is not None:
+            cached = self.cache.get(cache_key, model)
+            if cached is not None:
+                return cached
         try:
             response = litellm.completion(  # type: ignore[arg-type]
                 model,
@@ -161,13 +219,65 @@ class LLMEngine:
                 response_format=response_format,
             )
             # Cast to ModelResponse since we know it's not streaming in this case
-            return cast(ModelResponse, response)
+            response = cast(ModelResponse, response)
+        except Exception as e:
+            raise self._convert_provider_error(model, e) from e
+        if self.cache is not None and cache_key is not None:
+            self.cache.set(cache_key, response)
+        return response
 
-        except RateLimitError:
-            raise NotteRateLimitError(provider=model)
-        except AuthenticationError:
-            raise InvalidAPIKeyError(provider=model)
-        except LiteLLMContextWindowExceededError as e:
+    async def acompletion(
+        self,
+        messages: list[AllMessageValues],
+        model: str | None = None,
+        temperature: float = 0.0,
+        response_format: dict[str, str] | None = None,
+        n: int = 1,
+    ) -> ModelResponse:
+        model = model or self.model
+        cache_key = self._cache_key(messages, model, temperature, response_format, n)
+        if self.cache is not None and cache_key is not None:
+            # sqlite / file backends are blocking: keep them off the event loop
+            cached = await asyncio.to_thread(self.cache.get, cache_key, model)
+            if cached is not None:
+                return cached
+        try:
+            response = await litellm.acompletion(  # type: ignore[arg-type]
+                model,
+                messages,
+                temperature=temperature,
+                n=n,
+                response_format=response_format,
+            )
+            # Cast to ModelResponse since we know it's not streaming in this case
+            response = cast(ModelResponse, response)
+        except Exception as e:
+            raise self._convert_provider_error(model, e) from e
+        if self.cache is not None and cache_key is not None:
+            await asyncio.to_thread(self.cache.set, cache_key, response)
+        return response
+
+    def _cache_key(
+        self,
+        messages: list[AllMessageValues],
+        model: str,
+        temperature: float,
+        response_format: dict[str, str] | None,
+        n: int,
+    ) -> str | None:
+        """Cache key of the request, `None` if the request should not be cached"""
+        if self.cache is None or not self.cache.is_cacheable(temperature):
+            return None
+        return self.cache.key(model, messages, temperature, response_format, n)
+
+    @staticmethod
+    def _convert_provider_error(model: str, e: Exception) -> Exception:
+        """Map litellm exceptions to notte provider errors (shared by the sync and async paths)"""
+        if isinstance(e, RateLimitError):
+            return NotteRateLimitError(provider=model)
+        if isinstance(e, AuthenticationError):
+            return InvalidAPIKeyError(provider=model)
+        if isinstance(e, LiteLLMContextWindowExceededError):
             # Try to extract size information from error message
             current_size = None
             max_size = None
@@ -176,40 +286,39 @@ class LLMEngine:
             if match:
                 current_size = int(match.group(1))
                 max_size = int(match.group(2))
-            raise ContextWindowExceededError(
+            return ContextWindowExceededError(
                 provider=model,
                 current_size=current_size,
                 max_size=max_size,
-            ) from e
-        except BadRequestError as e:
+            )
+        if isinstance(e, BadRequestError):
             if "Missing API Key" in str(e):
-                raise MissingAPIKeyForModel(model) from e
+                return MissingAPIKeyForModel(model)
             if "Input should be a valid string" in str(e):
-                raise ModelDoesNotSupportImageError(model) from e
-            raise LLMProviderError(
+                return ModelDoesNotSupportImageError(model)
+            return LLMProviderError(
                 dev_message=f"Bad request to provider {model}. {str(e)}",
                 user_message="Invalid request parameters to LLM provider.",
                 agent_message=None,
                 should_retry_later=False,
-            ) from e
-        except APIError as e:
-            raise LLMProviderError(
+            )
+        if isinstance(e, APIError):
+            return LLMProviderError(
                 dev_message=f"API error from provider {model}. {str(e)}",
                 user_message="An unexpected error occurred while processing your request.",
                 agent_message=None,
                 should_retry_later=True,
-            ) from e
-        except Exception as e:
-            logger.error(f"Error generating response: {str(e)}")
-            logger.exception("Full traceback:")
-            if "credit balance is too low" in str(e):
-                raise InsufficentCreditsError() from e
-            raise LLMProviderError(
-                dev_message=f"Unexpected error from LLM provider: {str(e)}",
-                user_message="An unexpected error occurred while processing your request.",
-                should_retry_later=True,
-                agent_message=None,
-            ) from e
+            )
+        logger.error(f"Error generating response: {str(e)}")
+        logger.exception("Full traceback:")
+        if "credit balance is too low" in str(e):
+            return InsufficentCreditsError()
+        return LLMProviderError(
+            dev_message=f"Unexpected error from LLM provider: {str(e)}",
+            user_message="An unexpected error occurred while processing your request.",
+            should_retry_later=True,
+            agent_message=None,
+        )
 
 
 @dataclass
@@ -1,5 +1,6 @@
 import inspect
 import typing
+from collections.abc import Coroutine
 from datetime import datetime
 from functools import wraps
 from typing import TYPE_CHECKING, Any, Callable
@@ -27,6 +28,45 @@ def recover_args(func: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[s
     return all_params
 
 
+def _trace_response(
+    tracer: LlmTracer,
+    model: str,
+    messages: list[Any],
+    response: ModelResponse,
+    metadata: dict[str, Any] | None,
+) -> None:
+    try:
+        _completion: str | None = response.choices[0].message.content  # type: ignore[attr-defined]
+        completion: str = _completion or ""  # type: ignore[attr-defined]
+
+        usage = getattr(response, "usage", None)
+        usage_dict = (
+            {
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+                "completion_tokens": getattr(usage, "completion_tokens", 0),
+                "total_tokens": getattr(usage, "total_tokens", 0),
+            }
+            if usage
+            else {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        )
+        hidden_params: object = getattr(response, "_hidden_params", None)
+        if isinstance(hidden_params, dict) and hidden_params.get("cache_hit") is True:  # pyright: ignore[reportUnknownMemberType]
+            # cached responses are not billed: report the original usage in the metadata only
+            metadata = {**(metadata or {}), "cached": True, "cached_usage": usage_dict}
+            usage_dict = {key: 0 for key in usage_dict}
+
+        tracer.trace(
+            timestamp=datetime.now().isoformat(),
+            model=model,
+            messages=messages,
+            completion=completion,  # type: ignore[arg-type]
+            usage=usage_dict,
+            metadata=metadata,
+        )
+    except Exception as e:
+        logger.error(f"Error logging LLM usage: {str(e)}")
+
+
 def trace_llm_usage(
     tracer: LlmTracer | None = None,
 ) -> Callable[[Callable[..., ModelResponse]], Callable[..., ModelResponse]]:
@@ -46,31 +86,35 @@ def trace_llm_usage(
 
             # Only trace if tracer is provided
             if tracer is not None:
-                try:
-                    _completion: str | None = response.choices[0].message.content  # type: ignore[attr-defined]
-                    completion: str = _completion or ""  # type: ignore[attr-defined]
-
-                    usage = getattr(response, "usage", None)
-                    usage_dict = (
-                        {
-                            "prompt_tokens": getattr(usage, "prompt_tokens", 0),
-                            "completion_tokens": getattr(usage, "completion_tokens", 0),
-                            "total_tokens": getattr(usage, "total_tokens", 0),
-                        }
-                        if usage
-                        else {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
-                    )
-
-                    tracer.trace(
-                        timestamp=datetime.now().isoformat(),
-                        model=model,
-                        messages=messages,
-                        completion=completion,  # type: ignore[arg-type]
-                        usage=usage_dict,
-                        metadata=kwargs.get("metadata"),
-                    )
-                except Exception as e:
-                    logger.error(f"Error logging LLM usage: {str(e)}")
+                _trace_response(tracer, model, messages, response, kwargs.get("metadata"))
+
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def trace_llm_usage_async(
+    tracer: LlmTracer | None = None,
+) -> Callable[[Callable[..., Coroutine[Any, Any, ModelResponse]]], Callable[..., Coroutine[Any, Any, ModelResponse]]]:
+    def decorator(
+        func: Callable[..., Coroutine[Any, Any, ModelResponse]],
+    ) -> Callable[..., Coroutine[Any, Any, ModelResponse]]:
+        @wraps(func)
+        async def wrapper(
+            *args: Any,
+            **kwargs: Any,
+        ) -> ModelResponse:
+            recovered_args = recover_args(func, args, kwargs)
+            model = typing.cast(str, recovered_args.get("model"))
+
+            messages = typing.cast(list[Any], recovered_args.get("messages"))
+            response: ModelResponse = await func(*args, **kwargs)
+
+            # Only trace if tracer is provided
+            if tracer is not None:
+                _trace_response(tracer, model, messages, response, kwargs.get("metadata"))
 
             return response
 
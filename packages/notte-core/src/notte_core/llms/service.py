@@ -8,6 +8,7 @@ from llamux import Router  # type: ignore[import]
 from loguru import logger
 
 from notte_core.errors.llm import InvalidPromptTemplateError
+from notte_core.llms.cache import LlmResponseCache
 from notte_core.llms.engine import LLMEngine, LlmModel, TResponseFormat
 from notte_core.llms.prompt import PromptLibrary
 
@@ -36,6 +37,7 @@ class LLMService:
         use_llamux: bool = False,
         verbose: bool = False,
         structured_output_retries: int = 0,
+        cache: LlmResponseCache | None = None,
     ) -> None:
         self.lib: PromptLibrary = PromptLibrary(str(PROMPT_DIR))
         self.router: Router | None = None
@@ -50,6 +52,8 @@ class LLMService:
         self.tokenizer: tiktoken.Encoding = tiktoken.get_encoding("cl100k_base")
         self.verbose: bool = verbose
         self.structured_output_retries: int = structured_output_retries
+        # shared by all the engines created by the service
+        self.cache: LlmResponseCache | None = cache
 
     def context_length(self) -> int:
         return LlmModel.context_length(self.base_model)
@@ -100,13 +104,29 @@ class LLMService:
         messages = self.lib.materialize(prompt_id, variables)
         base_model, _ = self.get_base_model(messages)
         return LLMEngine(
-            structured_output_retries=self.structured_output_retries, verbose=self.verbose
+            structured_output_retries=self.structured_output_retries, verbose=self.verbose, cache=self.cache
         ).structured_completion(
             messages=messages,  # type: ignore[arg-type]
             response_format=response_format,
             model=base_model,
         )
 
+    async def astructured_completion(
+        self,
+        prompt_id: str,
+        response_format: type[TResponseFormat],
+        variables: dict[str, Any] | None = None,
+    ) -> TResponseFormat:
+        messages = self.lib.materialize(prompt_id, variables)
+        base_model, _ = self.get_base_model(messages)
+        return await LLMEngine(
+            structured_output_retries=self.structured_output_retries, verbose=self.verbose, cache=self.cache
+        ).astructured_completion(
+            messages=messages,  # type: ignore[arg-type]
+            response_format=response_format,
+            model=base_model,
+        )
+
     def completion(
         self,
         prompt_id: str,
@@ -114,12 +134,32 @@ class LLMService:
     ) -> ModelResponse:
         messages = self.lib.materialize(prompt_id, variables)
         base_model, eid = self.get_base_model(messages)
-        response = LLMEngine(verbose=self.verbose).completion(
+        response = LLMEngine(verbose=self.verbose, cache=self.cache).completion(
+            messages=messages,  # type: ignore[arg-type]
+            model=base_model,
+        )
+        self._log_router_usage(response, eid)
+        return response
+
+    async def acompletion(
+        self,
+        prompt_id: str,
+        variables: dict[str, Any] | None = None,
+    ) -> ModelResponse:
+        messages = self.lib.materialize(prompt_id, variables)
+        base_model, eid = self.get_base_model(messages)
+        response = await LLMEngine(verbose=self.verbose, cache=self.cache).acompletion(
             messages=messages,  # type: ignore[arg-type]
             model=base_model,
         )
+        self._log_router_usage(response, eid)
+        return response
+
+    def _log_router_usage(self, response: ModelResponse, eid: str | None) -> None:
+        if LlmResponseCache.is_cache_hit(response):
+            # cached responses did not spend any token of the endpoint
+            return
         if eid is not None and self.router is not None:
             # log usage to LLAMUX router if eid is provided
             tokens: int = response.usage.total_tokens  # type: ignore[attr-defined]
             self.router.log(tokens=tokens, endpoint_id=eid)  # type: ignore[arg-type]
-        return response
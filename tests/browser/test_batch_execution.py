@@ -0,0 +1,132 @@
+from typing import Any
+
+import pytest
+from notte_browser.controller import BrowserController
+from notte_core.browser.dom_tree import NodeSelectors
+from notte_core.controller.actions import BaseAction, CheckAction, ClickAction, FillAction
+
+
+class FakeLocator:
+    def __init__(self, page: "FakePage", selector: str) -> None:
+        self.page: FakePage = page
+        self.selector: str = selector
+
+    async def fill(self, value: str, **kwargs: Any) -> None:
+        if self.selector == "missing":
+            raise ValueError(f"element '{self.selector}' not found")
+        self.page.calls.append(f"fill:{self.selector}={value}")
+
+    async def check(self) -> None:
+        self.page.calls.append(f"check:{self.selector}")
+
+    async def click(self, **kwargs: Any) -> None:
+        self.page.calls.append(f"click:{self.selector}")
+
+
+class FakeContext:
+    def __init__(self, page: "FakePage") -> None:
+        self.pages: list[FakePage] = [page]
+
+
+class FakePage:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.url: str = "https://example.com/form"
+        self.context: FakeContext = FakeContext(self)
+
+
+class FakeWaitConfig:
+    action_timeout: int = 1000
+
+
+class FakeWindowConfig:
+    wait: FakeWaitConfig = FakeWaitConfig()
+
+
+class FakeWindow:
+    def __init__(self) -> None:
+        self.page: FakePage = FakePage()
+        self.config: FakeWindowConfig = FakeWindowConfig()
+
+    def invalidate_snapshots(self) -> None:
+        pass
+
+    async def short_wait(self) -> None:
+        self.page.calls.append("wait")
+
+    async def long_wait(self) -> None:
+        self.page.calls.append("long_wait")
+
+    async def snapshot(self) -> str:
+        self.page.calls.append("snapshot")
+        return "snapshot"
+
+
+async def fake_locate_element(page: FakePage, selectors: NodeSelectors) -> FakeLocator:
+    return FakeLocator(page, selectors.css_selector)
+
+
+@pytest.fixture(autouse=True)
+def patch_locate_element(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("notte_browser.controller.locate_element", fake_locate_element)
+
+
+def selector(css: str) -> NodeSelectors:
+    return NodeSelectors(
+        css_selector=css,
+        xpath_selector="",
+        notte_selector="",
+        in_iframe=False,
+        in_shadow_root=False,
+        iframe_parent_css_selectors=[],
+    )
+
+
+@pytest.mark.asyncio
+async def test_batched_form_actions_take_a_single_snapshot() -> None:
+    window = FakeWindow()
+    actions: list[BaseAction] = [
+        FillAction(id=f"I{i}", value=f"value {i}", selector=selector(f"#field{i}")) for i in range(3)
+    ]
+    actions.append(CheckAction(id="I3", value=True, selector=selector("#terms")))
+    result = await BrowserController().execute_multiple(window, actions)  # type: ignore[arg-type]
+
+    assert result.success
+    assert result.snapshot == "snapshot"
+    assert window.page.calls == [
+        "fill:#field0=value 0",
+        "fill:#field1=value 1",
+        "fill:#field2=value 2",
+        "check:#terms",
+        "wait",
+        "snapshot",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_failures_and_skips_remaining_actions() -> None:
+    window = FakeWindow()
+    actions: list[BaseAction] = [
+        FillAction(id="I1", value="a", selector=selector("#a")),
+        FillAction(id="I2", value="b", selector=selector("missing")),
+        FillAction(id="I3", value="c", selector=selector("#c")),
+    ]
+    result = await BrowserController().execute_multiple(window, actions)  # type: ignore[arg-type]
+
+    assert [(r.success, r.skipped) for r in result.results] == [(True, False), (False, False), (False, True)]
+    assert "not found" in str(result.results[1].error)
+    # the page is still snapshotted once after the partial batch
+    assert window.page.calls == ["fill:#a=a", "wait", "snapshot"]
+
+
+@pytest.mark.asyncio
+async def test_non_batchable_actions_are_executed_normally() -> None:
+    window = FakeWindow()
+    actions: list[BaseAction] = [
+        FillAction(id="I1", value="a", selector=selector("#a")),
+        ClickAction(id="B1", selector=selector("#submit")),
+    ]
+    result = await BrowserController().execute_multiple(window, actions)  # type: ignore[arg-type]
+
+    assert result.success
+    assert window.page.calls == ["fill:#a=a", "click:#submit", "wait", "snapshot"]
@@ -0,0 +1,231 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from notte_browser.playwright import ContextPoolConfig, GlobalWindowManager, PooledWindowManager
+from notte_browser.session import NotteSession
+from notte_browser.window import BrowserWindowOptions
+from patchright.async_api import Page
+from typing_extensions import override
+
+
+class FakeCDPSession:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+
+    async def send(self, method: str, params: dict[str, Any]) -> dict[str, Any]:
+        self.calls.append((method, params))
+        return {}
+
+    async def detach(self) -> None:
+        pass
+
+
+class FakePage(Page):
+    # subclass `Page` so that `BrowserResource` validation accepts it
+    def __init__(self, context: "FakeContext") -> None:  # pyright: ignore[reportMissingSuperCall]
+        self._fake_context: FakeContext = context
+        self.closed: bool = False
+        self.listeners: dict[str, list[Any]] = {}
+
+    @property
+    @override
+    def context(self) -> "FakeContext":  # type: ignore[override]
+        return self._fake_context
+
+    @override
+    def on(self, event: str, callback: Any) -> None:  # type: ignore[override]
+        self.listeners.setdefault(event, []).append(callback)
+
+    @override
+    def remove_listener(self, event: str, callback: Any) -> None:  # type: ignore[override]
+        self.listeners[event].remove(callback)
+
+    def navigate(self, url: str) -> None:
+        for callback in self.listeners.get("framenavigated", []):
+            callback(SimpleNamespace(url=url))
+
+    @override
+    def set_default_timeout(self, timeout: float) -> None:
+        pass
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    @override
+    async def close(self, **kwargs: Any) -> None:  # type: ignore[override]
+        self.closed = True
+        self.context.pages.remove(self)
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.pages: list[FakePage] = []
+        self.closed: bool = False
+        self.cookies_cleared: int = 0
+        self.cdp: FakeCDPSession = FakeCDPSession()
+        self.init_scripts: list[str] = []
+        self.listeners: dict[str, list[Any]] = {}
+
+    def on(self, event: str, callback: Any) -> None:
+        self.listeners.setdefault(event, []).append(callback)
+
+    def remove_listener(self, event: str, callback: Any) -> None:
+        self.listeners[event].remove(callback)
+
+    async def new_page(self) -> FakePage:
+        page = FakePage(self)
+        self.pages.append(page)
+        for callback in self.listeners.get("page", []):
+            callback(page)
+        return page
+
+    async def new_cdp_session(self, page: FakePage) -> FakeCDPSession:
+        return self.cdp
+
+    async def add_init_script(self, script: str) -> None:
+        self.init_scripts.append(script)
+
+    async def clear_cookies(self) -> None:
+        self.cookies_cleared += 1
+
+    async def clear_permissions(self) -> None:
+        pass
+
+    async def grant_permissions(self, permissions: list[str]) -> None:
+        pass
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self) -> None:
+        self.contexts: list[FakeContext] = []
+
+    async def new_context(self, **kwargs: Any) -> FakeContext:
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+
+def make_manager(config: ContextPoolConfig) -> tuple[PooledWindowManager, FakeBrowser]:
+    browser = FakeBrowser()
+    manager = PooledWindowManager(pool=config)
+    manager.browser = browser  # type: ignore[assignment]
+    return manager, browser
+
+
+@pytest.mark.asyncio
+async def test_pool_recycles_released_context() -> None:
+    manager, browser = make_manager(ContextPoolConfig(min_size=0, max_size=2))
+    options = BrowserWindowOptions(viewport_width=1280, viewport_height=720)
+
+    resource = await manager.get_browser_resource(options)
+    context = resource.page.context
+    resource.page.navigate("https://example.com/login")  # type: ignore[attr-defined]
+    await manager.release_browser_resource(resource)
+
+    assert not context.closed  # type: ignore[attr-defined]
+    assert context.cookies_cleared == 1  # type: ignore[attr-defined]
+    assert context.cdp.calls == [  # type: ignore[attr-defined]
+        ("Storage.clearDataForOrigin", {"origin": "https://example.com", "storageTypes": "all"})
+    ]
+    assert manager.nb_idle(options) == 1
+
+    # the same context is handed out again with a fresh page
+    resource2 = await manager.get_browser_resource(options)
+    assert resource2.page.context is context
+    assert resource2.page is not resource.page
+    assert len(browser.contexts) == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_recycles_context_after_tab_switch() -> None:
+    manager, _ = make_manager(ContextPoolConfig(min_size=0, max_size=1))
+    options = BrowserWindowOptions()
+
+    resource = await manager.get_browser_resource(options)
+    context = resource.page.context
+    resource.page.navigate("https://example.com")  # type: ignore[attr-defined]
+    # the session opens a new tab and switches to it
+    new_tab = await context.new_page()
+    new_tab.navigate("https://other.com/page")  # type: ignore[attr-defined]
+    resource.page = new_tab
+    await manager.release_browser_resource(resource)
+
+    assert not context.closed  # type: ignore[attr-defined]
+    assert {params["origin"] for _, params in context.cdp.calls} == {  # type: ignore[attr-defined]
+        "https://example.com",
+        "https://other.com",
+    }
+    assert manager._in_use == {}  # pyright: ignore[reportPrivateUsage]
+    assert manager.nb_idle(options) == 1
+    # the context is handed out again instead of hitting `max_size`
+    resource = await manager.get_browser_resource(options)
+    assert resource.page.context is context
+    assert all(len(callbacks) == 1 for callbacks in resource.page.listeners.values())  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_pool_is_keyed_by_context_options() -> None:
+    manager, browser = make_manager(ContextPoolConfig(min_size=0, max_size=2))
+    options = BrowserWindowOptions(user_agent="agent-a")
+    other_options = BrowserWindowOptions(user_agent="agent-b")
+
+    resource = await manager.get_browser_resource(options)
+    await manager.release_browser_resource(resource)
+    assert manager.nb_idle(options) == 1
+    assert manager.nb_idle(other_options) == 0
+
+    _ = await manager.get_browser_resource(other_options)
+    assert len(browser.contexts) == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_discards_tainted_and_expired_contexts() -> None:
+    manager, _ = make_manager(ContextPoolConfig(min_size=0, max_size=2, idle_ttl_seconds=0.0))
+    options = BrowserWindowOptions()
+
+    resource = await manager.get_browser_resource(options)
+    context = resource.page.context
+    manager.taint(resource)
+    await manager.release_browser_resource(resource)
+    assert context.closed  # type: ignore[attr-defined]
+    assert manager.nb_idle(options) == 0
+
+    resource = await manager.get_browser_resource(options)
+    context = resource.page.context
+    await manager.release_browser_resource(resource)
+    assert manager.nb_idle(options) == 1
+    await asyncio.sleep(0.01)
+    _ = await manager.get_browser_resource(options)
+    # idle context expired: it is closed and a new one is created instead
+    assert context.closed  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_pool_refills_in_background() -> None:
+    manager, browser = make_manager(ContextPoolConfig(min_size=2, max_size=4))
+    options = BrowserWindowOptions()
+
+    _ = await manager.get_browser_resource(options)
+    await asyncio.gather(*manager._refill_tasks.values())  # pyright: ignore[reportPrivateUsage]
+    assert manager.nb_idle(options) == 2
+    assert len(browser.contexts) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_session_context_is_not_recycled(monkeypatch: pytest.MonkeyPatch) -> None:
+    manager, _ = make_manager(ContextPoolConfig(min_size=0, max_size=2))
+    monkeypatch.setattr(GlobalWindowManager, "manager", manager)
+    monkeypatch.setattr(GlobalWindowManager, "started", True)
+    monkeypatch.setattr(manager, "is_started", lambda: True)
+
+    with pytest.raises(RuntimeError):
+        async with NotteSession() as session:
+            context = session.window.page.context
+            raise RuntimeError("agent failed")
+    assert context.closed  # type: ignore[attr-defined]
+    assert manager.nb_idle(BrowserWindowOptions()) == 0
@@ -0,0 +1,293 @@
+import dataclasses
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from notte_browser.dom.builder import DomTreeBuilder
+from notte_browser.dom.csspaths import build_csspath
+from notte_browser.dom.parsing import DomParsingConfig, ParseDomTreePipe
+from notte_browser.rendering.pipe import DomNodeRenderingConfig, DomNodeRenderingPipe
+from notte_core.browser.dom_tree import DomNode
+from notte_core.browser.node_type import NodeRole
+
+from tests.browser.test_dom_offloading import FakePage, make_tree
+from tests.browser.test_incremental_dom import element, text
+
+URL = "https://example.com"
+LEGACY_FIXTURE = Path(__file__).parents[1] / "data" / "dom_builder_legacy.json"
+
+
+def project(node: DomNode) -> list[tuple[Any, ...]]:
+    return [
+        (
+            n.id,
+            n.type,
+            n.role,
+            n.text,
+            n.attributes,
+            n.computed_attributes,
+            n.parent.id if n.parent is not None else None,
+            len(n.children),
+        )
+        for n in node.flatten()
+    ]
+
+
+def with_attributes(node: Any, **attributes: Any) -> Any:
+    node.update(attributes)
+    return node
+
+
+def edge_cases_tree() -> Any:
+    link = element(0, "a", "html/body/a", [text("visible "), text("hidden")], interactive=True)
+    link["children"][1]["isVisible"] = False
+    return element(
+        1,
+        "body",
+        "html/body",
+        [
+            link,
+            with_attributes(
+                element(0, "wiz_c_wiz", "html/body/c-wiz", [element(0, "span", "html/body/c-wiz/span", [text("x")])]),
+                attributes={"aria-hidden": "false", "class": "wrapper"},
+            ),
+            with_attributes(
+                element(0, "div", "html/body/div[1]", [text("menu")], interactive=True),
+                attributes={"role": "menuitem", "aria-label": "Open the menu"},
+            ),
+            with_attributes(
+                element(0, "input", "html/body/input", interactive=True),
+                attributes={"type": "checkbox", "name": "accept", "id": "accept"},
+            ),
+            element(
+                0,
+                "iframe",
+                "html/body/iframe",
+                [element(0, "button", "html/body/iframe/button", [text("in frame")], interactive=True)],
+            ),
+            with_attributes(
+                element(
+                    0, "div", "html/body/div[2]", [element(0, "button", "html/body/div[2]/button", interactive=True)]
+                ),
+                shadowRoot=True,
+            ),
+            {"tagName": None, "xpath": None, "attributes": {}, "children": []},
+            element(0, "img", "html/body/img"),
+        ],
+    )
+
+
+def fixture_trees() -> dict[str, Any]:
+    return {"sections": make_tree(5), "edge_cases": edge_cases_tree(), "placeholders": placeholders_tree()}
+
+
+def json_project(node: DomNode) -> Any:
+    """JSON version of `project`, without the notte selectors (`hash` is salted per process)"""
+
+    def attributes(n: DomNode) -> dict[str, Any] | None:
+        if n.attributes is None:
+            return None
+        return {key: value for key, value in dataclasses.asdict(n.attributes).items() if value is not None}
+
+    def computed_attributes(n: DomNode) -> dict[str, Any]:
+        attributes = dataclasses.asdict(n.computed_attributes)
+        if attributes["selectors"] is not None:
+            del attributes["selectors"]["notte_selector"]
+        return attributes
+
+    projection = [
+        (
+            n.id,
+            n.type.value,
+            n.role if isinstance(n.role, str) else n.role.value,
+            n.text,
+            attributes(n),
+            computed_attributes(n),
+            n.parent.id if n.parent is not None else None,
+            len(n.children),
+        )
+        for n in node.flatten()
+    ]
+    return json.loads(json.dumps(projection))
+
+
+def test_builder_matches_the_legacy_conversion() -> None:
+    # output of the legacy three passes conversion (`benchmarks/legacy_dom_parsing.py`) on the same trees
+    legacy = json.loads(LEGACY_FIXTURE.read_text())
+    for name, tree in fixture_trees().items():
+        assert json_project(DomTreeBuilder(URL).build(tree)) == legacy[name]
+
+
+def test_builder_edge_cases() -> None:
+    root = DomTreeBuilder(URL).build(edge_cases_tree())
+    assert [(node.id, node.role) for node in root.interaction_nodes()] == [
+        ("L1", NodeRole.LINK),
+        ("B1", NodeRole.MENUITEM),
+        ("B2", NodeRole.CHECKBOX),
+        ("B3", NodeRole.BUTTON),
+        ("B4", NodeRole.BUTTON),
+    ]
+    checkbox = root.find("B2")
+    assert checkbox is not None and checkbox.text == "accept"
+    wiz = root.children[1]
+    assert wiz.attributes is not None and wiz.attributes.tag_name == "c-wiz"
+    assert wiz.computed_attributes.selectors is not None
+    assert wiz.computed_attributes.selectors.css_selector == "html > body > c-wiz.wrapper"
+    frame_button = root.find("B3")
+    assert frame_button is not None and frame_button.computed_attributes.selectors is not None
+    assert frame_button.computed_attributes.selectors.in_iframe
+    assert len(frame_button.computed_attributes.selectors.iframe_parent_css_selectors) == 1
+    shadow_button = root.find("B4")
+    assert shadow_button is not None and shadow_button.computed_attributes.selectors is not None
+    assert shadow_button.computed_attributes.selectors.in_shadow_root
+    assert not shadow_button.computed_attributes.selectors.in_iframe
+
+
+def with_browser_selectors(node: Any, in_iframe: bool = False, in_shadow_root: bool = False, iframes: Any = ()) -> Any:
+    """Add the selectors `buildDomNode.js` emits in `browser_selectors` mode"""
+    if node.get("type") == "TEXT_NODE" or node["tagName"] is None:
+        return node
+    is_iframe = node["tagName"] == "iframe"
+    shadow_root = node.get("shadowRoot", False)
+    children_iframes = list(iframes)
+    if node.get("highlightIndex") is not None or is_iframe or shadow_root:
+        css = build_csspath(node["tagName"], node["xpath"], node["attributes"], node.get("highlightIndex"))
+        in_iframe, in_shadow_root = in_iframe or is_iframe, in_shadow_root or shadow_root
+        node["selectors"] = dict(css=css, inIframe=in_iframe, inShadowRoot=in_shadow_root, iframeParentCss=iframes)
+        if is_iframe:
+            children_iframes.append(css)
+    for child in node["children"]:
+        _ = with_browser_selectors(child, in_iframe, in_shadow_root, children_iframes)
+    return node
+
+
+def test_builder_uses_browser_selectors() -> None:
+    tree = edge_cases_tree()
+    expected = DomTreeBuilder(URL).build(tree)
+    root = DomTreeBuilder(URL, browser_selectors=True).build(with_browser_selectors(tree))
+    for node, expected_node in zip(root.flatten(), expected.flatten()):
+        selectors = node.computed_attributes.selectors
+        is_iframe = node.attributes is not None and node.attributes.tag_name == "iframe"
+        if (
+            node.computed_attributes.highlight_index is None
+            and not node.computed_attributes.shadow_root
+            and not is_iframe
+        ):
+            assert selectors is None
+            continue
+        expected_selectors = expected_node.computed_attributes.selectors
+        assert selectors is not None and expected_selectors is not None
+        assert selectors.css_selector == expected_selectors.css_selector
+        assert selectors.xpath_selector == expected_selectors.xpath_selector
+        assert selectors.in_iframe == expected_selectors.in_iframe
+        assert selectors.in_shadow_root == expected_selectors.in_shadow_root
+        assert selectors.iframe_parent_css_selectors == expected_selectors.iframe_parent_css_selectors
+    # everything but the selectors is unchanged
+    assert [n[:5] for n in project(root)] == [n[:5] for n in project(expected)]
+
+
+def encode_compact(tree: Any) -> Any:
+    """Python version of `encodeCompact` in `buildDomNode.js`"""
+    strings: list[str] = []
+    indices: dict[str, int] = {}
+    nodes: list[int] = []
+
+    def intern(value: str) -> int:
+        if value not in indices:
+            indices[value] = len(strings)
+            strings.append(value)
+        return indices[value]
+
+    def encode(node: Any) -> None:
+        if node.get("type") == "TEXT_NODE":
+            nodes.extend([0, intern(node["text"]), int(node["isVisible"])])
+            return
+        if node.get("type") == "PLACEHOLDER_NODE":
+            nodes.extend([2, node["elements"], node["interactive"], 0 if node["position"] == "above" else 1])
+            return
+        flags = sum(
+            flag
+            for key, flag in [("isVisible", 1), ("isInteractive", 2), ("isTopElement", 4), ("isEditable", 8)]
+            if node.get(key)
+        )
+        flags += 16 if node.get("shadowRoot") else 0
+        selectors = node.get("selectors")
+        if selectors is not None:
+            flags += 32 + (64 if selectors["inIframe"] else 0) + (128 if selectors["inShadowRoot"] else 0)
+        highlight_index = node.get("highlightIndex")
+        nodes.extend(
+            [
+                1,
+                intern(node["tagName"]),
+                intern(node["xpath"]),
+                flags,
+                (-1 if highlight_index is None else highlight_index) + 1,
+            ]
+        )
+        nodes.append(len(node["attributes"]))
+        for name, value in node["attributes"].items():
+            nodes.extend([intern(name), intern(value)])
+        if selectors is not None:
+            nodes.extend([intern(selectors["css"]), len(selectors["iframeParentCss"])])
+            nodes.extend(intern(css) for css in selectors["iframeParentCss"])
+        children = [child for child in node["children"] if child is not None and child.get("tagName", "") is not None]
+        nodes.append(len(children))
+        for child in children:
+            encode(child)
+
+    encode(tree)
+    return {"strings": strings, "nodes": nodes}
+
+
+def test_compact_payload_is_decoded_like_the_nested_payload() -> None:
+    for tree, browser_selectors in [
+        (make_tree(20), False),
+        (edge_cases_tree(), False),
+        (with_browser_selectors(edge_cases_tree()), True),
+    ]:
+        payload = encode_compact(tree)
+        decoded = DomTreeBuilder(URL, browser_selectors).build_compact(payload)
+        assert project(decoded) == project(DomTreeBuilder(URL, browser_selectors).build(tree))
+        assert len(json.dumps(payload)) < len(json.dumps(tree)) / 2
+
+
+@pytest.mark.asyncio
+async def test_compact_payload_end_to_end() -> None:
+    tree = make_tree(20)
+    page = FakePage(tree)
+    expected = await ParseDomTreePipe.forward(page, DomParsingConfig(offload=False))  # type: ignore[arg-type]
+    page.tree = encode_compact(tree)
+    for offload in [False, True]:
+        config = DomParsingConfig(offload=offload, compact_payload=True)
+        assert project(await ParseDomTreePipe.forward(page, config)) == project(expected)  # type: ignore[arg-type]
+
+
+def placeholder(elements: int, interactive: int, position: str) -> Any:
+    return {"type": "PLACEHOLDER_NODE", "elements": elements, "interactive": interactive, "position": position}
+
+
+def placeholders_tree() -> Any:
+    return element(
+        1,
+        "body",
+        "html/body",
+        [
+            placeholder(120, 30, "above"),
+            element(0, "a", "html/body/a", [text("visible link")], interactive=True),
+            element(0, "ul", "html/body/ul", [placeholder(5000, 1000, "below")]),
+        ],
+    )
+
+
+def test_partial_extraction_placeholders() -> None:
+    tree = placeholders_tree()
+    root = DomTreeBuilder(URL).build(tree)
+    assert project(DomTreeBuilder(URL).build_compact(encode_compact(tree))) == project(root)
+
+    assert [node.id for node in root.interaction_nodes()] == ["L1"]
+    # placeholders are rendered, but are not part of the names of their parents
+    assert root.children[2].text == ""
+    rendered = DomNodeRenderingPipe.forward(root, DomNodeRenderingConfig())
+    assert "[120 elements (30 interactive) above the viewport are not shown: scroll up to see them]" in rendered
+    assert "[5000 elements (1000 interactive) below the viewport are not shown: scroll down to see them]" in rendered
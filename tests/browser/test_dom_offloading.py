@@ -0,0 +1,139 @@
+import asyncio
+import gc
+import json
+import time
+from typing import Any
+
+import pytest
+from notte_browser.dom.parsing import (
+    DOM_TREE_FUNCTION,
+    DomParsingConfig,
+    ParseDomTreePipe,
+    dom_tree_js,
+)
+from notte_browser.playwright import ContextPoolConfig, PooledWindowManager
+from notte_browser.window import BrowserWindowOptions
+from notte_core.browser.dom_tree import DomNode
+
+from tests.browser.test_context_pool import FakeBrowser
+from tests.browser.test_incremental_dom import element, text
+
+URL = "https://example.com"
+
+
+def make_tree(nb_sections: int) -> Any:
+    return element(
+        1,
+        "body",
+        "html/body",
+        [
+            element(
+                0,
+                "section",
+                f"html/body/section[{i + 1}]",
+                [
+                    element(0, "a", f"html/body/section[{i + 1}]/a", [text(f"link {i}")], interactive=True),
+                    element(0, "input", f"html/body/section[{i + 1}]/input", interactive=True),
+                    element(0, "p", f"html/body/section[{i + 1}]/p", [text(f"paragraph {i}")]),
+                ],
+            )
+            for i in range(nb_sections)
+        ],
+    )
+
+
+class FakePage:
+    def __init__(self, tree: Any) -> None:
+        self.tree: Any = tree
+        self.url: str = URL
+        # whether the DOM tree function is defined in the current document
+        self.installed: bool = False
+        self.expressions: list[str] = []
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        self.expressions.append(expression)
+        if expression.startswith(f"(args) => {{ window.{DOM_TREE_FUNCTION} = "):
+            self.installed = True
+        elif not self.installed:
+            return None
+        return [json.dumps(self.tree) if "JSON.stringify" in expression else self.tree]
+
+
+def project(node: DomNode) -> list[tuple[Any, ...]]:
+    return [
+        (
+            n.id,
+            n.role,
+            n.text,
+            n.computed_attributes.selectors.notte_selector if n.computed_attributes.selectors else None,
+            n.computed_attributes.selectors.css_selector if n.computed_attributes.selectors else None,
+        )
+        for n in node.flatten()
+    ]
+
+
+@pytest.mark.asyncio
+async def test_offloaded_parsing_is_identical_to_inline_parsing() -> None:
+    page = FakePage(make_tree(20))
+    inline = await ParseDomTreePipe.forward(page, DomParsingConfig(offload=False))  # type: ignore[arg-type]
+    offloaded = await ParseDomTreePipe.forward(page, DomParsingConfig(offload=True))  # type: ignore[arg-type]
+    assert project(offloaded) == project(inline)
+    assert [node.id for node in offloaded.interaction_nodes()][:4] == ["L1", "I1", "L2", "I2"]
+
+
+@pytest.mark.asyncio
+async def test_offloaded_parsing_keeps_the_event_loop_responsive() -> None:
+    page = FakePage(make_tree(3000))
+    gaps: dict[bool, float] = {}
+    for offload in [False, True]:
+        done = asyncio.Event()
+        max_gap = 0.0
+
+        async def ticker() -> None:
+            nonlocal max_gap
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                max_gap = max(max_gap, now - last)
+                last = now
+
+        # full collections stop every thread: they would add the same pauses to both runs
+        gc.disable()
+        try:
+            task = asyncio.create_task(ticker())
+            await asyncio.sleep(0.01)
+            _ = await ParseDomTreePipe.forward(page, DomParsingConfig(offload=offload))  # type: ignore[arg-type]
+            done.set()
+            await task
+        finally:
+            gc.enable()
+        gaps[offload] = max_gap
+    # the inline path blocks the loop for the whole conversion
+    assert gaps[True] < gaps[False] / 2
+
+
+@pytest.mark.asyncio
+async def test_dom_tree_source_is_sent_once_per_document() -> None:
+    page = FakePage(make_tree(5))
+    for offload in [False, True, False]:
+        _ = await ParseDomTreePipe.forward(page, DomParsingConfig(offload=offload))  # type: ignore[arg-type]
+    sizes = [len(expression) for expression in page.expressions]
+    # first call: the function is not defined yet, it is defined (with the whole source) and called
+    assert len(sizes) == 4 and sizes[1] > len(dom_tree_js())
+    assert all(size < 300 for size in [sizes[0], *sizes[2:]])
+
+    # a new document (navigation) does not have the function anymore
+    page.installed = False
+    _ = await ParseDomTreePipe.forward(page, DomParsingConfig(offload=False))  # type: ignore[arg-type]
+    assert len(page.expressions) == 6 and len(page.expressions[-1]) > len(dom_tree_js())
+
+
+@pytest.mark.asyncio
+async def test_contexts_have_no_init_script() -> None:
+    # patchright routes every request of a context with init scripts through python
+    browser = FakeBrowser()
+    manager = PooledWindowManager(pool=ContextPoolConfig(min_size=0, max_size=1))
+    manager.browser = browser  # type: ignore[assignment]
+    _ = await manager.get_browser_resource(BrowserWindowOptions())
+    assert browser.contexts[0].init_scripts == []
@@ -0,0 +1,222 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+from notte_browser.http_cache import HttpCache, HttpCacheConfig, HttpCacheRoute, freshness_lifetime
+
+
+class FakeResponse:
+    def __init__(self, status: int, headers: dict[str, str], body: bytes) -> None:
+        self.status: int = status
+        self.headers: dict[str, str] = headers
+        self._body: bytes = body
+
+    async def body(self) -> bytes:
+        return self._body
+
+
+class FakeRequest:
+    def __init__(self, url: str, resource_type: str, method: str = "GET") -> None:
+        self.url: str = url
+        self.resource_type: str = resource_type
+        self.method: str = method
+        self.headers: dict[str, str] = {"accept": "*/*"}
+        # headers added by the browser, e.g. cookies
+        self.extra_headers: dict[str, str] = {}
+
+    async def all_headers(self) -> dict[str, str]:
+        return {**self.headers, **self.extra_headers}
+
+
+class FakeServer:
+    def __init__(self) -> None:
+        self.responses: dict[str, FakeResponse] = {}
+        self.fetched: list[tuple[str, dict[str, str]]] = []
+        self.offline: bool = False
+
+
+class FakeRoute:
+    def __init__(self, server: FakeServer, url: str, resource_type: str = "script", method: str = "GET") -> None:
+        self.server: FakeServer = server
+        self.request: FakeRequest = FakeRequest(url, resource_type, method)
+        self.outcome: str | None = None
+        self.body: bytes | None = None
+
+    async def fallback(self) -> None:
+        self.outcome = "fallback"
+
+    async def abort(self, error_code: str | None = None) -> None:
+        self.outcome = f"abort:{error_code}"
+
+    async def fetch(self, headers: dict[str, str] | None = None, **kwargs: Any) -> FakeResponse:
+        self.server.fetched.append((self.request.url, headers or {}))
+        if self.server.offline:
+            raise ConnectionError("net::ERR_INTERNET_DISCONNECTED")
+        response = self.server.responses[self.request.url]
+        if (
+            response.headers.get("etag") is not None
+            and (headers or {}).get("if-none-match") == response.headers["etag"]
+        ):
+            return FakeResponse(304, {"cache-control": "max-age=60"}, b"")
+        return response
+
+    async def fulfill(self, response: FakeResponse | None = None, body: bytes | None = None, **kwargs: Any) -> None:
+        self.outcome = "network" if response is not None else "cache"
+        self.body = body
+
+
+async def load(
+    handler: HttpCacheRoute,
+    server: FakeServer,
+    url: str,
+    resource_type: str = "script",
+    extra_headers: dict[str, str] | None = None,
+) -> FakeRoute:
+    route = FakeRoute(server, url, resource_type)
+    route.request.extra_headers = extra_headers or {}
+    await handler.handle(route)  # type: ignore[arg-type]
+    return route
+
+
+def test_freshness_lifetime() -> None:
+    assert freshness_lifetime({"cache-control": "public, max-age=600"}) == 600
+    assert freshness_lifetime({"cache-control": "max-age=600", "age": "100"}) == 500
+    assert freshness_lifetime({"cache-control": "no-store, max-age=600"}) is None
+    # shared cache semantics
+    assert freshness_lifetime({"cache-control": "private, max-age=600"}) is None
+    assert freshness_lifetime({"cache-control": "max-age=600, s-maxage=60"}) == 60
+    assert freshness_lifetime({"cache-control": "no-cache", "etag": '"v1"'}) == 0
+    assert freshness_lifetime({"cache-control": "no-cache"}) is None
+    assert (
+        freshness_lifetime({"date": "Mon, 01 Jan 2024 00:00:00 GMT", "expires": "Mon, 01 Jan 2024 01:00:00 GMT"})
+        == 3600
+    )
+    # heuristic freshness: 10% of the time since the last modification
+    assert (
+        freshness_lifetime({"date": "Thu, 11 Jan 2024 00:00:00 GMT", "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+        == 86400
+    )
+    assert freshness_lifetime({}) is None
+
+
+@pytest.mark.asyncio
+async def test_cache_is_shared_across_contexts(tmp_path: Path) -> None:
+    config = HttpCacheConfig().enable(str(tmp_path / "http.db"))
+    server = FakeServer()
+    server.responses["https://cdn.example.com/app.js"] = FakeResponse(
+        200, {"cache-control": "max-age=3600", "content-encoding": "gzip", "set-cookie": "a=b"}, b"console.log(1)"
+    )
+    server.responses["https://cdn.example.com/private.js"] = FakeResponse(200, {"cache-control": "no-store"}, b"secret")
+    first = await load(HttpCacheRoute(HttpCache(config)), server, "https://cdn.example.com/app.js")
+    assert first.outcome == "network"
+
+    # a new context (and even a new process) reads the response back from disk
+    cache = HttpCache(config)
+    second = await load(HttpCacheRoute(cache), server, "https://cdn.example.com/app.js")
+    assert second.outcome == "cache"
+    assert second.body == b"console.log(1)"
+    cached = cache.get("GET", "https://cdn.example.com/app.js")
+    assert cached is not None and "content-encoding" not in cached.headers and "set-cookie" not in cached.headers
+
+    for _ in range(2):
+        route = await load(HttpCacheRoute(cache), server, "https://cdn.example.com/private.js")
+        assert route.outcome == "network"
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 2
+    # documents, POST requests and non http urls are not handled by the cache
+    assert (await load(HttpCacheRoute(cache), server, "https://example.com/", "document")).outcome == "fallback"
+    post = FakeRoute(server, "https://cdn.example.com/app.js", method="POST")
+    await HttpCacheRoute(cache).handle(post)  # type: ignore[arg-type]
+    assert post.outcome == "fallback"
+
+
+@pytest.mark.asyncio
+async def test_credentialed_responses_are_not_shared(tmp_path: Path) -> None:
+    cache = HttpCache(HttpCacheConfig().enable(str(tmp_path / "http.db")))
+    server = FakeServer()
+    server.responses["https://example.com/avatar.png"] = FakeResponse(200, {"cache-control": "max-age=3600"}, b"me")
+    server.responses["https://example.com/logo.png"] = FakeResponse(200, {"cache-control": "public, max-age=3600"}, b"")
+    handler = HttpCacheRoute(cache)
+    for url in ["https://example.com/avatar.png", "https://example.com/logo.png"]:
+        _ = await load(handler, server, url, "image", extra_headers={"cookie": "session=secret"})
+    assert cache.get("GET", "https://example.com/avatar.png") is None
+    assert cache.get("GET", "https://example.com/logo.png") is not None
+
+    _ = await load(
+        handler, server, "https://example.com/avatar.png", "image", extra_headers={"authorization": "Bearer"}
+    )
+    assert cache.get("GET", "https://example.com/avatar.png") is None
+
+
+@pytest.mark.asyncio
+async def test_stale_responses_are_revalidated(tmp_path: Path) -> None:
+    cache = HttpCache(HttpCacheConfig().enable(str(tmp_path / "http.db")))
+    server = FakeServer()
+    server.responses["https://cdn.example.com/style.css"] = FakeResponse(
+        200, {"cache-control": "no-cache", "etag": '"v1"'}, b"body {}"
+    )
+    handler = HttpCacheRoute(cache)
+    _ = await load(handler, server, "https://cdn.example.com/style.css", "stylesheet")
+    route = await load(handler, server, "https://cdn.example.com/style.css", "stylesheet")
+    assert route.outcome == "cache"
+    assert route.body == b"body {}"
+    assert server.fetched[-1][1]["if-none-match"] == '"v1"'
+    assert cache.stats.revalidated == 1
+    # the 304 response made the entry fresh for 60s
+    _ = await load(handler, server, "https://cdn.example.com/style.css", "stylesheet")
+    assert len(server.fetched) == 2
+
+
+@pytest.mark.asyncio
+async def test_network_errors_resolve_the_route(tmp_path: Path) -> None:
+    cache = HttpCache(HttpCacheConfig().enable(str(tmp_path / "http.db")))
+    server = FakeServer()
+    server.responses["https://cdn.example.com/style.css"] = FakeResponse(
+        200, {"cache-control": "no-cache", "etag": '"v1"'}, b"body {}"
+    )
+    handler = HttpCacheRoute(cache)
+    _ = await load(handler, server, "https://cdn.example.com/style.css", "stylesheet")
+    server.offline = True
+    # the stale entry cannot be revalidated: it is served as is
+    route = await load(handler, server, "https://cdn.example.com/style.css", "stylesheet")
+    assert route.outcome == "cache"
+    assert route.body == b"body {}"
+    # nothing cached: the browser handles the request (and reports the failure)
+    assert (await load(handler, server, "https://cdn.example.com/app.js")).outcome == "fallback"
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction(tmp_path: Path) -> None:
+    cache = HttpCache(HttpCacheConfig(max_size_bytes=25).enable(str(tmp_path / "http.db")))
+    server = FakeServer()
+    for name in ["a", "b", "c"]:
+        server.responses[f"https://cdn.example.com/{name}.js"] = FakeResponse(
+            200, {"cache-control": "max-age=3600"}, name.encode() * 10
+        )
+    handler = HttpCacheRoute(cache)
+    _ = await load(handler, server, "https://cdn.example.com/a.js")
+    _ = await load(handler, server, "https://cdn.example.com/b.js")
+    # `a` is used again: `b` becomes the least recently used entry
+    assert (await load(handler, server, "https://cdn.example.com/a.js")).outcome == "cache"
+    _ = await load(handler, server, "https://cdn.example.com/c.js")
+    assert cache.stats.evictions == 1
+    assert cache.size_bytes == 20
+    assert cache.get("GET", "https://cdn.example.com/b.js") is None
+    assert cache.get("GET", "https://cdn.example.com/a.js") is not None
+
+
+@pytest.mark.asyncio
+async def test_record_and_offline_replay(tmp_path: Path) -> None:
+    config = HttpCacheConfig().enable(str(tmp_path / "site.db")).set_record()
+    server = FakeServer()
+    server.responses["https://example.com/"] = FakeResponse(200, {"cache-control": "no-store"}, b"<html></html>")
+    recorder = HttpCacheRoute(HttpCache(config))
+    assert (await load(recorder, server, "https://example.com/", "document")).outcome == "network"
+
+    replay = HttpCacheRoute(HttpCache(config.set_record(False).set_replay()))
+    route = await load(replay, server, "https://example.com/", "document")
+    assert route.outcome == "cache"
+    assert route.body == b"<html></html>"
+    missing = await load(replay, server, "https://example.com/missing", "xhr")
+    assert missing.outcome == "abort:internetdisconnected"
+    assert len(server.fetched) == 1
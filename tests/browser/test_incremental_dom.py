@@ -0,0 +1,151 @@
+import json
+from typing import Any
+
+import pytest
+from notte_browser.dom.builder import DomTreeBuilder
+from notte_browser.dom.parsing import (
+    DomParsingConfig,
+    DomTreeDict,
+    IncrementalDomState,
+    ParseDomTreePipe,
+)
+
+URL = "https://example.com"
+
+
+def element(key: int, tag: str, xpath: str, children: list[Any] | None = None, interactive: bool = False) -> Any:
+    node: dict[str, Any] = {
+        "tagName": tag,
+        "xpath": xpath,
+        "attributes": {},
+        "isVisible": True,
+        "isInteractive": interactive,
+        "isTopElement": True,
+        "isEditable": False,
+        "children": children or [],
+        "key": key,
+    }
+    if interactive:
+        node["highlightIndex"] = key
+    return node
+
+
+def text(value: str) -> Any:
+    return {"type": "TEXT_NODE", "text": value, "isVisible": True}
+
+
+def menu(key: int, nb_items: int) -> Any:
+    items = [
+        element(key + i + 1, "button", f"html/body/div/ul/button[{i + 1}]", [text(f"item {i}")], interactive=True)
+        for i in range(nb_items)
+    ]
+    return element(key, "ul", "html/body/div/ul", items)
+
+
+def make_tree() -> DomTreeDict:
+    return element(
+        1,
+        "body",
+        "html/body",
+        [
+            element(2, "a", "html/body/a", [text("home")], interactive=True),
+            element(3, "div", "html/body/div", [menu(10, 1)]),
+            element(4, "button", "html/body/button", [text("submit")], interactive=True),
+        ],
+    )
+
+
+def test_incremental_patch_keeps_ids() -> None:
+    state = IncrementalDomState.from_root(make_tree())
+    before = state.build(URL)
+    assert state.ids == {2: "L1", 11: "B1", 4: "B2"}
+
+    # the dropdown opens: two new items are appended to the menu
+    ParseDomTreePipe.apply_patch(state, {"key": 10, "node": menu(10, 3)}, URL)
+    after = state.build(URL)
+
+    # existing elements keep their ids, new ones get fresh ids
+    assert state.ids == {2: "L1", 11: "B1", 4: "B2", 12: "B3", 13: "B4"}
+    assert [node.id for node in after.interaction_nodes()] == ["L1", "B1", "B3", "B4", "B2"]
+    assert after.find("B4") is not None
+
+    # the tree of the previous snapshot is left untouched
+    assert [node.id for node in before.interaction_nodes()] == ["L1", "B1", "B2"]
+    assert before.find("B4") is None
+    assert all(child.parent is before for child in before.children)
+
+    # the dropdown closes: removed items are dropped
+    ParseDomTreePipe.apply_patch(state, {"key": 10, "node": menu(10, 1)}, URL)
+    _ = state.build(URL)
+    assert state.ids == {2: "L1", 11: "B1", 4: "B2"}
+    assert set(state.nodes) == {1, 2, 3, 4, 10, 11}
+
+
+def test_incremental_patch_matches_full_parse() -> None:
+    state = IncrementalDomState.from_root(make_tree())
+    _ = state.build(URL)
+    ParseDomTreePipe.apply_patch(state, {"key": 10, "node": menu(10, 2)}, URL)
+    patched = state.build(URL)
+
+    full_tree = make_tree()
+    full_tree["children"][1]["children"] = [menu(10, 2)]
+    full = DomTreeBuilder(URL).build(full_tree)
+
+    def selectors(node: Any) -> list[Any]:
+        return [n.computed_attributes.selectors for n in node.interaction_nodes()]
+
+    assert selectors(patched) == selectors(full)
+
+
+class FakeIncrementalPage:
+    """Replays the results of `buildDomNode.js` in incremental mode"""
+
+    def __init__(self, results: list[Any]) -> None:
+        self.url: str = URL
+        self.results: list[Any] = results
+        self.resets: list[bool] = []
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        self.resets.append(arg["reset"])
+        result = self.results.pop(0)
+        return [json.dumps(result) if "JSON.stringify" in expression else result]
+
+
+def with_selectors(node: Any, css: str) -> Any:
+    node["selectors"] = {"css": css, "inIframe": False, "inShadowRoot": False, "iframeParentCss": []}
+    return node
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("offload", [False, True])
+async def test_forward_incremental(offload: bool) -> None:
+    tree = make_tree()
+    for key, node in [(2, tree["children"][0]), (4, tree["children"][2])]:
+        _ = with_selectors(node, f"#element-{key}")
+    _ = with_selectors(tree["children"][1]["children"][0]["children"][0], "#element-11")
+    patched_menu = menu(10, 2)
+    _ = with_selectors(patched_menu["children"][0], "#element-11")
+    _ = with_selectors(patched_menu["children"][1], "#element-12")
+    page = FakeIncrementalPage(
+        [
+            {"mode": "full", "tree": tree},
+            {"mode": "patch", "patches": [{"key": 10, "node": patched_menu}]},
+            # unknown key: the page is asked for a full rebuild
+            {"mode": "patch", "patches": [{"key": 99, "node": menu(99, 1)}]},
+            {"mode": "full", "tree": make_tree()},
+        ]
+    )
+    config = DomParsingConfig(incremental=True, offload=offload, browser_selectors=True)
+
+    _ = await ParseDomTreePipe.forward(page, config)  # type: ignore[arg-type]
+    root = await ParseDomTreePipe.forward(page, config)  # type: ignore[arg-type]
+    assert [node.id for node in root.interaction_nodes()] == ["L1", "B1", "B3", "B2"]
+    # the selectors computed in the page are used for the patched nodes
+    patched = root.find("B3")
+    assert patched is not None and patched.computed_attributes.selectors is not None
+    assert patched.computed_attributes.selectors.css_selector == "#element-12"
+
+    config = DomParsingConfig(incremental=True, offload=offload)
+    root = await ParseDomTreePipe.forward(page, config)  # type: ignore[arg-type]
+    assert page.resets == [True, False, False, True]
+    assert [node.id for node in root.interaction_nodes()] == ["L1", "B1", "B2"]
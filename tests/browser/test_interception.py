@@ -0,0 +1,141 @@
+from typing import Any
+
+import pytest
+from notte_browser.interception import InterceptionConfig, InterceptionProfile, RequestInterceptor
+from notte_browser.playwright import ContextPoolConfig, PooledWindowManager
+from notte_browser.window import BrowserWindowOptions
+
+from tests.browser.test_context_pool import FakeBrowser, FakeContext
+
+PAGE_URL = "https://www.example.com/products"
+
+
+class RoutingContext(FakeContext):
+    def __init__(self) -> None:
+        super().__init__()
+        self.routes: list[tuple[str, Any]] = []
+
+    async def route(self, url: str, handler: Any) -> None:
+        self.routes.append((url, handler))
+
+
+class RoutingBrowser(FakeBrowser):
+    async def new_context(self, **kwargs: Any) -> RoutingContext:  # type: ignore[override]
+        context = RoutingContext()
+        self.contexts.append(context)
+        return context
+
+
+class FakeRequest:
+    def __init__(self, url: str, resource_type: str) -> None:
+        self.url: str = url
+        self.resource_type: str = resource_type
+
+    @property
+    def frame(self) -> Any:
+        class Frame:
+            class page:
+                url: str = PAGE_URL
+
+        return Frame()
+
+
+class FakeRoute:
+    def __init__(self, url: str, resource_type: str) -> None:
+        self.request: FakeRequest = FakeRequest(url, resource_type)
+        self.outcome: str | None = None
+
+    async def fallback(self) -> None:
+        self.outcome = "fallback"
+
+    async def abort(self, error_code: str | None = None) -> None:
+        self.outcome = f"abort:{error_code}"
+
+
+def test_profiles_block_rules() -> None:
+    no_media = RequestInterceptor(InterceptionConfig(profile=InterceptionProfile.NO_MEDIA))
+    assert no_media.block_rule("https://cdn.example.com/a.png", "image", PAGE_URL) == "no_media"
+    assert no_media.block_rule("https://cdn.example.com/a.woff2", "font", PAGE_URL) == "no_media"
+    assert no_media.block_rule("https://www.example.com/app.js", "script", PAGE_URL) is None
+    assert no_media.block_rule("data:image/png;base64,AAAA", "image", PAGE_URL) is None
+    # trackers are only blocked by the tracker profiles
+    assert no_media.block_rule("https://www.google-analytics.com/collect", "xhr", PAGE_URL) is None
+
+    trackers = RequestInterceptor(InterceptionConfig(profile=InterceptionProfile.NO_THIRD_PARTY_TRACKERS))
+    assert trackers.block_rule("https://www.google-analytics.com/collect", "xhr", PAGE_URL) == "tracker"
+    assert trackers.block_rule("https://cdn.example.com/a.png", "image", PAGE_URL) is None
+    # first-party analytics are kept
+    assert trackers.block_rule("https://www.hotjar.com/a.js", "script", "https://www.hotjar.com") is None
+
+    text_only = RequestInterceptor(InterceptionConfig(profile=InterceptionProfile.TEXT_ONLY))
+    assert text_only.block_rule("https://cdn.example.com/a.mp4", "media", PAGE_URL) == "text_only"
+    assert text_only.block_rule("https://stats.g.doubleclick.net/p", "image", PAGE_URL) == "text_only"
+    assert text_only.block_rule("https://stats.g.doubleclick.net/p", "script", PAGE_URL) == "tracker"
+    assert text_only.block_rule("https://www.example.com/style.css", "stylesheet", PAGE_URL) is None
+
+
+def test_allow_deny_lists_and_domain_overrides() -> None:
+    config = (
+        InterceptionConfig(profile=InterceptionProfile.NO_MEDIA)
+        .set_allow(["images.example.com", "*://*/captcha/*"])
+        .set_deny(["ads.example.net", "*/beacon?*"])
+        .set_domain_override("shop.com", InterceptionProfile.NONE)
+    )
+    interceptor = RequestInterceptor(config)
+    assert interceptor.block_rule("https://images.example.com/a.png", "image", PAGE_URL) is None
+    assert interceptor.block_rule("https://cdn.other.com/captcha/a.png", "image", PAGE_URL) is None
+    assert interceptor.block_rule("https://x.ads.example.net/a.js", "script", PAGE_URL) == "deny"
+    assert interceptor.block_rule("https://www.example.com/beacon?id=1", "ping", PAGE_URL) == "deny"
+    # images are kept on the overridden domain (and its subdomains) ...
+    assert interceptor.block_rule("https://cdn.example.com/a.png", "image", "https://www.shop.com") is None
+    # ... but the deny list still applies
+    assert interceptor.block_rule("https://ads.example.net/a.png", "image", "https://www.shop.com") == "deny"
+
+    assert not InterceptionConfig().active
+    assert not InterceptionConfig(allow=["example.com"]).active
+    assert InterceptionConfig(deny=["example.com"]).active
+
+
+@pytest.mark.asyncio
+async def test_interceptor_counts_blocked_requests() -> None:
+    interceptor = RequestInterceptor(InterceptionConfig(profile=InterceptionProfile.TEXT_ONLY))
+    routes = [
+        FakeRoute("https://www.example.com/", "document"),
+        FakeRoute("https://cdn.example.com/a.png", "image"),
+        FakeRoute("https://cdn.example.com/b.png", "image"),
+        FakeRoute("https://www.googletagmanager.com/gtm.js", "script"),
+    ]
+    for route in routes:
+        await interceptor.handle(route)  # type: ignore[arg-type]
+
+    assert [route.outcome for route in routes] == ["fallback"] + ["abort:blockedbyclient"] * 3
+    stats = interceptor.stats
+    assert stats.requests == 4
+    assert stats.blocked_requests == 3
+    assert stats.blocked_by_type == {"image": 2, "script": 1}
+    assert stats.blocked_by_rule == {"text_only": 2, "tracker": 1}
+    assert stats.estimated_blocked_bytes > 0
+
+
+@pytest.mark.asyncio
+async def test_pooled_contexts_install_routes_once_and_reset_counters() -> None:
+    browser = RoutingBrowser()
+    manager = PooledWindowManager(pool=ContextPoolConfig(min_size=0, max_size=2))
+    manager.browser = browser  # type: ignore[assignment]
+    options = BrowserWindowOptions().set_interception(InterceptionProfile.NO_MEDIA)
+
+    resource = await manager.get_browser_resource(options)
+    assert resource.interceptor is not None
+    resource.interceptor.stats.record("image", "no_media")
+    await manager.release_browser_resource(resource)
+
+    resource = await manager.get_browser_resource(options)
+    assert resource.interceptor is not None
+    assert resource.interceptor.stats.requests == 0
+    assert len(browser.contexts) == 1
+    assert [url for url, _ in browser.contexts[0].routes] == ["**/*"]  # type: ignore[attr-defined]
+
+    # contexts with different interception configs are not shared
+    assert manager.pool_key(options) != manager.pool_key(BrowserWindowOptions())
+    resource = await manager.get_browser_resource(BrowserWindowOptions())
+    assert resource.interceptor is None
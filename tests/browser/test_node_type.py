@@ -434,3 +434,61 @@ def test_non_intersecting_category_roles():
         _all = all_except(category)
         cat_roles = category.roles()
         assert len(cat_roles.intersection(_all)) == 0, f"Category {category.value} has intersecting roles"
+
+
+def test_dom_attributes_are_sparse():
+    attrs = DomAttributes.safe_init(
+        tag_name="a", href="/home", placeholder=None, **{"class": "nav-link", "aria-label": "Home", "data-id": "1"}
+    )
+    # only set attributes are stored on the instance, the others resolve to None
+    assert set(vars(attrs)) == {"tag_name", "href", "class_name", "aria_label"}
+    assert attrs.placeholder is None
+    assert attrs.src is None
+    assert attrs.get_resource_url() == "/home"
+    assert attrs.relevant_attrs() == {"href": "/home"}
+    assert attrs == DomAttributes.safe_init(tag_name="a", href="/home", **{"class": "nav-link", "aria-label": "Home"})
+
+    # low cardinality values are interned and shared across nodes
+    other = DomAttributes.safe_init(tag_name="".join(["a"]), **{"class": "".join(["nav-", "link"])})
+    assert other.class_name is attrs.class_name
+
+
+def test_subtree_ids_are_computed_lazily(nested_graph: DomNode):
+    assert nested_graph._subtree_ids is None  # pyright: ignore[reportPrivateUsage]
+    ids = nested_graph.subtree_ids
+    assert nested_graph.subtree_ids is ids
+    assert ids == [node.id for node in nested_graph.flatten() if node.id is not None]
+
+
+def test_dom_node_index(nested_graph: DomNode):
+    index = nested_graph.index
+    assert nested_graph.index is index
+    inodes = nested_graph.interaction_nodes()
+    assert [node.id for node in inodes] == [node.id for node in nested_graph.flatten() if node.is_interaction()]
+    # interaction nodes are converted once and reused by later lookups
+    assert nested_graph.find("B1") is inodes[0]
+    assert nested_graph.find("unknown") is None
+    assert index.find_interaction("unknown") is None
+    assert index.interaction_ids() == {node.id for node in inodes}
+    assert [node.id for node in index.role_nodes("button")] == [node.id for node in index.role_nodes(NodeRole.BUTTON)]
+    assert index.subtree_id_set(nested_graph) == frozenset(nested_graph.subtree_ids)
+
+
+def test_dom_node_index_is_invalidated_on_mutation(nested_graph: DomNode):
+    group = nested_graph.index.role_nodes(NodeRole.GROUP)[0]
+    group.set_parent(nested_graph)
+    assert nested_graph.find("B9") is None
+    new_button = DomNode(
+        id="B9",
+        role=NodeRole.BUTTON,
+        text="Button 9",
+        type=NodeType.INTERACTION,
+        children=[],
+        attributes=None,
+        computed_attributes=ComputedDomAttributes(),
+    )
+    group.children.append(new_button)
+    new_button.set_parent(group)
+    found = nested_graph.find("B9")
+    assert found is not None and found.id == "B9"
+    assert "B9" in nested_graph.subtree_ids
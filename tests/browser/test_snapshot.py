@@ -0,0 +1,225 @@
+import asyncio
+import time
+from typing import Any
+
+import pytest
+from notte_browser.dom.parsing import ParseDomTreePipe
+from notte_browser.errors import StaleSnapshotError
+from notte_browser.window import (
+    BrowserResource,
+    BrowserSnapshotConfig,
+    BrowserWindow,
+    BrowserWindowConfig,
+    BrowserWindowOptions,
+    SnapshotProfile,
+)
+from notte_core.browser.dom_tree import ComputedDomAttributes, DomNode
+from notte_core.browser.node_type import NodeRole, NodeType
+from notte_core.errors.base import AccessibilityTreeMissingError
+from patchright.async_api import Page
+from typing_extensions import override
+
+DELAY = 0.1
+
+
+class FakeAccessibility:
+    def __init__(self, page: "FakePage") -> None:
+        self.page: FakePage = page
+
+    async def snapshot(self, interesting_only: bool = True) -> dict[str, Any]:
+        self.page.calls.append("a11y" if interesting_only else "a11y_raw")
+        await asyncio.sleep(DELAY)
+        return {"role": "WebArea", "name": "", "children": [{"role": "button", "name": "ok"}]}
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.pages: list[FakePage] = []
+
+
+class FakePage(Page):
+    # subclass `Page` so that `BrowserResource` validation accepts it
+    def __init__(self, content_delay: float = DELAY) -> None:  # pyright: ignore[reportMissingSuperCall]
+        self.calls: list[str] = []
+        self.content_delay: float = content_delay
+        self._fake_context: FakeContext = FakeContext()
+        self._fake_context.pages.append(self)
+
+    @property
+    @override
+    def context(self) -> FakeContext:  # type: ignore[override]
+        return self._fake_context
+
+    @property
+    @override
+    def url(self) -> str:
+        return "https://example.com"
+
+    @property
+    def accessibility(self) -> FakeAccessibility:
+        return FakeAccessibility(self)
+
+    @override
+    def set_default_timeout(self, timeout: float) -> None:
+        pass
+
+    @override
+    def on(self, event: str, f: Any) -> None:  # type: ignore[override]
+        pass
+
+    @override
+    def remove_listener(self, event: Any, f: Any) -> None:
+        pass
+
+    @override
+    async def content(self) -> str:
+        self.calls.append("content")
+        await asyncio.sleep(self.content_delay)
+        return "<html></html>"
+
+    @override
+    async def screenshot(self, **kwargs: Any) -> bytes:  # type: ignore[override]
+        self.calls.append("screenshot")
+        await asyncio.sleep(DELAY)
+        return b"screenshot"
+
+    @override
+    async def title(self) -> str:
+        return "Example"
+
+    @override
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        await asyncio.sleep(DELAY)
+        return {
+            "scroll_x": 0,
+            "scroll_y": 0,
+            "viewport_width": 1280,
+            "viewport_height": 720,
+            "total_width": 1280,
+            "total_height": 2000,
+        }
+
+
+async def fake_parse_dom(page: Page, config: Any = None) -> DomNode:
+    await asyncio.sleep(DELAY)
+    return DomNode(
+        id=None,
+        role=NodeRole.WEBAREA,
+        text="",
+        type=NodeType.OTHER,
+        children=[],
+        attributes=None,
+        computed_attributes=ComputedDomAttributes(),
+    )
+
+
+def make_window(page: FakePage, snapshot: BrowserSnapshotConfig) -> BrowserWindow:
+    return BrowserWindow(
+        config=BrowserWindowConfig(snapshot=snapshot),
+        resource=BrowserResource(page=page, options=BrowserWindowOptions()),
+    )
+
+
+@pytest.fixture(autouse=True)
+def patch_dom_parsing(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ParseDomTreePipe, "forward", staticmethod(fake_parse_dom))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_snapshot_is_faster_than_sequential() -> None:
+    durations: dict[bool, float] = {}
+    for concurrent in (True, False):
+        window = make_window(FakePage(), BrowserSnapshotConfig(concurrent=concurrent))
+        start = time.time()
+        snapshot = await window.snapshot()
+        durations[concurrent] = time.time() - start
+        assert snapshot.html_content == "<html></html>"
+        assert snapshot.screenshot == b"screenshot"
+        assert snapshot.a11y_tree is not None and snapshot.a11y_tree.raw is not None
+        assert snapshot.metadata.viewport.total_height == 2000
+        assert len(snapshot.metadata.tabs) == 1
+
+    # 6 components of DELAY each: concurrent acquisition should take about one of them
+    assert durations[True] < 3 * DELAY
+    assert durations[False] >= 5 * DELAY
+
+
+@pytest.mark.asyncio
+async def test_snapshot_skips_disabled_components() -> None:
+    page = FakePage()
+    window = make_window(page, BrowserSnapshotConfig(html_content=False, raw_a11y_tree=False))
+    snapshot = await window.snapshot(screenshot=False)
+    assert page.calls == ["a11y"]
+    assert snapshot.html_content == ""
+    assert snapshot.screenshot is None
+    assert snapshot.a11y_tree is not None and snapshot.a11y_tree.raw is None
+
+
+@pytest.mark.asyncio
+async def test_snapshot_component_timeout() -> None:
+    page = FakePage(content_delay=10 * DELAY)
+    window = make_window(page, BrowserSnapshotConfig().set_timeouts(html=int(DELAY * 1000)))
+    start = time.time()
+    snapshot = await window.snapshot()
+    assert time.time() - start < 5 * DELAY
+    assert snapshot.html_content == ""
+    assert snapshot.dom_node is not None
+
+
+@pytest.mark.asyncio
+async def test_minimal_profile_fetches_skipped_components_lazily() -> None:
+    page = FakePage()
+    window = BrowserWindow(
+        config=BrowserWindowConfig().set_snapshot_profile(SnapshotProfile.MINIMAL),
+        resource=BrowserResource(page=page, options=BrowserWindowOptions()),
+    )
+    snapshot = await window.snapshot()
+    assert page.calls == []
+    assert snapshot.html_content == ""
+    assert snapshot.a11y_tree is None
+    assert snapshot.screenshot is None
+    assert not snapshot.is_loaded("html_content")
+
+    _ = await snapshot.load("html_content", "screenshot")
+    assert page.calls == ["content", "screenshot"]
+    assert snapshot.html_content == "<html></html>"
+    assert snapshot.screenshot == b"screenshot"
+    assert snapshot.is_loaded("html_content")
+    assert not snapshot.is_loaded("a11y_tree")
+
+    # loaded fields are not fetched twice
+    _ = await snapshot.load("html_content")
+    assert page.calls == ["content", "screenshot"]
+
+
+@pytest.mark.asyncio
+async def test_deferred_components_expire_with_the_page_state() -> None:
+    page = FakePage()
+    window = BrowserWindow(
+        config=BrowserWindowConfig().set_snapshot_profile(SnapshotProfile.MINIMAL),
+        resource=BrowserResource(page=page, options=BrowserWindowOptions()),
+    )
+    snapshot = await window.snapshot()
+    _ = await window.snapshot()
+    # the page may have changed since `snapshot` was taken: its deferred fields cannot be fetched anymore
+    with pytest.raises(StaleSnapshotError):
+        _ = await snapshot.load("html_content")
+
+    snapshot = await window.snapshot()
+    window.invalidate_snapshots()
+    with pytest.raises(StaleSnapshotError):
+        _ = await snapshot.with_dom_node(snapshot.dom_node).load("screenshot")
+    assert "content" not in page.calls and "screenshot" not in page.calls
+
+
+@pytest.mark.asyncio
+async def test_compare_with_requires_a11y_trees() -> None:
+    window = BrowserWindow(
+        config=BrowserWindowConfig().set_snapshot_profile(SnapshotProfile.MINIMAL),
+        resource=BrowserResource(page=FakePage(), options=BrowserWindowOptions()),
+    )
+    snapshot = await window.snapshot()
+    with pytest.raises(AccessibilityTreeMissingError):
+        _ = snapshot.compare_with(snapshot)
+    _ = await snapshot.load("a11y_tree")
+    assert snapshot.compare_with(snapshot)
@@ -0,0 +1,167 @@
+import asyncio
+import time
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+from notte_browser.stabilization import PageStabilizer
+from notte_browser.window import (
+    BrowserResource,
+    BrowserWaitConfig,
+    BrowserWindow,
+    BrowserWindowConfig,
+    BrowserWindowOptions,
+)
+from patchright.async_api import Page
+from typing_extensions import override
+
+
+class FakeRequest:
+    def __init__(self, resource_type: str = "fetch") -> None:
+        self.resource_type: str = resource_type
+
+
+class FakePage(Page):
+    # subclass `Page` so that `BrowserResource` validation accepts it
+    def __init__(self) -> None:  # pyright: ignore[reportMissingSuperCall]
+        self.listeners: dict[str, list[Callable[..., Any]]] = {}
+        self.last_mutation: float = time.perf_counter()
+        self.ready: bool = True
+        self.fixed_waits: int = 0
+
+    @property
+    @override
+    def url(self) -> str:
+        return "https://example.com"
+
+    @property
+    @override
+    def main_frame(self) -> Any:
+        return "main"
+
+    @override
+    def set_default_timeout(self, timeout: float) -> None:
+        pass
+
+    @override
+    def on(self, event: str, f: Callable[..., Any]) -> None:  # type: ignore[override]
+        self.listeners.setdefault(event, []).append(f)
+
+    @override
+    def remove_listener(self, event: Any, f: Any) -> None:
+        self.listeners[event].remove(f)
+
+    def emit(self, event: str, *args: Any) -> None:
+        for listener in self.listeners.get(event, []):
+            listener(*args)
+
+    def mutate(self) -> None:
+        self.last_mutation = time.perf_counter()
+
+    @override
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        if not self.ready:
+            return -1
+        return (time.perf_counter() - self.last_mutation) * 1000
+
+    @override
+    async def wait_for_timeout(self, timeout: float) -> None:
+        self.fixed_waits += 1
+        await asyncio.sleep(timeout / 1000)
+
+
+async def wait(page: FakePage, timeout_ms: int = 1000, **kwargs: Any) -> tuple[float, bool]:
+    stabilizer = PageStabilizer(page)
+    result = await stabilizer.wait(timeout_ms=timeout_ms, dom_quiet_ms=100, network_quiet_ms=100, **kwargs)
+    return result.elapsed_ms, result.settled
+
+
+@pytest.mark.asyncio
+async def test_quiet_page_settles_without_fixed_sleep() -> None:
+    page = FakePage()
+    page.last_mutation -= 1
+    elapsed, settled = await wait(page)
+    assert settled
+    # only the network quiet window is waited for
+    assert elapsed < 300
+
+
+@pytest.mark.asyncio
+async def test_waits_for_inflight_requests_and_dom_mutations() -> None:
+    page = FakePage()
+    stabilizer = PageStabilizer(page)
+    request = FakeRequest()
+    page.emit("request", request)
+    # long-lived connections are ignored
+    page.emit("request", FakeRequest(resource_type="websocket"))
+
+    async def finish() -> None:
+        await asyncio.sleep(0.3)
+        page.emit("requestfinished", request)
+        await asyncio.sleep(0.1)
+        page.mutate()
+
+    task = asyncio.create_task(finish())
+    result = await stabilizer.wait(timeout_ms=2000, dom_quiet_ms=100, network_quiet_ms=100)
+    await task
+    assert result.settled
+    assert result.inflight_requests == 0
+    # request finished after 300ms, last mutation at 400ms, then 100ms of quiet
+    assert 480 <= result.elapsed_ms < 1000
+
+
+@pytest.mark.asyncio
+async def test_hard_ceiling_and_tolerated_inflight_requests() -> None:
+    page = FakePage()
+    page.last_mutation -= 1
+    stabilizer = PageStabilizer(page)
+    page.emit("request", FakeRequest())
+    result = await stabilizer.wait(timeout_ms=300, dom_quiet_ms=100, network_quiet_ms=100)
+    assert not result.settled
+    assert result.inflight_requests == 1
+    assert 300 <= result.elapsed_ms < 500
+
+    result = await stabilizer.wait(timeout_ms=300, dom_quiet_ms=100, network_quiet_ms=100, max_inflight_requests=1)
+    assert result.settled
+
+
+@pytest.mark.asyncio
+async def test_navigation_resets_the_quiet_window() -> None:
+    page = FakePage()
+    page.last_mutation -= 1
+    page.ready = False
+    stabilizer = PageStabilizer(page)
+    page.emit("request", FakeRequest(resource_type="document"))
+
+    async def navigate() -> None:
+        await asyncio.sleep(0.2)
+        # requests of the previous document are dropped on navigation
+        page.emit("framenavigated", "main")
+        page.ready = True
+
+    task = asyncio.create_task(navigate())
+    result = await stabilizer.wait(timeout_ms=2000, dom_quiet_ms=100, network_quiet_ms=100)
+    await task
+    assert result.settled
+    assert result.elapsed_ms >= 300
+
+
+@pytest.mark.asyncio
+async def test_window_records_settle_time() -> None:
+    page = FakePage()
+    page.last_mutation -= 1
+    window = BrowserWindow(
+        config=BrowserWindowConfig(wait=BrowserWaitConfig.short()),
+        resource=BrowserResource(page=page, options=BrowserWindowOptions()),
+    )
+    await window.short_wait()
+    await window.short_wait()
+    assert page.fixed_waits == 0
+    settle_time = window.pop_settle_time()
+    # the second wait returns immediately: the page is still settled
+    assert 100 <= settle_time < window.config.wait.short_wait
+    assert window.pop_settle_time() == 0.0
+
+    window.config = window.config.set_wait(window.config.wait.set_stabilize(False))
+    await window.short_wait()
+    assert page.fixed_waits == 1
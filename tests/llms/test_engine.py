@@ -1,8 +1,9 @@
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from litellm import Message
 from notte_core.llms.engine import LLMEngine, StructuredContent
+from pydantic import BaseModel
 
 
 @pytest.fixture
@@ -39,6 +40,56 @@ def test_completion_error(llm_engine: LLMEngine) -> None:
         assert "API Error" in str(exc_info.value)
 
 
+@pytest.mark.asyncio
+async def test_acompletion_success(llm_engine: LLMEngine) -> None:
+    messages = [
+        Message(role="user", content="Hello"),
+    ]
+    model = "gpt-3.5-turbo"
+
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=Mock(content="Hello there!"))]
+
+    with patch("litellm.acompletion", new=AsyncMock(return_value=mock_response)):
+        response = await llm_engine.acompletion(messages=messages, model=model)
+
+        assert response == mock_response
+        assert response.choices[0].message.content == "Hello there!"
+
+
+@pytest.mark.asyncio
+async def test_acompletion_error(llm_engine: LLMEngine) -> None:
+    messages = [
+        Message(role="user", content="Hello"),
+    ]
+    model = "gpt-3.5-turbo"
+
+    with patch("litellm.acompletion", new=AsyncMock(side_effect=Exception("API Error"))):
+        with pytest.raises(ValueError) as exc_info:
+            _ = await llm_engine.acompletion(messages=messages, model=model)
+
+        assert "API Error" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_astructured_completion_retries_on_invalid_json() -> None:
+    class Answer(BaseModel):
+        value: int
+
+    llm_engine = LLMEngine(structured_output_retries=1)
+    messages = [
+        Message(role="user", content="Hello"),
+    ]
+    invalid, valid = Mock(), Mock()
+    invalid.choices = [Mock(message=Mock(content="not json"))]
+    valid.choices = [Mock(message=Mock(content='{"value": 3}'))]
+
+    with patch("litellm.acompletion", new=AsyncMock(side_effect=[invalid, valid])):
+        answer = await llm_engine.astructured_completion(messages=messages, response_format=Answer)  # type: ignore[arg-type]
+
+    assert answer == Answer(value=3)
+
+
 class TestStructuredContent:
     def test_extract_with_outer_tag(self):
         structure = StructuredContent(outer_tag="response")
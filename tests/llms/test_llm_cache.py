@@ -0,0 +1,106 @@
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from litellm import AllMessageValues, ChatCompletionUserMessage, ModelResponse
+from notte_core.common.tracer import LlmUsageDictTracer
+from notte_core.errors.llm import LLMCacheMissError
+from notte_core.llms.cache import LlmCacheBackend, LlmCacheConfig, LlmResponseCache
+from notte_core.llms.engine import LLMEngine
+from notte_core.llms.service import LLMService
+
+MODEL = "gpt-3.5-turbo"
+
+
+def model_response(content: str) -> ModelResponse:
+    return ModelResponse(
+        id="mock-id",
+        choices=[{"message": {"content": content, "role": "assistant"}, "index": 0, "finish_reason": "stop"}],
+        created=1234567890,
+        model=MODEL,
+        usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    )
+
+
+def messages(content: str = "Hello") -> list[AllMessageValues]:
+    return [ChatCompletionUserMessage(role="user", content=content)]
+
+
+@pytest.fixture(params=list(LlmCacheBackend))
+def cache_config(request: pytest.FixtureRequest, tmp_path: Path) -> LlmCacheConfig:
+    backend: LlmCacheBackend = request.param
+    path = {
+        LlmCacheBackend.MEMORY: None,
+        LlmCacheBackend.SQLITE: str(tmp_path / "llm_cache.db"),
+        LlmCacheBackend.DIRECTORY: str(tmp_path / "llm_cache"),
+    }[backend]
+    return LlmCacheConfig(backend=backend, path=path)
+
+
+def test_cached_completion_is_traced_as_cached(cache_config: LlmCacheConfig) -> None:
+    tracer = LlmUsageDictTracer()
+    engine = LLMEngine(tracer=tracer, cache=LlmResponseCache(cache_config))
+    with patch("litellm.completion", return_value=model_response("Hello there!")) as completion:
+        first = engine.completion(messages=messages(), model=MODEL)
+        second = engine.completion(messages=messages(), model=MODEL)
+        # different messages / temperature are different requests
+        _ = engine.completion(messages=messages("Bye"), model=MODEL)
+        _ = engine.completion(messages=messages(), model=MODEL, temperature=0.5)
+    assert completion.call_count == 3
+    assert second.choices[0].message.content == first.choices[0].message.content  # type: ignore[union-attr]
+
+    usages = [usage.usage["total_tokens"] for usage in tracer.usage]
+    assert usages == [15, 0, 15, 15]
+    assert tracer.usage[1].metadata == {
+        "cached": True,
+        "cached_usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }
+
+
+@pytest.mark.asyncio
+async def test_cache_replay_mode(cache_config: LlmCacheConfig) -> None:
+    engine = LLMEngine(cache=LlmResponseCache(cache_config))
+    with patch("litellm.acompletion", new=AsyncMock(return_value=model_response("recorded"))):
+        _ = await engine.acompletion(messages=messages(), model=MODEL)
+
+    replay = LLMEngine(cache=LlmResponseCache(cache_config.set_replay()))
+    if cache_config.backend == LlmCacheBackend.MEMORY:
+        # memory caches are not shared between instances
+        replay.cache = engine.cache
+        replay.cache.config = cache_config.set_replay()  # type: ignore[union-attr]
+    with patch("litellm.acompletion", new=AsyncMock(side_effect=Exception("offline"))):
+        response = await replay.acompletion(messages=messages(), model=MODEL)
+        assert response.choices[0].message.content == "recorded"  # type: ignore[union-attr]
+        with pytest.raises(LLMCacheMissError):
+            _ = await replay.acompletion(messages=messages("unknown"), model=MODEL)
+
+
+def test_cache_ttl_and_max_entries(cache_config: LlmCacheConfig) -> None:
+    cache = LlmResponseCache(cache_config.set_max_entries(2))
+    keys = [LlmResponseCache.key(MODEL, messages(str(i)), temperature=0.0) for i in range(3)]
+    for key in keys:
+        cache.set(key, model_response(key))
+    assert cache.get(keys[0], MODEL) is None
+    assert cache.get(keys[2], MODEL) is not None
+
+    cache.config = cache_config.set_ttl_seconds(0.0)
+    assert cache.get(keys[2], MODEL) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cached_responses_are_not_logged_to_the_router(cache_config: LlmCacheConfig) -> None:
+    logged: list[tuple[int, str]] = []
+
+    class FakeRouter:
+        def log(self, tokens: int, endpoint_id: str) -> None:
+            logged.append((tokens, endpoint_id))
+
+    cache = LlmResponseCache(cache_config)
+    service = LLMService(base_model=MODEL, cache=cache)
+    service.router = FakeRouter()  # type: ignore[assignment]
+    key = LlmResponseCache.key(MODEL, messages(), temperature=0.0)
+    response = model_response("Hello there!")
+    cache.set(key, response)
+    service._log_router_usage(response, "endpoint")  # pyright: ignore[reportPrivateUsage]
+    service._log_router_usage(cache.get(key, MODEL), "endpoint")  # type: ignore[arg-type]  # pyright: ignore[reportPrivateUsage]
+    assert logged == [(15, "endpoint")]
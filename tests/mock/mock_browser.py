@@ -165,6 +165,10 @@ class MockBrowserDriver(AsyncResource):
         """Mock browser reset"""
         pass
 
+    def pop_settle_time(self) -> float:
+        """Mock pages are always settled"""
+        return 0.0
+
     async def press(self, key: str = "Enter") -> BrowserSnapshot:
         """Mock key press action"""
         return self._mock_snapshot
@@ -16,6 +16,14 @@ class MockLLMService(LLMService):
         self.tokenizer = tiktoken.encoding_for_model("gpt-4o")
         self.base_model: str = LlmModel.default()
 
+    @override
+    async def acompletion(
+        self,
+        prompt_id: str,
+        variables: dict[str, Any] | None = None,
+    ) -> ModelResponse:
+        return self.completion(prompt_id, variables)
+
     @override
     def completion(
         self,
@@ -0,0 +1,168 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from notte_browser.tagging.action.cache import (
+    ActionListingCache,
+    ActionListingCacheConfig,
+    CachedActionListingPipe,
+)
+from notte_browser.tagging.action.llm_taging.base import BaseActionListingPipe
+from notte_core.actions.base import Action, PossibleAction
+from notte_core.actions.space import PossibleActionSpace
+from notte_core.browser.dom_tree import ComputedDomAttributes, DomNode
+from notte_core.browser.node_type import NodeRole, NodeType
+from notte_core.browser.snapshot import BrowserSnapshot, SnapshotMetadata, ViewportData
+from typing_extensions import override
+
+from tests.mock.mock_service import MockLLMService
+
+
+class CountingListingPipe(BaseActionListingPipe):
+    def __init__(self) -> None:
+        super().__init__(MockLLMService(mock_response=""))
+        self.calls: int = 0
+
+    def space(self, snapshot: BrowserSnapshot) -> PossibleActionSpace:
+        self.calls += 1
+        return PossibleActionSpace(
+            description="listing",
+            actions=[
+                PossibleAction(id=node.id, description=f"click {node.text}", category="nav", params=[])
+                for node in snapshot.interaction_nodes()
+            ],
+        )
+
+    @override
+    def forward(
+        self, snapshot: BrowserSnapshot, previous_action_list: list[Action] | None = None
+    ) -> PossibleActionSpace:
+        return self.space(snapshot)
+
+    @override
+    def forward_incremental(self, snapshot: BrowserSnapshot, previous_action_list: list[Action]) -> PossibleActionSpace:
+        return self.space(snapshot)
+
+
+def snapshot_from_links(texts: list[str], url: str = "https://www.example.com/search") -> BrowserSnapshot:
+    return BrowserSnapshot(
+        metadata=SnapshotMetadata(
+            title="",
+            url=url,
+            viewport=ViewportData(
+                viewport_width=1000,
+                viewport_height=1000,
+                scroll_x=0,
+                scroll_y=0,
+                total_width=1000,
+                total_height=1000,
+            ),
+            tabs=[],
+        ),
+        dom_node=DomNode(
+            id=None,
+            role=NodeRole.WEBAREA,
+            text="",
+            type=NodeType.OTHER,
+            attributes=None,
+            computed_attributes=ComputedDomAttributes(),
+            children=[
+                DomNode(
+                    id=f"L{i + 1}",
+                    role=NodeRole.LINK,
+                    text=text,
+                    type=NodeType.INTERACTION,
+                    children=[],
+                    attributes=None,
+                    computed_attributes=ComputedDomAttributes(),
+                )
+                for i, text in enumerate(texts)
+            ],
+        ),
+    )
+
+
+def make_pipe(config: ActionListingCacheConfig) -> tuple[CachedActionListingPipe, CountingListingPipe]:
+    inner = CountingListingPipe()
+    return CachedActionListingPipe(pipe=inner, cache=ActionListingCache(config)), inner
+
+
+def test_cache_hits_on_same_page_structure() -> None:
+    pipe, inner = make_pipe(ActionListingCacheConfig(enabled=True))
+    space = pipe.forward(snapshot_from_links(["Home", "Page 2"]))
+    # whitespace, case and page numbers do not change the fingerprint
+    cached = pipe.forward(snapshot_from_links(["home ", "Page  3"]))
+    assert inner.calls == 1
+    assert cached == space
+
+    _ = pipe.forward(snapshot_from_links(["Home", "About"]))
+    _ = pipe.forward(snapshot_from_links(["Home", "Page 2"], url="https://other.com"))
+    assert inner.calls == 3
+    assert pipe.cache.stats.hits == 1
+    assert pipe.cache.stats.misses == 3
+    assert pipe.cache.stats.hit_rate == 0.25
+
+    # incremental listings bypass the cache
+    previous = [Action(id="L1", description="click home", category="nav", params=[], status="valid")]
+    _ = pipe.forward(snapshot_from_links(["Home", "Page 2"]), previous_action_list=previous)
+    assert inner.calls == 4
+
+
+def test_cache_expires_entries() -> None:
+    pipe, inner = make_pipe(ActionListingCacheConfig(enabled=True, ttl_seconds=0.01))
+    _ = pipe.forward(snapshot_from_links(["Home"]))
+    time.sleep(0.02)
+    _ = pipe.forward(snapshot_from_links(["Home"]))
+    assert inner.calls == 2
+    assert pipe.cache.stats.expired == 1
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_cache_caps_entries_per_domain(tmp_path: Path, on_disk: bool) -> None:
+    path = str(tmp_path / "listing.db") if on_disk else None
+    pipe, inner = make_pipe(ActionListingCacheConfig(enabled=True, max_entries_per_domain=2, path=path))
+    for text in ["a", "b", "c"]:
+        _ = pipe.forward(snapshot_from_links([text]))
+    _ = pipe.forward(snapshot_from_links(["a"], url="https://other.com"))
+    assert pipe.cache.stats.evictions == 1
+    # the oldest entry of the domain was evicted, the other domain is unaffected
+    _ = pipe.forward(snapshot_from_links(["a"]))
+    _ = pipe.forward(snapshot_from_links(["c"]))
+    _ = pipe.forward(snapshot_from_links(["a"], url="https://other.com"))
+    assert inner.calls == 5
+
+
+@pytest.mark.asyncio
+async def test_cache_persists_on_disk(tmp_path: Path) -> None:
+    config = ActionListingCacheConfig(enabled=True, path=str(tmp_path / "listing.db"))
+    pipe, inner = make_pipe(config)
+    space = await pipe.forward_async(snapshot_from_links(["Home", "About"]))
+    pipe.cache.close()
+
+    # a new process / session reads the listing back from sqlite
+    pipe, inner = make_pipe(config)
+    assert await pipe.forward_async(snapshot_from_links(["Home", "About"])) == space
+    assert inner.calls == 0
+    assert pipe.cache.stats.disk_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_async_cache_access_runs_off_the_event_loop(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pipe, _ = make_pipe(ActionListingCacheConfig(enabled=True, path=str(tmp_path / "listing.db")))
+    threads: list[threading.Thread] = []
+    get, set_ = pipe.cache.get, pipe.cache.set
+
+    def recording_get(key: str) -> PossibleActionSpace | None:
+        threads.append(threading.current_thread())
+        return get(key)
+
+    def recording_set(key: str, url: str, space: PossibleActionSpace) -> None:
+        threads.append(threading.current_thread())
+        set_(key, url, space)
+
+    monkeypatch.setattr(pipe.cache, "get", recording_get)
+    monkeypatch.setattr(pipe.cache, "set", recording_set)
+    _ = await pipe.forward_async(snapshot_from_links(["Home"]))
+    assert len(threads) == 2
+    assert all(thread is not threading.main_thread() for thread in threads)
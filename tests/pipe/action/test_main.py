@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import Sequence
 from typing import Callable
 from unittest.mock import patch
@@ -219,3 +220,31 @@ def test_context_inodes_empty_previous_returns_llms(
     ):
         space = pipe.forward(context, previous_actions, pagination=PaginationParams())
         assert space_to_ids(space) == ["B1"]
+
+
+@pytest.mark.asyncio
+async def test_large_pages_are_listed_in_concurrent_chunks() -> None:
+    config = LlmActionSpaceConfig(required_action_coverage=1.0, doc_categorisation=False, max_nodes_per_chunk=10)
+    pipe = LlmActionSpacePipe(llmserve=MockLLMService(mock_response=""), config=config)
+    ids = [f"L{i}" for i in range(1, 26)]
+    chunks: list[list[str]] = []
+    active = {"current": 0, "max": 0}
+
+    async def list_chunk(snapshot: BrowserSnapshot, previous_action_list: list[Action] | None) -> PossibleActionSpace:
+        chunk = [node.id for node in snapshot.interaction_nodes()]
+        chunks.append(chunk)
+        active["current"] += 1
+        active["max"] = max(active["max"], active["current"])
+        await asyncio.sleep(0.01)
+        active["current"] -= 1
+        return PossibleActionSpace(description="", actions=actions_from_ids(chunk))
+
+    with patch(
+        "notte_browser.tagging.action.llm_taging.listing.ActionListingPipe.forward_async",
+        side_effect=list_chunk,
+    ):
+        space = await pipe.forward_async(context_from_ids(ids), [], pagination=PaginationParams())
+    # 3 disjoint chunks of the page, in DOM order, listed at the same time
+    assert chunks == [ids[:9], ids[9:18], ids[18:]]
+    assert active["max"] == 3
+    assert space_to_ids(space) == ids
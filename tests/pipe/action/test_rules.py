@@ -0,0 +1,115 @@
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from notte_browser.dom.builder import DomTreeBuilder
+from notte_browser.tagging.action.cache import ActionListingCache, ActionListingCacheConfig
+from notte_browser.tagging.action.llm_taging.listing import ActionListingConfig
+from notte_browser.tagging.action.llm_taging.pipe import LlmActionSpaceConfig, LlmActionSpacePipe
+from notte_browser.tagging.action.llm_taging.rules import RuleBasedActionListingPipe, is_descriptive
+from notte_core.actions.base import Action
+from notte_core.actions.space import PossibleActionSpace
+from notte_core.browser.snapshot import BrowserSnapshot
+from notte_sdk.types import PaginationParams
+
+from tests.browser.test_incremental_dom import element, text
+from tests.mock.mock_service import MockLLMService
+from tests.pipe.action.test_main import actions_from_ids, context_from_ids
+
+
+def node(tag: str, xpath: str, children: list[Any] | None = None, **attributes: str) -> Any:
+    payload = element(0, tag, xpath, children, interactive=True)
+    payload["attributes"] = attributes
+    return payload
+
+
+def page() -> BrowserSnapshot:
+    root = DomTreeBuilder("https://example.com").build(
+        element(
+            1,
+            "body",
+            "html/body",
+            [
+                node("a", "html/body/a[1]", [text("Pricing")], href="/pricing"),
+                node("a", "html/body/a[2]", [text("Read more")], href="/blog"),
+                node("button", "html/body/button[1]", [text("Sign in")], type="button"),
+                node("button", "html/body/button[2]", type="button", **{"class": "icon"}),
+                node("input", "html/body/input[1]", type="text", placeholder="Email address"),
+                node("input", "html/body/input[2]", type="text", name="q"),
+                node("select", "html/body/select", [node("option", "html/body/select/option", [text("EUR")])]),
+            ],
+        )
+    )
+    return context_from_ids([]).with_dom_node(root)
+
+
+def test_is_descriptive() -> None:
+    for name in ["Sign in", "Email address", "Add to cart"]:
+        assert is_descriptive(name)
+    for name in [None, "", "x", "→", "Read more", "https://example.com", "/pricing", "search_query", "btn-primary"]:
+        assert not is_descriptive(name)
+
+
+def test_rule_based_actions() -> None:
+    actions = RuleBasedActionListingPipe.forward(page())
+    assert [(action.id, action.description, [p.name for p in action.params]) for action in actions] == [
+        ("L1", "Open 'Pricing'", []),
+        ("B1", "Click the 'Sign in' button", []),
+        ("I1", "Fill the 'Email address' field", ["email_address"]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_only_ambiguous_nodes_are_sent_to_the_llm() -> None:
+    config = LlmActionSpaceConfig(required_action_coverage=0.0, doc_categorisation=False, rule_based_listing=True)
+    pipe = LlmActionSpacePipe(llmserve=MockLLMService(mock_response=""), config=config)
+    sent: list[list[str]] = []
+
+    async def list_incremental(snapshot: BrowserSnapshot, previous_action_list: list[Action]) -> PossibleActionSpace:
+        assert [action.id for action in previous_action_list] == ["L1", "B1", "I1"]
+        remaining = snapshot.subgraph_without(previous_action_list)
+        assert remaining is not None
+        sent.append([inode.id for inode in remaining.interaction_nodes()])
+        return PossibleActionSpace(description="A page", actions=actions_from_ids(sent[-1]))
+
+    with patch(
+        "notte_browser.tagging.action.llm_taging.listing.ActionListingPipe.forward_incremental_async",
+        side_effect=list_incremental,
+    ):
+        space = await pipe.forward_async(page(), [], pagination=PaginationParams())
+    assert sent == [["L2", "B2", "I2", "I3", "O1"]]
+    assert {action.id for action in space.actions("valid")} == {"L1", "L2", "B1", "B2", "I1", "I2", "I3", "O1"}
+
+
+@pytest.mark.asyncio
+async def test_rule_based_listings_are_cached(tmp_path: Path) -> None:
+    cache = ActionListingCacheConfig(enabled=True, path=str(tmp_path / "listing.db"))
+    config = LlmActionSpaceConfig(
+        listing=ActionListingConfig().set_cache(cache),
+        required_action_coverage=0.0,
+        doc_categorisation=False,
+        rule_based_listing=True,
+    )
+    pipe = LlmActionSpacePipe(llmserve=MockLLMService(mock_response=""), config=config)
+    nb_calls = 0
+
+    async def list_incremental(snapshot: BrowserSnapshot, previous_action_list: list[Action]) -> PossibleActionSpace:
+        nonlocal nb_calls
+        nb_calls += 1
+        remaining = snapshot.subgraph_without(previous_action_list)
+        assert remaining is not None
+        return PossibleActionSpace(
+            description="A page", actions=actions_from_ids([inode.id for inode in remaining.interaction_nodes()])
+        )
+
+    with patch(
+        "notte_browser.tagging.action.llm_taging.listing.ActionListingPipe.forward_incremental_async",
+        side_effect=list_incremental,
+    ):
+        first = await pipe.forward_async(page(), [], pagination=PaginationParams())
+        second = await pipe.forward_async(page(), [], pagination=PaginationParams())
+    # the previous action list only holds the rule-based actions of the page: the LLM listing is served from the cache
+    assert nb_calls == 1
+    assert ActionListingCache.shared(cache).stats.hits == 1
+    assert {action.id for action in second.actions("valid")} == {action.id for action in first.actions("valid")}
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from notte_browser.scraping.pipe import DataScrapingPipe, ScrapingType
+from notte_core.data.space import ImageData, StructuredData
+from notte_sdk.types import ScrapeParams
+
+
+class FakeImagePipe:
+    def __init__(self, delay: float, fail: bool = False) -> None:
+        self.delay: float = delay
+        self.fail: bool = fail
+        self.cancelled: bool = False
+
+    async def forward(self, window: Any, snapshot: Any) -> list[ImageData]:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise ValueError("image scraping failed")
+        return [ImageData(url="https://example.com/image.png")]
+
+
+class FakeSchemaPipe:
+    def __init__(self, delay: float) -> None:
+        self.delay: float = delay
+        self.documents: list[str] = []
+
+    async def forward_async(self, document: str, **kwargs: Any) -> StructuredData[Any]:
+        self.documents.append(document)
+        await asyncio.sleep(self.delay)
+        return StructuredData(success=False, error="no data")
+
+
+def make_pipe(markdown_delay: float, images: FakeImagePipe, fail_markdown: bool = False) -> DataScrapingPipe:
+    pipe = DataScrapingPipe(llmserve=None, type=ScrapingType.MARKDOWNIFY)  # type: ignore[arg-type]
+    pipe.image_pipe = images  # type: ignore[assignment]
+    pipe.schema_pipe = FakeSchemaPipe(delay=0.2)  # type: ignore[assignment]
+
+    async def scrape_markdown(window: Any, snapshot: Any, params: Any) -> str:
+        await asyncio.sleep(markdown_delay)
+        if fail_markdown:
+            raise RuntimeError("markdown scraping failed")
+        return "# page"
+
+    pipe.scrape_markdown = scrape_markdown  # type: ignore[method-assign]
+    return pipe
+
+
+PARAMS = ScrapeParams(scrape_images=True, instructions="extract the title")
+SNAPSHOT: Any = SimpleNamespace(metadata=SimpleNamespace(url="https://example.com"))
+
+
+@pytest.mark.asyncio
+async def test_scraping_stages_run_concurrently() -> None:
+    images = FakeImagePipe(delay=0.3)
+    pipe = make_pipe(markdown_delay=0.1, images=images)
+    start = asyncio.get_running_loop().time()
+    data = await pipe.forward(None, SNAPSHOT, PARAMS)  # type: ignore[arg-type]
+    elapsed = asyncio.get_running_loop().time() - start
+    # markdown (0.1s) then structured (0.2s), while the images are scraped (0.3s)
+    assert elapsed < 0.45
+    assert data.markdown == "# page" and data.images is not None and data.structured is not None
+    assert pipe.schema_pipe.documents == ["# page"]  # type: ignore[attr-defined]
+    assert data.timings is not None and set(data.timings) == {"markdown", "images", "structured"}
+    assert data.timings["images"] >= 300 and 100 <= data.timings["markdown"] < 300
+
+
+@pytest.mark.asyncio
+async def test_failed_stage_cancels_the_other_ones() -> None:
+    images = FakeImagePipe(delay=1)
+    with pytest.raises(RuntimeError, match="markdown scraping failed") as error:
+        _ = await make_pipe(markdown_delay=0.05, images=images, fail_markdown=True).forward(None, SNAPSHOT, PARAMS)  # type: ignore[arg-type]
+    assert images.cancelled
+    # the task group error is kept as the cause
+    assert isinstance(error.value.__cause__, BaseExceptionGroup)
+
+    with pytest.raises(ValueError, match="image scraping failed"):
+        _ = await make_pipe(markdown_delay=1, images=FakeImagePipe(delay=0.05, fail=True)).forward(
+            None, SNAPSHOT, PARAMS
+        )  # type: ignore[arg-type]
@@ -0,0 +1,117 @@
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from notte_browser.dom.builder import DomTreeBuilder
+from notte_browser.scraping import images
+from notte_browser.scraping.images import IMAGE_ELEMENTS_JS, ImageElementDict, ImageScrapingPipe
+from notte_core.browser.dom_tree import ComputedDomAttributes, InteractionDomNode
+from notte_core.browser.node_type import NodeRole, NodeType
+from notte_core.data.space import ImageCategory
+
+from tests.browser.test_incremental_dom import element
+
+URL = "https://example.com"
+
+
+def image(tag: str, xpath: str, **attributes: str) -> Any:
+    node = element(0, tag, xpath)
+    node["attributes"] = attributes
+    return node
+
+
+def properties(tag_name: str, width: float, height: float, **overrides: Any) -> ImageElementDict:
+    return {  # pyright: ignore[reportReturnType]
+        "tagName": tag_name,
+        "role": None,
+        "ariaHidden": None,
+        "ariaLabel": None,
+        "alt": "a picture",
+        "classes": "",
+        "width": width,
+        "height": height,
+        "sources": [None, None, None, None],
+        "svgContent": "<svg></svg>" if tag_name == "svg" else None,
+        **overrides,
+    }
+
+
+class FakePage:
+    def __init__(self, elements: dict[str, ImageElementDict]) -> None:
+        self.elements: dict[str, ImageElementDict] = elements
+        self.calls: list[Any] = []
+
+    async def evaluate(self, expression: str, xpaths: list[str | None]) -> Any:
+        assert expression == IMAGE_ELEMENTS_JS
+        self.calls.append(xpaths)
+        return [self.elements.get(xpath) if xpath is not None else None for xpath in xpaths]
+
+
+@pytest.mark.asyncio
+async def test_images_are_read_with_a_single_evaluate(monkeypatch: pytest.MonkeyPatch) -> None:
+    tree = element(
+        1,
+        "body",
+        "html/body",
+        [
+            image("img", "html/body/img[1]", src="/photo.png"),
+            image("img", "html/body/img[2]"),
+            image("svg", "html/body/svg[1]", role="img"),
+            image("svg", "html/body/svg[2]", role="img"),
+            image("img", "html/body/img[3]", src="/missing.png"),
+        ],
+    )
+    page = FakePage(
+        {
+            "html/body/img[1]": properties("img", 640, 480),
+            "html/body/img[2]": properties("img", 32, 32, sources=[None, "/lazy.png", None, None]),
+            "html/body/svg[1]": properties("svg", 16, 16),
+            "html/body/svg[2]": properties("svg", 300, 200),
+        }
+    )
+    located: list[str | None] = []
+
+    async def resolve_image_conflict(page: Any, node: Any, image_node: Any) -> None:
+        located.append(image_node.computed_attributes.selectors.xpath_selector)
+
+    monkeypatch.setattr(images, "resolve_image_conflict", resolve_image_conflict)
+    window: Any = SimpleNamespace(page=page)
+    snapshot: Any = SimpleNamespace(
+        dom_node=DomTreeBuilder(URL).build(tree), metadata=SimpleNamespace(url=URL), clean_url="example.com"
+    )
+    scraped = await ImageScrapingPipe().forward(window, snapshot)
+
+    assert len(page.calls) == 1
+    # only the image that could not be read is located (and skipped: there is no locator in this test)
+    assert located == ["html/body/img[3]"]
+    assert [(image.category, image.url) for image in scraped[1:]] == [
+        (ImageCategory.CONTENT_IMAGE, f"{URL}/photo.png"),
+        (ImageCategory.ICON, f"{URL}/lazy.png"),
+        (ImageCategory.SVG_ICON, None),
+        (ImageCategory.SVG_CONTENT, "<svg></svg>"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_image_without_selectors_is_located_by_role() -> None:
+    locator = object()
+
+    async def all_locators() -> list[Any]:
+        return [locator]
+
+    page: Any = SimpleNamespace(get_by_role=lambda role, name=None: SimpleNamespace(all=all_locators))  # pyright: ignore[reportUnknownLambdaType]
+    image_node = InteractionDomNode(
+        id="image_0",
+        type=NodeType.INTERACTION,
+        role=NodeRole.IMG,
+        text="a picture",
+        children=[],
+        attributes=None,
+        computed_attributes=ComputedDomAttributes(),
+    )
+    assert (
+        await images.resolve_image_conflict(
+            page, DomTreeBuilder(URL).build(element(1, "body", "html/body")), image_node
+        )
+        is locator
+    )
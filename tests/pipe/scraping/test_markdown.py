@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import markdownify  # type: ignore[import]
+import pytest
+from notte_browser.scraping.markdown import MarkdownifyScrapingPipe, markdownify_html, stream_markdown
+
+HTML = """
+<html><body>
+  <!-- comment -->
+  <div>
+    <h1>Title</h1>
+    <div><p>First <b>paragraph</b> with a <a href="https://example.com">link</a></p>text after</div>
+    <section>
+      <ul><li>one</li><li>two</li></ul>
+      <pre>
+code
+  block</pre>
+      <div>
+      </div>
+      <table><tr><th>a</th><td>b</td></tr></table>
+    </section>
+    inline <img src="image.png" alt="image"><br>end
+  </div>
+  <blockquote>quote</blockquote><hr>
+</body></html>
+"""
+
+
+def test_stream_markdown_matches_markdownify() -> None:
+    for strip in [None, ["a", "img"]]:
+        chunks = list(stream_markdown(HTML, strip=strip))
+        assert len(chunks) > 5
+        assert "".join(chunks) == markdownify.markdownify(HTML, strip=strip)  # type: ignore[attr-defined]
+
+
+def test_markdownify_html_max_length() -> None:
+    html = "".join(f"<p>paragraph {i}</p>" for i in range(1000))
+    assert markdownify_html(html) == markdownify.markdownify(html)  # type: ignore[attr-defined]
+    content = markdownify_html(html, max_length=100)
+    assert len(content) == 100 and markdownify.markdownify(html).startswith(content)  # type: ignore[attr-defined]
+
+
+class FakeFrame:
+    def __init__(self, url: str, html: str) -> None:
+        self.url: str = url
+        self.html: str = html
+        self.started: bool = False
+
+    async def content(self) -> str:
+        self.started = True
+        await asyncio.sleep(0.05)
+        return self.html
+
+
+@pytest.mark.asyncio
+async def test_markdownify_pipe_fetches_iframes_concurrently() -> None:
+    frames = [FakeFrame(f"https://frame{i}.com", f"<p>frame {i}</p>") for i in range(5)]
+    page = SimpleNamespace(url="https://example.com", frames=[SimpleNamespace(url="https://example.com"), *frames])
+    window: Any = SimpleNamespace(page=page)
+    snapshot: Any = SimpleNamespace(html_content="<h1>Title</h1><p>content</p>")
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    content = await MarkdownifyScrapingPipe.forward(
+        window, snapshot, only_main_content=False, scrape_links=True, scrape_images=True
+    )
+    assert loop.time() - start < 0.2
+    assert content.startswith("\n\nTitle\n=====\n\ncontent\n\n")
+    assert all(f"IFRAME https://frame{i}.com:\n\n\nframe {i}\n\n" in content for i in range(5))
+
+    for max_length, nb_iframes in [(40, 0), (70, 1)]:
+        content = await MarkdownifyScrapingPipe.forward(
+            window, snapshot, only_main_content=False, scrape_links=True, scrape_images=True, max_length=max_length
+        )
+        assert len(content) <= max_length and content.count("IFRAME") == nb_iframes
@@ -0,0 +1,119 @@
+import asyncio
+from typing import Any
+
+import pytest
+from notte_browser.scraping.schema import SchemaScrapingPipe, merge_structured_data, split_markdown
+from notte_core.data.space import DictBaseModel, StructuredData
+from pydantic import BaseModel
+
+
+def count_tokens(text: str) -> int:
+    return len(text.split())
+
+
+TABLE = "| name | price |\n| --- | --- |\n" + "".join(f"| product {i} | {i} $ |\n" for i in range(30))
+DOCUMENT = (
+    "# Catalog\n\nSome introduction about the catalog.\n\n"
+    + "## Products\n\n"
+    + TABLE
+    + "\n## Reviews\n\n"
+    + "".join(f"- review {i}: great product\n" for i in range(20))
+)
+
+
+def test_split_markdown_on_structural_boundaries() -> None:
+    chunks = split_markdown(DOCUMENT, max_tokens=40, count_tokens=count_tokens)
+    assert len(chunks) > 3
+    assert all(count_tokens(chunk) <= 40 for chunk in chunks)
+    # chunks starting in the middle of the table repeat its header
+    header = "| name | price |\n| --- | --- |\n"
+    table_chunks = [chunk for chunk in chunks if "| product" in chunk]
+    assert len(table_chunks) > 1 and all(chunk.startswith(header) for chunk in table_chunks[1:])
+    # nothing is lost
+    assert "".join(chunk.replace(header, "") for chunk in chunks) == DOCUMENT.replace(header, "")
+    assert all(line.startswith(("|", "- ", "#", "\n", "Some")) for chunk in chunks for line in chunk.splitlines(True))
+    # blocks larger than the chunks are split as well
+    assert all(count_tokens(chunk) <= 3 for chunk in split_markdown("a b c d e f g h", 3, count_tokens))
+
+
+def test_merge_structured_data() -> None:
+    responses: list[StructuredData[DictBaseModel]] = [
+        StructuredData(data=DictBaseModel({"title": "Catalog", "products": [{"name": "a"}, {"name": "b"}]})),
+        StructuredData(success=False, error="no product in this chunk"),
+        StructuredData(data=DictBaseModel({"title": None, "products": [{"name": "b"}, {"name": "c"}]})),
+    ]
+    merged = merge_structured_data(responses)
+    assert merged.success and merged.data is not None
+    assert merged.data.root == {"title": "Catalog", "products": [{"name": "a"}, {"name": "b"}, {"name": "c"}]}
+    assert merge_structured_data(responses[1:2]).error == "no product in this chunk"
+
+
+class Product(BaseModel):
+    name: str
+    price: int
+
+
+class Products(BaseModel):
+    products: list[Product]
+
+
+class FakeLLMService:
+    def __init__(self, failing: str | None = None) -> None:
+        self.active: int = 0
+        self.max_active: int = 0
+        # the extraction of the chunks containing `failing` raises
+        self.failing: str | None = failing
+
+    def context_length(self) -> int:
+        return 10_000
+
+    def estimate_tokens(self, text: str) -> int:
+        return count_tokens(text)
+
+    def structured_completion(self, prompt_id: str, response_format: Any, variables: dict[str, Any]) -> Any:
+        if self.failing is not None and self.failing in variables["content"]:
+            raise RuntimeError("LLM call failed")
+        products = [
+            {"name": line.split("|")[1].strip(), "price": int(line.split("|")[2].split()[0])}
+            for line in variables["content"].splitlines()
+            if line.startswith("| product")
+        ]
+        return StructuredData(data=DictBaseModel({"products": products}))
+
+    async def astructured_completion(self, prompt_id: str, response_format: Any, variables: dict[str, Any]) -> Any:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return self.structured_completion(prompt_id, response_format, variables)
+
+
+@pytest.mark.asyncio
+async def test_chunked_extraction_is_complete() -> None:
+    llmserve = FakeLLMService()
+    pipe = SchemaScrapingPipe(llmserve=llmserve, chunk_tokens=40)  # type: ignore[arg-type]
+    result = await pipe.forward_async(
+        url="https://example.com", document=DOCUMENT, response_format=Products, instructions=None
+    )
+    assert llmserve.max_active > 1
+    assert isinstance(result.data, Products)
+    assert [product.price for product in result.data.products] == list(range(30))
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_does_not_lose_the_other_ones() -> None:
+    pipe = SchemaScrapingPipe(llmserve=FakeLLMService(failing="product 0 "), chunk_tokens=40)  # type: ignore[arg-type]
+    kwargs: dict[str, Any] = dict(
+        url="https://example.com", document=DOCUMENT, response_format=Products, instructions=None
+    )
+    for result in [await pipe.forward_async(**kwargs), pipe.forward(**kwargs)]:
+        assert isinstance(result.data, Products)
+        prices = [product.price for product in result.data.products]
+        assert 0 not in prices and 29 in prices
+
+    # nothing extracted: the error is raised
+    pipe = SchemaScrapingPipe(llmserve=FakeLLMService(failing="product"), chunk_tokens=40)  # type: ignore[arg-type]
+    with pytest.raises(RuntimeError, match="LLM call failed"):
+        _ = await pipe.forward_async(**kwargs)
+    with pytest.raises(RuntimeError, match="LLM call failed"):
+        _ = pipe.forward(**kwargs)
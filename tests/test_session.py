@@ -1,7 +1,14 @@
+from typing import Any
+
 import pytest
-from notte_browser.session import NotteSession
+from notte_browser.controller import ActionExecutionResult, BatchExecutionResult
+from notte_browser.errors import StaleSnapshotError
+from notte_browser.resolution import NodeResolutionPipe
+from notte_browser.session import NotteSession, NotteSessionConfig
 from notte_core.actions.base import Action
+from notte_core.browser.observation import Observation
 from notte_core.browser.snapshot import BrowserSnapshot
+from notte_core.controller.actions import BaseAction, CheckAction, FillAction
 
 from tests.mock.mock_browser import MockBrowserDriver
 from tests.mock.mock_service import MockLLMService
@@ -118,3 +125,79 @@ async def test_valid_observation_after_reset(mock_llm_service: MockLLMService) -
         # Verify the state was effectively reset
         assert page.snapshot.screenshot == obs.screenshot  # poor proxy but ok
         assert len(page.trajectory) == 1  # the trajectory should only contains a single obs (from reset)
+
+
+@pytest.mark.asyncio
+async def test_act_multiple_records_a_single_step(
+    mock_llm_service: MockLLMService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    window = MockBrowserDriver()
+    snapshot = await window.snapshot()
+    session = NotteSession(config=NotteSessionConfig().set_max_steps(1), window=window, llmserve=mock_llm_service)  # type: ignore[arg-type]
+    actions: list[BaseAction] = [
+        FillAction(id="I1", value="a"),
+        FillAction(id="I2", value="b"),
+        CheckAction(id="I3", value=True),
+    ]
+
+    async def resolve(action: BaseAction, snapshot: BrowserSnapshot | None, verbose: bool = False) -> BaseAction:
+        return action
+
+    async def execute_multiple(window: Any, actions: list[BaseAction]) -> BatchExecutionResult:
+        return BatchExecutionResult(
+            results=[ActionExecutionResult(action=action, success=True) for action in actions], snapshot=snapshot
+        )
+
+    async def observe(pagination: Any, retry: int) -> Observation:
+        return session.obs
+
+    monkeypatch.setattr(NodeResolutionPipe, "forward", resolve)
+    monkeypatch.setattr(session.controller, "execute_multiple", execute_multiple)
+    monkeypatch.setattr(session, "_observe", observe)
+    results, _ = await session.act_multiple(actions)
+
+    # a batch counts as one step towards `max_steps`
+    assert all(result.success for result in results)
+    assert len(session.trajectory) == 1
+    assert session.trajectory[0].action == actions[-1]
+    assert session.trajectory[0].batch == actions
+
+
+@pytest.mark.asyncio
+async def test_unchanged_page_check_keeps_deferred_fields_loadable(
+    mock_llm_service: MockLLMService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    window = MockBrowserDriver()
+    goto, snapshot = window.goto, window.snapshot
+    page_version = 0
+
+    def with_deferred_html(captured: BrowserSnapshot) -> BrowserSnapshot:
+        # mimics `BrowserWindow`: deferred fields expire with the next snapshot
+        nonlocal page_version
+        page_version += 1
+        version = page_version
+        deferred = BrowserSnapshot(metadata=captured.metadata, a11y_tree=captured.a11y_tree, dom_node=captured.dom_node)
+
+        async def load_html() -> str:
+            if version != page_version:
+                raise StaleSnapshotError("html_content", captured.metadata.url)
+            return "<html></html>"
+
+        deferred.defer("html_content", load_html)
+        return deferred
+
+    async def goto_deferred(url: str, wait_for: str = "networkidle") -> BrowserSnapshot:
+        return with_deferred_html(await goto(url, wait_for))
+
+    async def snapshot_deferred(screenshot: bool | None = None) -> BrowserSnapshot:
+        return with_deferred_html(await snapshot(screenshot))
+
+    monkeypatch.setattr(window, "goto", goto_deferred)
+    monkeypatch.setattr(window, "snapshot", snapshot_deferred)
+    config = NotteSessionConfig().set_nb_seconds_between_snapshots_check(0)
+    session = NotteSession(config=config, window=window, llmserve=mock_llm_service)  # type: ignore[arg-type]
+    _ = await session.observe("https://example.com")
+    # the page did not change: no retry, but the session moved to the check snapshot
+    assert page_version == 2
+    assert len(session.trajectory) == 1
+    assert (await session.snapshot.load("html_content")).html_content == "<html></html>"